@@ -0,0 +1,26 @@
+"""
+Micro-benchmarks for performance-sensitive parts of the project.
+Run them all with `make benchmark` or `python -m benchmarks` from the `src` directory,
+or pass the names of specific benchmark modules, e.g., `python -m benchmarks markdown_table`.
+Each benchmark module defines a `run(report: Callable[[str, float], None])` function.
+"""
+
+from __future__ import annotations
+import time
+from typing import Callable
+
+def time_it(fn: Callable[[], any], repeat: int = 5) -> float:
+    """
+    Call `fn` `repeat` times and return the best (minimum) elapsed time in seconds,
+    which is the least noisy estimate for short-running code.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def print_report(label: str, seconds: float):
+    """Print one benchmark result in a fixed-width format."""
+    print(f"    {label:50s}  {seconds*1000.0:10.3f} ms")
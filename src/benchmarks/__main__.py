@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+"""
+Run all the benchmarks or just the ones whose module names are given as arguments.
+"""
+
+import importlib, sys
+from benchmarks import print_report
+
+all_benchmarks = [
+    'compression',
+    'markdown_table',
+    'startup',
+    'task_result',
+    'tracing',
+]
+
+def main(names: list[str]):
+    for name in names if names else all_benchmarks:
+        if name not in all_benchmarks:
+            raise ValueError(f"Unknown benchmark {name}. Known benchmarks: {all_benchmarks}")
+        print(f"{name}:")
+        module = importlib.import_module(f"benchmarks.{name}")
+        module.run(print_report)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
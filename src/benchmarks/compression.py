@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Benchmark writing and reading compressed artifacts, a Markdown report and JSON Lines log
+records, with each `Compression`. The labels include the compressed size as a percentage
+of the original and the write throughput.
+"""
+
+import io, json, tempfile
+from pathlib import Path
+from typing import Callable
+from benchmarks import time_it
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.utils.compression import (
+    Compression, compressed_path, has_zstandard, open_binary, write_compressed)
+
+num_rows = 20_000
+num_records = 20_000
+
+def make_report() -> bytes:
+    records = [{'Item': f"item_{i}", 'Quarter': f"Q{i%4+1}", 'Revenue': i*1000.0, 'Margin': i/num_rows}
+        for i in range(num_rows)]
+    return str(MarkdownTable.from_records(records)).encode('utf-8')
+
+def make_log() -> bytes:
+    lines = [json.dumps({'level': 'INFO', 'timestamp': f"2026-01-01T00:{i//60%60:02d}:{i%60:02d}",
+        'namespace': 'mcp_agent.workflows.deep_orchestrator', 'message': f"Executing task {i%50}",
+        'data': {'iteration': i % 25, 'tokens': i * 7}}) for i in range(num_records)]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+def read(path: Path) -> bytes:
+    with open_binary(path) as stream:
+        return stream.read()
+
+def run(report: Callable[[str, float], None]):
+    compressions = [c for c in Compression if c != Compression.ZSTD or has_zstandard()]
+    if not has_zstandard():
+        print("    (zstd skipped: the 'zstandard' package isn't installed)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in [('report', make_report()), ('JSONL log', make_log())]:
+            print(f"    {name}, {len(data)/1_000_000:.1f} MB:")
+            for compression in compressions:
+                def write() -> io.BytesIO:
+                    stream = io.BytesIO()
+                    write_compressed(stream, data, compression)
+                    return stream
+                compressed = write().getvalue()
+                seconds = time_it(write)
+                throughput = len(data) / seconds / 1_000_000 if seconds > 0 else float('inf')
+                report(f"{compression.value:4s} write {name}: {len(compressed)/len(data):6.1%} size, {throughput:,.0f} MB/s",
+                    seconds)
+                path = compressed_path(Path(tmp) / f"{name}.txt", compression)
+                path.write_bytes(compressed)
+                report(f"{compression.value:4s} read {name}", time_it(lambda: read(path)))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Benchmark building and rendering a large `MarkdownTable`.
+"""
+
+from typing import Callable
+from benchmarks import time_it
+from dra.common.markdown.elements import MarkdownTable
+
+num_rows = 10_000
+columns = [('Name', 'left'), ('Quarter', 'center'), ('Revenue', 'right'), ('Margin', 'right')]
+names = [name for name, _ in columns]
+
+def make_rows() -> list[list[any]]:
+    return [[f"item_{i}", f"Q{i%4+1}", i*1000.0, i/num_rows] for i in range(num_rows)]
+
+def run(report: Callable[[str, float], None]):
+    rows = make_rows()
+    records = [dict(zip(names, row)) for row in rows]
+    data = dict((name, [row[i] for row in rows]) for i, name in enumerate(names))
+
+    def add_row_loop() -> MarkdownTable:
+        table = MarkdownTable('Benchmark', columns)
+        for record in records:
+            table.add_row(record)
+        return table
+
+    def add_rows() -> MarkdownTable:
+        table = MarkdownTable('Benchmark', columns)
+        table.add_rows(records)
+        return table
+
+    report(f"add_row() x {num_rows} dicts", time_it(add_row_loop))
+    report(f"add_rows() with {num_rows} dicts", time_it(add_rows))
+    report(f"from_records() with {num_rows} dicts", time_it(lambda: MarkdownTable.from_records(records)))
+    report(f"from_columns() with {num_rows} rows", time_it(lambda: MarkdownTable.from_columns(data, justifications=dict(columns))))
+
+    table = MarkdownTable.from_records(records, columns=columns)
+    report("str(table), first rendering", time_it(lambda: str(table.invalidate() or table)))
+    report("str(table), cached rendering", time_it(lambda: str(table)))
+    aligned = MarkdownTable.from_columns(data, justifications=dict(columns), aligned=True)
+    report("str(table), aligned, first rendering", time_it(lambda: str(aligned.invalidate() or aligned)))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Benchmark the cold startup of the apps for `--help`, each in a new interpreter, against
+`target_secs`. Argument errors are reported after the same imports, so they are as fast.
+The modules that are slow to import, e.g., `mcp_agent`, the provider SDKs, and Rich, are
+only imported when a run starts. The benchmark also lists any of them that were imported.
+"""
+
+import subprocess, sys
+from pathlib import Path
+from typing import Callable
+from benchmarks import time_it
+
+# The cold `--help` startup should take less than this, in seconds.
+target_secs = 0.5
+
+# Packages that `--help` shouldn't import.
+slow_packages = ['mcp_agent', 'openai', 'anthropic', 'ollama', 'rich', 'sklearn']
+
+src_dir = Path(__file__).parent.parent
+
+def python(*args: str) -> str:
+    return subprocess.run([sys.executable, *args], cwd=src_dir, check=True,
+        capture_output=True, text=True).stdout
+
+def imported_slow_packages(app: str) -> list[str]:
+    code = (f"import sys; sys.argv = ['{app}', '--help']\n"
+        f"try:\n    import runpy; runpy.run_module('dra.apps.{app}.main', run_name='__main__')\n"
+        f"except SystemExit:\n    pass\n"
+        f"print(' '.join(p for p in {slow_packages!r} if p in sys.modules), file=sys.stderr)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=src_dir, check=True,
+        capture_output=True, text=True)
+    return result.stderr.split()
+
+def run(report: Callable[[str, float], None]):
+    report("interpreter startup (python -c pass)", time_it(lambda: python('-c', 'pass')))
+    for app in ['finance', 'medical']:
+        secs = time_it(lambda: python('-m', f'dra.apps.{app}.main', '--help'))
+        report(f"{app} --help (target {target_secs*1000:.0f} ms)", secs)
+        if secs > target_secs:
+            print(f"    WARNING: {app} --help is slower than the target.")
+        slow = imported_slow_packages(app)
+        if slow:
+            print(f"    WARNING: {app} --help imported {slow}.")
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+"""
+Benchmark the truncated string views of a large `TaskResult`.
+"""
+
+from typing import Callable
+from benchmarks import time_it
+from dra.common.tasks import TaskResult
+from dra.common.utils.strings import truncate
+
+num_messages = 20
+message_size = 100_000
+
+def run(report: Callable[[str, float], None]):
+    messages = [f"message {i}: " + 'x'*message_size for i in range(num_messages)]
+
+    report(f"truncate(str(list), 2000), {num_messages} x {message_size:,} chars",
+        time_it(lambda: truncate(str(messages), 2000, '...')))
+    report("TaskResult(...).truncated(2000), first call",
+        time_it(lambda: TaskResult(messages).truncated(2000, '...')))
+    result = TaskResult(messages)
+    result.truncated(2000, '...')
+    report("TaskResult.truncated(2000), cached",
+        time_it(lambda: result.truncated(2000, '...')))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+"""
+Benchmark the cost of the span instrumentation, when tracing is off, which is the default,
+and when it is on and the spans are exported to an OTLP-JSON file in the background.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import Callable
+from benchmarks import time_it
+from dra.common.tracing import configure_tracing, shutdown_tracing, span
+
+num_spans = 10_000
+
+def nested_spans():
+    for i in range(num_spans // 2):
+        with span('task', task='t', index=i):
+            with span('llm.generate', model='gpt-4o'):
+                pass
+
+def run(report: Callable[[str, float], None]):
+    shutdown_tracing()
+    report(f"{num_spans:,} spans, tracing off", time_it(nested_spans))
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_tracing(Path(tmp) / "traces.jsonl")
+        try:
+            report(f"{num_spans:,} spans, tracing on", time_it(nested_spans))
+        finally:
+            shutdown_tracing()
@@ -11,16 +11,23 @@ This example demonstrates the Deep Orchestrator (AdaptiveOrchestrator) for finan
 - Full state visibility throughout execution
 """
 
+# Allow the `TYPE_CHECKING`-only types in annotations.
+from __future__ import annotations
+
 import asyncio, sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+from dra.common.financial_spreadsheet import write_financials_spreadsheet
 from dra.common.observer import Observer
-from dra.common.tasks import BaseTask, GenerateTask, AgentTask
-from dra.common.utils.io import UserPrompts
+from dra.common.tasks import BaseTask, GenerateTask, LocalAgentTask
 from dra.common.utils.main import ParserUtil, Runner
 from dra.common.utils.paths import resolve_path, resolve_and_require_path
 from dra.common.variables import Variable
 from dra.ux.display import Display
 
+if TYPE_CHECKING:  # Imports Rich, which `--help` doesn't need.
+    from dra.common.utils.io import UserPrompts
+
 def get_server_list() -> list[str]:
     """Define the list of tools and services to use for this app."""
     return [
@@ -28,6 +35,7 @@ def get_server_list() -> list[str]:
         "fetch",
         "filesystem",
         "financial-datasets",
+        "financial-metrics",
         "yfmcp",
     ]
 
@@ -73,6 +81,7 @@ def define_cli_arguments() -> ParserUtil:
     def_excel_writer_agent_prompt_file = "excel_writer_agent.md"
     def_excel_spreadsheet_path = 'financials.xlsx'
     def_excel_writer_model = 'o4-mini'
+    def_financial_data_store = 'financial_data.sqlite'
     
     which_app='finance'
     app_name = "financial_deep_research"
@@ -96,8 +105,10 @@ def define_cli_arguments() -> ParserUtil:
         help=f"The currency used by the company for financial reporting. (Default: {def_reporting_currency})"
     )    
     parser_util.add_arg_markdown_report_path()
+    parser_util.add_arg_extra_report_formats()
     parser_util.add_arg_markdown_research_report_title()
     parser_util.add_arg_output_dir()
+    parser_util.add_arg_cache_dir()
     parser_util.parser.add_argument(
         "--output-spreadsheet",
         default=def_excel_spreadsheet_path,
@@ -128,6 +139,22 @@ def define_cli_arguments() -> ParserUtil:
     parser_util.add_arg_max_tokens()
     parser_util.add_arg_max_cost_dollars()
     parser_util.add_arg_max_time_minutes()
+    parser_util.add_arg_knowledge_store()
+    parser_util.parser.add_argument(
+        "--financial-data-store",
+        default=def_financial_data_store,
+        help=f"Path to a SQLite database of the financial statements returned by the MCP servers, keyed by ticker, period, and line item. Statements are read from it instead of calling the tools again, until the company can have filed newer ones. Pass '' to disable. (Default: {def_financial_data_store}) {parser_util.written_relative_to('cache-dir')}"
+    )
+    parser_util.add_arg_memory_compaction_tokens()
+    parser_util.add_arg_usage_ledger()
+    parser_util.add_arg_execution_profile()
+    parser_util.add_arg_record_llm_fixtures()
+    parser_util.add_arg_trace_file()
+    parser_util.add_arg_metrics_port()
+    parser_util.add_arg_profile()
+    parser_util.add_arg_mcp_startup_timeout_secs()
+    parser_util.add_arg_mcp_servers_dir()
+    parser_util.add_arg_artifact_compression()
     parser_util.add_arg_short_run()
     parser_util.add_arg_verbose()
     
@@ -173,8 +200,16 @@ def process_cli_arguments(parser_util: ParserUtil):
     excel_writer_agent_prompt_path = resolve_and_require_path(
         parser_util.args.excel_writer_agent_prompt_path, templates_dir_path)
 
+    # Like the knowledge store, the financial data store is kept in the cache directory by default,
+    # which isn't moved aside between runs, so later runs reuse the stored statements.
+    financial_data_store_path = None
+    if parser_util.args.financial_data_store:
+        financial_data_store_path = resolve_path(parser_util.args.financial_data_store,
+            parser_util.processed_args['cache_dir_path'])
+
     parser_util.processed_args.update({
         'output_spreadsheet_path':        output_spreadsheet_path, 
+        'financial_data_store_path':      financial_data_store_path,
         'financial_research_prompt_path': financial_research_prompt_path,
         'excel_writer_agent_prompt_path': excel_writer_agent_prompt_path,
     })
@@ -207,8 +242,10 @@ def create_variables(parser_util: ParserUtil) -> dict[str, Variable]:
     
     # Finish with the remaining custom variables for this app and "verbose" variables:
     variables_list.extend([
+        Variable("knowledge_entity",               parser_util.processed_args["ticker"].strip().upper(), kind=None),
         Variable("excel_writer_model",             parser_util.args.excel_writer_model, kind='code'),
         Variable("output_spreadsheet_path",        parser_util.processed_args["output_spreadsheet_path"], kind='file'),
+        Variable("financial_data_store_path",      parser_util.processed_args["financial_data_store_path"], kind='file'),
         Variable("financial_research_prompt_path", parser_util.processed_args["financial_research_prompt_path"], kind='file'),
         Variable("excel_writer_agent_prompt_path", parser_util.processed_args["excel_writer_agent_prompt_path"], kind='file'),
     ])
@@ -223,8 +260,9 @@ def make_tasks(parser_util: ParserUtil, variables: dict[str, Variable]) -> list[
     and MCP services (discussed below) to do the basic research, aggregate the results 
     and generate a report at the end.
     Additional `AgentTask`s and `GenerateTask`s might be used for additional processing.
-    In the finance app, an `AgentTask` is used to generate an Excel spreadsheet with the 
-    results.
+    In the finance app, a `LocalAgentTask` is used to generate an Excel spreadsheet with the 
+    results. It writes the spreadsheet directly from the JSON returned by the research task
+    and only falls back to its agent if there is no JSON with financial data.
 
     Args:
         parser_util (ParserUtil):         A utility that handles CLI arguments and common processing steps for them.
@@ -234,21 +272,27 @@ def make_tasks(parser_util: ParserUtil, variables: dict[str, Variable]) -> list[
         list[BaseTask]:                   A list of the tasks to do.
     """
 
+    research_task = GenerateTask(
+        name="financial_research",
+        title="📊 Financial Research Result",
+        model_name=parser_util.args.research_model,
+        prompt_template_path=variables['financial_research_prompt_path'].value,
+        output_dir_path=variables['output_dir_path'].value,
+        properties=variables)
+
+    def write_spreadsheet() -> list[str] | None:
+        return write_financials_spreadsheet(research_task.replies, variables['output_spreadsheet_path'].value)
+
     tasks = [
-        GenerateTask(
-            name="financial_research",
-            title="📊 Financial Research Result",
-            model_name=parser_util.args.research_model,
-            prompt_template_path=variables['financial_research_prompt_path'].value,
-            output_dir_path=variables['output_dir_path'].value,
-            properties=variables),
-        AgentTask(
+        research_task,
+        LocalAgentTask(
             name="excel_writer",
             title="📈 Excel Creation Result",
             model_name=parser_util.args.excel_writer_model,
             prompt_template_path=variables['excel_writer_agent_prompt_path'].value,
             output_dir_path=variables['output_dir_path'].value,
             generate_prompt="Generate the Excel file with the provided financial data.",
+            run_locally=write_spreadsheet,
             properties=variables),
     ]
     return tasks
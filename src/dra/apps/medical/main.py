@@ -11,17 +11,23 @@ This example demonstrates the Deep Orchestrator (AdaptiveOrchestrator) for medic
 - Full state visibility throughout execution
 """
 
+# Allow the `TYPE_CHECKING`-only types in annotations.
+from __future__ import annotations
+
 import asyncio
 import re
 from pathlib import Path
+from typing import TYPE_CHECKING
 from dra.common.observer import Observer
 from dra.common.tasks import BaseTask, GenerateTask, AgentTask
-from dra.common.utils.io import UserPrompts
 from dra.common.utils.main import ParserUtil, Runner
 from dra.common.utils.paths import resolve_path, resolve_and_require_path
 from dra.common.variables import Variable
 from dra.ux.display import Display
 
+if TYPE_CHECKING:  # Imports Rich, which `--help` doesn't need.
+    from dra.common.utils.io import UserPrompts
+
 def get_server_list() -> list[str]:
     """Define the list of tools and services to use for this app."""
     return [
@@ -87,8 +93,10 @@ def define_cli_arguments() -> ParserUtil:
         help=f"Optional, comma-separated key terms or phrases. Spaces are allowed within them. Used in some queries to data sources (recommended)."
     )
     parser_util.add_arg_markdown_report_path()
+    parser_util.add_arg_extra_report_formats()
     parser_util.add_arg_markdown_research_report_title()
     parser_util.add_arg_output_dir()
+    parser_util.add_arg_cache_dir()
     parser_util.add_arg_templates_dir()
     parser_util.parser.add_argument(
         "--medical-research-prompt-path",
@@ -104,6 +112,17 @@ def define_cli_arguments() -> ParserUtil:
     parser_util.add_arg_max_tokens()
     parser_util.add_arg_max_cost_dollars()
     parser_util.add_arg_max_time_minutes()
+    parser_util.add_arg_knowledge_store()
+    parser_util.add_arg_memory_compaction_tokens()
+    parser_util.add_arg_usage_ledger()
+    parser_util.add_arg_execution_profile()
+    parser_util.add_arg_record_llm_fixtures()
+    parser_util.add_arg_trace_file()
+    parser_util.add_arg_metrics_port()
+    parser_util.add_arg_profile()
+    parser_util.add_arg_mcp_startup_timeout_secs()
+    parser_util.add_arg_mcp_servers_dir()
+    parser_util.add_arg_artifact_compression()
     parser_util.add_arg_short_run()
     parser_util.add_arg_verbose()
     
@@ -173,6 +192,7 @@ def create_variables(parser_util: ParserUtil) -> dict[str, Variable]:
     
     # Finish with the remaining custom variables for this app and "verbose" variables:
     variables_list.extend([
+        Variable("knowledge_entity",             parser_util.processed_args["query"].strip().lower(), kind=None),
         Variable("medical_research_prompt_path", parser_util.processed_args["medical_research_prompt_path"], kind='file'),
     ])
     variables_list.extend(parser_util.only_verbose_common_vars())
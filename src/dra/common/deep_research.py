@@ -20,12 +20,27 @@ from mcp_agent.workflows.deep_orchestrator.config import (
     DeepOrchestratorConfig,
     ExecutionConfig,
     BudgetConfig,
+    ContextConfig,
+    PolicyConfig,
+    CacheConfig,
 )
 from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
 from mcp_agent.workflows.llm.augmented_llm import RequestParams
 
+from dra.common.financial_store import FinancialDataStore, stored_statements
+from dra.common.knowledge import KnowledgeStore
+from dra.common.ledger import UsageLedger, current_task, recorded
+from dra.common.memory_compaction import MemoryCompactor
+from dra.common.profiles import ExecutionProfile
+from dra.common.rate_limiter import rate_limiters, rate_limited
+from dra.common.replay import recording
+from dra.common.server_installs import ServerInstalls
+from dra.common.server_startup import ServerStarter
 from dra.common.observer import Observer, Observers 
-from dra.common.tasks import BaseTask, GenerateTask, AgentTask, TaskStatus
+from dra.common.output_writer import output_writer
+from dra.common.tasks import BaseTask, GenerateTask, AgentTask, TaskResult, TaskStatus
+from dra.common.tracing import configure_tracing, flush_tracing, span, trace_steps, traced, tracing_enabled
+from dra.common.utils.compression import Compression, compressed_path
 from dra.common.utils.strings import replace_variables, truncate
 from dra.common.variables import Variable, VariableFormat
 from dra.ux.display import Display
@@ -77,13 +92,21 @@ class DeepResearch():
         self.orchestrator: DeepOrchestrator | None = None
         self.token_counter: TokenCounter | None = None
         self.logger: Logger | None = None
+        self.knowledge_store: KnowledgeStore | None = None
+        self.financial_data_store: FinancialDataStore | None = None
+        self.memory_compactor: MemoryCompactor | None = None
+        self.ledger: UsageLedger | None = None
+        self.server_starter: ServerStarter | None = None
+        # The number of observer updates and the duration of the last one, e.g., for the metrics.
+        self.observer_updates = 0
+        self.last_observer_update_secs = 0.0
 
     # A observer loop that will be executed in its own thread.
     async def update_loop(self, update_iteration_frequency_secs: float = 1.0):
         while True:
             try:
-                await self.observers.async_update()
-                self.observers.update()
+                self.__compact_memory()
+                await self.__update_observers()
                 await asyncio.sleep(update_iteration_frequency_secs)
             except Exception as e:
                 err_msg = f"WARNING: Error updating observers: {e}"
@@ -114,18 +137,39 @@ class DeepResearch():
             try:
                 error_msg = await self.run_tasks()
             finally:
+                self.save_knowledge()
                 # Final update...
                 other = {'messages': [], 'error_msg': error_msg}
-                await self.observers.async_update(is_final=True, other=other)
-                self.observers.update(is_final=True, other=other)
+                await self.__update_observers(other=other, is_final=True)
                 update_task.cancel()
                 try:
                     await update_task
                 except asyncio.CancelledError:
                     pass
+                # Make sure the prompts, results, reports, and traces are on disk before returning.
+                await output_writer().flush_async()
+                await asyncio.to_thread(flush_tracing)
+                if self.server_starter:
+                    await self.server_starter.stop()
+                # Writes that failed during the run were logged; fail the run for them, too.
+                await output_writer().flush_async(raise_errors=True)
 
         await self.display.run_live(do_work)
 
+    async def __update_observers(self, other: dict[str,any] = {}, is_final: bool = False):
+        """
+        Update the observers. The time taken is logged at the debug level, so
+        `dra.tools.log_latency` can report it.
+        """
+        start = time.perf_counter()
+        await self.observers.async_update(is_final=is_final, other=other)
+        self.observers.update(is_final=is_final, other=other)
+        self.last_observer_update_secs = time.perf_counter() - start
+        self.observer_updates += 1
+        if self.logger:
+            self.logger.debug("Updated observers",
+                data={'duration_secs': round(self.last_observer_update_secs, 6), 'is_final': is_final})
+
     async def __finish_init(self):
         """
         Finish initializing the object by creating the MCApp, Orchestrator, the display, etc..
@@ -140,29 +184,161 @@ class DeepResearch():
         self.logger = self.mcp_app.logger
 
         async with self.mcp_app.run() as app:
+            # If the config defines rate limits for the provider, every inference call
+            # made through the factory waits for the shared limiter first.
+            rate_limiters.configure(getattr(app.context.config, 'rate_limits', None))
+            llm_factory = self.llm_factory
+            fixtures_path = self.__get_var_value('llm_fixtures_path', None)
+            if fixtures_path:
+                self.logger.info(f"Recording LLM fixtures in {fixtures_path}")
+                llm_factory = recording(llm_factory, Path(fixtures_path))
+            ledger_path = self.__get_var_value('usage_ledger_path', None)
+            if ledger_path:
+                self.ledger = UsageLedger(Path(ledger_path), app=self.app_name,
+                    entity=self.__get_var_value('knowledge_entity', ''))
+                self.logger.info(f"Recording usage for run {self.ledger.run_id} in {ledger_path}")
+                # Inside the rate limiter, so the latency excludes the time waiting for it.
+                llm_factory = recorded(llm_factory, self.provider, self.ledger)
+            financial_data_path = self.__get_var_value('financial_data_store_path', None)
+            if financial_data_path:
+                self.financial_data_store = FinancialDataStore(Path(financial_data_path))
+                self.logger.info(f"Reading and saving financial statements in {financial_data_path}")
+                llm_factory = stored_statements(llm_factory, self.financial_data_store)
+            if rate_limiters.has_limits(self.provider):
+                llm_factory = rate_limited(llm_factory, self.provider)
+            trace_path = self.__get_var_value('trace_path', None)
+            if trace_path:
+                configure_tracing(Path(trace_path), service_name=self.app_name)
+                self.logger.info(f"Writing OTLP-JSON traces to {trace_path}")
+                # Outside the rate limiter, so the LLM call spans include the time waiting for it.
+                llm_factory = traced(llm_factory, self.provider)
+
             # Run the orchestrator
             # Create the Deep Orchestrator with configuration
             self.orchestrator = DeepOrchestrator(
-                llm_factory=self.llm_factory,
+                llm_factory=llm_factory,
                 config=self.config,
                 context=app.context,
             )
             # Store plan reference for display
             self.orchestrator.current_plan = None
+            if tracing_enabled():
+                trace_steps(self.orchestrator)
 
+            self.__use_installed_servers(app.context)
             # Configure filesystem server with current directory
             app.context.config.mcp.servers["filesystem"].args.extend([os.getcwd()])
+            self.__configure_metrics_server(app.context)
+            await self.__start_servers(app.context)
 
             # Due to an occasionally, apparent infinite loop bug when using ollama, we
             # don't invoke this code if serving that way.
             if (self.provider != "ollama"):
                 self.token_counter = app.context.token_counter
 
+            self.seed_knowledge()
+
+            compaction_tokens = self.__get_var_value('memory_compaction_tokens', 0)
+            if compaction_tokens and compaction_tokens > 0:
+                self.memory_compactor = MemoryCompactor(threshold_tokens=compaction_tokens)
+
             # Now let the observers know
             self.observers.update(self)
 
             self.logger.debug("Finished DeepResearch initialization")
 
+    def __use_installed_servers(self, context: any):
+        """
+        If the MCP servers were installed with `python -m dra.tools.mcp_servers install`, run
+        the installed executables instead of launching the servers with `uvx` or `npx`.
+        """
+        servers_dir = self.__get_var_value('mcp_servers_dir_path', None)
+        if not servers_dir or not (Path(servers_dir) / ServerInstalls.manifest_name).exists():
+            return
+        for server in ServerInstalls(Path(servers_dir)).rewrite(context.config.mcp.servers):
+            self.logger.info(f"Using installed MCP server {server.name}: {server.package} {server.version}",
+                data={'server_name': server.name, 'command': server.command})
+
+    def __configure_metrics_server(self, context: any):
+        """
+        If the config defines the `financial-metrics` server, run it with this interpreter and
+        package on the financial data store, or don't use it if there is no store.
+        """
+        settings = context.config.mcp.servers.get("financial-metrics")
+        if not settings:
+            return
+        if self.financial_data_store:
+            settings.command = sys.executable
+            settings.args = list(settings.args or []) + ['--store', str(self.financial_data_store.path)]
+            settings.env = dict(settings.env or {}, PYTHONPATH=str(Path(__file__).resolve().parents[2]))
+        elif "financial-metrics" in (self.config.available_servers or []):
+            self.config.available_servers.remove("financial-metrics")
+
+    async def __start_servers(self, context: any):
+        """
+        Unless the startup timeout is 0, start all the MCP servers now, in parallel, and log
+        how long each took. If any of them fails to start, the run fails with a `ValueError`.
+        """
+        timeout_secs = self.__get_var_value('mcp_startup_timeout_secs', ServerStarter.def_timeout_secs)
+        if not timeout_secs or timeout_secs <= 0:
+            return
+        self.server_starter = ServerStarter(context, self.config.available_servers, timeout_secs=timeout_secs)
+        with span('DeepResearch.start_servers', **{'dra.servers': len(self.server_starter.server_names)}):
+            startups = await self.server_starter.start()
+        for startup in startups:
+            self.logger.info("Started MCP server", data={'server_name': startup.name,
+                'status': startup.status.value, 'duration_secs': round(startup.secs, 6), 'error': startup.error})
+        self.logger.info(f"Started {len(startups)} MCP servers in {self.server_starter.wall_secs:.3f} seconds")
+        if self.server_starter.failed:
+            message = self.server_starter.failure_message()
+            await self.server_starter.stop()
+            self.logger.error(message)
+            raise ValueError(message)
+
+    def seed_knowledge(self):
+        """
+        If a knowledge store and an entity, e.g., a ticker, are defined, open the store and 
+        add the fresh, high-confidence knowledge saved by previous runs for the entity to the 
+        orchestrator's memory, before it plans.
+        """
+        store_path = self.__get_var_value('knowledge_store_path', None)
+        entity = self.__get_var_value('knowledge_entity', None)
+        if not store_path or not entity:
+            return
+        self.knowledge_store = KnowledgeStore(Path(store_path),
+            max_age_days=self.__get_var_value('knowledge_max_age_days', KnowledgeStore.def_max_age_days))
+        count = self.knowledge_store.seed(entity, self.orchestrator.memory)
+        self.logger.info(f"Seeded {count} knowledge items for {entity} from {store_path}")
+
+    def save_knowledge(self):
+        """
+        Save the knowledge accumulated during this run, if a knowledge store is open. If the
+        memory was compacted, the items are saved as they were before they were summarized
+        or dropped, so the store doesn't erode from run to run.
+        """
+        if not self.knowledge_store:
+            return
+        entity = self.__get_var_value('knowledge_entity')
+        knowledge = self.orchestrator.memory.knowledge
+        if self.memory_compactor:
+            knowledge = self.memory_compactor.full_knowledge(knowledge)
+        try:
+            count = self.knowledge_store.save(entity, knowledge)
+            self.logger.info(f"Saved {count} knowledge items for {entity} to {self.knowledge_store.path}")
+        except Exception as e:
+            self.logger.warning(f"WARNING: Failed to save knowledge items for {entity}: {e}")
+
+    def __compact_memory(self):
+        """
+        Compact the orchestrator's memory if a compactor is defined and the memory has grown
+        past its threshold. This runs in the observer loop, between the orchestrator's awaits.
+        """
+        if not self.memory_compactor:
+            return
+        stats = self.memory_compactor.maybe_compact(self.orchestrator.memory)
+        if stats:
+            self.logger.info(f"Compacted memory: {stats}")
+
     def add_observers(self, observers: dict[str, Observer]) -> dict[str, Observer]:
         """
         Add more observers and return the new dict of them. It is an error for a new
@@ -183,28 +359,43 @@ class DeepResearch():
         tasks are passed as part of the next task's prompt via the
         `prompt_variables` passed to `Task.run()`.
         """
-        previous_tasks_results = ''
-        prompt_variables = dict([(v.key, v.value) for v in self.variables.values()])
-        prompt_variables['previous_tasks_results'] = previous_tasks_results
-        for task in self.tasks:
-            status, result = await task.run(self.orchestrator, self.logger, **prompt_variables)            
-            previous_tasks_results = f"{previous_tasks_results}\ntask {task.name} result:\n{result}\n"
+        with span('DeepResearch.run_tasks', **{'dra.app': self.app_name, 'gen_ai.system': self.provider,
+            'dra.tasks': len(self.tasks)}):
+            previous_tasks_results = ''
+            prompt_variables = dict([(v.key, v.value) for v in self.variables.values()])
             prompt_variables['previous_tasks_results'] = previous_tasks_results
-            self.__save_task_raw_result(task.name, result)
-            if not status == TaskStatus.FINISHED_OK:
-                error_msg = f"Task sequence aborted due to failure of task {task.name}."
-                self.logger.error(error_msg)
-                return error_msg
+            for task in self.tasks:
+                status, result = await self.__run_task(task, prompt_variables)
+                previous_tasks_results = f"{previous_tasks_results}\ntask {task.name} result:\n{result}\n"
+                prompt_variables['previous_tasks_results'] = previous_tasks_results
+                await self.__save_task_raw_result(task.name, result)
+                if not status == TaskStatus.FINISHED_OK:
+                    error_msg = f"Task sequence aborted due to failure of task {task.name}."
+                    self.logger.error(error_msg)
+                    return error_msg
 
-        return ''
+            return ''
         
-    def __save_task_raw_result(self, name: str, result: list[any]):
-        result_file = self.output_dir_path / f"{name}_result.txt"
+    async def __run_task(self, task: BaseTask, prompt_variables: dict[str,any]) -> (TaskStatus, TaskResult):
+        """Run one task, recording its totals in the usage ledger, if there is one."""
+        if not self.ledger:
+            return await task.run(self.orchestrator, self.logger, **prompt_variables)
+        token = current_task.set(task.name)
+        start = time.perf_counter()
+        try:
+            return await task.run(self.orchestrator, self.logger, **prompt_variables)
+        finally:
+            current_task.reset(token)
+            # Hashing the template and writing the row are done off the event loop.
+            await asyncio.to_thread(self.ledger.record_task, task.name, task.prompt_template_path, self.provider,
+                task.model_name, time.perf_counter() - start, task.status.name)
+
+    async def __save_task_raw_result(self, name: str, result: TaskResult):
+        result_file = compressed_path(self.output_dir_path / f"{name}_result.txt",
+            self.__get_var_value('artifact_compression', Compression.NONE))
         self.logger.info(f"Writing 'raw' returned result for task {name} to: {result_file}")
-        with open(result_file, "w") as file:
-            for res in result:
-                file.write(str(res))
-                file.write('\n\n')
+        # The messages are streamed into the file by the writer's thread.
+        await output_writer().write_async(result_file, result.write_to)
     
     def __print_details(self):
         message_fmt = "    {0:40s}  {1}"
@@ -234,12 +425,16 @@ class DeepResearch():
         short_run: bool,
         name: str,
         available_servers: list[str],
-        variables: dict[str, Variable]) -> DeepOrchestratorConfig:
+        variables: dict[str, Variable],
+        profile: ExecutionProfile | None = None) -> DeepOrchestratorConfig:
         """
         Create configuration for the Deep Orchestrator.
+        The values are taken from `variables`, if defined, then from the execution
+        `profile`, if any, then from the hard-coded defaults here. The `context`, `policy`,
+        and `cache` settings only come from the profile. A short run ignores the profile.
         TODO: Make all this user configurable. Not all the queries to `variables`
-        are currently defined by the calling module! Hence, the hard-coded defaults
-        here are used.
+        are currently defined by the calling module! Hence, the profile values or
+        the hard-coded defaults here are used.
         """
         if short_run:
             # don't use the values passed in through variables.
@@ -255,27 +450,34 @@ class DeepResearch():
                 max_cost=0.10,
                 max_time_minutes=1,
             )
+            profile = None
         else:
-            def get_val(key: str, default: any) -> any:
-                return Variable.get(variables.get(key), default)
+            execution = profile.section('execution') if profile else {}
+            budget = profile.section('budget') if profile else {}
+            def get_val(key: str, default: any, profile_values: dict[str,any], profile_key: str = None) -> any:
+                return Variable.get(variables.get(key), profile_values.get(profile_key or key, default))
 
             execution_config=ExecutionConfig(
-                max_iterations=get_val('max_iterations', 25),
-                max_replans=get_val('max_replans', 2),
-                max_task_retries=get_val('max_task_retries', 5),
-                enable_parallel=get_val('enable_parallel', True),
-                enable_filesystem=get_val('enable_filesystem', True),
+                max_iterations=get_val('max_iterations', 25, execution),
+                max_replans=get_val('max_replans', 2, execution),
+                max_task_retries=get_val('max_task_retries', 5, execution),
+                enable_parallel=get_val('enable_parallel', True, execution),
+                enable_filesystem=get_val('enable_filesystem', True, execution),
             )
             budget_config=BudgetConfig(
-                max_tokens=get_val('max_tokens', 100000),
-                max_cost=get_val('max_cost_dollars', 1.00),
-                max_time_minutes=get_val('max_time_minutes', 10),
+                max_tokens=get_val('max_tokens', 100000, budget),
+                max_cost=get_val('max_cost_dollars', 1.00, budget, 'max_cost'),
+                max_time_minutes=get_val('max_time_minutes', 10, budget),
+                **{k: v for k, v in budget.items() if k not in ['max_tokens', 'max_cost', 'max_time_minutes']},
             )
         config = DeepOrchestratorConfig(
             name=name,
             available_servers=available_servers,
             execution=execution_config,
             budget=budget_config,
+            context=ContextConfig(**(profile.section('context') if profile else {})),
+            policy=PolicyConfig(**(profile.section('policy') if profile else {})),
+            cache=CacheConfig(**(profile.section('cache') if profile else {})),
         )
         return config
 
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+Compute the standard derived metrics of financial statements, e.g., gross profit, margins,
+growth rates, the effective tax rate, free cash flow, and a trend projection of the next
+period, for many tickers and periods at once with NumPy, so the LLM doesn't have to do the
+arithmetic.
+
+A `StatementPanel` holds the line items of the statements in a `FinancialDataStore` as a
+3-D array indexed by ticker, period, and line item, with `NaN` for the values that aren't
+reported. The periods of each ticker are aligned on its most recent period, so the last
+period is fiscal year N-1 for every ticker, even if their fiscal years end in different
+months. `compute_metrics()` derives each metric for all the tickers and periods with one
+array expression. The growth rates and the projection are per period, so for quarterly
+statements the projection is of the next quarter, labeled as such, and the annualized
+growth rate is added.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from dra.common.financial_store import FinancialDataStore, StatementKind, period_months
+from dra.common.markdown.elements import MarkdownTable
+
+# The line items used, each with the names the statement tools may report it under.
+line_items: dict[str, tuple[StatementKind, list[str]]] = {
+    'revenue':             (StatementKind.INCOME, ['revenue', 'total_revenue']),
+    'cost_of_revenue':     (StatementKind.INCOME, ['cost_of_revenue']),
+    'gross_profit':        (StatementKind.INCOME, ['gross_profit']),
+    'r_and_d':             (StatementKind.INCOME, ['research_and_development']),
+    'sg_and_a':            (StatementKind.INCOME, ['selling_general_and_administrative_expenses']),
+    'operating_income':    (StatementKind.INCOME, ['operating_income']),
+    'pretax_income':       (StatementKind.INCOME, ['income_before_tax', 'pretax_income', 'ebt']),
+    'income_tax_expense':  (StatementKind.INCOME, ['income_tax_expense']),
+    'net_income':          (StatementKind.INCOME, ['net_income']),
+    'operating_cash_flow': (StatementKind.CASH_FLOW, ['net_cash_flow_from_operations', 'operating_cash_flow']),
+    'capex':               (StatementKind.CASH_FLOW, ['capital_expenditure']),
+}
+
+# The metrics in currency units, which are scaled, e.g., to millions, when reported.
+amount_metrics = {'revenue', 'gross_profit', 'operating_income', 'pretax_income', 'net_income',
+    'operating_cash_flow', 'capex', 'free_cash_flow'}
+
+# For each period type, the key and column title of the projection of the next period.
+projection_labels: dict[str, tuple[str, str]] = {
+    'annual':    ('projection_next_fiscal_year', 'next FY (trend)'),
+    'quarterly': ('projection_next_quarter', 'next quarter (trend)'),
+    'ttm':       ('projection_next_quarter_ttm', 'next quarter TTM (trend)'),
+}
+
+class StatementPanel():
+    """The line items of `tickers` for their last `len(period_labels[0])` periods, as an array."""
+
+    def __init__(self, tickers: list[str], period_labels: list[list[str | None]], values: np.ndarray,
+        period_type: str = 'annual'):
+        """
+        Args:
+            tickers (list[str]):              The tickers, the first axis of `values`.
+            period_labels (list[list[str]]):  For each ticker, the end date of each period, oldest first, or `None` if missing.
+            values (np.ndarray):              The values, indexed by ticker, period, and the index of the item in `line_items`.
+            period_type (str):                The period type of the statements, one of the keys of `projection_labels`.
+        """
+        if period_type not in projection_labels:
+            raise ValueError(f"Unknown period type {period_type}. Use one of {list(projection_labels)}.")
+        self.tickers = tickers
+        self.period_labels = period_labels
+        self.values = values
+        self.period_type = period_type
+
+    @property
+    def periods_per_year(self) -> int:
+        return 12 // period_months[self.period_type]
+
+    def item(self, name: str) -> np.ndarray:
+        """The values of one line item, indexed by ticker and period."""
+        return self.values[:, :, list(line_items).index(name)]
+
+    @staticmethod
+    def from_store(store: FinancialDataStore, tickers: list[str], period_type: str = 'annual', periods: int = 4) -> StatementPanel:
+        """The most recent `periods` periods of each ticker's stored statements."""
+        if period_type not in projection_labels:
+            raise ValueError(f"Unknown period type {period_type}. Use one of {list(projection_labels)}.")
+        tickers = [t.upper() for t in tickers]
+        values = np.full((len(tickers), periods, len(line_items)), np.nan)
+        period_labels: list[list[str | None]] = []
+        for t, ticker in enumerate(tickers):
+            records = dict((kind, dict((r['report_period'], r) for r in store.load(ticker, kind, period_type)))
+                for kind in [StatementKind.INCOME, StatementKind.CASH_FLOW])
+            ends = sorted(records[StatementKind.INCOME])[-periods:]
+            labels = [None] * (periods - len(ends)) + ends
+            period_labels.append(labels)
+            for p, end in enumerate(labels):
+                if end is None:
+                    continue
+                for i, (kind, names) in enumerate(line_items.values()):
+                    record = records[kind].get(end, {})
+                    values[t, p, i] = next((record[n] for n in names if record.get(n) is not None), np.nan)
+        return StatementPanel(tickers, period_labels, values, period_type)
+
+    def __repr__(self) -> str:
+        return f"StatementPanel(tickers = {self.tickers}, period_type = {self.period_type}, periods = {self.values.shape[1]})"
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """`numerator / denominator`, or `NaN` where the denominator is zero or missing."""
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=np.isfinite(denominator) & (denominator != 0))
+    return out
+
+def growth(values: np.ndarray) -> np.ndarray:
+    """The growth from each period to the next, along the last axis. `NaN` from a base that isn't positive."""
+    out = np.full(values.shape, np.nan)
+    previous, current = values[..., :-1], values[..., 1:]
+    np.divide(current - previous, previous, out=out[..., 1:], where=np.isfinite(previous) & (previous > 0))
+    return out
+
+def cagr(values: np.ndarray) -> np.ndarray:
+    """
+    The compound growth rate per period of each row, from its first reported value to its
+    last, e.g., the CAGR for annual values.
+    """
+    reported = np.isfinite(values)
+    first_index = np.argmax(reported, axis=-1)
+    first = np.take_along_axis(values, first_index[..., None], axis=-1)[..., 0]
+    last = values[..., -1]
+    years = values.shape[-1] - 1 - first_index
+    valid = reported.any(axis=-1) & (years > 0) & (first > 0) & (last > 0)
+    out = np.full(last.shape, np.nan)
+    np.power(ratio(last, first), 1.0 / np.maximum(years, 1), out=out, where=valid)
+    return np.where(valid, out - 1.0, np.nan)
+
+class FinancialMetrics():
+    """
+    The derived metrics of a `StatementPanel`, each indexed by ticker and period, and the
+    projections of the next period, e.g., the next fiscal year for annual statements, each
+    indexed by ticker.
+    """
+
+    def __init__(self, panel: StatementPanel, metrics: dict[str, np.ndarray], projections: dict[str, np.ndarray]):
+        self.panel = panel
+        self.metrics = metrics
+        self.projections = projections
+
+    def to_dict(self, scale: float = 1.0, digits: int = 2) -> dict[str, any]:
+        """
+        The metrics of each ticker, keyed by the periods' end dates. Amounts are divided by
+        `scale`, e.g., `1e6` for millions, and rates are in percent. Missing values are `None`.
+        """
+        def value(name: str, v: float) -> float | None:
+            if not math.isfinite(v):
+                return None
+            return round(v / scale if name in amount_metrics else v * 100.0, digits)
+
+        projection_key = projection_labels[self.panel.period_type][0]
+        result = {}
+        for t, ticker in enumerate(self.panel.tickers):
+            labels = self.panel.period_labels[t]
+            result[ticker] = {
+                'periods': [l for l in labels if l],
+                'metrics': dict((self.metric_name(name), dict((label, value(name, float(values[t, p])))
+                    for p, label in enumerate(labels) if label)) for name, values in self.metrics.items()),
+                projection_key: dict((self.metric_name(name), value(name, float(values[t])))
+                    for name, values in self.projections.items()),
+            }
+        return result
+
+    @staticmethod
+    def metric_name(name: str) -> str:
+        return name if name in amount_metrics else f"{name}_percent"
+
+    def table(self, ticker: str, scale: float = 1.0) -> MarkdownTable:
+        """The metrics of `ticker` as a table, with a column for each period and one for the projection."""
+        t = self.panel.tickers.index(ticker.upper())
+        labels = [l for l in self.panel.period_labels[t] if l]
+        projection_key, projection_title = projection_labels[self.panel.period_type]
+        table = MarkdownTable(title=f"{ticker.upper()} derived metrics",
+            columns=[('metric', 'left')] + [(l, 'right') for l in labels] + [(projection_title, 'right')],
+            aligned=True)
+        metrics = self.to_dict(scale)[ticker.upper()]
+        for name, values in metrics['metrics'].items():
+            projected = metrics[projection_key].get(name)
+            table.add_row([name] + [format_value(values.get(l)) for l in labels] + [format_value(projected)])
+        return table
+
+    def __repr__(self) -> str:
+        return f"FinancialMetrics(tickers = {self.panel.tickers}, metrics = {list(self.metrics)})"
+
+def format_value(value: float | None) -> str:
+    return '-' if value is None else f"{value:,.2f}"
+
+def compute_metrics(panel: StatementPanel) -> FinancialMetrics:
+    """
+    Derive the metrics of all the tickers and periods in `panel`. Values that are reported,
+    e.g., gross profit, are used as is, and computed from their components otherwise, using
+    the same rules as the research prompt, e.g., Gross Profit = Revenue - Cost of Revenue.
+    """
+    revenue = panel.item('revenue')
+    gross_profit = np.where(np.isfinite(panel.item('gross_profit')), panel.item('gross_profit'),
+        revenue - panel.item('cost_of_revenue'))
+    operating_income = panel.item('operating_income')
+    tax = panel.item('income_tax_expense')
+    net_income = panel.item('net_income')
+    pretax_income = np.where(np.isfinite(panel.item('pretax_income')), panel.item('pretax_income'), net_income + tax)
+    capex = np.abs(panel.item('capex'))  # Reported as a negative cash flow by some sources.
+    free_cash_flow = panel.item('operating_cash_flow') - capex
+
+    metrics = {
+        'revenue': revenue,
+        'revenue_growth': growth(revenue),
+        'gross_profit': gross_profit,
+        'gross_margin': ratio(gross_profit, revenue),
+        'operating_income': operating_income,
+        'operating_margin': ratio(operating_income, revenue),
+        'operating_income_growth': growth(operating_income),
+        'pretax_income': pretax_income,
+        'effective_tax_rate': ratio(tax, pretax_income),
+        'net_income': net_income,
+        'net_margin': ratio(net_income, revenue),
+        'net_income_growth': growth(net_income),
+        'r_and_d_to_revenue': ratio(panel.item('r_and_d'), revenue),
+        'sg_and_a_to_revenue': ratio(panel.item('sg_and_a'), revenue),
+        'operating_cash_flow': panel.item('operating_cash_flow'),
+        'capex': capex,
+        'free_cash_flow': free_cash_flow,
+        'free_cash_flow_margin': ratio(free_cash_flow, revenue),
+    }
+    # The next period, growing revenue at its historical compound rate per period with the
+    # last period's margins.
+    revenue_cagr = cagr(revenue)
+    projected_revenue = revenue[:, -1] * (1.0 + revenue_cagr)
+    projections = {
+        'revenue': projected_revenue,
+        'revenue_growth': revenue_cagr,
+        'operating_income': projected_revenue * metrics['operating_margin'][:, -1],
+        'operating_margin': metrics['operating_margin'][:, -1],
+        'net_income': projected_revenue * metrics['net_margin'][:, -1],
+        'net_margin': metrics['net_margin'][:, -1],
+    }
+    if panel.periods_per_year > 1:
+        projections['revenue_growth_annualized'] = np.power(1.0 + revenue_cagr, panel.periods_per_year) - 1.0
+    return FinancialMetrics(panel, metrics, projections)
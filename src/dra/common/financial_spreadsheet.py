@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+"""
+Write the finance app's Excel workbook directly from the JSON object that the financial
+research task returns, i.e., the "Output Format" of `financial_research_agent.md`, using
+the table layout of `excel_writer_agent.md`. The whole sheet is built in memory and saved
+once with openpyxl, so no model has to fill in the cells one tool call at a time.
+
+`research_data()` finds the JSON object in the research task's replies. If there isn't
+one, or it has no financials, `write_financials_spreadsheet()` returns `None` and the
+`excel_writer` agent writes the workbook instead.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import re
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+from dra.common.messages import ReplyMessage
+from dra.common.utils.fast_json import loads_reply
+
+class RowKind(Enum):
+    """A section heading, e.g., Cost of Revenue, with no values."""
+    HEADING = 'heading'
+    """A component of a section, e.g., a revenue stream, shown with a "• " prefix."""
+    ITEM = 'item'
+    """A total or derived amount, e.g., Gross Profit, shown in bold."""
+    TOTAL = 'total'
+    """A rate, e.g., a margin, stored as a fraction and shown as a percentage."""
+    PERCENT = 'percent'
+
+class Row():
+    """One row of the sheet, with the value of each period."""
+
+    def __init__(self, label: str, kind: RowKind, values: dict[str, float | None] = {}):
+        self.label = label
+        self.kind = kind
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f"Row(label = {self.label}, kind = {self.kind.value}, values = {self.values})"
+
+# The sheet written, and the labels of the line items in the research JSON, with a
+# title-cased label for the keys that aren't listed.
+sheet_name = 'Financials'
+item_labels = {
+    'ads': 'Advertising',
+    'subscriptions': 'Subscriptions',
+    'hardware': 'Hardware',
+    'payments_other': 'Payments & Other',
+    'infrastructure_da': 'Infrastructure & Depreciation',
+    'content_partner_costs': 'Content/Partner Payments',
+    'payments_processing_other': 'Payments Processing & Other',
+    'r_and_d': 'R&D',
+    'sales_marketing': 'Sales & Marketing',
+    'g_and_a': 'General & Admin',
+}
+
+# The number formats: thousands separators with negative amounts in parentheses, and
+# percentages with one decimal.
+amount_format = '#,##0;(#,##0)'
+percent_format = '0.0%'
+
+json_block_pattern = re.compile(r"```(?:json)?\s*\n(.*?)\n\s*```", re.DOTALL)
+
+def item_label(key: str) -> str:
+    return item_labels.get(key) or key.replace('_', ' ').title()
+
+def research_data(replies: list[ReplyMessage]) -> dict[str, any] | None:
+    """
+    The last JSON object with `financials` in `replies`: a reply that is JSON, a fenced
+    JSON block in a reply, or the text between a reply's first `{` and last `}`.
+    """
+    for reply in reversed(replies):
+        candidates = [reply.data] if isinstance(reply.data, dict) else []
+        text = reply.content or ''
+        candidates.extend(reversed(json_block_pattern.findall(text)))
+        start, end = text.find('{'), text.rfind('}')
+        if 0 <= start < end:
+            candidates.append(text[start:end+1])
+        for candidate in candidates:
+            if isinstance(candidate, str):
+                try:
+                    candidate = loads_reply(candidate)
+                except ValueError:
+                    continue
+            if isinstance(candidate, dict) and isinstance(candidate.get('financials'), dict):
+                return candidate
+    return None
+
+def number(value: any) -> float | None:
+    """`value` as a number, including strings like "1,234.5", or `None`."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(',', '').strip())
+        except ValueError:
+            return None
+    return None
+
+class FinancialsSheet():
+    """
+    The rows and period columns of the sheet for one research JSON object. The columns
+    are the last three reported fiscal years, N-3 to N-1, our model's estimate of year N,
+    and the guidance or consensus for year N.
+    """
+
+    def __init__(self, data: dict[str, any]):
+        self.data = data
+        self.financials: dict[str, any] = data.get('financials') or {}
+        periods = [str(p) for p in data.get('periods') or []]
+        self.reported = [p for p in periods if re.fullmatch(r"FY\d{4}", p)][-3:]
+        next_year = f"FY{int(self.reported[-1][2:]) + 1}" if self.reported else None
+        self.estimate = next((p for p in periods if next_year and p.startswith(next_year)),
+            next((p for p in periods if p.startswith('FY') and p.endswith('E')), None))
+        self.rows = self.__make_rows()
+
+    @property
+    def columns(self) -> list[str]:
+        estimate = self.estimate or 'FY N'
+        return ['Account'] + self.reported + [f"{estimate} (Our Model)", f"{estimate} (Guidance/Consensus)"]
+
+    def has_values(self) -> bool:
+        """Whether any reported period or the estimate has a value."""
+        return any(v is not None for row in self.rows for v in row.values.values())
+
+    def __section(self, *path: str) -> dict[str, any]:
+        section = self.financials
+        for key in path:
+            section = section.get(key) if isinstance(section, dict) else None
+        return section if isinstance(section, dict) else {}
+
+    def __values(self, *path: str) -> dict[str, float | None]:
+        section = self.__section(*path)
+        return dict((p, number(section.get(p))) for p in self.reported + [self.estimate] if p)
+
+    def __components(self, *path: str) -> list[tuple[str, dict[str, float | None]]]:
+        return [(key, self.__values(*path, key)) for key, value in self.__section(*path).items()
+            if key != 'total' and isinstance(value, dict)]
+
+    @staticmethod
+    def __combine(function: Callable[..., float | None], *values: dict[str, float | None]) -> dict[str, float | None]:
+        """Apply `function` to the values of each period, where none of them are missing."""
+        combined = {}
+        for period in values[0]:
+            args = [v.get(period) for v in values]
+            combined[period] = function(*args) if all(a is not None for a in args) else None
+        return combined
+
+    @staticmethod
+    def __or(values: dict[str, float | None], fallback: dict[str, float | None]) -> dict[str, float | None]:
+        """The reported `values`, with the missing ones taken from `fallback`."""
+        return dict((p, v if v is not None else fallback.get(p)) for p, v in values.items())
+
+    def __total(self, *path: str) -> dict[str, float | None]:
+        """A section's reported total, or else the sum of its components, if they are all reported."""
+        components = [values for _, values in self.__components(*path)]
+        total = self.__values(path[0], 'total')
+        return self.__or(total, self.__combine(lambda *a: sum(a), *components)) if components else total
+
+    def __margin(self, key: str, amount: dict[str, float | None], revenue: dict[str, float | None]) -> dict[str, float | None]:
+        """A margin as a fraction, from the reported percentage or else computed."""
+        reported = self.__combine(lambda v: v / 100.0, self.__values('derived', 'margins_percent', key))
+        computed = self.__combine(lambda a, r: a / r if r else None, amount, revenue)
+        return self.__or(reported, computed)
+
+    def __make_rows(self) -> list[Row]:
+        revenue = self.__total('revenue', 'streams')
+        cost_of_revenue = self.__total('cost_of_revenue')
+        gross_profit = self.__or(self.__values('derived', 'gross_profit'),
+            self.__combine(lambda r, c: r - c, revenue, cost_of_revenue))
+        operating_income = self.__or(self.__values('derived', 'operating_income'),
+            self.__combine(lambda g, o: g - o, gross_profit, self.__total('opex')))
+        net_income = self.__values('derived', 'net_income')
+        pretax_income = self.__combine(lambda n, t: n + t, net_income, self.__values('tax', 'income_tax_expense'))
+        pretax_income = self.__or(pretax_income, self.__combine(lambda o, i, e, x: o + i - e + x, operating_income,
+            *[self.__values('non_operating', k) for k in ['interest_income', 'interest_expense', 'other_income_expense']]))
+        # The guidance or consensus is only known for revenue.
+        consensus = number(self.__street('consensus', 'revenue_FY+1', 'value'))
+        if consensus is None:
+            consensus = number(self.__street('ranges', 'revenue_FY+1_median'))
+
+        rows = [Row('Revenue', RowKind.HEADING)]
+        rows.extend(Row(item_label(k), RowKind.ITEM, v) for k, v in self.__components('revenue', 'streams'))
+        rows.append(Row('Total Revenue', RowKind.TOTAL, dict(revenue, consensus=consensus)))
+        rows.append(Row('Cost of Revenue', RowKind.HEADING))
+        rows.extend(Row(item_label(k), RowKind.ITEM, v) for k, v in self.__components('cost_of_revenue'))
+        rows.append(Row('Gross Profit', RowKind.TOTAL, gross_profit))
+        rows.append(Row('Gross Margin', RowKind.PERCENT, self.__margin('gross', gross_profit, revenue)))
+        rows.append(Row('Operating Expenses', RowKind.HEADING))
+        rows.extend(Row(item_label(k), RowKind.ITEM, v) for k, v in self.__components('opex'))
+        rows.append(Row('Operating Income', RowKind.TOTAL, operating_income))
+        rows.append(Row('Operating Margin', RowKind.PERCENT, self.__margin('operating', operating_income, revenue)))
+        rows.append(Row('Pre-Tax Income', RowKind.TOTAL, pretax_income))
+        rows.append(Row('Net Income', RowKind.TOTAL, net_income))
+        rows.append(Row('Net Margin', RowKind.PERCENT, self.__margin('net', net_income, revenue)))
+        return rows
+
+    def __street(self, *path: str) -> any:
+        value = self.data.get('street_and_banks')
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+    def cells(self) -> list[list[any]]:
+        """The rows of cell values, starting with the header row."""
+        periods = self.reported + [self.estimate, 'consensus']
+        cells = [self.columns]
+        for row in self.rows:
+            label = f"• {row.label}" if row.kind == RowKind.ITEM else row.label
+            values = [row.values.get(p) if p else None for p in periods] if row.kind != RowKind.HEADING else []
+            cells.append([label] + values)
+        return cells
+
+    def __repr__(self) -> str:
+        return f"FinancialsSheet(reported = {self.reported}, estimate = {self.estimate}, rows = {len(self.rows)})"
+
+def write_sheet(sheet: FinancialsSheet, path: Path) -> Path:
+    """
+    Write `sheet` as the "Financials" worksheet of the workbook at `path`, replacing the
+    worksheet if the workbook exists, or else creating a new workbook.
+    """
+    # openpyxl is only needed when a workbook is written.
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    if path.exists():
+        workbook = load_workbook(path)
+        if sheet_name in workbook.sheetnames:
+            del workbook[sheet_name]
+        worksheet = workbook.create_sheet(sheet_name, 0)
+    else:
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = sheet_name
+
+    cells = sheet.cells()
+    for row in cells:
+        worksheet.append(row)
+
+    header_fill = PatternFill('solid', fgColor='1F4E78')
+    band_fill = PatternFill('solid', fgColor='F2F2F2')
+    for cell in worksheet[1]:
+        cell.font = Font(bold=True, color='FFFFFF')
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal='center' if cell.column > 1 else 'left')
+    for r, row in enumerate(sheet.rows, start=2):
+        bold = row.kind in (RowKind.HEADING, RowKind.TOTAL)
+        for cell in worksheet[r]:
+            if bold:
+                cell.font = Font(bold=True)
+            if r % 2:
+                cell.fill = band_fill
+            if cell.column > 1:
+                cell.number_format = percent_format if row.kind == RowKind.PERCENT else amount_format
+        if row.kind == RowKind.ITEM:
+            worksheet.cell(r, 1).alignment = Alignment(indent=1)
+
+    widths = [max(len(f"{row[c]:,.1f}" if isinstance(row[c], float) else str(row[c] or ''))
+        for row in cells if c < len(row)) for c in range(len(cells[0]))]
+    for c, width in enumerate(widths, start=1):
+        worksheet.column_dimensions[get_column_letter(c)].width = width + 2
+    worksheet.freeze_panes = 'B2'
+
+    units = sheet.data.get('units') or sheet.data.get('currency')
+    if units:
+        worksheet.cell(len(cells) + 2, 1, f"Units: {units}").font = Font(italic=True)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+    return path
+
+def write_financials_spreadsheet(replies: list[ReplyMessage], path: Path) -> list[str] | None:
+    """
+    Write the workbook from the research JSON in `replies`. Returns the confirmation
+    message, or `None` if there is no JSON with financial values, so the workbook must be
+    written by the agent.
+    """
+    data = research_data(replies)
+    if not data:
+        return None
+    sheet = FinancialsSheet(data)
+    if not sheet.has_values():
+        return None
+    write_sheet(sheet, path)
+    return [f"Created {path} with updated {sheet_name} sheet."]
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""
+A local store of the financial statements that the MCP servers return, normalized to one
+row per ticker, statement, period, and line item, so repeated research on a ticker can
+skip fetching the statements again.
+
+When a store is used, the statement tools, e.g., the financial-datasets server's
+`get_income_statements`, are intercepted by `stored_statements()`. A call is answered
+from the store if it holds at least the requested number of periods and is still
+current, i.e., the company can't have filed a newer report yet. Otherwise the tool is
+called and the statements it returns are saved.
+
+Freshness is tied to the filing dates: after a report for a period is filed, the next one
+can't be filed until a period later. Without a filing date, the filing deadline after the
+end of the period is assumed.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import calendar
+import json
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+
+class StatementKind(Enum):
+    """Income statements, e.g., revenue, operating expenses, and net income."""
+    INCOME = 'income'
+    """Balance sheets, e.g., assets, liabilities, and equity."""
+    BALANCE = 'balance'
+    """Cash flow statements, e.g., operating cash flow and capital expenditure."""
+    CASH_FLOW = 'cash_flow'
+    """Revenue by segment, e.g., by product line or region."""
+    SEGMENTS = 'segments'
+
+class StatementTool():
+    """A tool that returns statements, as a JSON object with a list of records under `result_key`."""
+
+    def __init__(self, name: str, kind: StatementKind, result_key: str):
+        self.name = name
+        self.kind = kind
+        self.result_key = result_key
+
+    def __repr__(self) -> str:
+        return f"StatementTool(name = {self.name}, kind = {self.kind.value}, result_key = {self.result_key})"
+
+# The tools of the financial-datasets server that return statements.
+statement_tools = [
+    StatementTool('get_income_statements', StatementKind.INCOME, 'income_statements'),
+    StatementTool('get_balance_sheets', StatementKind.BALANCE, 'balance_sheets'),
+    StatementTool('get_cash_flow_statements', StatementKind.CASH_FLOW, 'cash_flow_statements'),
+    StatementTool('get_segmented_revenues', StatementKind.SEGMENTS, 'segmented_revenues'),
+]
+
+def find_statement_tool(name: str) -> StatementTool | None:
+    """The statement tool called `name`, which mcp_agent prefixes with the server's name."""
+    return next((t for t in statement_tools if name == t.name or name.endswith(f"_{t.name}")), None)
+
+# The months in each kind of period, and the days after a period ends until its report
+# must be filed, i.e., the SEC's 10-K and 10-Q deadlines for the smallest filers.
+period_months = {'annual': 12, 'quarterly': 3, 'ttm': 3}
+filing_deadline_days = {'annual': 90, 'quarterly': 45, 'ttm': 45}
+
+# The number of periods the statement tools return when the call doesn't say.
+def_limit = 4
+
+# The record fields that identify a report, rather than hold line items.
+period_end_fields = ['report_period', 'period_end', 'end_date', 'fiscal_date_ending', 'date']
+metadata_fields = {'ticker', 'period', 'fiscal_period', 'fiscal_year', 'currency', 'filing_date', 'accession_number'}
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+def flatten_line_items(record: dict[str,any], prefix: str = '') -> dict[str, float]:
+    """
+    The numeric fields of `record`, with nested objects flattened to dotted names and
+    lists of named amounts, e.g., revenue segments, keyed by their names.
+    """
+    items = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if not prefix and (key in metadata_fields or key in period_end_fields):
+            continue
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            items[name] = float(value)
+        elif isinstance(value, dict):
+            items.update(flatten_line_items(value, f"{name}."))
+        elif isinstance(value, list):
+            for element in value:
+                if not isinstance(element, dict):
+                    continue
+                label = element.get('name') or element.get('label') or element.get('segment')
+                amount = element.get('amount', element.get('value'))
+                if isinstance(label, str) and isinstance(amount, (int, float)) and not isinstance(amount, bool):
+                    items[f"{name}.{label}"] = float(amount)
+    return items
+
+class FinancialDataStore():
+    """
+    A SQLite database of reports, keyed by ticker, statement, period type, e.g., `annual`,
+    and the period's end date, and of their line items.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path (Path): The database file. It is created if it doesn't exist.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    ticker        TEXT NOT NULL,
+                    statement     TEXT NOT NULL,
+                    period_type   TEXT NOT NULL,
+                    period_end    TEXT NOT NULL,
+                    fiscal_period TEXT,
+                    currency      TEXT,
+                    filing_date   TEXT,
+                    fetched_at    TEXT NOT NULL,
+                    PRIMARY KEY (ticker, statement, period_type, period_end))""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS line_items (
+                    ticker      TEXT NOT NULL,
+                    statement   TEXT NOT NULL,
+                    period_type TEXT NOT NULL,
+                    period_end  TEXT NOT NULL,
+                    item        TEXT NOT NULL,
+                    value       REAL NOT NULL,
+                    PRIMARY KEY (ticker, statement, period_type, period_end, item))""")
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def save(self, ticker: str, kind: StatementKind, period_type: str, records: list[dict[str,any]]) -> int:
+        """
+        Save the statement `records` for `ticker`, replacing the stored reports for the same
+        periods. Records without a period end date are skipped. Returns the number saved.
+        """
+        ticker = ticker.upper()
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        reports, line_items = [], []
+        for record in records:
+            period_end = next((str(record[f])[:10] for f in period_end_fields if record.get(f)), None)
+            if not period_end:
+                continue
+            key = (str(record.get('ticker') or ticker).upper(), kind.value, str(record.get('period') or period_type), period_end)
+            filing_date = record.get('filing_date')
+            reports.append(key + (record.get('fiscal_period'), record.get('currency'),
+                str(filing_date)[:10] if filing_date else None, fetched_at))
+            line_items.extend(key + (item, value) for item, value in flatten_line_items(record).items())
+        with closing(self.__connect()) as conn, conn:
+            conn.executemany("""
+                DELETE FROM line_items
+                WHERE ticker = ? AND statement = ? AND period_type = ? AND period_end = ?""",
+                [r[:4] for r in reports])
+            conn.executemany("""
+                INSERT OR REPLACE INTO reports
+                    (ticker, statement, period_type, period_end, fiscal_period, currency, filing_date, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", reports)
+            conn.executemany("""
+                INSERT OR REPLACE INTO line_items (ticker, statement, period_type, period_end, item, value)
+                VALUES (?, ?, ?, ?, ?, ?)""", line_items)
+        return len(reports)
+
+    def load(self, ticker: str, kind: StatementKind, period_type: str, limit: int | None = None) -> list[dict[str,any]]:
+        """The stored reports as records like the tools return, the most recent period first."""
+        ticker = ticker.upper()
+        with closing(self.__connect()) as conn:
+            reports = conn.execute("""
+                SELECT period_end, fiscal_period, currency, filing_date FROM reports
+                WHERE ticker = ? AND statement = ? AND period_type = ?
+                ORDER BY period_end DESC
+                LIMIT ?""", (ticker, kind.value, period_type, limit or -1)).fetchall()
+            items = conn.execute("""
+                SELECT period_end, item, value FROM line_items
+                WHERE ticker = ? AND statement = ? AND period_type = ?""", (ticker, kind.value, period_type)).fetchall()
+        values: dict[str, dict[str, float]] = {}
+        for period_end, item, value in items:
+            values.setdefault(period_end, {})[item] = value
+        records = []
+        for period_end, fiscal_period, currency, filing_date in reports:
+            record = {'ticker': ticker, 'report_period': period_end, 'period': period_type}
+            record.update((k, v) for k, v in [('fiscal_period', fiscal_period), ('currency', currency),
+                ('filing_date', filing_date)] if v)
+            record.update(values.get(period_end, {}))
+            records.append(record)
+        return records
+
+    def next_filing_date(self, ticker: str, kind: StatementKind, period_type: str) -> date | None:
+        """The earliest date a report newer than the stored ones can be filed, or `None` if none are stored."""
+        with closing(self.__connect()) as conn:
+            row = conn.execute("""
+                SELECT period_end, filing_date FROM reports
+                WHERE ticker = ? AND statement = ? AND period_type = ?
+                ORDER BY period_end DESC
+                LIMIT 1""", (ticker.upper(), kind.value, period_type)).fetchone()
+        if not row:
+            return None
+        period_end, filing_date = row
+        months = period_months.get(period_type, 3)
+        if filing_date:
+            return add_months(date.fromisoformat(filing_date), months)
+        deadline = date.fromisoformat(period_end) + timedelta(days=filing_deadline_days.get(period_type, 45))
+        return add_months(deadline, months)
+
+    def lookup(self, ticker: str, kind: StatementKind, period_type: str, limit: int,
+        today: date | None = None) -> list[dict[str,any]] | None:
+        """
+        The `limit` most recent stored reports, if there are that many and no newer report
+        can have been filed by `today`. Otherwise `None`, i.e., the tool must be called.
+        """
+        next_filing = self.next_filing_date(ticker, kind, period_type)
+        if next_filing and (today or date.today()) < next_filing:
+            records = self.load(ticker, kind, period_type, limit)
+            if len(records) >= limit:
+                self.hits += 1
+                return records
+        self.misses += 1
+        return None
+
+    def __repr__(self) -> str:
+        return f"FinancialDataStore(path = {self.path}, hits = {self.hits}, misses = {self.misses})"
+
+def stored_statements(llm_class: type, store: FinancialDataStore) -> type:
+    """
+    Return a subclass of the `AugmentedLLM` class `llm_class` whose statement tool calls
+    are answered from `store` when it is current, and whose statement tool results are
+    saved in `store` otherwise.
+    """
+
+    class StoredLLM(llm_class):
+        async def call_tool(self, request, tool_call_id=None):
+            tool = find_statement_tool(request.params.name)
+            args = request.params.arguments or {}
+            ticker = str(args.get('ticker') or '').strip()
+            if not tool or not ticker:
+                return await super().call_tool(request, tool_call_id)
+            period_type = str(args.get('period') or 'annual')
+            try:
+                limit = int(args.get('limit') or def_limit)
+            except (TypeError, ValueError):
+                limit = def_limit
+            records = await asyncio.to_thread(store.lookup, ticker, tool.kind, period_type, limit)
+            if records is not None:
+                from mcp.types import CallToolResult, TextContent
+                self.logger.debug("Used stored financial statements",
+                    data={'tool_name': tool.name, 'ticker': ticker, 'period': period_type, 'periods': len(records)})
+                return CallToolResult(content=[TextContent(type='text', text=json.dumps({tool.result_key: records}))])
+            result = await super().call_tool(request, tool_call_id)
+            if not getattr(result, 'isError', False):
+                await asyncio.to_thread(save_result, store, tool, ticker, period_type, result)
+            return result
+
+    StoredLLM.__name__ = f"Stored{llm_class.__name__}"
+    StoredLLM.__qualname__ = StoredLLM.__name__
+    return StoredLLM
+
+def save_result(store: FinancialDataStore, tool: StatementTool, ticker: str, period_type: str, result: any) -> int:
+    """Save the records in the text content of a tool's `result`. Content that isn't JSON is ignored."""
+    saved = 0
+    for content in getattr(result, 'content', None) or []:
+        try:
+            data = json.loads(getattr(content, 'text', None) or '')
+        except (TypeError, ValueError):
+            continue
+        records = data.get(tool.result_key) if isinstance(data, dict) else data
+        if isinstance(records, list):
+            saved += store.save(ticker, tool.kind, period_type, [r for r in records if isinstance(r, dict)])
+    return saved
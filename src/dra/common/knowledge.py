@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+A persistent store of the knowledge extracted by the Deep Orchestrator, so later runs
+for the same subject can start with what earlier runs learned.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:  # mcp_agent is slow to import, so it is imported when first used.
+    from mcp_agent.workflows.deep_orchestrator.memory import WorkspaceMemory
+    from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem
+
+class KnowledgeStore():
+    """
+    A SQLite database of `KnowledgeItems`, keyed by an _entity_, e.g., a ticker symbol,
+    the item's category, and its key. Saving an item that is already stored replaces
+    it only if the new one is newer or has higher confidence.
+    """
+
+    def_max_age_days = 30
+    def_min_confidence = 0.7
+    def_limit = 50
+
+    def __init__(self,
+        path: Path,
+        max_age_days: float = def_max_age_days,
+        min_confidence: float = def_min_confidence):
+        """
+        Args:
+            path (Path):            The database file. It is created if it doesn't exist.
+            max_age_days (float):   Only items this fresh are loaded.
+            min_confidence (float): Only items with at least this confidence are loaded.
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self.min_confidence = min_confidence
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS knowledge (
+                    entity     TEXT NOT NULL,
+                    category   TEXT NOT NULL,
+                    key        TEXT NOT NULL,
+                    value      TEXT NOT NULL,
+                    source     TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    timestamp  TEXT NOT NULL,
+                    PRIMARY KEY (entity, category, key))""")
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def save(self, entity: str, items: Iterable[KnowledgeItem]) -> int:
+        """Save the items for `entity`. Returns the number of items passed in."""
+        rows = [(entity, item.category, item.key,
+                 json.dumps(item.value, default=str), item.source, item.confidence,
+                 item.timestamp.astimezone(timezone.utc).isoformat())
+                for item in items]
+        with closing(self.__connect()) as conn, conn:
+            conn.executemany("""
+                INSERT INTO knowledge (entity, category, key, value, source, confidence, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (entity, category, key) DO UPDATE SET
+                    value = excluded.value,
+                    source = excluded.source,
+                    confidence = excluded.confidence,
+                    timestamp = excluded.timestamp
+                WHERE excluded.timestamp > knowledge.timestamp
+                   OR excluded.confidence > knowledge.confidence""", rows)
+        return len(rows)
+
+    def load(self, entity: str, limit: int = def_limit) -> list[KnowledgeItem]:
+        """
+        Return up to `limit` items for `entity` that are fresh enough and confident enough,
+        most confident and then most recent first.
+        """
+        oldest = (datetime.now(timezone.utc) - timedelta(days=self.max_age_days)).isoformat()
+        with closing(self.__connect()) as conn:
+            rows = conn.execute("""
+                SELECT category, key, value, source, confidence, timestamp FROM knowledge
+                WHERE entity = ? AND confidence >= ? AND timestamp >= ?
+                ORDER BY confidence DESC, timestamp DESC
+                LIMIT ?""", (entity, self.min_confidence, oldest, limit)).fetchall()
+        from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem
+        return [KnowledgeItem(
+                    key=key, value=json.loads(value), source=source,
+                    timestamp=datetime.fromisoformat(timestamp),
+                    confidence=confidence, category=category)
+                for category, key, value, source, confidence, timestamp in rows]
+
+    def seed(self, entity: str, memory: WorkspaceMemory, limit: int = def_limit) -> int:
+        """
+        Add the items loaded for `entity` to the orchestrator's memory, so they are
+        available when it plans. Returns the number of items added.
+        """
+        items = self.load(entity, limit)
+        for item in items:
+            memory.add_knowledge(item)
+        return len(items)
+
+    def __repr__(self) -> str:
+        return f"KnowledgeStore(path = {self.path}, max_age_days = {self.max_age_days}, min_confidence = {self.min_confidence})"
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""
+An append-only SQLite ledger of token usage, cost, and latency, with one row per LLM call
+and one per task, so spending can be tracked across runs, e.g., per ticker or per prompt
+template version. See `dra.tools.ledger` for a CLI that aggregates it.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+from dra.common.llm_wrappers import wrap_llm_class
+
+class EntryKind(Enum):
+    """One inference call, i.e., one `generate()` of an `AugmentedLLM`."""
+    CALL = 'call'
+    """One task, with the totals of the calls made while it ran."""
+    TASK = 'task'
+
+class UsageLedger():
+    """
+    The ledger database for one run. Rows are only ever inserted. The `run_id`, app name,
+    and entity, e.g., the ticker, are recorded in every row.
+    """
+
+    columns = ['id', 'run_id', 'recorded_at', 'kind', 'app', 'entity', 'task',
+        'template', 'template_hash', 'provider', 'model', 'input_tokens', 'output_tokens',
+        'cost', 'latency_secs', 'cache_hit', 'status']
+
+    group_by_columns = ['run_id', 'kind', 'app', 'entity', 'task', 'template',
+        'template_hash', 'provider', 'model', 'status', 'day']
+
+    # The default file name in the apps' `--cache-dir`, which the CLI reads by default, too.
+    def_file_name = 'usage_ledger.sqlite'
+
+    def __init__(self,
+        path: Path,
+        run_id: str | None = None,
+        app: str = '',
+        entity: str = ''):
+        self.path = path
+        self.run_id = run_id if run_id else UsageLedger.new_run_id()
+        self.app = app
+        self.entity = entity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id        TEXT NOT NULL,
+                    recorded_at   TEXT NOT NULL,
+                    kind          TEXT NOT NULL,
+                    app           TEXT,
+                    entity        TEXT,
+                    task          TEXT,
+                    template      TEXT,
+                    template_hash TEXT,
+                    provider      TEXT,
+                    model         TEXT,
+                    input_tokens  INTEGER,
+                    output_tokens INTEGER,
+                    cost          REAL,
+                    latency_secs  REAL,
+                    cache_hit     INTEGER,
+                    status        TEXT)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS usage_run_id ON usage (run_id)")
+
+        # Running totals of the calls for each task in this run, for the task rows.
+        self.task_totals: dict[str, dict[str,float]] = {}
+
+    @staticmethod
+    def new_run_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def hash_template(path: Path) -> str:
+        """A short hash of a prompt template's contents, which identifies its version."""
+        return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def record(self,
+        kind: EntryKind,
+        task: str | None = None,
+        template: str | None = None,
+        template_hash: str | None = None,
+        provider: str | None = None,
+        model: str | None = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost: float = 0.0,
+        latency_secs: float = 0.0,
+        cache_hit: bool | None = None,
+        status: str | None = None):
+        """Append one row."""
+        self.__insert(self.__row(kind, task, template, template_hash, provider, model,
+            input_tokens, output_tokens, cost, latency_secs, cache_hit, status))
+
+    async def record_async(self, kind: EntryKind, **kwargs):
+        """
+        Like `record()`, but the row is inserted on a worker thread, so the event loop isn't
+        blocked while the database is opened and the insert is committed. The task totals
+        are still updated before this returns.
+        """
+        row = self.__row(kind, **kwargs)
+        await asyncio.to_thread(self.__insert, row)
+
+    def __row(self,
+        kind: EntryKind,
+        task: str | None = None,
+        template: str | None = None,
+        template_hash: str | None = None,
+        provider: str | None = None,
+        model: str | None = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost: float = 0.0,
+        latency_secs: float = 0.0,
+        cache_hit: bool | None = None,
+        status: str | None = None) -> tuple:
+        """Add a call to its task's totals and return the values of its row."""
+        if kind == EntryKind.CALL and task:
+            totals = self.task_totals.setdefault(task,
+                {'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0})
+            totals['input_tokens'] += input_tokens
+            totals['output_tokens'] += output_tokens
+            totals['cost'] += cost
+        return (self.run_id, datetime.now(timezone.utc).isoformat(), kind.value,
+            self.app, self.entity, task, template, template_hash, provider, model,
+            input_tokens, output_tokens, cost, latency_secs,
+            None if cache_hit is None else int(cache_hit), status)
+
+    def __insert(self, row: tuple):
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("""
+                INSERT INTO usage (run_id, recorded_at, kind, app, entity, task, template,
+                    template_hash, provider, model, input_tokens, output_tokens, cost,
+                    latency_secs, cache_hit, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", row)
+
+    def record_task(self,
+        task: str,
+        template_path: Path | None,
+        provider: str | None,
+        model: str | None,
+        latency_secs: float,
+        status: str):
+        """Append the row for a task, with the totals of the calls recorded while it ran."""
+        totals = self.task_totals.get(task, {})
+        template_hash = None
+        if template_path and template_path.exists():
+            template_hash = UsageLedger.hash_template(template_path)
+        self.record(EntryKind.TASK, task=task,
+            template=str(template_path) if template_path else None, template_hash=template_hash,
+            provider=provider, model=model,
+            input_tokens=totals.get('input_tokens', 0), output_tokens=totals.get('output_tokens', 0),
+            cost=totals.get('cost', 0.0), latency_secs=latency_secs, status=status)
+
+    def summarize(self,
+        group_by: list[str],
+        kind: EntryKind = EntryKind.CALL,
+        since: datetime | None = None,
+        order_by: str = 'cost',
+        limit: int | None = None) -> tuple[list[str], list[tuple]]:
+        """
+        Aggregate the rows of `kind` recorded at or after `since`, grouped by the `group_by`
+        columns, which must be in `group_by_columns`. The `day` pseudo-column is the date
+        the row was recorded. Returns the column names and the rows, most expensive first
+        by default.
+        """
+        for column in group_by:
+            if column not in UsageLedger.group_by_columns:
+                raise ValueError(f"Unknown group-by column {column}. Known columns: {UsageLedger.group_by_columns}")
+        aggregates = ['count', 'input_tokens', 'output_tokens', 'cost', 'mean_latency_secs', 'cache_hit_rate']
+        if order_by not in aggregates + group_by:
+            raise ValueError(f"Cannot order by {order_by}. Use one of: {aggregates + group_by}")
+        keys = [("substr(recorded_at, 1, 10)" if c == 'day' else c) + f" AS {c}" for c in group_by]
+        where = "kind = ?"
+        params = [kind.value]
+        if since:
+            where += " AND recorded_at >= ?"
+            params.append(since.astimezone(timezone.utc).isoformat())
+        sql = f"""
+            SELECT {', '.join(keys + [
+                "COUNT(*) AS count",
+                "SUM(input_tokens) AS input_tokens",
+                "SUM(output_tokens) AS output_tokens",
+                "SUM(cost) AS cost",
+                "AVG(latency_secs) AS mean_latency_secs",
+                "AVG(cache_hit) AS cache_hit_rate"])}
+            FROM usage WHERE {where}
+            {'GROUP BY ' + ', '.join(group_by) if group_by else ''}
+            ORDER BY {order_by} DESC"""
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with closing(self.__connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return (group_by + aggregates, rows)
+
+    def __repr__(self) -> str:
+        return f"UsageLedger(path = {self.path}, run_id = {self.run_id}, app = {self.app}, entity = {self.entity})"
+
+# The name of the task whose calls are being made, set by `DeepResearch` while it runs a task.
+current_task: ContextVar[str | None] = ContextVar('current_task', default=None)
+
+def usage_from_responses(responses: any) -> tuple[int, int, bool | None] | None:
+    """
+    Return the input tokens, output tokens, and whether a prompt cache was hit, summed over
+    the responses that report usage, or `None` if none do.
+    """
+    result = None
+    for response in responses if isinstance(responses, list) else [responses]:
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            continue
+        input_tokens = (getattr(usage, 'input_tokens', None) or getattr(usage, 'prompt_tokens', None) or 0)
+        output_tokens = (getattr(usage, 'output_tokens', None) or getattr(usage, 'completion_tokens', None) or 0)
+        cached = getattr(usage, 'cache_read_input_tokens', None)
+        if cached is None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached = getattr(details, 'cached_tokens', None) if details else None
+        in_sum, out_sum, hit = result if result else (0, 0, None)
+        if cached is not None:
+            hit = bool(hit) or cached > 0
+        result = (in_sum + input_tokens, out_sum + output_tokens, hit)
+    return result
+
+class CallUsage():
+    """The model, tokens, cost, latency, and outcome of one inference call."""
+
+    def __init__(self,
+        model: str | None = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost: float = 0.0,
+        latency_secs: float = 0.0,
+        cache_hit: bool | None = None,
+        error: BaseException | None = None):
+        self.model = model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cost = cost
+        self.latency_secs = latency_secs
+        self.cache_hit = cache_hit
+        self.error = error
+
+    @property
+    def status(self) -> str:
+        return 'error' if self.error else 'ok'
+
+    def __repr__(self) -> str:
+        return f"CallUsage(model = {self.model}, input_tokens = {self.input_tokens}, output_tokens = {self.output_tokens}, cost = {self.cost}, latency_secs = {self.latency_secs:.3f}, cache_hit = {self.cache_hit}, status = {self.status})"
+
+async def measured_call(llm: any, method: Callable, message: any, request_params: any,
+    kwargs: dict[str,any], clock: Callable[[], float] = time.perf_counter) -> tuple[any, CallUsage]:
+    """
+    Call `method` and measure it. The tokens and cost come from a token counter scope opened
+    around the call, if the context has a token counter, or else from the usage reported in
+    the responses. An exception raised by the call is returned in `CallUsage.error`, with a
+    `None` result, so the caller can record the failed call before re-raising it.
+    """
+    params = llm.get_request_params(request_params)
+    counter = getattr(getattr(llm, 'context', None), 'token_counter', None)
+    node = None
+    result = None
+    error = None
+    start = clock()
+    try:
+        if counter:
+            await counter.push(f"{getattr(llm, 'name', '')}.ledger", 'ledger')
+        result = await method(message=message, request_params=request_params, **kwargs)
+    except BaseException as e:
+        error = e
+    finally:
+        latency = clock() - start
+        if counter:
+            node = await counter.pop()
+
+    reported = usage_from_responses(result) if not error else None
+    input_tokens, output_tokens, cache_hit = reported if reported else (0, 0, None)
+    cost = 0.0
+    model = params.model if params else None
+    if node:
+        usage = node.aggregate_usage()
+        input_tokens, output_tokens = usage.input_tokens, usage.output_tokens
+        cost = node.get_cost()
+        model = next((child.usage.model_name for child in node.children
+            if child.usage.model_name), model)
+    return (result, CallUsage(model, input_tokens, output_tokens, cost, latency, cache_hit, error))
+
+def recorded(llm_class: type, provider: str, ledger: UsageLedger,
+    clock: Callable[[], float] = time.perf_counter) -> type:
+    """
+    Return a subclass of the `AugmentedLLM` class `llm_class` that appends a ledger row for
+    each `generate()` and `generate_structured()` call, as measured by `measured_call()`.
+    The rows are written off the event loop, with `UsageLedger.record_async()`.
+    """
+    async def record(llm: any, method: Callable, message: any, request_params: any, kwargs: dict[str,any]) -> any:
+        result, usage = await measured_call(llm, method, message, request_params, kwargs, clock)
+        try:
+            await ledger.record_async(EntryKind.CALL, task=current_task.get(), provider=provider, model=usage.model,
+                input_tokens=usage.input_tokens, output_tokens=usage.output_tokens, cost=usage.cost,
+                latency_secs=usage.latency_secs, cache_hit=usage.cache_hit, status=usage.status)
+        except sqlite3.Error:
+            pass  # The ledger is best effort; never fail an inference call because of it.
+        if usage.error:
+            raise usage.error
+        return result
+
+    return wrap_llm_class(llm_class, 'Recorded', record)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Support for wrapping the inference calls of an `AugmentedLLM` class, e.g., to rate limit or
+record them, by subclassing it, so the wrapped class can be passed to the orchestrator as
+its `llm_factory`.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+# An `around` function is called with the LLM instance, the original bound method, and the
+# `message`, `request_params`, and any other keyword arguments of the call.
+Around = Callable[[any, Callable[..., Awaitable[any]], any, any, dict[str,any]], Awaitable[any]]
+
+def wrap_llm_class(llm_class: type, name_prefix: str, around: Around) -> type:
+    """
+    Return a subclass of `llm_class` whose `generate()` and `generate_structured()` are
+    passed to `around`. Other methods, e.g., `generate_str()`, usually call `generate()`.
+    Nested calls, e.g., when a provider's `generate_structured()` calls `generate()`,
+    bypass `around`, so each call is wrapped only once.
+    """
+    in_call: ContextVar[bool] = ContextVar(f"in_{name_prefix}_call", default=False)
+
+    async def call(llm: any, method: Callable, message: any, request_params: any, kwargs: dict[str,any]) -> any:
+        if in_call.get():
+            return await method(message=message, request_params=request_params, **kwargs)
+        token = in_call.set(True)
+        try:
+            return await around(llm, method, message, request_params, kwargs)
+        finally:
+            in_call.reset(token)
+
+    class WrappedLLM(llm_class):
+        async def generate(self, message, request_params=None):
+            return await call(self, super().generate, message, request_params, {})
+
+        async def generate_structured(self, message, response_model, request_params=None):
+            return await call(self, super().generate_structured, message, request_params,
+                {'response_model': response_model})
+
+    WrappedLLM.__name__ = f"{name_prefix}{llm_class.__name__}"
+    WrappedLLM.__qualname__ = WrappedLLM.__name__
+    return WrappedLLM
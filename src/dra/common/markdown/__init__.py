@@ -6,22 +6,24 @@ The Markdown-formatted streaming output version of Deep Orchestrator Research Ex
 from __future__ import annotations
 
 import argparse
-import json
-import re
 import time
 from datetime import datetime, timedelta
-from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import cast, Callable, Generic
+from typing import TYPE_CHECKING, cast, Callable, Generic, TextIO
 
-from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
-from openai.types.chat import ChatCompletionMessage
-from anthropic.types import Message
+if TYPE_CHECKING:  # Imported when a run starts, so the apps' `--help` is fast.
+    from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
+    from dra.common.deep_research import DeepResearch
 
+from dra.common.messages import ReplyKind, ReplyMessage
 from dra.common.observer import Observer
-from dra.common.deep_research import DeepResearch
+from dra.common.memory_compaction import CompactionStats
+from dra.common.output_writer import Chunks, output_writer
+from dra.common.utils.compression import Compression, compressed_path
+from dra.common.rate_limiter import rate_limiters
+from dra.common.server_startup import ServerStarter
 from dra.common.tasks import BaseTask, GenerateTask, AgentTask, TaskStatus
-from dra.common.utils.strings import MarkdownUtil, clean_json_string, replace_variables
+from dra.common.utils.strings import MarkdownUtil, replace_variables
 from dra.common.variables import Variable, VariableFormat
 
 from dra.common.markdown.elements import (
@@ -29,6 +31,7 @@ from dra.common.markdown.elements import (
     MarkdownSection,
     MarkdownTable,
     MarkdownTree)
+from dra.common.markdown.renderers import Renderer, make_renderer
 
 class MarkdownDeepOrchestratorMonitor():
     """Markdown-based monitor to expose all internal state of the Deep Orchestrator."""
@@ -215,6 +218,37 @@ class MarkdownDeepOrchestratorMonitor():
         table.add_row(["Task Results",    stats['task_results']])
         table.add_row(["Categories",      stats['knowledge_categories']])
         table.add_row(["Est. Tokens",     stats['estimated_tokens']])
+        compaction = CompactionStats.of(memory)
+        if compaction:
+            table.add_rows([
+                ["Compactions",                   compaction.compactions],
+                ["Last Compaction Tokens",        f"{compaction.tokens_before} → {compaction.tokens_after}"],
+                ["Last Compaction Knowledge",     f"{compaction.knowledge_before} → {compaction.knowledge_after}"],
+                ["Last Compaction Task Results",  f"{compaction.task_results_before} → {compaction.task_results_after}"],
+            ])
+        return table
+
+    def get_rate_limits_table(self) -> MarkdownTable:
+        """Get the rate limiter statistics, including the time calls waited in the queue"""
+        table = MarkdownTable(title="🚦 Rate Limits",
+            columns = [("Provider", 'left'), ("Model", 'left'),
+                ("Requests/Min", 'right'), ("Tokens/Min", 'right'),
+                ("Requests", 'right'), ("Tokens", 'right'),
+                ("Total Wait (s)", 'right'), ("Mean Wait (s)", 'right'), ("Max Wait (s)", 'right')])
+        table.add_rows([[
+                limiter.provider, limiter.model,
+                limiter.requests_per_minute or '-', limiter.tokens_per_minute or '-',
+                limiter.request_count, limiter.token_count,
+                f"{limiter.total_wait_secs:.2f}", f"{limiter.mean_wait_secs():.2f}", f"{limiter.max_wait_secs:.2f}",
+            ] for limiter in rate_limiters.all()])
+        return table
+
+    def get_server_startup_table(self, server_starter: ServerStarter) -> MarkdownTable:
+        """Get how long each MCP server took to start, before the research started"""
+        table = MarkdownTable(title=f"🔌 MCP Server Startup ({server_starter.wall_secs:.2f}s in total)",
+            columns = [("Server", 'left'), ("Status", 'left'), ("Startup (s)", 'right'), ("Error", 'left')])
+        table.add_rows([[startup.name, startup.status.value, f"{startup.secs:.2f}", startup.error or '-']
+            for startup in server_starter.startups])
         return table
 
     def get_knowledge_table(self) -> MarkdownTable:
@@ -300,11 +334,14 @@ class MarkdownDeepOrchestratorMonitor():
         self.execution_time = self.end_time - self.start_time
         return self.execution_time
 
-class MarkdownObserver(Observer[DeepResearch]):
+class MarkdownObserver(Observer['DeepResearch']):
     """
-    A Markdown "display", which is used to produce a markdown-formatted report
-    at the end of execution. No output is generated during execution, unlike 
-    RichDisplay, for example. Hence, this could just be an Observer.
+    A Markdown "display", which is used to produce a markdown-formatted report.
+    Unlike RichDisplay, for example, nothing is shown during execution. Instead, the
+    report file is checkpointed each time a task finishes, so a partial report is on disk
+    if the run is killed, and it is rewritten one last time at the end of execution.
+    Each write goes to a temporary file that is then renamed, so the report file is never
+    left half written.
 
     If the user doesn't want a report, don't instantiate this object, as it will use
     a default output path to write the file, if none is defined!
@@ -316,12 +353,14 @@ class MarkdownObserver(Observer[DeepResearch]):
 
     def __init__(self, 
         title: str,
-        yaml_header_template: Path = None):
+        yaml_header_template: Path = None,
+        extra_formats: list[str] = []):
         """Construct a MarkdownObserver object.
 
         Args:
             title (str): The H1 title at the top of the document.
             yaml_header_template (Path): An optional template for a YAML block that will be printed first. Useful for GitHub Pages display.
+            extra_formats (list[str]): Other formats to write besides Markdown, e.g., `html` and `json`. See `renderers.renderers`.
         
         Returns:
             MarkdownObserver: An observer of DeepResearch state for rendering Markdown.
@@ -337,10 +376,17 @@ class MarkdownObserver(Observer[DeepResearch]):
             To keep the logic as simple and bug free as possible, we only allow the DeepResearch instance
             to be set once, during lazy initialization, where it is changed from `None` to the 
             real instance.
+            Each of the `extra_formats` is written next to the Markdown report, with the same
+            name and the format's suffix, e.g., `report.html`. They are rendered from the same
+            `self.layout` tree, but without the YAML header.
         """
         super().__init__(disallow_system_change=True)
         self.title = title
         self.yaml_header_template = yaml_header_template
+        self.extra_renderers: list[Renderer] = [make_renderer(f) for f in extra_formats]
+        # Limits for rendering JSON replies as nested bullets:
+        self.max_json_depth = 10
+        self.max_json_lines = 2000
         # Lazy initialize these in `_after_set_system()`.
         self.monitor: MarkdownDeepOrchestratorMonitor = None
         self.orchestrator: DeepOrchestrator = None
@@ -358,6 +404,9 @@ class MarkdownObserver(Observer[DeepResearch]):
             output_dir_path / 'research_report.md')
 
         self.layout = self.__make_layout(self.title)
+        # The results sections for finished tasks, keyed by task name. Each one is built
+        # once, as soon as the task finishes, and reused for every later write.
+        self.task_sections: dict[str, MarkdownSection] = {}
         
         super()._after_set_system()
 
@@ -365,19 +414,33 @@ class MarkdownObserver(Observer[DeepResearch]):
         other: dict[str,any] = {},
         is_final: bool = False) -> any:
         """
-        Update the display with the current state. Because the final Markdown report 
-        is all we care about, we don't do anything unless `is_final == True`! 
+        Update the report with the current state. When `is_final == False`, the report file
+        is only rewritten when at least one more task has finished since the last update.
         """
         # self.system.logger.info(f"MarkdownDisplay._do_update(is_final={is_final})")
         
         if not is_final:
+            if self.__add_finished_task_sections():
+                self.__update_statistics()
+                self.__write_report()
             return self.layout
 
-        self.monitor.update_execution_time()
-        
         messages  = other.get('messages')
         error_msg = other.get('error_msg')
         self.__report_results(messages=messages, error_msg=error_msg)
+        self.__update_statistics()
+        
+        self.__update_final_statistics(),
+        self.__update_budget_summary(),
+        self.__update_knowledge_summary(),
+        self.__update_workspace_artifacts(),
+
+        self.__write_report()
+        return self.layout
+
+    def __update_statistics(self):
+        """Refresh the runtime statistics and objective sections."""
+        self.monitor.update_execution_time()
 
         statistics = self.layout["statistics_section"]
         statistics["queue"].set_intro_content([self.monitor.get_queue_tree()])
@@ -385,25 +448,38 @@ class MarkdownObserver(Observer[DeepResearch]):
         statistics["memory"].set_intro_content([
             self.monitor.get_memory_table(),
             self.monitor.get_knowledge_table()])
-        statistics["budget"].set_intro_content([self.monitor.get_budget_table()])
+        budget_content = [self.monitor.get_budget_table()]
+        if rate_limiters.all():
+            budget_content.append(self.monitor.get_rate_limits_table())
+        statistics["budget"].set_intro_content(budget_content)
         statistics["policy"].set_intro_content(
             [self.monitor.get_policy_table(), self.monitor.get_agents_table()])
-        statistics["status"].set_intro_content([self.monitor.get_status_summary_table()])
+        status_content = [self.monitor.get_status_summary_table()]
+        server_starter = getattr(self.system, 'server_starter', None)
+        if server_starter and server_starter.startups:
+            status_content.append(self.monitor.get_server_startup_table(server_starter))
+        statistics["status"].set_intro_content(status_content)
 
         objective = self.layout["objective_section"]
         objective.set_subsections([self.monitor.get_objective_section()])
-        
-        self.__update_final_statistics(),
-        self.__update_budget_summary(),
-        self.__update_knowledge_summary(),
-        self.__update_workspace_artifacts(),
 
-        # Save to the report file.
-        all_sections = str(self)
-        with self.research_report_path.open('w') as file:
-            file.write(all_sections)
-
-        return self.layout
+    def __write_report(self):
+        """
+        Save to the report file and any extra formats. The rendering is done here, while
+        the layout can't change, into lists of chunks, most of them the cached renderings
+        of unchanged sections, so the report is never joined into one string. The shared
+        `OutputWriter` encodes and writes them in the background, so the event loop isn't
+        blocked, even if its buffer is full. The extra formats are compressed if
+        `artifact_compression` is set. The Markdown report isn't, so it can still be viewed
+        and published as is.
+        """
+        report_path = self.research_report_path
+        compression = self.__get_var_value('artifact_compression', Compression.NONE)
+        writer = output_writer()
+        writer.write_soon(report_path, self.render_to(Chunks()))
+        for renderer in self.extra_renderers:
+            writer.write_soon(compressed_path(report_path.with_suffix(renderer.suffix), compression),
+                renderer.render(self.layout, Chunks()))
 
     async def async_update(self,
         other: dict[str,any] = {},
@@ -418,22 +494,6 @@ class MarkdownObserver(Observer[DeepResearch]):
         variable = self.system.variables.get(key)
         return variable.value if variable else default
 
-    def __parse_json(self, s: str, context: str = '', log_failure: bool = False) -> (str, list[str]):
-        try:
-            # Handle an observed problem with returned results; '\\' that will cause json
-            # parsing to fail.
-            s2 = clean_json_string(s, '')
-            obj = json.loads(s2)
-            # format as nested bullets:
-            mu = MarkdownUtil
-            md_str = mu.to_markdown(obj, bullet='*', indent='\t', key_format='**%s:**')
-            return ('', md_str)
-        except (JSONDecodeError, TypeError) as err:
-            err_msg = f"{err} raised while parsing attempting to parse {context} results."
-            if log_failure:
-                self.system.logger.warning(f"{err_msg}: input = {s}")
-            return (err_msg, None)
-
     def __make_layout(self, title: str) -> MarkdownSection:
         layout = MarkdownSection(title=title)
         
@@ -481,108 +541,42 @@ class MarkdownObserver(Observer[DeepResearch]):
         self.layout.add_subsections([section])
         return section
 
-    def __parse_openai_message(self, message_index: int, obj: any) -> list[any]:
-        # For inference with OpenAI, the results will be a ChatCompletionMessage:
-
-        def make_metadata_table_from_dict(
-            ccm: ChatCompletionMessage) -> MarkdownTable:
-            table = MarkdownTable(title=f"✉️ OpenAI/Ollama Reply Message #{message_index}: Metadata",
-                columns = [('Item', 'left'), ('Value', 'left')])
-            for key, value in ccm.to_dict().items():
-                table.add_row([key, str(value)])
-            return table
+    def __make_reply_content(self, message: ReplyMessage) -> list[any]:
+        """
+        Return the lines and elements for one reply message, which was already normalized
+        when the task finished, so no parsing of the message's string form is needed here.
+        """
+        match message.kind:
+            case ReplyKind.JSON:
+                # format as nested bullets, capping the size for huge replies:
+                mu = MarkdownUtil(max_depth=self.max_json_depth, max_lines=self.max_json_lines)
+                return mu.to_markdown(message.data, bullet='*', indent='\t', key_format='**%s:**')
+            case ReplyKind.TEXT:
+                return message.content_lines()
+            case ReplyKind.OPENAI:
+                header = f"✉️ Reply Message #{message.index} Content:"
+                table_title = f"✉️ OpenAI/Ollama Reply Message #{message.index}: Metadata"
+            case ReplyKind.ANTHROPIC:
+                header = f"**Message #{message.index} content:**"
+                table_title = f"✉️ Anthropic Reply Message #{message.index}: Metadata"
 
-        sobj = str(obj)
-        content: list[any] = []
-        metadata_table: MarkdownTable = None
-
-        if isinstance(obj, ChatCompletionMessage):
-            ccm: ChatCompletionMessage = cast(ChatCompletionMessage, obj)
-            content = ccm.content.split('\n') if ccm.content else []
-            metadata_table = make_metadata_table_from_dict(ccm)
-        elif sobj.startswith("ChatCompletion"):
-            # Is it a "str(ChatCompletion...)"? Try parsing it with the following
-            #  _ugly_ hack to extract just the `content` from the string:
-            try:
-                s2 = re.sub(r"""ChatCompletion[^=]+\s*=\s*['"]?""", '', sobj)
-                s3 = re.sub(r"""['"]?,\s*refusal\s*=.*$""", '', s2)
-                content = s3.split('\n')
-            except:  # bail out...
-                content = sobj.split('\n')
-          
         all_content: list[any] = []
+        content = message.content_lines()
         if content:
-            all_content = [f"✉️ Reply Message #{message_index} Content:"]
+            all_content = [header]
             all_content.extend(content)
             all_content.extend(['\n', "(end content)"])
-        if metadata_table:
-            all_content.append('\n')
-            all_content.append(metadata_table)
-
-        return all_content
-
-    def __parse_anthropic_message(self, message_index: int, obj: any) -> list[any]:
-        def make_metadata_table(
-            subtype: str,
-            duration_ms: int,
-            duration_api_ms: int,
-            is_error: bool,
-            num_turns: int,
-            session_id: str,
-            total_cost_usd: float | None = None,
-            usage: dict[str, any] | None = None, 
-            structured_output: any = None) -> MarkdownTable:
-            table = MarkdownTable(title=f"✉️ Anthropic Reply Message #{message_index}: Metadata",
-                columns = [('Item', 'left'), ('Value', 'right')])
-            table.add_row(['subtype', subtype])
-            table.add_row(['duration_ms', str(duration_ms)])
-            table.add_row(['duration_api_ms', str(duration_api_ms)])
-            table.add_row(['is_error', str(is_error)])
-            table.add_row(['num_turns', str(num_turns)])
-            table.add_row(['session_id', session_id])
-            table.add_row(['total_cost_usd', str(total_cost_usd)])
-            table.add_row(['usage', str(usage)])
-            table.add_row(['total_cost_usd', str(total_cost_usd)])
-            table.add_row(['structured_output', str(structured_output)])
-            return table
 
-        sobj = str(obj)
-        content: list[any] = []
-        metadata_table: MarkdownTable = None
-
-        if isinstance(obj, Message):
-            rm: Message = cast(Message, obj)
-            content = rm.result.split('\n')
-            metadata_table = make_metadata_table(
-                subtype = rm.subtype,
-                duration_ms = rm.duration_ms,
-                duration_api_ms = rm.duration_api_ms,
-                is_error = rm.is_error,
-                num_turns = rm.num_turns,
-                session_id = rm.session_id,
-                total_cost_usd = rm.total_cost_usd,
-                usage = rm.usage,
-                result = rm.result,
-                structured_output = rm.structured_output)
-        elif sobj.startswith("Message") or sobj.startswith("ResultMessage"):
-            # Try parsing it with the following _ugly_ hack to extract just the
-            # `content` from the string:
-            try:
-                s2 = re.sub(r"""(Result)?Message\([^=]+)\s*=\s*['"]""", '', sobj)
-                s3 = re.sub(r"""^.*\s*result=(.*)""", 'result:\n', s2)
-                s4 = re.sub('structured_output=', '\nstructured_output:\n', s3)
-                content = s4.split('\n')
-            except:  # bail out...
-                content = results.split('\n')
-
-        all_content: list[any] = []
-        if content:
-            all_content = [f"**Message #{message_index} content:**"]
-            all_content.extend(content)
-            all_content.extend(['\n', "(end content)"])
-        if metadata_table:
+        rows = [[key, str(value)] for key, value in message.metadata.items()]
+        if message.usage:
+            rows.append(['usage', str(message.usage)])
+        for i, tool_call in enumerate(message.tool_calls):
+            rows.append([f"tool call #{i+1}", str(tool_call)])
+        if rows:
             all_content.append('\n')
-            all_content.append(metadata_table)
+            table = MarkdownTable(title=table_title, columns=[('Item', 'left'), ('Value', 'left')])
+            table.add_rows(rows)
+            all_content.append(table)
 
         return all_content
 
@@ -603,26 +597,45 @@ class MarkdownObserver(Observer[DeepResearch]):
             return result_section
 
         subsections: list[MarkdownSection] = []
-        for i in range(len(task.result)):
-            content: list[any] = []
-            result = task.result[i]
-            result_content = self.__parse_openai_message(i+1, result)
-            if not result_content:
-                result_content = self.__parse_anthropic_message(i+1, result)
-                if not result_content:
-                    # Try parsing as JSON, although it probably isn't JSON...
-                    (err_msg, result_content) = self.__parse_json(str(result))
-                    if not result_content: # not JSON, so just split the text.
-                        result_content = str(result).split('\n')
-
-            content.extend([f"> {line}" for line in result_content])
-
-            ss = MarkdownSection(title=f"✉️ Reply Message #{i+1}", content=content)
+        for message in task.replies:
+            # Quote the lines of text, but keep elements like tables as they are.
+            content = [item if isinstance(item, MarkdownElement) else f"> {item}" 
+                for item in self.__make_reply_content(message)]
+            ss = MarkdownSection(title=f"✉️ Reply Message #{message.index}", content=content)
             subsections.append(ss)
 
         result_section.add_subsections(subsections)
         return result_section
 
+    def __get_task_section(self, task_number: int, task: BaseTask) -> MarkdownSection:
+        """Return the cached results section for a task, building it if necessary."""
+        section = self.task_sections.get(task.name)
+        if not section:
+            section = self.__make_task_results_section(task_number, task)
+            self.task_sections[task.name] = section
+        return section
+
+    def __add_finished_task_sections(self) -> bool:
+        """
+        Add the results sections for any tasks that have finished since the last call.
+        Returns `True` if at least one section was added.
+        """
+        finished = {TaskStatus.FINISHED_OK, TaskStatus.FINISHED_ERROR, TaskStatus.FINISHED_EXCEPTION}
+        new_sections = []
+        for i in range(len(self.system.tasks)):
+            task = self.system.tasks[i]
+            if task.status in finished and task.name not in self.task_sections:
+                new_sections.append(self.__get_task_section(i+1, task))
+        if not new_sections:
+            return False
+
+        results_section = self.layout["results_section"]
+        results_section.add_subsections(new_sections)
+        results_section.set_intro_content([
+            "This section provides the research results.",
+            f"In progress... ({len(self.task_sections)} of {len(self.system.tasks)} tasks finished)"])
+        return True
+
     def __report_results(self, messages: list[str] = [], error_msg: str = None):
         output_dir_path_msg = ''
         odp = self.__get_var_value('output_dir_path', None)
@@ -649,10 +662,11 @@ class MarkdownObserver(Observer[DeepResearch]):
         results_subsections = []
         for i in range(len(self.system.tasks)):
             task = self.system.tasks[i]
-            s = self.__make_task_results_section(i+1, task)
+            s = self.__get_task_section(i+1, task)
             results_subsections.append(s)
 
-        results_section.add_subsections(results_subsections)
+        # Some of these sections may already have been added by earlier checkpoints.
+        results_section.set_subsections(results_subsections)
 
     def __update_final_statistics(self) -> MarkdownSection:
         """Update the final statistics for display"""
@@ -740,7 +754,7 @@ class MarkdownObserver(Observer[DeepResearch]):
 
         return self.add_section("📁 Artifacts Created", artifacts_info)
 
-    def __repr__(self) -> str:
+    def __make_yaml_header(self) -> str:
         yaml_header_str = ''
         if self.yaml_header_template:
             with self.yaml_header_template.open('r') as file: 
@@ -749,4 +763,16 @@ class MarkdownObserver(Observer[DeepResearch]):
                 yaml_header_str = replace_variables(template_str, 
                     title=self.title, 
                     **self.system.variables)
-        return f"{yaml_header_str}\n{self.layout}"
+        return yaml_header_str
+
+    def render_to(self, stream: TextIO) -> TextIO:
+        """
+        Write the report to `stream`, e.g., an open file. The output is identical to `str(self)`,
+        but the sections are written one chunk at a time. See `MarkdownElement.render_to()`.
+        """
+        stream.write(self.__make_yaml_header())
+        stream.write('\n')
+        return self.layout.render_to(stream)
+
+    def __repr__(self) -> str:
+        return f"{self.__make_yaml_header()}\n{self.layout}"
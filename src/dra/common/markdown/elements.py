@@ -12,10 +12,7 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable
-
-from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
-from mcp_agent.workflows.deep_orchestrator.config import DeepOrchestratorConfig
+from typing import Callable, Iterable, Iterator, Sequence, TextIO
 
 from dra.common.utils.strings import to_id
 
@@ -24,12 +21,77 @@ class MarkdownElement():
     Note: There are places in subtype method signatures where `MarkdownElement`
     is used, but really the type itself should be used. It appears that Python
     doesn't allow self-references to a type _while inside_ its definition!
+
+    `str(element)` caches the rendered string. Assigning any public attribute, or calling
+    the methods that add or replace content, rows, or children, discards the cached
+    string for the element and for all the elements that contain it (its "parents"),
+    so unchanged elements aren't rendered again. If you mutate a list or dict attribute
+    in place, e.g., `table.rows.append(...)`, call `invalidate()` yourself afterwards.
     """
     def __init__(self, title: str = ''):
+        self._rendered: str | None = None
+        self._parents: list[MarkdownElement] = []
         self.title = title
 
+    def __setattr__(self, name: str, value: any):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self.invalidate()
+
+    def invalidate(self):
+        """Discard the cached rendering of this element and of all the elements containing it."""
+        # Use __dict__ because this can be called before __init__ has finished.
+        pending = [self]
+        while pending:
+            element = pending.pop()
+            element.__dict__['_rendered'] = None
+            pending.extend(element.__dict__.get('_parents', []))
+
+    def _adopt(self, child: MarkdownElement):
+        """Record that `child` is now part of this element, so changes to it invalidate us."""
+        child._parents.append(self)
+
+    def _release(self, child: MarkdownElement):
+        """Undo `_adopt()`. We compare by identity, since `__eq__` compares by value."""
+        for i, parent in enumerate(child._parents):
+            if parent is self:
+                del child._parents[i]
+                return
+
+    def render_chunks(self) -> Iterator[str]:
+        """
+        Yield the rendered Markdown as a sequence of string chunks. Concatenating the
+        chunks produces exactly the same string as `str(element)`, but without building
+        the whole document in memory first. If the element has a cached rendering from
+        a previous `str()` call, it is yielded as a single chunk. Otherwise, this method
+        doesn't fill the cache, so streaming a large document doesn't keep a copy of it.
+        """
+        if self._rendered is not None:
+            yield self._rendered
+        else:
+            yield from self._render_chunks(memoize=False)
+
+    def _render_chunks(self, memoize: bool) -> Iterator[str]:
+        """
+        Subtypes override this method, not `render_chunks()` or `__repr__()`. When `memoize`
+        is true, nested elements should be rendered with `str()`, so their renderings are
+        cached, too. Otherwise, use their `render_chunks()`.
+        """
+        yield self.title
+
+    def render_to(self, stream: TextIO) -> TextIO:
+        """
+        Write the rendered Markdown to `stream`, e.g., an open file, one chunk at a time.
+        Returns the stream for convenience.
+        """
+        for chunk in self.render_chunks():
+            stream.write(chunk)
+        return stream
+
     def __repr__(self) -> str:
-        return self.title
+        if self._rendered is None:
+            self._rendered = ''.join(self._render_chunks(memoize=True))
+        return self._rendered
 
     def __eq__(self, other: any) -> bool:
         if not isinstance(other, MarkdownElement):
@@ -68,6 +130,8 @@ class MarkdownSection(MarkdownElement):
         will be rendered _below_ the content at the top.
         Don't pass `MarkdownSections` as `content`; use the `subsections` instead.
         """
+        for item in self.content:
+            self._release(item)
         self.content = []
         self.add_intro_content(content)
 
@@ -81,10 +145,11 @@ class MarkdownSection(MarkdownElement):
         for item in content:
             if isinstance(item, MarkdownSection):
                 raise ValueError(f"Don't pass MarkdownSections as intro content. Use add/set_subsections instead! item = {item}")
-            elif isinstance(item, MarkdownElement):
-                self.content.append(item)
-            else:
-                self.content.append(MarkdownElement(title=str(item)))
+            elif not isinstance(item, MarkdownElement):
+                item = MarkdownElement(title=str(item))
+            self.content.append(item)
+            self._adopt(item)
+        self.invalidate()
 
     def set_subsections(self, subsections: dict[str, MarkdownSection] | list[MarkdownSection]):
         """
@@ -92,6 +157,8 @@ class MarkdownSection(MarkdownElement):
         NOTE: All the levels will be reset to to the parent's level + 1, unless they
         are already >= level+1!
         """
+        for s in self.subsections.values():
+            self._release(s)
         self.subsections = {}
         self.add_subsections(subsections)
         
@@ -127,10 +194,17 @@ class MarkdownSection(MarkdownElement):
             raise ValueError(error)
 
         self.subsections.update(ss)
+        for s in ss.values():
+            self._adopt(s)
+        self.invalidate()
         self._fix_levels()
 
     def clear(self):
         """Remove the leading content and subsections."""
+        for item in self.content:
+            self._release(item)
+        for s in self.subsections.values():
+            self._release(s)
         self.content = []
         self.subsections = {}
 
@@ -151,7 +225,12 @@ class MarkdownSection(MarkdownElement):
         While you can replace a subsection this way, you can also just fetch
         the items with `my_section['foo']` and edit it directly.
         """
+        old = self.subsections.get(key)
+        if old is not None:
+            self._release(old)
         self.subsections[key] = item
+        self._adopt(item)
+        self.invalidate()
 
     def __getitem__(self, key: str) -> MarkdownElement:
         """
@@ -161,13 +240,29 @@ class MarkdownSection(MarkdownElement):
         """
         return self.subsections[key]
  
-    def __repr__(self) -> str:
-        def ss(key: str, subsection: MarkdownSection) -> str:
-            return f"""<a id="{to_id(key)}"></a>\n\n{subsection}\n"""
-
-        content_str = '\n'.join([str(c) for c in self.content])
-        subsections_str = '\n'.join([ss(k,s) for k,s in self.subsections.items()])
-        return f"{self.level*'#'} {self.title}\n\n{content_str}\n{subsections_str}"
+    def _render_chunks(self, memoize: bool) -> Iterator[str]:
+        """
+        Yield the section header, the intro content, and then each subsection, recursively.
+        Each subsection is preceded by an anchor, so links like `[foo](#key)` work.
+        """
+        def render(element: MarkdownElement) -> Iterator[str]:
+            if memoize:
+                yield str(element)
+            else:
+                yield from element.render_chunks()
+
+        yield f"{self.level*'#'} {self.title}\n\n"
+        for i, c in enumerate(self.content):
+            if i > 0:
+                yield '\n'
+            yield from render(c)
+        yield '\n'
+        for i, (key, subsection) in enumerate(self.subsections.items()):
+            if i > 0:
+                yield '\n'
+            yield f"""<a id="{to_id(key)}"></a>\n\n"""
+            yield from render(subsection)
+            yield '\n'
 
     def __eq__(self, other: any) -> bool:
         if not isinstance(other, MarkdownSection):
@@ -177,13 +272,61 @@ class MarkdownSection(MarkdownElement):
             and self.subsections == other.subsections
         
 class MarkdownTable(MarkdownElement):
-    def __init__(self, title: str = '', columns: list[str] | list[tuple[str,str]] = []):
+    def __init__(self, 
+        title: str = '', 
+        columns: list[str] | list[tuple[str,str]] = [],
+        aligned: bool = False):
+        """
+        Construct a table with an optional title and columns. See `add_columns()` for the
+        column specifications. If `aligned` is `True`, the cells are padded so the columns
+        line up when the Markdown is viewed as plain text. This costs an extra pass over the
+        cells to compute the column widths, so it is off by default.
+        See also the `from_records()` and `from_columns()` constructors.
+        """
         super().__init__(title)
         self.columns: [str] = []
         self.columns_justifications: [str] = []
         self.rows = []
+        self.aligned = aligned
+        self._column_names: frozenset[str] = frozenset()
         self.add_columns(columns)
 
+    @classmethod
+    def from_records(cls, 
+        records: Iterable[dict[str,any]], 
+        title: str = '',
+        columns: list[str] | list[tuple[str,str]] = None,
+        aligned: bool = False) -> MarkdownTable:
+        """
+        Construct a table from dictionaries, one per row. If `columns` is `None`, the
+        columns are the keys found in the records, in the order they are first seen.
+        Missing values are rendered as empty cells.
+        """
+        records = list(records)
+        if columns is None:
+            columns = list(dict.fromkeys(key for record in records for key in record))
+        table = cls(title, columns, aligned=aligned)
+        table.add_rows(records)
+        return table
+
+    @classmethod
+    def from_columns(cls, 
+        data: dict[str, Sequence[any]], 
+        title: str = '',
+        justifications: dict[str,str] = {},
+        aligned: bool = False) -> MarkdownTable:
+        """
+        Construct a table from a dictionary of column names to sequences of cell values,
+        which must all have the same length. Optionally pass `justifications` for some or
+        all of the columns (see `add_columns()`); the rest are left justified.
+        """
+        lengths = set(len(values) for values in data.values())
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same number of values. Lengths = <{dict((k, len(v)) for k, v in data.items())}>")
+        table = cls(title, [(name, justifications.get(name, 'left')) for name in data.keys()], aligned=aligned)
+        table.add_rows(zip(*data.values()))
+        return table
+
     def add_columns(self, columns: list[str] | list[tuple[str,str]]):
         """
         Append one or more columns to the list of columns.
@@ -209,6 +352,8 @@ class MarkdownTable(MarkdownElement):
                 self.columns_justifications.extend([MarkdownTable.justify(c[0], c[1]) for c in columns])
             case s:
                 raise ValueError(f"Bad type for input columns: {type(columns)} ('{s}' was returned by __which_types()) (columns = {columns})")
+        self._column_names = frozenset(self.columns)
+        self.invalidate()
 
     def add_row(self, row: list[any] | list[tuple[str,any]] | dict[str,any]):
         """
@@ -227,16 +372,55 @@ class MarkdownTable(MarkdownElement):
                 self.rows.append(self.row_dict_to_list(dict(row)))
             case 'dict':
                 self.rows.append(self.row_dict_to_list(row))
+        self.invalidate()
+
+    def add_rows(self, rows: Iterable[Sequence[any] | list[tuple[str,any]] | dict[str,any]]) -> int:
+        """
+        Add many rows at once, which is much faster than calling `add_row()` for each one,
+        because the rows are validated together. All the rows must be of the same kind, 
+        which is determined from the first row:
+        * A `dict` or a list of `(column, value)` tuples, as for `add_row()`.
+        * Any other sequence of values (of any type), e.g., a list or a tuple, which must have 
+          one value per column.
+        If any row is invalid, a `ValueError` is raised and no rows are added.
+        Returns the number of rows added.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        first = rows[0]
+        if isinstance(first, dict):
+            if not all(isinstance(row, dict) for row in rows):
+                raise ValueError("add_rows(): When the first row is a dict, all rows must be dicts.")
+            new_rows = self.__dicts_to_lists(rows)
+        elif isinstance(first, list) and len(first) > 0 and type(first[0]) is tuple:
+            new_rows = self.__dicts_to_lists([dict(row) for row in rows])
+        else:
+            num_columns = len(self.columns)
+            bad_rows = [i for i, row in enumerate(rows) if len(row) != num_columns]
+            if bad_rows:
+                raise ValueError(f"add_rows(): Wrong number of cells in rows at indices <{bad_rows[:10]}>. Expected {num_columns}.")
+            new_rows = [list(row) for row in rows]
+        self.rows.extend(new_rows)
+        self.invalidate()
+        return len(new_rows)
 
     def row_dict_to_list(self, row_dict: dict[str,any]) -> list[any]:
         # Check that no unknown columns are specified.
-        names = set(self.columns)
-        keys = set(row_dict.keys())
-        if names.union(keys) != names:
+        if not self._column_names.issuperset(row_dict):
+            names = set(self.columns)
+            keys = set(row_dict.keys())
             raise ValueError(f"At least one unexpected column name <{keys}> that isn't in the set of columns = <{names}>")
         new_row = [row_dict.get(name, '') for name in self.columns]
         return new_row
 
+    def __dicts_to_lists(self, row_dicts: list[dict[str,any]]) -> list[list[any]]:
+        """Like `row_dict_to_list()`, but the keys of all the rows are checked at once."""
+        unknown = set().union(*row_dicts) - self._column_names
+        if unknown:
+            raise ValueError(f"At least one unexpected column name <{unknown}> that isn't in the set of columns = <{set(self.columns)}>")
+        return [[row_dict.get(name, '') for name in self.columns] for row_dict in row_dicts]
+
     justifications = {'left', 'center', 'full', 'right', '', None}
 
     def is_justification(value: str) -> bool:
@@ -256,18 +440,77 @@ class MarkdownTable(MarkdownElement):
                 case 'center' | 'full':
                     return f':{dashes}:'
 
-    def __repr__(self) -> str:
+    def justification_of(justification_str: str) -> str:
+        """
+        The inverse of `justify()`: recover `left`, `right`, or `center` from the
+        Markdown syntax, e.g., `--:` is right justified.
+        """
+        if justification_str.startswith(':') and justification_str.endswith(':'):
+            return 'center'
+        elif justification_str.endswith(':'):
+            return 'right'
+        else:
+            return 'left'
+
+    def _render_chunks(self, memoize: bool) -> Iterator[str]:
+        """Yield the optional title, the header rows, and then one chunk per row."""
+        if len(self.columns) == 0:
+            return
+
         title_str = '\n\n'
         if len(self.title) > 0:
             title_str = f"\n**Table: {self.title}**\n\n"
-
-        if len(self.columns) == 0:
-            return ''
-        else:
-            columns_str = self.__make_row(self.columns)
-            columns_justifications_str = self.__make_row(self.columns_justifications)
-            rows_strs = [ self.__make_row(row) for row in self.rows ]
-            return f"{title_str}{columns_str}\n{columns_justifications_str}\n{'\n'.join(rows_strs)}\n"
+        yield title_str
+        if self.aligned:
+            yield from self.__render_aligned_rows()
+            return
+        yield f"{self.__make_row(self.columns)}\n"
+        yield f"{self.__make_row(self.columns_justifications)}\n"
+        for i, row in enumerate(self.rows):
+            if i > 0:
+                yield '\n'
+            yield self.__make_row(row)
+        yield '\n'
+
+    def __render_aligned_rows(self) -> Iterator[str]:
+        """
+        Yield the header rows and the rows padded to fixed column widths. Each cell is
+        converted to a string once, then the widths are computed column by column.
+        """
+        cells = [[str(v) for v in row] for row in self.rows]
+        widths = [max(3, max(len(c) for c in column)) for column in zip(self.columns, *cells)]
+
+        justs = [MarkdownTable.justification_of(cj) for cj in self.columns_justifications]
+
+        def pad(values: list[str]) -> str:
+            padded = []
+            for value, width, just in zip(values, widths, justs):
+                match just:
+                    case 'right':
+                        padded.append(value.rjust(width))
+                    case 'center':
+                        padded.append(value.center(width))
+                    case _:
+                        padded.append(value.ljust(width))
+            return self.__make_row(padded)
+
+        separators = []
+        for width, just in zip(widths, justs):
+            match just:
+                case 'right':
+                    separators.append(f"{'-'*(width-1)}:")
+                case 'center':
+                    separators.append(f":{'-'*(width-2)}:")
+                case _:
+                    separators.append(f":{'-'*(width-1)}")
+
+        yield f"{pad(self.columns)}\n"
+        yield f"{self.__make_row(separators)}\n"
+        for i, row in enumerate(cells):
+            if i > 0:
+                yield '\n'
+            yield pad(row)
+        yield '\n'
 
     def __which_type(self, values: list[str] | list[tuple[str,any]] | dict[str,any]) -> str | None:
         def type_error():
@@ -341,6 +584,8 @@ class MarkdownTree(MarkdownElement):
             
         c = to_tree(child)
         self.children.append(c)
+        self._adopt(c)
+        self.invalidate()
         return c
 
     def add_children(self, children: list[MarkdownElement | str]) -> list[MarkdownElement]:
@@ -364,17 +609,26 @@ class MarkdownTree(MarkdownElement):
             return check(third)
 
     def as_strs(self, level: int, parent_bullet: str, parent_indent: str) -> list[str]:
+        return list(self.iter_strs(level, parent_bullet, parent_indent))
+
+    def iter_strs(self, level: int, parent_bullet: str, parent_indent: str) -> Iterator[str]:
+        """Like `as_strs()`, but yields the lines one at a time, depth first."""
         bullet = self.get_bullet(default=parent_bullet)
         indent = self.get_indentation(default=parent_indent)
         indent_str = level*indent
-        lines = [f"{indent_str}{bullet} {self.label}"]
+        yield f"{indent_str}{bullet} {self.label}"
         for child in self.children:
-            lines.extend(child.as_strs(level+1, parent_bullet, parent_indent))
-        return lines
-        #return [f"{indent_str}{line}" for line in lines]
+            yield from child.iter_strs(level+1, parent_bullet, parent_indent)
 
-    def __repr__(self) -> str:
-        return "\n".join(self.as_strs(0, self.bullet, self.indentation))
+    def _render_chunks(self, memoize: bool) -> Iterator[str]:
+        """
+        Yield one chunk per bullet line, with newlines between them. The children inherit
+        the bullet and indentation of the root, so they aren't cached separately.
+        """
+        for i, line in enumerate(self.iter_strs(0, self.bullet, self.indentation)):
+            if i > 0:
+                yield '\n'
+            yield line
 
     number_re = re.compile(r'^\d+$')
     letter_re = re.compile(r'^\W$')
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Renderers that write a tree of `MarkdownElements` in different formats, so one report
+tree can be emitted as Markdown, HTML, and JSON without rebuilding it or re-parsing the Markdown.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import html
+import json
+from abc import abstractmethod
+from typing import TextIO
+
+from dra.common.utils.strings import to_id
+from dra.common.markdown.elements import (
+    MarkdownElement,
+    MarkdownSection,
+    MarkdownTable,
+    MarkdownTree)
+
+class Renderer():
+    """
+    Base class for renderers. `render()` walks the element tree once, depth first,
+    writing to the stream as it goes. Subclasses implement one method per kind of element.
+    Plain `MarkdownElements`, which just wrap a string, are rendered with `_text()`.
+    """
+
+    """The file name suffix for this format, e.g., `.html`."""
+    suffix = ''
+
+    def render(self, element: MarkdownElement, stream: TextIO) -> TextIO:
+        """Write `element` and all its descendants to `stream`, then return the stream."""
+        self._render(element, stream)
+        return stream
+
+    def _render(self, element: MarkdownElement, stream: TextIO):
+        match element:
+            case MarkdownSection():
+                self._section(element, stream)
+            case MarkdownTable():
+                self._table(element, stream)
+            case MarkdownTree():
+                self._tree(element, stream)
+            case _:
+                self._text(element, stream)
+
+    @abstractmethod
+    def _section(self, section: MarkdownSection, stream: TextIO):
+        raise Exception("Abstract method Renderer._section() called!")
+
+    @abstractmethod
+    def _table(self, table: MarkdownTable, stream: TextIO):
+        raise Exception("Abstract method Renderer._table() called!")
+
+    @abstractmethod
+    def _tree(self, tree: MarkdownTree, stream: TextIO):
+        raise Exception("Abstract method Renderer._tree() called!")
+
+    @abstractmethod
+    def _text(self, element: MarkdownElement, stream: TextIO):
+        raise Exception("Abstract method Renderer._text() called!")
+
+class MarkdownRenderer(Renderer):
+    """
+    Writes Markdown. The elements already know how to render themselves and cache
+    the results, so this renderer just delegates to `MarkdownElement.render_to()`.
+    """
+
+    suffix = '.md'
+
+    def _render(self, element: MarkdownElement, stream: TextIO):
+        element.render_to(stream)
+
+    def _section(self, section: MarkdownSection, stream: TextIO):
+        section.render_to(stream)
+
+    def _table(self, table: MarkdownTable, stream: TextIO):
+        table.render_to(stream)
+
+    def _tree(self, tree: MarkdownTree, stream: TextIO):
+        tree.render_to(stream)
+
+    def _text(self, element: MarkdownElement, stream: TextIO):
+        element.render_to(stream)
+
+class HTMLRenderer(Renderer):
+    """
+    Writes HTML. Sections become `<section>` elements with an `id` attribute matching
+    the Markdown anchors, so links like `#key` work in both formats. Tables become `<table>`
+    elements and trees become nested lists. The text of plain elements is escaped,
+    but any Markdown syntax inside it is not converted.
+    """
+
+    suffix = '.html'
+
+    def __init__(self, full_document: bool = True):
+        """
+        If `full_document` is `True`, wrap the output in `<html>` and `<body>` elements,
+        using the title of the top-level element as the document title.
+        """
+        self.full_document = full_document
+
+    def render(self, element: MarkdownElement, stream: TextIO) -> TextIO:
+        if not self.full_document:
+            return super().render(element, stream)
+        title = html.escape(str(element.title))
+        stream.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n</head>\n<body>\n")
+        self._render(element, stream)
+        stream.write("</body>\n</html>\n")
+        return stream
+
+    def _section(self, section: MarkdownSection, stream: TextIO, key: str = None):
+        id_attr = f' id="{html.escape(to_id(key))}"' if key else ''
+        h = min(section.level, 6)
+        stream.write(f"<section{id_attr}>\n<h{h}>{html.escape(str(section.title))}</h{h}>\n")
+        for c in section.content:
+            self._render(c, stream)
+        for key, subsection in section.subsections.items():
+            self._section(subsection, stream, key)
+        stream.write("</section>\n")
+
+    def _table(self, table: MarkdownTable, stream: TextIO):
+        if len(table.columns) == 0:
+            return
+        styles = [f' style="text-align: {MarkdownTable.justification_of(cj)}"'
+            for cj in table.columns_justifications]
+        stream.write("<table>\n")
+        if table.title:
+            stream.write(f"<caption>{html.escape(str(table.title))}</caption>\n")
+        stream.write("<thead>\n<tr>")
+        for name, style in zip(table.columns, styles):
+            stream.write(f"<th{style}>{html.escape(str(name))}</th>")
+        stream.write("</tr>\n</thead>\n<tbody>\n")
+        for row in table.rows:
+            stream.write("<tr>")
+            for value, style in zip(row, styles):
+                stream.write(f"<td{style}>{html.escape(str(value))}</td>")
+            stream.write("</tr>\n")
+        stream.write("</tbody>\n</table>\n")
+
+    def _tree(self, tree: MarkdownTree, stream: TextIO, parent_bullet: str = None):
+        """Like `MarkdownTree.iter_strs()`, the children inherit the root's bullet."""
+        bullet = tree.get_bullet(default=parent_bullet)
+        if parent_bullet is None:
+            stream.write(self.__list_tag(bullet, 'open'))
+        stream.write(f"<li>{html.escape(str(tree.label))}")
+        if tree.children:
+            stream.write('\n')
+            stream.write(self.__list_tag(bullet, 'open'))
+            for child in tree.children:
+                self._tree(child, stream, parent_bullet=bullet)
+            stream.write(self.__list_tag(bullet, 'close'))
+        stream.write("</li>\n")
+        if parent_bullet is None:
+            stream.write(self.__list_tag(bullet, 'close'))
+
+    def __list_tag(self, bullet: str, which: str) -> str:
+        tag = 'ol' if MarkdownTree.number_re.match(bullet) else 'ul'
+        return f"<{tag}>\n" if which == 'open' else f"</{tag}>\n"
+
+    def _text(self, element: MarkdownElement, stream: TextIO):
+        text = html.escape(str(element.title)).replace('\n', '<br>\n')
+        stream.write(f"<p>{text}</p>\n")
+
+class JSONRenderer(Renderer):
+    """
+    Writes one compact JSON object per element, so downstream tools can read the report
+    data, e.g., the table rows, without parsing Markdown. The objects have a `type` field:
+    * `section`: `title`, `level`, `content` (a list of objects), and `subsections` (an object
+      of section objects keyed by the subsection keys).
+    * `table`: `title`, `columns`, `justifications` (`left`, `right`, or `center`), and `rows`
+      (a list of lists of cell values).
+    * `tree`: `label`, `bullet`, and `children` (a list of tree objects).
+    * `text`: `text`.
+    Cell values that aren't JSON types are converted with `str()`.
+    """
+
+    suffix = '.json'
+
+    def __dump(self, value: any) -> str:
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    def _section(self, section: MarkdownSection, stream: TextIO):
+        stream.write(f'{{"type": "section", "title": {self.__dump(section.title)}, "level": {section.level}, "content": [')
+        for i, c in enumerate(section.content):
+            if i > 0:
+                stream.write(', ')
+            self._render(c, stream)
+        stream.write('], "subsections": {')
+        for i, (key, subsection) in enumerate(section.subsections.items()):
+            if i > 0:
+                stream.write(', ')
+            stream.write(f'{self.__dump(key)}: ')
+            self._render(subsection, stream)
+        stream.write('}}')
+
+    def _table(self, table: MarkdownTable, stream: TextIO):
+        justifications = [MarkdownTable.justification_of(cj) for cj in table.columns_justifications]
+        stream.write(f'{{"type": "table", "title": {self.__dump(table.title)}, "columns": {self.__dump(table.columns)}, "justifications": {self.__dump(justifications)}, "rows": [')
+        for i, row in enumerate(table.rows):
+            if i > 0:
+                stream.write(', ')
+            stream.write(self.__dump(row))
+        stream.write(']}')
+
+    def _tree(self, tree: MarkdownTree, stream: TextIO):
+        stream.write(f'{{"type": "tree", "label": {self.__dump(tree.label)}, "bullet": {self.__dump(tree.bullet)}, "children": [')
+        for i, child in enumerate(tree.children):
+            if i > 0:
+                stream.write(', ')
+            self._tree(child, stream)
+        stream.write(']}')
+
+    def _text(self, element: MarkdownElement, stream: TextIO):
+        stream.write(f'{{"type": "text", "text": {self.__dump(element.title)}}}')
+
+"""The supported formats and their renderers."""
+renderers: dict[str, type[Renderer]] = {
+    'markdown': MarkdownRenderer,
+    'html':     HTMLRenderer,
+    'json':     JSONRenderer,
+}
+
+def make_renderer(format: str) -> Renderer:
+    """Return a new renderer for `format`, one of the keys in `renderers`."""
+    renderer_class = renderers.get(format)
+    if not renderer_class:
+        raise ValueError(f"Unknown report format: {format}. Known formats: {list(renderers.keys())}")
+    return renderer_class()
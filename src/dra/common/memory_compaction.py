@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Compact the Deep Orchestrator's memory when its estimated size exceeds a threshold, so
+the knowledge and task results accumulated during long runs don't inflate every later prompt.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import dataclasses
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # mcp_agent is slow to import, so it is imported when first used.
+    from mcp_agent.workflows.deep_orchestrator.memory import WorkspaceMemory
+    from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem, TaskResult
+
+class CompactionStats():
+    """The sizes of the memory before and after the most recent compaction."""
+
+    metadata_key = 'compaction'
+
+    def __init__(self,
+        compactions: int,
+        tokens_before: int,
+        tokens_after: int,
+        knowledge_before: int,
+        knowledge_after: int,
+        task_results_before: int,
+        task_results_after: int,
+        timestamp: datetime | None = None):
+        self.compactions = compactions
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.knowledge_before = knowledge_before
+        self.knowledge_after = knowledge_after
+        self.task_results_before = task_results_before
+        self.task_results_after = task_results_after
+        self.timestamp = timestamp if timestamp else datetime.now(timezone.utc)
+
+    @staticmethod
+    def of(memory: WorkspaceMemory) -> CompactionStats | None:
+        """Return the stats stored in the memory's metadata, if it has been compacted."""
+        return memory.metadata.get(CompactionStats.metadata_key)
+
+    def __repr__(self) -> str:
+        return f"CompactionStats(compactions = {self.compactions}, tokens = {self.tokens_before} -> {self.tokens_after}, knowledge = {self.knowledge_before} -> {self.knowledge_after}, task_results = {self.task_results_before} -> {self.task_results_after})"
+
+class MemoryCompactor():
+    """
+    When `WorkspaceMemory.estimate_context_size()` exceeds `threshold_tokens`, deduplicate
+    and summarize the memory in place:
+
+    * Knowledge items with the same category and key, ignoring case and white space, are
+      reduced to the most confident one, with ties going to the most recent.
+    * Long knowledge values are truncated to `max_value_chars`.
+    * Only the latest result is kept for each task, e.g., after retries.
+    * The outputs of all but the `keep_recent_results` latest task results are truncated to
+      `max_output_chars`.
+    * If the memory is still over `target_tokens`, which defaults to three quarters of the
+      threshold, the least confident knowledge items, oldest first, are dropped until it fits.
+
+    Unlike the orchestrator's own `trim_for_context()`, which only drops items once a much
+    larger limit is reached, distinct items are dropped only when the rest can't get the memory
+    under the threshold. The items as they were before any compaction, including the dropped
+    ones, are remembered, and `full_knowledge()` returns them, e.g., to persist the knowledge
+    without the truncated values or the losses of the compaction. After a compaction, `maybe_compact()` waits until the memory has grown
+    by `regrowth_tokens`, which defaults to a tenth of the threshold, past its compacted size,
+    so memory that can't shrink further isn't compacted again on every call. The stats for
+    the compaction are stored in `memory.metadata`, where the monitors find them.
+    """
+
+    def_threshold_tokens = 20000
+    def_max_value_chars = 400
+    def_max_output_chars = 500
+    def_keep_recent_results = 5
+
+    def __init__(self,
+        threshold_tokens: int = def_threshold_tokens,
+        max_value_chars: int = def_max_value_chars,
+        max_output_chars: int = def_max_output_chars,
+        keep_recent_results: int = def_keep_recent_results,
+        target_tokens: int | None = None,
+        regrowth_tokens: int | None = None):
+        if threshold_tokens <= 0:
+            raise ValueError(f"threshold_tokens must be positive: {threshold_tokens}")
+        if target_tokens is None:
+            target_tokens = threshold_tokens * 3 // 4
+        if not 0 < target_tokens <= threshold_tokens:
+            raise ValueError(f"target_tokens must be positive and at most threshold_tokens ({threshold_tokens}): {target_tokens}")
+        if regrowth_tokens is None:
+            regrowth_tokens = threshold_tokens // 10
+        if regrowth_tokens < 0:
+            raise ValueError(f"regrowth_tokens can't be negative: {regrowth_tokens}")
+        self.threshold_tokens = threshold_tokens
+        self.max_value_chars = max_value_chars
+        self.max_output_chars = max_output_chars
+        self.keep_recent_results = keep_recent_results
+        self.target_tokens = target_tokens
+        self.regrowth_tokens = regrowth_tokens
+        self.compactions = 0
+        self.last_tokens_after: int | None = None
+        # The original of each summarized item, with the summary, by the summary's id.
+        self.originals: dict[int, tuple[KnowledgeItem, KnowledgeItem]] = {}
+        # The originals of the items dropped from the memory.
+        self.dropped: list[KnowledgeItem] = []
+
+    def maybe_compact(self, memory: WorkspaceMemory) -> CompactionStats | None:
+        """
+        Compact `memory` if it is over the threshold and, after an earlier compaction, has
+        grown by `regrowth_tokens` since then. Returns the stats if it was compacted.
+        """
+        tokens = memory.estimate_context_size()
+        if tokens <= self.threshold_tokens:
+            return None
+        if self.last_tokens_after is not None and tokens <= self.last_tokens_after + self.regrowth_tokens:
+            return None
+        return self.compact(memory)
+
+    def compact(self, memory: WorkspaceMemory) -> CompactionStats:
+        """Compact `memory` unconditionally and return the stats."""
+        tokens_before = memory.estimate_context_size()
+        knowledge_before = len(memory.knowledge)
+        task_results_before = len(memory.task_results)
+
+        memory.knowledge = self.__compact_knowledge(memory.knowledge)
+        memory.task_results = self.__compact_task_results(memory.task_results)
+        excess_tokens = memory.estimate_context_size() - self.target_tokens
+        if excess_tokens > 0:
+            kept = MemoryCompactor.__drop_knowledge(memory.knowledge, excess_tokens)
+            kept_ids = {id(item) for item in kept}
+            for item in memory.knowledge:
+                if id(item) not in kept_ids:
+                    self.dropped.append(self.original(item))
+                    self.originals.pop(id(item), None)
+            memory.knowledge = kept
+        memory.knowledge_by_category.clear()
+        for item in memory.knowledge:
+            memory.knowledge_by_category[item.category].append(item)
+
+        self.compactions += 1
+        self.last_tokens_after = memory.estimate_context_size()
+        stats = CompactionStats(self.compactions,
+            tokens_before, self.last_tokens_after,
+            knowledge_before, len(memory.knowledge),
+            task_results_before, len(memory.task_results))
+        memory.metadata[CompactionStats.metadata_key] = stats
+        return stats
+
+    def original(self, item: KnowledgeItem) -> KnowledgeItem:
+        """Return the item `item` was summarized from, or `item` itself if it wasn't."""
+        entry = self.originals.get(id(item))
+        return entry[1] if entry and entry[0] is item else item
+
+    def full_knowledge(self, knowledge: list[KnowledgeItem]) -> list[KnowledgeItem]:
+        """
+        Return the `knowledge` of a compacted memory with the summarized items replaced
+        by their originals, followed by the items dropped by the compactions.
+        """
+        return [self.original(item) for item in knowledge] + self.dropped
+
+    @staticmethod
+    def __normalize(s: str) -> str:
+        return ' '.join(s.lower().split())
+
+    def __compact_knowledge(self, knowledge: list[KnowledgeItem]) -> list[KnowledgeItem]:
+        """Keep the best item for each category and key, in the original order."""
+        best: dict[tuple[str,str], int] = {}
+        for i, item in enumerate(knowledge):
+            key = (item.category, MemoryCompactor.__normalize(item.key))
+            j = best.get(key)
+            if j is None or (item.confidence, item.timestamp.timestamp()) >= \
+                (knowledge[j].confidence, knowledge[j].timestamp.timestamp()):
+                best[key] = i
+        return [self.__summarize_item(knowledge[i]) for i in sorted(best.values())]
+
+    def __summarize_item(self, item: KnowledgeItem) -> KnowledgeItem:
+        value_str = item.value if isinstance(item.value, str) else str(item.value)
+        if len(value_str) <= self.max_value_chars:
+            return item
+        summary = dataclasses.replace(item, value=value_str[:self.max_value_chars] + "...")
+        self.originals[id(summary)] = (summary, self.original(item))
+        self.originals.pop(id(item), None)
+        return summary
+
+    @staticmethod
+    def __drop_knowledge(knowledge: list[KnowledgeItem], excess_tokens: int) -> list[KnowledgeItem]:
+        """
+        Drop the least confident items, oldest first, until the characters they count for in
+        `estimate_context_size()` cover `excess_tokens`. The rest keep their original order.
+        """
+        excess_chars = excess_tokens * 4
+        dropped: set[int] = set()
+        by_worth = sorted(range(len(knowledge)),
+            key=lambda i: (knowledge[i].confidence, knowledge[i].timestamp.timestamp()))
+        for i in by_worth:
+            if excess_chars <= 0:
+                break
+            dropped.add(i)
+            excess_chars -= len(knowledge[i].key) + len(str(knowledge[i].value))
+        return [item for i, item in enumerate(knowledge) if i not in dropped]
+
+    def __compact_task_results(self, results: list[TaskResult]) -> list[TaskResult]:
+        """Keep the latest result for each task and truncate the older outputs."""
+        latest = {result.task_name: i for i, result in enumerate(results)}
+        kept = [results[i] for i in sorted(latest.values())]
+        recent_start = max(0, len(kept) - self.keep_recent_results)
+        for result in kept[:recent_start]:
+            if result.output and len(result.output) > self.max_output_chars:
+                result.output = result.output[:self.max_output_chars] + "..."
+        return kept
+
+    def __repr__(self) -> str:
+        return f"MemoryCompactor(threshold_tokens = {self.threshold_tokens}, max_value_chars = {self.max_value_chars}, max_output_chars = {self.max_output_chars}, keep_recent_results = {self.keep_recent_results}, target_tokens = {self.target_tokens}, regrowth_tokens = {self.regrowth_tokens}, compactions = {self.compactions})"
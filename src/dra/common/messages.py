@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Normalize the reply messages returned by the inference providers into typed records.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import ast
+import sys
+from enum import Enum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # The provider SDKs are slow to import. See `loaded_class()`.
+    from openai.types.chat import ChatCompletionMessage
+    from anthropic.types import Message
+
+from dra.common.utils.fast_json import loads_values, looks_like_json, loads_reply
+
+class ReplyKind(Enum):
+    """An OpenAI (or ollama) `ChatCompletionMessage`, or its `str()` form."""
+    OPENAI = 0
+    """An Anthropic `Message` or a `ResultMessage`, or their `str()` forms."""
+    ANTHROPIC = 1
+    """
+    A string that parses as JSON, or as a sequence of JSON values, e.g., JSON Lines.
+    The parsed object, or a list of the values, is in `ReplyMessage.data`.
+    """
+    JSON = 2
+    """Anything else, rendered as text."""
+    TEXT = 3
+
+def loaded_class(module_name: str, class_name: str) -> type | None:
+    """
+    Return the class `class_name` from the module `module_name` if the module has already
+    been imported, or else `None`. An object can only be an instance of a class whose module
+    was imported, so the `isinstance()` checks for provider messages don't need to import
+    the provider SDKs themselves.
+    """
+    return getattr(sys.modules.get(module_name), class_name, None)
+
+class ReplyMessage():
+    """
+    One reply message from a task's result, normalized once when the task finishes, so the
+    displays can use the fields directly instead of converting the message to a string and
+    parsing it again on every update.
+    """
+
+    def __init__(self,
+        index: int,
+        kind: ReplyKind,
+        content: str = '',
+        metadata: dict[str,any] = {},
+        usage: dict[str,any] | None = None,
+        tool_calls: list[dict[str,any]] = [],
+        data: any = None):
+        """
+        Args:
+            index (int):                   The 1-based index of the message in the result.
+            kind (ReplyKind):              What kind of message it was.
+            content (str):                 The text content of the reply.
+            metadata (dict[str,any]):      Other fields of the message, e.g., the `role` and `model`.
+            usage (dict[str,any] | None):  Token usage, if the message reports it.
+            tool_calls (list[dict]):       The tool calls requested in the reply, if any.
+            data (any):                    For `ReplyKind.JSON`, the parsed object.
+        """
+        self.index = index
+        self.kind = kind
+        self.content = content if content else ''
+        self.metadata = metadata
+        self.usage = usage
+        self.tool_calls = tool_calls
+        self.data = data
+
+    def content_lines(self) -> list[str]:
+        return self.content.split('\n') if self.content else []
+
+    def __repr__(self) -> str:
+        return f"ReplyMessage(index = {self.index}, kind = {self.kind.name}, content = {len(self.content)} chars, metadata = {self.metadata}, usage = {self.usage}, tool_calls = {self.tool_calls})"
+
+    def __eq__(self, other: any) -> bool:
+        if not isinstance(other, ReplyMessage):
+            return False
+        return  self.index == other.index \
+            and self.kind == other.kind \
+            and self.content == other.content \
+            and self.metadata == other.metadata \
+            and self.usage == other.usage \
+            and self.tool_calls == other.tool_calls \
+            and self.data == other.data
+
+    @staticmethod
+    def normalize_all(result: list[any]) -> list[ReplyMessage]:
+        """Normalize all the messages in a task result."""
+        return [ReplyMessage.normalize(i+1, obj) for i, obj in enumerate(result)]
+
+    @staticmethod
+    def normalize(index: int, obj: any) -> ReplyMessage:
+        """
+        Convert one message to a `ReplyMessage`. Provider message objects are read field by
+        field. Other objects are converted to a string once, which is then recognized as the
+        `str()` form of a provider message, JSON, or plain text, in that order.
+        """
+        chat_completion_message = loaded_class('openai.types.chat', 'ChatCompletionMessage')
+        if chat_completion_message and isinstance(obj, chat_completion_message):
+            return ReplyMessage.__from_chat_completion_message(index, obj)
+        message = loaded_class('anthropic.types', 'Message')
+        if message and isinstance(obj, message):
+            return ReplyMessage.__from_anthropic_message(index, obj)
+        if hasattr(obj, 'result') and hasattr(obj, 'session_id'):
+            return ReplyMessage.__from_result_message(index, obj)
+
+        s = obj if isinstance(obj, str) else str(obj)
+        if s.startswith("ChatCompletion"):
+            content = ReplyMessage.__field_from_repr(s, 'content')
+            return ReplyMessage(index, ReplyKind.OPENAI, content=content if content is not None else s)
+        if s.startswith("ResultMessage"):
+            content = ReplyMessage.__field_from_repr(s, 'result')
+            return ReplyMessage(index, ReplyKind.ANTHROPIC, content=content if content is not None else s)
+        if s.startswith("Message"):
+            texts = ReplyMessage.__fields_from_repr(s, 'text')
+            return ReplyMessage(index, ReplyKind.ANTHROPIC, content='\n'.join(texts) if texts else s)
+
+        if looks_like_json(s):
+            data = ReplyMessage.__parse_json(s)
+            if data is not None:
+                return ReplyMessage(index, ReplyKind.JSON, content=s, data=data)
+        return ReplyMessage(index, ReplyKind.TEXT, content=s)
+
+    @staticmethod
+    def __parse_json(s: str) -> any:
+        """
+        Parse `s` as one JSON document or, failing that, as a sequence of JSON values.
+        Returns `None` if neither works.
+        """
+        try:
+            return loads_reply(s)
+        except ValueError:
+            pass
+        try:
+            values = loads_values(s)
+            return values if len(values) > 1 else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def __from_chat_completion_message(index: int, ccm: ChatCompletionMessage) -> ReplyMessage:
+        metadata = ccm.to_dict()
+        metadata.pop('content', None)
+        tool_calls = metadata.pop('tool_calls', None) or []
+        return ReplyMessage(index, ReplyKind.OPENAI,
+            content=ccm.content, metadata=metadata, tool_calls=tool_calls)
+
+    @staticmethod
+    def __from_anthropic_message(index: int, message: Message) -> ReplyMessage:
+        texts = []
+        tool_calls = []
+        for block in message.content:
+            match block.type:
+                case 'text':
+                    texts.append(block.text)
+                case 'tool_use' | 'server_tool_use':
+                    tool_calls.append(block.to_dict())
+        metadata = {
+            'id':            message.id,
+            'model':         message.model,
+            'role':          message.role,
+            'stop_reason':   message.stop_reason,
+            'stop_sequence': message.stop_sequence,
+        }
+        usage = message.usage.to_dict() if message.usage else None
+        return ReplyMessage(index, ReplyKind.ANTHROPIC,
+            content='\n'.join(texts), metadata=metadata, usage=usage, tool_calls=tool_calls)
+
+    @staticmethod
+    def __from_result_message(index: int, rm: any) -> ReplyMessage:
+        """A `ResultMessage` from the Claude Agent SDK, which we read by field name."""
+        metadata = {}
+        for key in ['subtype', 'duration_ms', 'duration_api_ms', 'is_error', 'num_turns',
+            'session_id', 'total_cost_usd', 'structured_output']:
+            metadata[key] = getattr(rm, key, None)
+        return ReplyMessage(index, ReplyKind.ANTHROPIC,
+            content=rm.result, metadata=metadata, usage=getattr(rm, 'usage', None))
+
+    @staticmethod
+    def __field_from_repr(s: str, key: str) -> str | None:
+        """
+        Return the value of the first `key='...'` string field in the `repr()` of an object,
+        or `None` if it isn't there or isn't a string literal.
+        """
+        values = ReplyMessage.__fields_from_repr(s, key, limit=1)
+        return values[0] if values else None
+
+    @staticmethod
+    def __fields_from_repr(s: str, key: str, limit: int = None) -> list[str]:
+        """
+        Return the values of the `key='...'` string fields in the `repr()` of an object.
+        Each string literal is scanned once, so this is linear in the length of `s`.
+        """
+        values = []
+        prefix = f"{key}="
+        start = 0
+        while limit is None or len(values) < limit:
+            start = s.find(prefix, start)
+            if start < 0:
+                break
+            start += len(prefix)
+            end = ReplyMessage.__end_of_literal(s, start)
+            if end < 0:
+                continue
+            try:
+                values.append(ast.literal_eval(s[start:end]))
+            except (ValueError, SyntaxError):
+                pass
+            start = end
+        return values
+
+    @staticmethod
+    def __end_of_literal(s: str, start: int) -> int:
+        """
+        If `s[start]` begins a quoted string literal, return the index just past its closing quote.
+        Otherwise, or if the literal isn't terminated, return -1.
+        """
+        if start >= len(s) or s[start] not in ('"', "'"):
+            return -1
+        quote = s[start]
+        i = start + 1
+        while i < len(s):
+            c = s[i]
+            if c == '\\':
+                i += 2
+            elif c == quote:
+                return i + 1
+            else:
+                i += 1
+        return -1
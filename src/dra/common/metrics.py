@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""
+An observer that exposes the live metrics of a run, e.g., the tokens used, cost,
+iterations, replans, policy failures, agent cache hit rate, and task and observer update
+latencies, in the OpenMetrics text format on a local HTTP endpoint, so they can be scraped
+by Prometheus or watched with `curl http://127.0.0.1:9464/metrics`.
+
+Each observer update takes a `MetricsSnapshot` of the orchestrator's state and replaces
+the shared snapshot with it. A scrape only renders the current snapshot, at most once per
+snapshot, so scrapes never walk the orchestrator's state or contend with the run.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # Imported when a run starts, so the apps' `--help` is fast.
+    from dra.common.deep_research import DeepResearch
+
+from dra.common.observer import Observer
+
+class MetricKind(Enum):
+    """A total that only increases, e.g., the tokens used."""
+    COUNTER = 'counter'
+    """A current value, e.g., the iteration."""
+    GAUGE = 'gauge'
+    """The distribution of observed values, e.g., task latencies, in cumulative buckets."""
+    HISTOGRAM = 'histogram'
+
+class Histogram():
+    """Counts of observed values in buckets with the given upper bounds, plus their sum."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # The last bucket is +Inf.
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self) -> list[tuple[str, dict[str,str], float]]:
+        """The `_bucket`, `_count`, and `_sum` samples, with cumulative bucket counts."""
+        samples = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            cumulative += count
+            samples.append(('_bucket', {'le': format_value(bound)}, cumulative))
+        samples.append(('_count', {}, self.count))
+        samples.append(('_sum', {}, self.sum))
+        return samples
+
+    def __repr__(self) -> str:
+        return f"Histogram(buckets = {self.buckets}, count = {self.count}, sum = {self.sum})"
+
+def format_value(value: float | int) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+    return repr(value)
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(labels: dict[str,str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{escape_label_value(str(v))}"' for k, v in labels.items()) + '}'
+
+class MetricFamily():
+    """One named metric with its samples, which are `(suffix, labels, value)` tuples."""
+
+    def __init__(self, name: str, kind: MetricKind, help: str, samples: list[tuple[str, dict[str,str], float]]):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples = samples
+
+    def lines(self) -> list[str]:
+        lines = [f"# TYPE {self.name} {self.kind.value}", f"# HELP {self.name} {self.help}"]
+        lines.extend(f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}"
+            for suffix, labels, value in self.samples)
+        return lines
+
+    def __repr__(self) -> str:
+        return f"MetricFamily(name = {self.name}, kind = {self.kind.value}, samples = {len(self.samples)})"
+
+class MetricsSnapshot():
+    """The metrics at one point in time. The text is rendered on the first scrape that reads it."""
+
+    content_type = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+    def __init__(self, families: list[MetricFamily], timestamp: float | None = None):
+        self.families = families
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.__text: bytes | None = None
+
+    def render(self) -> bytes:
+        if self.__text is None:
+            lines = [line for family in self.families for line in family.lines()]
+            self.__text = ('\n'.join(lines + ['# EOF']) + '\n').encode('utf-8')
+        return self.__text
+
+    def __getitem__(self, name: str) -> MetricFamily:
+        return next(f for f in self.families if f.name == name)
+
+    def __repr__(self) -> str:
+        return f"MetricsSnapshot(families = {len(self.families)}, timestamp = {self.timestamp})"
+
+class MetricsObserver(Observer['DeepResearch']):
+    """
+    Serve the metrics of the `DeepResearch` system it observes at `http://host:port/metrics`.
+    The server is started when the system is set and runs on a daemon thread until `close()`
+    is called or the process exits, so the final metrics can still be scraped.
+    """
+
+    def_host = '127.0.0.1'
+    def_prefix = 'dra'
+    # Seconds for the orchestrator's tasks, which make one or more LLM and tool calls.
+    def_task_buckets = (1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+    # Seconds for updating all the observers, e.g., redrawing the console and writing reports.
+    def_update_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, port: int, host: str = def_host, prefix: str = def_prefix):
+        """
+        Args:
+            port (int): The port to listen on. Use `0` to pick a free port, see `self.port`.
+            host (str): The interface to listen on. The default only accepts local connections.
+            prefix (str): The prefix of the metric names.
+        """
+        super().__init__(disallow_system_change=True)
+        self.host = host
+        self.requested_port = port
+        self.prefix = prefix
+        self.task_latency = Histogram(MetricsObserver.def_task_buckets)
+        self.observer_update_latency = Histogram(MetricsObserver.def_update_buckets)
+        self.task_statuses: dict[str, int] = {}
+        self.snapshot = MetricsSnapshot([])
+        self.server: ThreadingHTTPServer | None = None
+        self.__seen_results: dict[int, any] = {}
+        self.__observer_updates = 0
+
+    @property
+    def port(self) -> int | None:
+        """The port the server is listening on, or `None` if it isn't running."""
+        return self.server.server_address[1] if self.server else None
+
+    def _after_set_system(self):
+        self.start()
+        super()._after_set_system()
+
+    def start(self):
+        if self.server:
+            return
+        observer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = observer.snapshot.render()
+                self.send_response(200)
+                self.send_header('Content-Type', MetricsSnapshot.content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Don't write over the console display.
+
+        self.server = ThreadingHTTPServer((self.host, self.requested_port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='MetricsObserver', daemon=True).start()
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def _do_update(self,
+        other: dict[str,any] = {},
+        is_final: bool = False) -> any:
+        self.snapshot = self.take_snapshot()
+        return None
+
+    def take_snapshot(self) -> MetricsSnapshot:
+        """Read the current state of the system into a new snapshot."""
+        self.__observe_task_results()
+        self.__observe_observer_updates()
+        p = self.prefix
+        families = []
+        def add(name: str, kind: MetricKind, help: str, value: float, labels: dict[str,str] = {}):
+            families.append(MetricFamily(f"{p}_{name}", kind, help,
+                [('_total' if kind == MetricKind.COUNTER else '', labels, value)]))
+
+        orchestrator = getattr(self.system, 'orchestrator', None)
+        if orchestrator and getattr(orchestrator, 'budget', None):
+            budget = orchestrator.budget
+            add('tokens', MetricKind.COUNTER, "Tokens used by the orchestrator.", budget.tokens_used)
+            add('cost_dollars', MetricKind.COUNTER, "Estimated cost in dollars of the tokens used.", budget.cost_incurred)
+            add('budget_max_tokens', MetricKind.GAUGE, "The token budget.", budget.max_tokens)
+            add('budget_max_cost_dollars', MetricKind.GAUGE, "The cost budget in dollars.", budget.max_cost)
+        if orchestrator:
+            execution = orchestrator.config.execution
+            add('iteration', MetricKind.GAUGE, "The orchestrator's current iteration.", orchestrator.iteration)
+            add('max_iterations', MetricKind.GAUGE, "The maximum iterations allowed.", execution.max_iterations)
+            add('replans', MetricKind.GAUGE, "The replans of the current objective.", orchestrator.replan_count)
+            add('max_replans', MetricKind.GAUGE, "The maximum replans allowed.", execution.max_replans)
+            policy = orchestrator.policy
+            add('policy_successes', MetricKind.COUNTER, "Plan steps that succeeded.", policy.total_successes)
+            add('policy_failures', MetricKind.COUNTER, "Plan steps that failed.", policy.total_failures)
+            add('policy_consecutive_failures', MetricKind.GAUGE, "Plan steps that failed since the last success.",
+                policy.consecutive_failures)
+            cache = orchestrator.agent_cache
+            lookups = cache.hits + cache.misses
+            add('agent_cache_hits', MetricKind.COUNTER, "Agent cache lookups that found an agent.", cache.hits)
+            add('agent_cache_misses', MetricKind.COUNTER, "Agent cache lookups that created an agent.", cache.misses)
+            add('agent_cache_hit_ratio', MetricKind.GAUGE, "The fraction of agent cache lookups that hit.",
+                cache.hits / lookups if lookups else math.nan)
+        families.append(MetricFamily(f"{p}_orchestrator_tasks", MetricKind.COUNTER,
+            "Orchestrator tasks finished, by status.",
+            [('_total', {'status': status}, count) for status, count in sorted(self.task_statuses.items())]))
+        families.append(MetricFamily(f"{p}_task_duration_seconds", MetricKind.HISTOGRAM,
+            "Latency of the orchestrator's tasks.", self.task_latency.samples()))
+        families.append(MetricFamily(f"{p}_observer_update_duration_seconds", MetricKind.HISTOGRAM,
+            "Latency of updating all the observers.", self.observer_update_latency.samples()))
+        return MetricsSnapshot(families)
+
+    def __observe_task_results(self):
+        """
+        Observe the latencies of the task results added since the last update. Results are
+        tracked by identity, because memory compaction can remove older results. Keeping the
+        results seen last time ensures their ids aren't reused by new results.
+        """
+        memory = getattr(getattr(self.system, 'orchestrator', None), 'memory', None)
+        results = getattr(memory, 'task_results', None) or []
+        for result in results:
+            if id(result) not in self.__seen_results:
+                self.task_latency.observe(result.duration_seconds)
+                status = getattr(result.status, 'value', result.status)
+                self.task_statuses[str(status)] = self.task_statuses.get(str(status), 0) + 1
+        self.__seen_results = dict((id(r), r) for r in results)
+
+    def __observe_observer_updates(self):
+        updates = getattr(self.system, 'observer_updates', 0)
+        if updates > self.__observer_updates:
+            self.observer_update_latency.observe(self.system.last_observer_update_secs)
+            self.__observer_updates = updates
+
+    def __repr__(self) -> str:
+        return f"MetricsObserver(host = {self.host}, port = {self.port or self.requested_port}, prefix = {self.prefix})"
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+Write the output files, e.g., the saved prompts, raw task results, and reports, on a
+background thread, so slow file systems, e.g., network mounts, don't stall the event loop
+that runs the tasks and updates the observers. Use the process-wide writer returned by
+`output_writer()`, so concurrent runs in the same process share one thread and one buffer.
+
+Each file is written to a temporary file in the same directory and then renamed, which is
+atomic, so readers see either the previous contents or the new ones. When a file is written
+again before the previous contents reached the disk, e.g., a report rewritten on every
+observer update, only the latest contents are written. The contents can be a string, a
+list of string chunks, e.g., a rendered report captured in `Chunks`, or a function that
+writes them to a text stream. Either way, they are encoded, and compressed if the file's
+name ends with `.gz` or `.zst`, while they are streamed into the file by the thread, so a
+large document is never copied into one string or buffer.
+
+The pending contents are bounded. When the buffer is full, `write()` waits until the
+thread catches up, and `write_async()` waits without blocking the event loop. Failed
+writes are logged, and `flush(raise_errors=True)` raises an error for them, e.g., at the
+end of a run. The writer flushes when the process exits.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import atexit
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, TextIO
+
+from dra.common.utils.compression import Compression, compressing_writer
+
+logger = logging.getLogger(__name__)
+
+class Chunks(list):
+    """
+    A list of string chunks that can be written to like a text stream, e.g., by
+    `render_to()`, to capture a document without joining it into one string.
+    """
+
+    def write(self, s: str) -> int:
+        self.append(s)
+        return len(s)
+
+# The contents of a file: text, bytes, chunks of text, or a function that writes the text to a stream.
+Content = str | bytes | list[str] | Callable[[TextIO], any]
+
+def content_size(content: Content) -> int:
+    """
+    The size of `content` counted against the buffer: bytes or characters. A function is
+    counted as 0, since it only holds references to objects that exist anyway.
+    """
+    if isinstance(content, (str, bytes)):
+        return len(content)
+    if isinstance(content, list):
+        return sum(len(chunk) for chunk in content)
+    return 0
+
+def write_atomically(path: Path, content: Content, encoding: str = 'utf-8') -> int:
+    """
+    Stream `content` into a temporary file next to `path`, then rename it to `path`. The
+    contents are compressed if the name of `path` ends with the suffix for a `Compression`.
+    Returns the size of the file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open('wb') as file:
+            with compressing_writer(file, Compression.of_path(path)) as binary:
+                if isinstance(content, bytes):
+                    binary.write(content)
+                else:
+                    text = io.TextIOWrapper(binary, encoding=encoding, newline='')
+                    if isinstance(content, str):
+                        text.write(content)
+                    elif isinstance(content, list):
+                        text.writelines(content)
+                    else:
+                        content(text)
+                    # Leave `binary` open for the `with` to close.
+                    text.flush()
+                    text.detach()
+        os.replace(tmp_path, path)
+        return path.stat().st_size
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def log_failure(path: Path, future: Future):
+    """Log a failed write, since the callers usually don't wait for the `Future`s."""
+    e = None if future.cancelled() else future.exception()
+    if e:
+        logger.error(f"Failed to write {path}: {e}", exc_info=e)
+
+class OutputWriter():
+    """
+    A background thread that writes files atomically, in batches of the writes requested
+    since the last batch, keeping only the latest contents for each path.
+    """
+
+    def_max_pending_bytes = 16 * 1024 * 1024
+
+    def __init__(self, max_pending_bytes: int = def_max_pending_bytes, encoding: str = 'utf-8'):
+        if max_pending_bytes <= 0:
+            raise ValueError(f"max_pending_bytes must be positive: {max_pending_bytes}")
+        self.max_pending_bytes = max_pending_bytes
+        self.encoding = encoding
+        self.__condition = threading.Condition()
+        self.__pending: dict[Path, tuple[Content, int, Future]] = {}
+        # The bytes pending or being written by the current batch.
+        self.__pending_bytes = 0
+        self.__writing = False
+        # The writes waiting for space in the buffer, which `flush()` waits for too.
+        self.__waiting = 0
+        # The order of the writes, so a write that waited for space doesn't replace a later one.
+        self.__sequence = 0
+        self.__latest: dict[Path, int] = {}
+        self.__closed = False
+        self.__thread: threading.Thread | None = None
+        self.__background: set[asyncio.Future] = set()
+
+        self.writes_requested = 0
+        self.writes_coalesced = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        self.errors = 0
+        # The failed writes not yet reported by `flush(raise_errors=True)`.
+        self.failures: list[tuple[Path, Exception]] = []
+
+    def write(self, path: Path, content: Content) -> Future:
+        """
+        Queue `content` to be written to `path` and return a `Future` that is resolved
+        with `path` once the file is in place, or with the exception if writing failed.
+        A pending write to the same path is replaced and shares the returned `Future`.
+        Blocks only while the bytes pending or being written would exceed `max_pending_bytes`,
+        so use `write_async()` on the event loop.
+        """
+        sequence = self.__reserve(path)
+        return self.__wait_and_put(path, content, sequence)
+
+    def write_async(self, path: Path, content: Content) -> asyncio.Future:
+        """
+        Like `write()`, but for the event loop: if the buffer is full, the wait is done in
+        another thread. The write is queued in order with the other writes requested now,
+        and `flush()` waits for it, even if the returned `asyncio.Future`, which resolves
+        to the `write()` `Future`, isn't awaited, e.g., by synchronous observer updates.
+        """
+        loop = asyncio.get_running_loop()
+        sequence = self.__reserve(path)
+        future = self.__put(path, content, sequence, wait=False)
+        if future is not None:
+            done = loop.create_future()
+            done.set_result(future)
+            return done
+        task = asyncio.ensure_future(asyncio.to_thread(self.__wait_and_put, path, content, sequence))
+        self.__background.add(task)
+        task.add_done_callback(self.__background.discard)
+        return task
+
+    def write_soon(self, path: Path, content: Content):
+        """
+        For synchronous code that may run on the event loop, e.g., observer updates: use
+        `write_async()` without awaiting it if there is a running loop, or else `write()`.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.write(path, content)
+            return
+        self.write_async(path, content)
+
+    def __reserve(self, path: Path) -> int:
+        with self.__condition:
+            if self.__closed:
+                raise ValueError(f"The OutputWriter is closed; cannot write {path}")
+            self.__sequence += 1
+            self.__waiting += 1
+            return self.__sequence
+
+    def __wait_and_put(self, path: Path, content: Content, sequence: int) -> Future:
+        return self.__put(path, content, sequence, wait=True)
+
+    def __put(self, path: Path, content: Content, sequence: int, wait: bool) -> Future | None:
+        """
+        Queue the write reserved as `sequence`, waiting for space if `wait`. Otherwise
+        returns `None` if there is no space, and the write stays reserved.
+        """
+        size = content_size(content)
+        with self.__condition:
+            # A write larger than the buffer proceeds once the buffer is empty.
+            has_space = lambda: self.__pending_bytes == 0 or self.__pending_bytes + size <= self.max_pending_bytes
+            if not has_space():
+                if not wait:
+                    return None
+                self.__condition.wait_for(has_space)
+            self.__waiting -= 1
+            self.writes_requested += 1
+            previous = self.__pending.get(path)
+            if sequence < self.__latest.get(path, 0):
+                # A later write to the same path was already queued.
+                self.writes_coalesced += 1
+                self.__condition.notify_all()
+                if previous:
+                    return previous[2]
+                future = Future()
+                future.set_result(path)
+                return future
+            self.__latest[path] = sequence
+            if previous:
+                self.__pending.pop(path)
+                self.writes_coalesced += 1
+                self.__pending_bytes -= previous[1]
+                future = previous[2]
+            else:
+                future = Future()
+                future.add_done_callback(lambda f: log_failure(path, f))
+            self.__pending[path] = (content, size, future)
+            self.__pending_bytes += size
+            self.__start()
+            self.__condition.notify_all()
+        return future
+
+    def __start(self):
+        if not self.__thread:
+            self.__thread = threading.Thread(target=self.__run, name="OutputWriter", daemon=True)
+            self.__thread.start()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__pending or self.__closed)
+                if not self.__pending:
+                    return
+                batch, self.__pending = self.__pending, {}
+                self.__writing = True
+            for path, (content, _, future) in batch.items():
+                try:
+                    size = write_atomically(path, content, self.encoding)
+                    self.files_written += 1
+                    self.bytes_written += size
+                    future.set_result(path)
+                except Exception as e:
+                    with self.__condition:
+                        self.errors += 1
+                        self.failures.append((path, e))
+                    future.set_exception(e)
+            with self.__condition:
+                self.__pending_bytes -= sum(size for _, size, _ in batch.values())
+                self.__writing = False
+                self.__condition.notify_all()
+
+    def flush(self, timeout: float | None = None, raise_errors: bool = False) -> bool:
+        """
+        Wait until all the queued writes are done. Returns `False` on timeout. If
+        `raise_errors`, raises `ValueError` for the writes that failed since the last such
+        call, with the first failure as the cause.
+        """
+        with self.__condition:
+            done = self.__condition.wait_for(
+                lambda: not self.__pending and not self.__writing and not self.__waiting, timeout)
+            failures, self.failures = (self.failures, []) if raise_errors else ([], self.failures)
+        if failures:
+            paths = ', '.join(str(path) for path, _ in failures)
+            raise ValueError(f"{len(failures)} output file(s) couldn't be written: {paths}") from failures[0][1]
+        return done
+
+    async def flush_async(self, timeout: float | None = None, raise_errors: bool = False) -> bool:
+        """Like `flush()`, but waits in another thread, so the event loop keeps running."""
+        return await asyncio.to_thread(self.flush, timeout, raise_errors)
+
+    def close(self, timeout: float | None = None):
+        """Flush, then stop the thread. Later writes raise `ValueError`."""
+        self.flush(timeout)
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        if self.__thread:
+            self.__thread.join(timeout)
+
+    def __repr__(self) -> str:
+        return f"OutputWriter(max_pending_bytes = {self.max_pending_bytes}, pending_bytes = {self.__pending_bytes}, writes_requested = {self.writes_requested}, writes_coalesced = {self.writes_coalesced}, files_written = {self.files_written}, bytes_written = {self.bytes_written}, errors = {self.errors})"
+
+_output_writer: OutputWriter | None = None
+_output_writer_lock = threading.Lock()
+
+def output_writer() -> OutputWriter:
+    """Return the process-wide `OutputWriter`, creating it on first use."""
+    global _output_writer
+    with _output_writer_lock:
+        if _output_writer is None:
+            _output_writer = OutputWriter()
+            atexit.register(_output_writer.close)
+        return _output_writer
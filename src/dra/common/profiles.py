@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Named execution profiles, e.g., `fast`, `balanced`, and `thorough`, which set the Deep
+Orchestrator's execution, budget, and other settings, the parallelism, and the models as
+a unit, so a run can trade quality for latency and cost with one flag. The profiles are
+read from a YAML file with a top-level `profiles` mapping:
+
+```yaml
+profiles:
+  fast:
+    description: Few iterations and small budgets.
+    temperature: 0.5
+    models:
+      openai:
+        research_model: gpt-4o-mini
+    execution:
+      max_iterations: 5
+      enable_parallel: true
+    budget:
+      max_tokens: 100000
+```
+
+The `execution`, `budget`, `context`, `policy`, and `cache` sections hold fields of the
+corresponding `mcp_agent` config classes. The `models` section maps each provider to the
+model arguments of the apps, e.g., `research_model` or `excel_writer_model`.
+See `profiles.yaml` in this directory for the built-in profiles.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+from pathlib import Path
+
+import yaml
+
+class ExecutionProfile():
+    """One named profile. The sections are validated against the config classes."""
+
+    # The sections, named after their config classes, e.g., `execution` for `ExecutionConfig`.
+    section_names = ['execution', 'budget', 'context', 'policy', 'cache']
+
+    # The CLI arguments that are set from the profile, with the section and key they come from.
+    cli_arguments = {
+        'max_iterations':   ('execution', 'max_iterations'),
+        'max_tokens':       ('budget', 'max_tokens'),
+        'max_cost_dollars': ('budget', 'max_cost'),
+        'max_time_minutes': ('budget', 'max_time_minutes'),
+    }
+
+    def __init__(self,
+        name: str,
+        description: str = '',
+        temperature: float | None = None,
+        models: dict[str, dict[str,str]] = {},
+        execution: dict[str,any] = {},
+        budget: dict[str,any] = {},
+        context: dict[str,any] = {},
+        policy: dict[str,any] = {},
+        cache: dict[str,any] = {}):
+        self.name = name
+        self.description = description
+        self.temperature = temperature
+        self.models = dict(models)
+        self.sections = {
+            'execution': dict(execution),
+            'budget':    dict(budget),
+            'context':   dict(context),
+            'policy':    dict(policy),
+            'cache':     dict(cache),
+        }
+        for section, values in self.sections.items():
+            fields = ExecutionProfile.section_class(section).model_fields
+            unknown = [key for key in values if key not in fields]
+            if unknown:
+                raise ValueError(f"Profile {name}: unknown {section} settings {unknown}. Known settings: {list(fields)}")
+        for provider, provider_models in self.models.items():
+            if not isinstance(provider_models, dict):
+                raise ValueError(f"Profile {name}: the models for provider {provider} must be a mapping: {provider_models}")
+
+    @staticmethod
+    def section_class(section: str) -> type:
+        """
+        The `mcp_agent` config class for `section`. It is imported here, rather than by the
+        module, because `mcp_agent` is slow to import and the apps' `--help` doesn't need it.
+        """
+        from mcp_agent.workflows.deep_orchestrator import config
+        return getattr(config, f"{section.capitalize()}Config")
+
+    @staticmethod
+    def from_dict(name: str, values: dict[str,any]) -> ExecutionProfile:
+        if not isinstance(values, dict):
+            raise ValueError(f"Profile {name} must be a mapping: {values}")
+        known = ['description', 'temperature', 'models'] + ExecutionProfile.section_names
+        unknown = [key for key in values if key not in known]
+        if unknown:
+            raise ValueError(f"Profile {name}: unknown keys {unknown}. Known keys: {known}")
+        kwargs = dict(values)
+        for key in ['models'] + ExecutionProfile.section_names:
+            # An empty section in YAML is None.
+            if key in kwargs and kwargs[key] is None:
+                kwargs[key] = {}
+        return ExecutionProfile(name, **kwargs)
+
+    def section(self, section: str) -> dict[str,any]:
+        """Return the settings for `section`, e.g., `execution`."""
+        return self.sections[section]
+
+    def models_for(self, provider: str) -> dict[str,str]:
+        """Return the model arguments for `provider`, e.g., `{'research_model': 'gpt-4o'}`."""
+        return self.models.get(provider) or {}
+
+    def cli_values(self, provider: str) -> dict[str,any]:
+        """
+        Return the values this profile sets for the app CLI arguments, keyed by the
+        argument destination, e.g., `max_tokens` or `research_model`.
+        """
+        values = {}
+        for dest, (section, key) in ExecutionProfile.cli_arguments.items():
+            if key in self.sections[section]:
+                values[dest] = self.sections[section][key]
+        if self.temperature is not None:
+            values['temperature'] = self.temperature
+        values.update(self.models_for(provider))
+        return values
+
+    def __repr__(self) -> str:
+        return f"ExecutionProfile(name = {self.name}, description = {self.description}, temperature = {self.temperature}, models = {self.models}, sections = {self.sections})"
+
+# The built-in profiles.
+default_profiles_path = Path(__file__).parent / 'profiles.yaml'
+
+def load_profiles(path: Path = default_profiles_path) -> dict[str, ExecutionProfile]:
+    """Load the profiles in the YAML file `path`, keyed by name, in file order."""
+    with open(path, encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    profiles = data.get('profiles') if isinstance(data, dict) else None
+    if not isinstance(profiles, dict) or not profiles:
+        raise ValueError(f"The profiles file {path} must have a non-empty top-level 'profiles' mapping.")
+    return {name: ExecutionProfile.from_dict(name, values) for name, values in profiles.items()}
+
+def get_profile(name: str, path: Path = default_profiles_path) -> ExecutionProfile:
+    """Load the profiles in `path` and return the one called `name`."""
+    profiles = load_profiles(path)
+    if name not in profiles:
+        raise ValueError(f"Unknown execution profile {name} in {path}. Known profiles: {list(profiles)}")
+    return profiles[name]
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""
+Profile a whole run, to find out whether the time goes to the provider, the MCP servers,
+the Rich display, or building the Markdown reports. A `RunProfiler` profiles the code
+in the thread running the event loop, either deterministically with `cProfile`, which
+counts every call but slows the run down, or by sampling the thread's stack at a fixed
+interval, which is cheaper but approximate. It also times each observer's updates and
+measures the event loop lag, i.e., how late the loop wakes up a sleeping task, which
+shows when synchronous work blocks the loop.
+
+When the run ends, the profile is written next to the report, as a `.prof` file for
+`python -m pstats` or `snakeviz`, or as a `.folded` file of collapsed stacks for flame
+graph tools, and a Markdown summary of the hottest functions, observer updates, and
+event loop lag is written to a `.profile.md` file.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from enum import Enum
+from pathlib import Path
+from typing import AsyncIterator
+
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.observer import Observers
+
+class ProfileMode(Enum):
+    """No profiling."""
+    NONE = 'none'
+    """Profile every call with `cProfile`. Exact call counts, but the run is slower."""
+    DETERMINISTIC = 'deterministic'
+    """Sample the stack of the event loop's thread periodically. Approximate, but cheap."""
+    SAMPLING = 'sampling'
+
+class StackSampler():
+    """
+    Count the stacks of one thread, sampled every `interval_secs` on a daemon thread.
+    Each stack is a tuple of `file:function` frames, outermost first.
+    """
+
+    def __init__(self, thread_id: int, interval_secs: float):
+        self.thread_id = thread_id
+        self.interval_secs = interval_secs
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def start(self):
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__sample, name='StackSampler', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+    def __sample(self):
+        while not self.__stop.wait(self.interval_secs):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_qualname}")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def functions(self) -> tuple[Counter[str], Counter[str]]:
+        """The sample counts per function, where it was the innermost frame and anywhere on the stack."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+        return own, total
+
+    def folded(self) -> str:
+        """The stacks in the collapsed format of `flamegraph.pl` and speedscope, one per line."""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def __repr__(self) -> str:
+        return f"StackSampler(thread_id = {self.thread_id}, interval_secs = {self.interval_secs}, samples = {self.samples})"
+
+class RunProfiler():
+    """
+    Profile a run. Call `time_observers()` before the run, run it inside `profiling()`,
+    then call `save()` to write the profile and its summary.
+    """
+
+    # Seconds between the stack samples.
+    def_sample_interval_secs = 0.005
+    # Seconds the event loop lag monitor sleeps between measurements.
+    def_lag_interval_secs = 0.1
+    # The number of rows in the summary's tables of functions and stacks.
+    def_top = 25
+
+    def __init__(self,
+        mode: ProfileMode,
+        sample_interval_secs: float = def_sample_interval_secs,
+        lag_interval_secs: float = def_lag_interval_secs,
+        top: int = def_top):
+        if mode == ProfileMode.NONE:
+            raise ValueError("RunProfiler() requires a profiling mode other than 'none'.")
+        self.mode = mode
+        self.sample_interval_secs = sample_interval_secs
+        self.lag_interval_secs = lag_interval_secs
+        self.top = top
+        self.wall_secs = 0.0
+        self.observer_secs: dict[str, list[float]] = {}
+        self.loop_lags: list[float] = []
+        self.profile: cProfile.Profile | None = None
+        self.sampler: StackSampler | None = None
+
+    def time_observers(self, observers: Observers):
+        """Time the updates of each of the `observers`, by wrapping their update methods."""
+        for key, observer in observers.observers.items():
+            self.__time_observer(key, observer)
+
+    def __time_observer(self, key: str, observer: any):
+        durations = self.observer_secs.setdefault(key, [])
+        update = observer.update
+        async_update = observer.async_update
+
+        def timed_update(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return update(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+
+        async def timed_async_update(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await async_update(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+
+        observer.update = timed_update
+        observer.async_update = timed_async_update
+
+    @contextlib.asynccontextmanager
+    async def profiling(self) -> AsyncIterator[RunProfiler]:
+        """Profile the code run inside the context, which must be in the event loop's thread."""
+        lag_task = asyncio.create_task(self.__watch_loop())
+        if self.mode == ProfileMode.DETERMINISTIC:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval_secs)
+            self.sampler.start()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.wall_secs += time.perf_counter() - start
+            if self.profile:
+                self.profile.disable()
+            if self.sampler:
+                self.sampler.stop()
+            lag_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await lag_task
+
+    async def __watch_loop(self):
+        """Record how much later than requested the loop resumes each sleep."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval_secs)
+            self.loop_lags.append(max(0.0, time.perf_counter() - start - self.lag_interval_secs))
+
+    def paths(self, report_path: Path) -> tuple[Path, Path]:
+        """The paths of the profile and the summary, next to `report_path`."""
+        suffix = '.prof' if self.mode == ProfileMode.DETERMINISTIC else '.folded'
+        return (report_path.with_name(f"{report_path.stem}.profile{suffix}"),
+                report_path.with_name(f"{report_path.stem}.profile.md"))
+
+    def save(self, report_path: Path) -> tuple[Path, Path]:
+        """Write the profile and the summary next to `report_path`. Returns their paths."""
+        profile_path, summary_path = self.paths(report_path)
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.profile:
+            self.profile.dump_stats(profile_path)
+        else:
+            profile_path.write_text(self.sampler.folded() if self.sampler else '', encoding='utf-8')
+        summary_path.write_text(self.summary(profile_path), encoding='utf-8')
+        return profile_path, summary_path
+
+    def summary(self, profile_path: Path | None = None) -> str:
+        lines = [f"# Profile Summary\n",
+            f"Mode: {self.mode.value}. Wall time: {self.wall_secs:.3f} seconds." +
+            (f" Profile: `{profile_path.name}`." if profile_path else '') + "\n"]
+        lines.append(str(self.hot_functions_table()))
+        if self.sampler:
+            lines.append(str(self.hot_stacks_table()))
+        lines.append(str(self.observers_table()))
+        lines.append(str(self.loop_lag_table()))
+        return '\n'.join(lines)
+
+    def hot_functions_table(self) -> MarkdownTable:
+        """
+        The functions with the most time spent in their own code, i.e., excluding the functions
+        they call. For sampling, the time spent waiting for I/O, e.g., LLM replies and MCP tool
+        results, shows up as the event loop's selector.
+        """
+        if self.sampler:
+            table = MarkdownTable(title=f"Hottest functions ({self.sampler.samples} samples)",
+                columns=[('function', 'left'), ('own samples', 'right'), ('total samples', 'right'), ('own share', 'right')],
+                aligned=True)
+            own, total = self.sampler.functions()
+            samples = max(1, self.sampler.samples)
+            for function, count in own.most_common(self.top):
+                table.add_row([function, str(count), str(total[function]), f"{count / samples:.1%}"])
+            return table
+        table = MarkdownTable(title="Hottest functions",
+            columns=[('function', 'left'), ('calls', 'right'), ('own secs', 'right'), ('total secs', 'right')],
+            aligned=True)
+        if self.profile:
+            stats = pstats.Stats(self.profile).stats
+            rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+            for (file, line, function), (_, calls, own_secs, total_secs, _) in rows:
+                name = f"{Path(file).name}:{line}:{function}" if line else function
+                table.add_row([name, str(calls), f"{own_secs:.3f}", f"{total_secs:.3f}"])
+        return table
+
+    def hot_stacks_table(self) -> MarkdownTable:
+        """The most frequently sampled stacks, showing their innermost frames."""
+        table = MarkdownTable(title="Hottest stacks",
+            columns=[('innermost frames', 'left'), ('samples', 'right')],
+            aligned=True)
+        for stack, count in self.sampler.stacks.most_common(self.top):
+            table.add_row([' < '.join(reversed(stack[-4:])), str(count)])
+        return table
+
+    def observers_table(self) -> MarkdownTable:
+        table = MarkdownTable(title="Observer updates",
+            columns=[('observer', 'left'), ('updates', 'right'), ('mean secs', 'right'), ('max secs', 'right'), ('total secs', 'right')],
+            aligned=True)
+        for key, durations in self.observer_secs.items():
+            total = sum(durations)
+            mean = total / len(durations) if durations else 0.0
+            table.add_row([key, str(len(durations)), f"{mean:.4f}", f"{max(durations, default=0.0):.4f}", f"{total:.3f}"])
+        return table
+
+    def loop_lag_table(self) -> MarkdownTable:
+        table = MarkdownTable(title=f"Event loop lag (measured every {self.lag_interval_secs} seconds)",
+            columns=[('measurements', 'right'), ('p50 secs', 'right'), ('p99 secs', 'right'), ('max secs', 'right'), ('over 0.1 secs', 'right')],
+            aligned=True)
+        lags = sorted(self.loop_lags)
+        def at(fraction: float) -> str:
+            return f"{lags[min(len(lags) - 1, int(fraction * len(lags)))]:.4f}" if lags else '-'
+        table.add_row([str(len(lags)), at(0.5), at(0.99), f"{lags[-1]:.4f}" if lags else '-',
+            str(sum(1 for lag in lags if lag > 0.1))])
+        return table
+
+    def __repr__(self) -> str:
+        return f"RunProfiler(mode = {self.mode.value}, wall_secs = {self.wall_secs}, observers = {list(self.observer_secs)})"
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+A process-wide rate limiter for the inference calls, with a requests-per-minute and a
+tokens-per-minute token bucket for each provider and model, so concurrent tasks wait
+their turn instead of bursting past the provider limits and getting 429 errors.
+
+The limits are read from a `rate_limits` section in the `mcp_agent` config file:
+
+```yaml
+rate_limits:
+  anthropic:
+    requests_per_minute: 50
+    tokens_per_minute: 40000
+    models:
+      claude-3-5-haiku-latest:
+        requests_per_minute: 100
+```
+
+Each model has its own buckets. The provider's values are the defaults for models that
+aren't listed, or when no model is specified. A missing or zero value means no limit.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+from dra.common.llm_wrappers import wrap_llm_class
+
+class TokenBucket():
+    """
+    A bucket that holds up to `capacity` units and refills at `rate_per_minute`.
+    It starts full, so a burst up to the capacity is allowed.
+    """
+
+    def __init__(self,
+        rate_per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive: {rate_per_minute}")
+        self.rate_per_sec = rate_per_minute / 60.0
+        self.capacity = capacity if capacity else rate_per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self.last = clock()
+
+    def __refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.last) * self.rate_per_sec)
+        self.last = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Return how many seconds until `amount` units are available, 0 if they are now.
+        Amounts larger than the capacity are treated as the capacity.
+        """
+        self.__refill()
+        shortfall = min(amount, self.capacity) - self.level
+        return shortfall / self.rate_per_sec if shortfall > 0 else 0.0
+
+    def take(self, amount: float):
+        """
+        Remove `amount` units. The level may go negative, e.g., when the actual usage
+        of a call exceeds its estimate, which delays the following calls accordingly.
+        """
+        self.__refill()
+        self.level -= amount
+
+class ModelRateLimiter():
+    """
+    The request and token buckets for one provider and model. Callers queue on an
+    `asyncio.Lock`, which is FIFO, so they are served in order at the limit rate, rather
+    than all waking at once and oscillating around it.
+    """
+
+    def __init__(self,
+        provider: str,
+        model: str,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        clock: Callable[[], float] = time.monotonic):
+        self.provider = provider
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.__lock = asyncio.Lock()
+
+        self.request_count = 0
+        self.token_count = 0
+        self.total_wait_secs = 0.0
+        self.max_wait_secs = 0.0
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until one request and `tokens` estimated tokens are available, then take them.
+        Returns the seconds spent waiting, including waiting in the queue.
+        """
+        start = time.monotonic()
+        async with self.__lock:
+            while True:
+                wait = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(tokens) if self.tokens else 0.0)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+        waited = time.monotonic() - start
+        self.request_count += 1
+        self.token_count += tokens
+        self.total_wait_secs += waited
+        self.max_wait_secs = max(self.max_wait_secs, waited)
+        return waited
+
+    def adjust(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket after a call, once its actual usage is known."""
+        delta = actual_tokens - estimated_tokens
+        self.token_count += delta
+        if self.tokens and delta:
+            self.tokens.take(delta)
+
+    def mean_wait_secs(self) -> float:
+        return self.total_wait_secs / self.request_count if self.request_count else 0.0
+
+    def __repr__(self) -> str:
+        return f"ModelRateLimiter(provider = {self.provider}, model = {self.model}, requests_per_minute = {self.requests_per_minute}, tokens_per_minute = {self.tokens_per_minute}, request_count = {self.request_count}, total_wait_secs = {self.total_wait_secs:.2f})"
+
+class RateLimiters():
+    """
+    The registry of `ModelRateLimiter`s, created on demand from the configured limits.
+    Use the process-wide `rate_limiters` instance, so all tasks and apps share the buckets.
+    """
+
+    default_model = '*'
+
+    def __init__(self):
+        self.limits: dict[str, dict[str,any]] = {}
+        self.limiters: dict[tuple[str,str], ModelRateLimiter] = {}
+
+    def configure(self, limits: dict[str, dict[str,any]] | None):
+        """
+        Add or replace the limits for the providers in `limits`, the `rate_limits` section
+        of the config. Existing limiters for those providers are discarded.
+        """
+        for provider, provider_limits in (limits or {}).items():
+            if provider_limits is not None and not isinstance(provider_limits, dict):
+                raise ValueError(f"The rate limits for provider {provider} must be a mapping: {provider_limits}")
+            self.limits[provider] = provider_limits or {}
+            for key in [key for key in self.limiters if key[0] == provider]:
+                del self.limiters[key]
+
+    def has_limits(self, provider: str) -> bool:
+        return provider in self.limits
+
+    def get(self, provider: str, model: str | None) -> ModelRateLimiter | None:
+        """Return the limiter for `provider` and `model`, or `None` if the provider has no limits."""
+        provider_limits = self.limits.get(provider)
+        if provider_limits is None:
+            return None
+        model_limits = (provider_limits.get('models') or {}).get(model) if model else None
+        key = (provider, model if model else RateLimiters.default_model)
+        limiter = self.limiters.get(key)
+        if not limiter:
+            def get_limit(name: str) -> float | None:
+                if model_limits and name in model_limits:
+                    return model_limits[name]
+                return provider_limits.get(name)
+            limiter = ModelRateLimiter(key[0], key[1],
+                requests_per_minute=get_limit('requests_per_minute'),
+                tokens_per_minute=get_limit('tokens_per_minute'))
+            self.limiters[key] = limiter
+        return limiter
+
+    def all(self) -> list[ModelRateLimiter]:
+        return list(self.limiters.values())
+
+    def clear(self):
+        self.limits.clear()
+        self.limiters.clear()
+
+rate_limiters = RateLimiters()
+
+def estimate_tokens(message: any) -> int:
+    """Estimate the prompt tokens for a message, using the usual 4 characters per token."""
+    return len(message if isinstance(message, str) else str(message)) // 4
+
+def usage_tokens(responses: any) -> int | None:
+    """Sum the input and output tokens reported in the responses, or `None` if none are."""
+    total = None
+    for response in responses if isinstance(responses, list) else [responses]:
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            continue
+        tokens = 0
+        for name in ['input_tokens', 'output_tokens', 'prompt_tokens', 'completion_tokens']:
+            tokens += getattr(usage, name, None) or 0
+        total = (total or 0) + tokens
+    return total
+
+def rate_limited(llm_class: type, provider: str, limiters: RateLimiters = rate_limiters) -> type:
+    """
+    Return a subclass of the `AugmentedLLM` class `llm_class` whose `generate()` and
+    `generate_structured()` acquire from the limiter for `provider` and the requested
+    model before calling the provider. Use it as the `llm_factory` of the orchestrator.
+    """
+    async def limited(llm: any, method: Callable, message: any, request_params: any, kwargs: dict[str,any]) -> any:
+        params = llm.get_request_params(request_params)
+        limiter = limiters.get(provider, params.model if params else None)
+        if not limiter:
+            return await method(message=message, request_params=request_params, **kwargs)
+        estimated = estimate_tokens(message)
+        await limiter.acquire(estimated)
+        result = await method(message=message, request_params=request_params, **kwargs)
+        actual = usage_tokens(result)
+        if actual is not None:
+            limiter.adjust(estimated, actual)
+        return result
+
+    return wrap_llm_class(llm_class, 'RateLimited', limited)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Record the replies of the inference calls made during a run as JSON Lines fixtures, and
+replay them later without calling a provider, e.g., to benchmark the execution profiles
+offline. Each line holds one call:
+
+```json
+{"kind": "structured", "response_model": "Plan", "agent": "planner", "model": "gpt-4o",
+ "content": {"steps": []}, "input_tokens": 1200, "output_tokens": 300, "latency_secs": 2.4}
+```
+
+The `content` of a `text` fixture is the text of the reply, and of a `structured` fixture
+it is the JSON form of the response model. Fixture files whose names end with `.gz` or
+`.zst` are compressed.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+from mcp_agent.workflows.llm.augmented_llm import AugmentedLLM
+
+from dra.common.ledger import measured_call
+from dra.common.llm_wrappers import wrap_llm_class
+from dra.common.messages import ReplyMessage
+from dra.common.utils.compression import Compression, open_text, write_compressed
+
+class FixtureKind(Enum):
+    """The reply to a `generate()` or `generate_str()` call."""
+    TEXT = 'text'
+    """The reply to a `generate_structured()` call."""
+    STRUCTURED = 'structured'
+
+class LLMFixture():
+    """One recorded inference call."""
+
+    def __init__(self,
+        kind: FixtureKind,
+        content: str | dict[str,any],
+        response_model: str | None = None,
+        agent: str | None = None,
+        model: str | None = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        latency_secs: float = 0.0):
+        self.kind = kind
+        self.content = content
+        self.response_model = response_model
+        self.agent = agent
+        self.model = model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.latency_secs = latency_secs
+
+    def to_dict(self) -> dict[str,any]:
+        return {
+            'kind': self.kind.value,
+            'response_model': self.response_model,
+            'agent': self.agent,
+            'model': self.model,
+            'content': self.content,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'latency_secs': self.latency_secs,
+        }
+
+    @staticmethod
+    def from_dict(d: dict[str,any]) -> LLMFixture:
+        try:
+            return LLMFixture(FixtureKind(d['kind']), d['content'],
+                response_model=d.get('response_model'), agent=d.get('agent'), model=d.get('model'),
+                input_tokens=d.get('input_tokens', 0), output_tokens=d.get('output_tokens', 0),
+                latency_secs=d.get('latency_secs', 0.0))
+        except KeyError as e:
+            raise ValueError(f"LLM fixture is missing the field {e}: {d}") from e
+
+    def __repr__(self) -> str:
+        return f"LLMFixture(kind = {self.kind.value}, response_model = {self.response_model}, agent = {self.agent}, model = {self.model}, input_tokens = {self.input_tokens}, output_tokens = {self.output_tokens}, latency_secs = {self.latency_secs})"
+
+class LLMFixtures():
+    """
+    The fixtures of a recorded run, grouped by the response model for structured calls
+    and in one group for text calls. Each group is replayed in order and then cycled.
+    """
+
+    # Serializes appends from worker threads, since a compressed fixture is written in chunks.
+    append_lock = threading.Lock()
+
+    def __init__(self, fixtures: list[LLMFixture]):
+        self.fixtures = fixtures
+        self.groups: dict[str, list[LLMFixture]] = {}
+        for fixture in fixtures:
+            self.groups.setdefault(LLMFixtures.__group_key(fixture.kind, fixture.response_model), []).append(fixture)
+        self.positions: dict[str, int] = {}
+
+    @staticmethod
+    def __group_key(kind: FixtureKind, response_model: str | None) -> str:
+        return response_model if kind == FixtureKind.STRUCTURED else FixtureKind.TEXT.value
+
+    @staticmethod
+    def load(path: Path) -> LLMFixtures:
+        fixtures = []
+        with open_text(path) as f:
+            for n, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    fixtures.append(LLMFixture.from_dict(json.loads(line)))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{n}: invalid JSON: {e}") from e
+        return LLMFixtures(fixtures)
+
+    @staticmethod
+    def append(path: Path, fixture: LLMFixture):
+        """
+        Append one fixture to the file `path`. For a compressed file, each fixture is
+        appended as a separate gzip member or zstd frame, which are read as one stream.
+        """
+        data = (json.dumps(fixture.to_dict()) + '\n').encode('utf-8')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with LLMFixtures.append_lock, open(path, 'ab') as f:
+            write_compressed(f, data, Compression.of_path(path))
+
+    @staticmethod
+    async def append_async(path: Path, fixture: LLMFixture):
+        """Like `append()`, but the file is written on a worker thread, off the event loop."""
+        await asyncio.to_thread(LLMFixtures.append, path, fixture)
+
+    def next(self, kind: FixtureKind, response_model: str | None = None) -> LLMFixture:
+        """Return the next fixture for a call of `kind`, for the given response model name."""
+        key = LLMFixtures.__group_key(kind, response_model)
+        group = self.groups.get(key)
+        if not group:
+            raise ValueError(f"No recorded LLM fixtures for {key}. Recorded: {list(self.groups)}")
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        return group[position % len(group)]
+
+    def reset(self):
+        """Start replaying each group from its first fixture again."""
+        self.positions.clear()
+
+    def __len__(self) -> int:
+        return len(self.fixtures)
+
+    def __repr__(self) -> str:
+        return f"LLMFixtures(fixtures = {len(self.fixtures)}, groups = {dict((k, len(v)) for k, v in self.groups.items())})"
+
+def reply_text(result: any) -> str:
+    """The text of the reply messages returned by `generate()`."""
+    messages = ReplyMessage.normalize_all(result if isinstance(result, list) else [result])
+    return '\n'.join(message.content for message in messages)
+
+def recording(llm_class: type, path: Path, clock: Callable[[], float] = time.perf_counter) -> type:
+    """
+    Return a subclass of the `AugmentedLLM` class `llm_class` that appends a fixture to
+    `path` for each successful `generate()` and `generate_structured()` call. The fixtures
+    are written off the event loop, with `LLMFixtures.append_async()`.
+    """
+    async def record(llm: any, method: Callable, message: any, request_params: any, kwargs: dict[str,any]) -> any:
+        result, usage = await measured_call(llm, method, message, request_params, kwargs, clock)
+        if usage.error:
+            raise usage.error
+        response_model = kwargs.get('response_model')
+        if response_model:
+            kind = FixtureKind.STRUCTURED
+            content = result.model_dump(mode='json') if hasattr(result, 'model_dump') else result
+        else:
+            kind = FixtureKind.TEXT
+            content = reply_text(result)
+        try:
+            await LLMFixtures.append_async(path, LLMFixture(kind, content,
+                response_model=response_model.__name__ if response_model else None,
+                agent=getattr(llm, 'name', None), model=usage.model,
+                input_tokens=usage.input_tokens, output_tokens=usage.output_tokens,
+                latency_secs=round(usage.latency_secs, 3)))
+        except (OSError, TypeError, ValueError):
+            pass  # Recording is best effort; never fail an inference call because of it.
+        return result
+
+    return wrap_llm_class(llm_class, 'Recording', record)
+
+def replaying(fixtures: LLMFixtures, provider: str, model: str | None = None,
+    time_scale: float = 1.0) -> type:
+    """
+    Return an `AugmentedLLM` class that answers every call with the next fixture, after
+    sleeping for its recorded latency times `time_scale`, and records its token usage
+    in the context's token counter. The usage is charged to `model`, when given, instead
+    of the recorded model, so the cost reflects the model that would have been used.
+    """
+    async def replay(llm: AugmentedLLM, kind: FixtureKind, response_model: type | None) -> LLMFixture:
+        fixture = fixtures.next(kind, response_model.__name__ if response_model else None)
+        if fixture.latency_secs and time_scale > 0:
+            await asyncio.sleep(fixture.latency_secs * time_scale)
+        counter = getattr(llm.context, 'token_counter', None) if llm.context else None
+        if counter:
+            await counter.record_usage(fixture.input_tokens, fixture.output_tokens,
+                model_name=model or fixture.model, provider=provider)
+        return fixture
+
+    class ReplayLLM(AugmentedLLM):
+        async def generate(self, message, request_params=None):
+            fixture = await replay(self, FixtureKind.TEXT, None)
+            return [fixture.content]
+
+        async def generate_str(self, message, request_params=None):
+            fixture = await replay(self, FixtureKind.TEXT, None)
+            return fixture.content
+
+        async def generate_structured(self, message, response_model, request_params=None):
+            fixture = await replay(self, FixtureKind.STRUCTURED, response_model)
+            return response_model.model_validate(fixture.content)
+
+    return ReplayLLM
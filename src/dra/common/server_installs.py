@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+"""
+Install the MCP servers that the configurations launch with `uvx` or `npx` once, at
+pinned versions, into a local directory, so starting a server doesn't resolve package
+versions or download anything. `python -m dra.tools.mcp_servers install` resolves each
+server's package to an exact version, unless the configuration already pins one, and
+installs it, with all its dependencies pinned, into a directory named for the package
+and version:
+
+* `uvx` servers get a virtual environment in `python/<package>-<version>`, created by
+  `uv` from a fully pinned `requirements.txt`.
+* `npx` servers get an npm prefix in `node/<package>-<version>`, with a `package-lock.json`.
+
+The installed servers are recorded in the manifest `servers.json` in the directory. When
+a run starts, `ServerInstalls.rewrite()` replaces the launcher command of each installed
+server with the path of the installed executable. Servers whose configured launch command
+has changed since they were installed are left as configured.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import subprocess
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+def default_servers_dir() -> Path:
+    """The shared install directory, in the user's cache directory."""
+    cache = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache) / 'deep-research-agent' / 'mcp-servers'
+
+def run_command(argv: list[str], input: str | None = None) -> str:
+    """Run `argv`, returning its standard output. Raises `ValueError` if it fails."""
+    try:
+        result = subprocess.run(argv, input=input, capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise ValueError(f"Command '{argv[0]}' not found. Is it installed and on the PATH?")
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"Command '{' '.join(argv)}' failed with exit code {e.returncode}: {e.stderr.strip()}")
+    return result.stdout
+
+class Launcher(Enum):
+    """`uvx` runs a command from a Python package, installed in a cached environment."""
+    UVX = 'uvx'
+    """`npx` runs a command from an npm package, installed in a cached prefix."""
+    NPX = 'npx'
+
+class LaunchSpec():
+    """
+    A server's package and version and the arguments passed to its command, parsed from
+    a `uvx` or `npx` launch command. An empty `version` means the latest version. For `uvx`,
+    `python` is the requested interpreter, if any, from `--python` or `-p`, and `index_args`
+    are the `--index-url` and `--extra-index-url` options, which are passed to `uv` when the
+    server is installed.
+    """
+
+    # Launcher options followed by a value.
+    uvx_value_options = {'--from', '--python', '-p', '--index-url', '--extra-index-url'}
+    npx_value_options = {'--package', '-p'}
+    # The uvx options that select package indexes, which may be repeated.
+    uvx_index_options = {'--index-url', '--extra-index-url'}
+
+    def __init__(self, launcher: Launcher, package: str, version: str, executable: str, args: list[str],
+        python: str | None = None, index_args: list[str] = []):
+        self.launcher = launcher
+        self.package = package
+        self.version = version
+        self.executable = executable
+        self.args = args
+        self.python = python
+        self.index_args = list(index_args)
+
+    @staticmethod
+    def parse(command: str, args: list[str]) -> LaunchSpec | None:
+        """
+        The launch spec of `command` and `args`, or `None` if the command isn't `uvx` or `npx`.
+        Raises `ValueError` for launcher options that can't be installed as one package.
+        """
+        name = Path(command).name
+        if name not in [l.value for l in Launcher]:
+            return None
+        launcher = Launcher(name)
+        value_options = LaunchSpec.uvx_value_options if launcher == Launcher.UVX else LaunchSpec.npx_value_options
+        options: dict[str, str] = {}
+        index_args: list[str] = []
+        i = 0
+        while i < len(args) and args[i].startswith('-'):
+            option = args[i]
+            if option == '--':
+                i += 1
+                break
+            if option in value_options and i + 1 < len(args):
+                options[option] = args[i + 1]
+                if launcher == Launcher.UVX and option in LaunchSpec.uvx_index_options:
+                    index_args.extend([option, args[i + 1]])
+                i += 2
+            elif option in ['--yes', '-y', '--quiet', '-q']:
+                i += 1
+            else:
+                raise ValueError(f"Unsupported {launcher.value} option '{option}' in: {command} {' '.join(args)}")
+        if i >= len(args):
+            raise ValueError(f"No package to run in: {command} {' '.join(args)}")
+        spec, rest = args[i], args[i+1:]
+        if launcher == Launcher.UVX:
+            package, version = LaunchSpec.__split_python_spec(options.get('--from', spec))
+            executable = spec if '--from' in options else re.sub(r'\[.*\]$', '', package)
+            python = options.get('--python') or options.get('-p')
+            return LaunchSpec(launcher, package, version, executable, rest, python, index_args)
+        package_option = options.get('--package') or options.get('-p')
+        package, version = LaunchSpec.__split_npm_spec(package_option or spec)
+        executable = spec if package_option else ''  # Read from the package.json when installed.
+        return LaunchSpec(launcher, package, version, executable, rest)
+
+    @staticmethod
+    def __split_python_spec(spec: str) -> tuple[str, str]:
+        for separator in ['==', '@']:
+            if separator in spec:
+                package, version = spec.split(separator, 1)
+                return package, '' if version == 'latest' else version
+        return spec, ''
+
+    @staticmethod
+    def __split_npm_spec(spec: str) -> tuple[str, str]:
+        at = spec.rfind('@')
+        if at <= 0:  # Either no version or just a scope, e.g., `@scope/name`.
+            return spec, ''
+        version = spec[at+1:]
+        return spec[:at], '' if version == 'latest' else version
+
+    def __repr__(self) -> str:
+        return f"LaunchSpec(launcher = {self.launcher.value}, package = {self.package}, version = {self.version}, executable = {self.executable}, args = {self.args}, python = {self.python}, index_args = {self.index_args})"
+
+class InstalledServer():
+    """An installed server: how it was configured to launch, and how to run it now."""
+
+    def __init__(self, name: str, launch: list[str], package: str, version: str, command: str, args: list[str]):
+        self.name = name
+        self.launch = launch
+        self.package = package
+        self.version = version
+        self.command = command
+        self.args = args
+
+    def to_dict(self) -> dict[str,any]:
+        return dict(launch=self.launch, package=self.package, version=self.version, command=self.command, args=self.args)
+
+    @staticmethod
+    def from_dict(name: str, d: dict[str,any]) -> InstalledServer:
+        return InstalledServer(name, d['launch'], d['package'], d['version'], d['command'], d['args'])
+
+    def __repr__(self) -> str:
+        return f"InstalledServer(name = {self.name}, package = {self.package}, version = {self.version}, command = {self.command})"
+
+class ServerInstalls():
+    """
+    The servers installed in `dir`, recorded in its manifest. Use `install()` to install
+    or upgrade a server and `rewrite()` to run the installed servers.
+    """
+
+    manifest_name = 'servers.json'
+
+    def __init__(self, dir: Path, run: Callable[[list[str], str | None], str] = run_command):
+        """
+        Args:
+            dir (Path):     The install directory. It is created when a server is installed.
+            run (Callable): Runs a command with an optional standard input, returning its standard output.
+        """
+        self.dir = dir
+        self.run = run
+        self.servers: dict[str, InstalledServer] = {}
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            self.servers = dict((name, InstalledServer.from_dict(name, d))
+                for name, d in manifest.get('servers', {}).items())
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.dir / ServerInstalls.manifest_name
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        manifest = {'servers': dict((name, s.to_dict()) for name, s in sorted(self.servers.items()))}
+        self.manifest_path.write_text(json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+
+    def is_current(self, name: str, command: str, args: list[str]) -> bool:
+        """True if `name` is installed for the launch command `command args` and its executable exists."""
+        server = self.servers.get(name)
+        return bool(server and server.launch == [command] + list(args) and Path(server.command).exists())
+
+    def install(self, name: str, command: str, args: list[str], upgrade: bool = False) -> InstalledServer | None:
+        """
+        Install the server `name` launched by `command args`, unless it is already installed,
+        and record it in the manifest. The version installed before is kept, unless `upgrade`
+        is true. Returns `None` if the command isn't `uvx` or `npx`.
+        """
+        spec = LaunchSpec.parse(command, args)
+        if spec is None:
+            return None
+        launch = [command] + list(args)
+        previous = self.servers.get(name)
+        if not upgrade and self.is_current(name, command, args):
+            return previous
+        if not spec.version and not upgrade and previous and previous.launch == launch:
+            spec.version = previous.version
+        if spec.launcher == Launcher.UVX:
+            version, executable = self.__install_python(spec)
+        else:
+            version, executable = self.__install_npm(spec)
+        server = InstalledServer(name, launch, spec.package, version, str(executable), spec.args)
+        self.servers[name] = server
+        self.save()
+        return server
+
+    def __install_python(self, spec: LaunchSpec) -> tuple[str, Path]:
+        requirement = f"{spec.package}=={spec.version}" if spec.version else spec.package
+        python_args = ['--python', spec.python] if spec.python else []
+        locked = self.run(['uv', 'pip', 'compile', '-', '--quiet', '--no-header', '--no-annotate']
+            + python_args + spec.index_args, requirement)
+        base = re.sub(r'\[.*\]$', '', spec.package)
+        version = spec.version or ServerInstalls.__locked_version(locked, base)
+        env_dir = self.dir / 'python' / f"{base}-{version}"
+        if env_dir.exists():
+            shutil.rmtree(env_dir)
+        self.run(['uv', 'venv', '--quiet', str(env_dir)] + python_args, None)
+        (env_dir / 'requirements.txt').write_text(locked, encoding='utf-8')
+        self.run(['uv', 'pip', 'install', '--quiet', '--python', str(env_dir), '-r', str(env_dir / 'requirements.txt')]
+            + spec.index_args, None)
+        return version, env_dir / 'bin' / spec.executable
+
+    @staticmethod
+    def __locked_version(locked: str, package: str) -> str:
+        normalized = re.sub(r'[-_.]+', '-', package).lower()
+        for line in locked.splitlines():
+            match = re.match(r'^([A-Za-z0-9][A-Za-z0-9._-]*)(\[.*\])?==([^\s;]+)', line.strip())
+            if match and re.sub(r'[-_.]+', '-', match.group(1)).lower() == normalized:
+                return match.group(3)
+        raise ValueError(f"uv didn't resolve a version for '{package}'.")
+
+    def __install_npm(self, spec: LaunchSpec) -> tuple[str, Path]:
+        versions = json.loads(self.run(['npm', 'view', f"{spec.package}@{spec.version or 'latest'}", 'version', '--json'], None))
+        version = versions[-1] if isinstance(versions, list) else versions
+        prefix = self.dir / 'node' / f"{spec.package.lstrip('@').replace('/', '+')}-{version}"
+        if prefix.exists():
+            shutil.rmtree(prefix)
+        prefix.mkdir(parents=True)
+        self.run(['npm', 'install', '--prefix', str(prefix), '--no-audit', '--no-fund', '--save-exact',
+            f"{spec.package}@{version}"], None)
+        executable = spec.executable or ServerInstalls.__npm_bin(prefix / 'node_modules' / spec.package / 'package.json')
+        return version, prefix / 'node_modules' / '.bin' / executable
+
+    @staticmethod
+    def __npm_bin(package_json: Path) -> str:
+        """The command `npx` runs for the package: its only command, or the one named for the package."""
+        package = json.loads(package_json.read_text(encoding='utf-8'))
+        name = package['name'].split('/')[-1]
+        bins = package.get('bin') or {}
+        if isinstance(bins, str):
+            return name
+        if len(bins) == 1:
+            return next(iter(bins))
+        if name in bins:
+            return name
+        raise ValueError(f"Can't tell which command of {package['name']} to run: {sorted(bins)}")
+
+    def rewrite(self, servers: dict[str, any]) -> list[InstalledServer]:
+        """
+        Replace the `command` and `args` of the server settings in `servers`, e.g., the
+        `mcp.servers` of an `mcp_agent` config, with those of the installed servers that are
+        current. Returns the servers rewritten.
+        """
+        rewritten = []
+        for name, settings in servers.items():
+            if self.is_current(name, settings.command, settings.args or []):
+                server = self.servers[name]
+                settings.command = server.command
+                settings.args = list(server.args)
+                rewritten.append(server)
+        return rewritten
+
+    def __repr__(self) -> str:
+        return f"ServerInstalls(dir = {self.dir}, servers = {list(self.servers)})"
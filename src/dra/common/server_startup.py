@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Start the MCP servers a run uses before the research starts, all at the same time, rather
+than one by one when the agents first need them. Each server's launcher, e.g., `uvx` or
+`npx`, which may have to resolve and download its package, runs concurrently with the
+others, and each server must complete the MCP initialize handshake within a timeout. A
+broken server then fails the run immediately, instead of in the middle of the research.
+
+The servers are started with the connection manager that `mcp_agent` shares among the
+agents' aggregators, i.e., `context._mcp_connection_manager`. The `ServerStarter` holds a
+reference to it until `stop()` is called, so the servers stay up for the whole run and
+each agent reuses them, rather than relaunching them when the previous agent closed them.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import asyncio
+import time
+from enum import Enum
+from typing import Callable
+
+class ServerStatus(Enum):
+    """The server completed the MCP initialize handshake."""
+    READY = 'ready'
+    """The server exited or reported an error before completing the handshake."""
+    FAILED = 'failed'
+    """The server didn't complete the handshake within the timeout."""
+    TIMED_OUT = 'timed out'
+
+class ServerStartup():
+    """How starting one server went and how long it took."""
+
+    def __init__(self, name: str, status: ServerStatus, secs: float, error: str = ''):
+        self.name = name
+        self.status = status
+        self.secs = secs
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ServerStartup(name = {self.name}, status = {self.status.value}, secs = {self.secs:.3f}, error = {self.error})"
+
+def make_connection_manager(context: any) -> any:
+    """A new `MCPConnectionManager` for `context`'s server registry."""
+    from mcp_agent.mcp.mcp_connection_manager import MCPConnectionManager
+    return MCPConnectionManager(context.server_registry)
+
+class ServerStarter():
+    """
+    Start the named servers in parallel with `start()`, which returns a `ServerStartup` for
+    each one, and release them with `stop()` when the run ends.
+    """
+
+    # Seconds each server has to complete the MCP initialize handshake, including the
+    # time its launcher takes to install the server, the first time it runs.
+    def_timeout_secs = 60.0
+    # Seconds to wait for the servers to shut down in `stop()`.
+    def_close_timeout_secs = 5.0
+
+    def __init__(self,
+        context: any,
+        server_names: list[str],
+        timeout_secs: float = def_timeout_secs,
+        make_connection_manager: Callable[[any], any] = make_connection_manager):
+        """
+        Args:
+            context (Context):      The `mcp_agent` context, whose server registry defines the servers.
+            server_names (list[str]): The servers to start.
+            timeout_secs (float):   The time each server has to start.
+            make_connection_manager (Callable): Creates the connection manager, if the context doesn't have one yet.
+        """
+        self.context = context
+        self.server_names = list(dict.fromkeys(server_names))
+        self.timeout_secs = timeout_secs
+        self.make_connection_manager = make_connection_manager
+        self.startups: list[ServerStartup] = []
+        self.wall_secs = 0.0
+        self.manager: any = None
+
+    @property
+    def failed(self) -> list[ServerStartup]:
+        return [s for s in self.startups if s.status != ServerStatus.READY]
+
+    async def start(self) -> list[ServerStartup]:
+        """Start all the servers at once and wait until each is ready, fails, or times out."""
+        self.manager = await self.__acquire_manager()
+        start = time.perf_counter()
+        self.startups = list(await asyncio.gather(*[self.__start_server(name) for name in self.server_names]))
+        self.wall_secs = time.perf_counter() - start
+        return self.startups
+
+    async def __start_server(self, name: str) -> ServerStartup:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.manager.get_server(name), timeout=self.timeout_secs)
+            return ServerStartup(name, ServerStatus.READY, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            # Stop the launcher, so it doesn't keep running in the background.
+            await self.manager.disconnect_server(name)
+            return ServerStartup(name, ServerStatus.TIMED_OUT, time.perf_counter() - start,
+                f"No MCP initialize response within {self.timeout_secs:g} seconds")
+        except Exception as e:
+            return ServerStartup(name, ServerStatus.FAILED, time.perf_counter() - start, str(e))
+
+    async def __acquire_manager(self) -> any:
+        """Use the connection manager the aggregators share, counting our reference to it."""
+        context = self.context
+        if not hasattr(context, '_mcp_connection_manager_lock'):
+            context._mcp_connection_manager_lock = asyncio.Lock()
+        if not hasattr(context, '_mcp_connection_manager_ref_count'):
+            context._mcp_connection_manager_ref_count = 0
+        async with context._mcp_connection_manager_lock:
+            context._mcp_connection_manager_ref_count += 1
+            manager = getattr(context, '_mcp_connection_manager', None)
+            if manager is None:
+                manager = self.make_connection_manager(context)
+                await manager.__aenter__()
+                context._mcp_connection_manager = manager
+            return manager
+
+    async def stop(self):
+        """Release our reference to the servers, shutting them down if no agent still uses them."""
+        if self.manager is None:
+            return
+        context = self.context
+        async with context._mcp_connection_manager_lock:
+            context._mcp_connection_manager_ref_count -= 1
+            if context._mcp_connection_manager_ref_count == 0 and \
+                getattr(context, '_mcp_connection_manager', None) is self.manager:
+                try:
+                    await asyncio.wait_for(self.manager.close(), timeout=ServerStarter.def_close_timeout_secs)
+                except Exception:
+                    pass  # The servers are child processes, so they end when we exit anyway.
+                del context._mcp_connection_manager
+        self.manager = None
+
+    def failure_message(self) -> str:
+        failures = ', '.join(f"{s.name} ({s.status.value}: {s.error})" for s in self.failed)
+        return (f"MCP servers failed to start: {failures}. Check their definitions in the mcp_agent "
+            "config file, or pass '--mcp-startup-timeout-secs 0' to start the servers when they are first used.")
+
+    def __repr__(self) -> str:
+        return f"ServerStarter(server_names = {self.server_names}, timeout_secs = {self.timeout_secs}, startups = {self.startups})"
@@ -2,16 +2,23 @@
 # Allow types to self-reference during their definitions.
 from __future__ import annotations
 
+import asyncio
+import traceback
 from enum import Enum
 from pathlib import Path
 from abc import abstractmethod
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TextIO
 
-from mcp_agent.agents.agent import Agent
-from mcp_agent.logging.logger import Logger
-from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
-from mcp_agent.workflows.llm.augmented_llm import RequestParams
+if TYPE_CHECKING:  # mcp_agent is slow to import, so it is imported when a task runs.
+    from mcp_agent.agents.agent import Agent
+    from mcp_agent.logging.logger import Logger
+    from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
 
 
+from dra.common.messages import ReplyMessage
+from dra.common.output_writer import output_writer
+from dra.common.tracing import set_attributes, span
+from dra.common.utils.compression import Compression, compressed_path
 from dra.common.utils.prompts import load_prompt_markdown
 from dra.common.utils.strings import replace_variables, truncate
 from dra.common.variables import Variable, VariableFormat
@@ -26,6 +33,82 @@ class TaskStatus(Enum):
     """An error occurred due to a thrown exception."""
     FINISHED_EXCEPTION = 4
 
+class TaskResult():
+    """
+    The messages returned by a task, with lazily computed and cached string forms.
+    `str(result)` is the same as `str(list(result))`, but it is only computed once. 
+    Most callers only need the beginning of it, for which `truncated()` converts only
+    as many messages as necessary. Use `write_to()` to write the messages to a file
+    without building one big string. A `None` result, e.g., from a `_run()` that
+    returned nothing, is an empty result.
+    """
+
+    def __init__(self, messages: Iterable[any] | None = ()):
+        self.messages: tuple[any] = tuple(messages) if messages is not None else ()
+        self.__reprs: list[str | None] = [None]*len(self.messages)
+        self.__text: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[any]:
+        return iter(self.messages)
+
+    def __getitem__(self, index: int) -> any:
+        return self.messages[index]
+
+    def __eq__(self, other: any) -> bool:
+        if isinstance(other, TaskResult):
+            return self.messages == other.messages
+        if isinstance(other, (list, tuple)):
+            return self.messages == tuple(other)
+        return False
+
+    def __item_repr(self, index: int) -> str:
+        r = self.__reprs[index]
+        if r is None:
+            r = repr(self.messages[index])
+            self.__reprs[index] = r
+        return r
+
+    def __chunks(self) -> Iterator[str]:
+        """Yield the pieces of `str(list(self))`, converting the messages one at a time."""
+        yield '['
+        for i in range(len(self.messages)):
+            if i > 0:
+                yield ', '
+            yield self.__item_repr(i)
+        yield ']'
+
+    def prefix(self, n: int) -> str:
+        """Return the first `n` characters of `str(self)`."""
+        if self.__text is not None:
+            return self.__text[:n]
+        chunks = []
+        length = 0
+        for chunk in self.__chunks():
+            if length >= n:
+                break
+            chunks.append(chunk)
+            length += len(chunk)
+        return ''.join(chunks)[:n]
+
+    def truncated(self, n: int, ellipsis: str = None) -> str:
+        """Equivalent to `truncate(str(self), n, ellipsis)`, but doesn't build the whole string."""
+        return truncate(self.prefix(n+1), n, ellipsis)
+
+    def write_to(self, stream: TextIO, separator: str = '\n\n') -> TextIO:
+        """Write `str()` of each message to `stream`, each followed by `separator`."""
+        for message in self.messages:
+            stream.write(str(message))
+            stream.write(separator)
+        return stream
+
+    def __repr__(self) -> str:
+        if self.__text is None:
+            self.__text = ''.join(self.__chunks())
+        return self.__text
+
 class BaseTask():
     def __init__(self, 
         name: str, 
@@ -42,32 +125,39 @@ class BaseTask():
         self.properties = properties
 
         self.status: TaskStatus = TaskStatus.NOT_STARTED 
-        self.result: list[any] = []
+        self._replies: list[ReplyMessage] | None = None  # lazily computed from the result...
+        self.result: TaskResult = TaskResult()
         self.prompt = '' # lazy loaded...
         self.prompt_saved_file = self.output_dir_path / f"{self.name}_task_prompt.txt"
 
     async def run(self, 
         orchestrator: DeepOrchestrator,
         logger: Logger,
-        **prompt_variables: dict[str,any]) -> (TaskStatus, list[any]):
+        **prompt_variables: dict[str,any]) -> (TaskStatus, TaskResult):
         """
         Return the final status and the result, which are also attributes of the task object.
         """
         self.status = TaskStatus.RUNNING 
-        try:
-            self.prepare_prompt(logger, prompt_variables)
-            self.result = await self._run(orchestrator, logger)
-            if self.result:  # TBD: Probably doesn't catch all error scenarios!
-                self.status = TaskStatus.FINISHED_OK
-            else:
-                self.status = TaskStatus.FINISHED_ERROR
-                self.result = [f"No result for task {self.name}!"]
-            self.__log_result(logger)
-        except Exception as ex:
-            self.status = TaskStatus.FINISHED_EXCEPTION
-            self.result = [f"Exception {ex} thrown in task {self.name}!"]
-            logger.error(str(self.result))
-            raise ex
+        with span('BaseTask.run', **{'dra.task': self.name, 'dra.task.kind': type(self).__name__,
+            'gen_ai.request.model': self.model_name}) as current:
+            try:
+                self.prepare_prompt(logger, prompt_variables)
+                self.result = await self._run(orchestrator, logger)
+                if self.result:  # TBD: Probably doesn't catch all error scenarios!
+                    self.status = TaskStatus.FINISHED_OK
+                else:
+                    self.status = TaskStatus.FINISHED_ERROR
+                    self.result = [f"No result for task {self.name}!"]
+                self.__log_result(logger)
+                self.__normalize_replies()
+            except Exception as ex:
+                self.status = TaskStatus.FINISHED_EXCEPTION
+                self.result = [f"Exception {ex} thrown in task {self.name}!"]
+                logger.error(str(self.result))
+                self.__normalize_replies()
+                raise ex
+            finally:
+                set_attributes(current, **{'dra.task.status': self.status.name})
         return (self.status, self.result)
 
     @abstractmethod
@@ -76,6 +166,32 @@ class BaseTask():
         logger: Logger) -> list[any]:
         raise Exception("Abstract method BaseTask._run() called!")
 
+    @property
+    def result(self) -> TaskResult:
+        return self._result
+
+    @result.setter
+    def result(self, result: TaskResult | Iterable[any] | None):
+        """
+        The result is stored as a `TaskResult`. Setting a new result discards the 
+        `replies` computed for the previous one.
+        """
+        self._result = result if isinstance(result, TaskResult) else TaskResult(result)
+        self._replies = None
+
+    @property
+    def replies(self) -> list[ReplyMessage]:
+        """
+        The messages in `result`, normalized into `ReplyMessage` records. This is done
+        once, when the task finishes, or on first use if `result` was set directly.
+        """
+        if self._replies is None:
+            self.__normalize_replies()
+        return self._replies
+
+    def __normalize_replies(self):
+        self._replies = ReplyMessage.normalize_all(self.result)
+
     def attributes_as_strs(self, 
         variable_format: VariableFormat = VariableFormat.PLAIN, 
         exclusions: set[str] = {}) -> dict[str,str]:
@@ -92,7 +208,7 @@ class BaseTask():
         if self.prompt:
             prompt_str = truncate(str(self.prompt), 200, '...')
         if self.result:
-            result_str = truncate(str(self.result), 200, '...')
+            result_str = self.result.truncated(200, '...')
         
         prompt = Variable('code', prompt_str, kind='callout')
         result = Variable('code', result_str, kind='callout')
@@ -134,11 +250,13 @@ class BaseTask():
         """Load and format a task prompt."""
         prompt_template = load_prompt_markdown(self.prompt_template_path)
         self.prompt = replace_variables(prompt_template, **prompt_variables)
+        self.prompt_saved_file = compressed_path(self.prompt_saved_file,
+            self._get_val('artifact_compression', Compression.NONE))
         if logger:  # may not be initialized in tests...
             logger.info(f"Writing the {self.name} task prompt to {self.prompt_saved_file}")
-        with self.prompt_saved_file.open('w') as file:
-            file.write(f"This is the prompt that will be used for the {self.name} task:\n")
-            file.write(self.prompt)
+        # Written in the background, so the event loop isn't blocked.
+        output_writer().write_soon(self.prompt_saved_file,
+            f"This is the prompt that will be used for the {self.name} task:\n{self.prompt}")
         return self.prompt
 
     def __log_result(self, logger: Logger):
@@ -150,7 +268,7 @@ class BaseTask():
         """
         result_str = 'No result yet...'
         if self.result:
-            result_str = truncate(str(self.result), 2000, '...')            
+            result_str = self.result.truncated(2000, '...')
         msg = f"""Task "{self.name}": status = {self.status}), result = {result_str}"""
         match self.status:
             case TaskStatus.FINISHED_ERROR | TaskStatus.FINISHED_EXCEPTION:
@@ -176,18 +294,20 @@ class GenerateTask(BaseTask):
     async def _run(self, 
         orchestrator: DeepOrchestrator, 
         logger: Logger) -> list[any]:
+        from mcp_agent.workflows.llm.augmented_llm import RequestParams
         logger.debug("GenerateTask: calling inference")
-        return await orchestrator.generate(
-            message=self.prompt,
-            request_params=RequestParams(
-                model=self.model_name, 
-                temperature=self._get_val('temperature', 0.7),
-                max_iterations=self._get_val('max_iterations', 10),
-                max_tokens=self._get_val('max_tokens', 100000),
-                max_cost=self._get_val('max_cost_dollars', 2.0),
-                max_time_minutes=self._get_val('max_time_minutes', 10),
-            ),
-        )
+        with span('GenerateTask._run', **{'dra.task': self.name, 'gen_ai.request.model': self.model_name}):
+            return await orchestrator.generate(
+                message=self.prompt,
+                request_params=RequestParams(
+                    model=self.model_name, 
+                    temperature=self._get_val('temperature', 0.7),
+                    max_iterations=self._get_val('max_iterations', 10),
+                    max_tokens=self._get_val('max_tokens', 100000),
+                    max_cost=self._get_val('max_cost_dollars', 2.0),
+                    max_time_minutes=self._get_val('max_time_minutes', 10),
+                ),
+            )
 
     def __repr__(self) -> str: 
         return f"""GenerateTask({super().__repr__()})"""
@@ -209,6 +329,7 @@ class AgentTask(BaseTask):
     async def _run(self, 
         orchestrator: DeepOrchestrator, 
         logger: Logger) -> list[any]:
+        from mcp_agent.agents.agent import Agent
         agent = Agent(
             name=self.name,
             instruction=self.prompt,
@@ -216,6 +337,12 @@ class AgentTask(BaseTask):
             server_names=[self.name]
         )
 
+        with span('AgentTask._run', **{'dra.task': self.name, 'gen_ai.request.model': self.model_name,
+            'gen_ai.agent.name': self.name}):
+            return await self.__generate(agent, orchestrator, logger)
+
+    async def __generate(self, agent: Agent, orchestrator: DeepOrchestrator, logger: Logger) -> list[any]:
+        from mcp_agent.workflows.llm.augmented_llm import RequestParams
         async with agent:
             logger.debug("AgentTask: calling inference")
             llm = await agent.attach_llm(orchestrator.llm_factory)
@@ -242,3 +369,48 @@ class AgentTask(BaseTask):
     def __repr__(self) -> str: 
         return f"""AgentTask({super().__repr__()}, generate prompt: {self.generate_prompt})"""
 
+class LocalAgentTask(AgentTask):
+    """
+    An `AgentTask` that first tries to do its work locally, without a model, by calling
+    `run_locally`, e.g., to write a file directly from the structured result of an earlier
+    task. The agent is only run if `run_locally` returns `None`, e.g., because the data it
+    needs is missing, or if it raises an exception, which is logged.
+    """
+    def __init__(self, 
+        name: str, 
+        title: str, 
+        model_name: str, 
+        prompt_template_path: Path,
+        output_dir_path: Path,
+        generate_prompt: str,
+        run_locally: Callable[[], list[any] | None],
+        properties: dict[str,any]):
+        super().__init__(name, title, model_name, 
+            prompt_template_path, output_dir_path, 
+            generate_prompt, properties)
+        self.run_locally = run_locally
+        self.ran_locally = False
+
+    async def _run(self, 
+        orchestrator: DeepOrchestrator, 
+        logger: Logger) -> list[any]:
+        with span('LocalAgentTask._run', **{'dra.task': self.name}) as current:
+            failed = False
+            try:
+                # Run in a thread, since it usually writes files.
+                result = await asyncio.to_thread(self.run_locally)
+            except Exception as e:
+                logger.error(f"Task {self.name} failed to run locally, so the {self.model_name} agent is used: {e}\n{traceback.format_exc()}")
+                result = None
+                failed = True
+            self.ran_locally = result is not None
+            set_attributes(current, **{'dra.task.ran_locally': self.ran_locally})
+        if self.ran_locally:
+            logger.info(f"Task {self.name} ran locally, without the {self.model_name} agent.")
+            return result
+        if not failed:
+            logger.info(f"Task {self.name} can't run locally, so the {self.model_name} agent is used.")
+        return await super()._run(orchestrator, logger)
+
+    def __repr__(self) -> str: 
+        return f"""LocalAgentTask({super().__repr__()}, ran locally: {self.ran_locally})"""
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+OpenTelemetry spans for the task pipeline: the task sequence, each task, the orchestrator's
+plan steps and their tasks, the LLM calls, with their model, tokens, and cost, and the MCP
+tool calls. The spans of a run form one trace, where each span is a child of the span that
+was current when it started.
+
+Tracing is off until `configure_tracing()` is called. Until then, `span()` returns a shared
+no-op context manager and nothing is wrapped, so the instrumentation costs one global
+lookup per span. When tracing is on, the spans are exported in batches on a background
+thread to a JSON Lines file, where each line is an OTLP-JSON `ExportTraceServiceRequest`,
+the format of the OpenTelemetry Collector's file exporter. Files ending with `.gz` or
+`.zst` are compressed.
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import atexit
+import base64
+import contextlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import ContextManager, Sequence
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from dra.common.ledger import measured_call
+from dra.common.llm_wrappers import wrap_llm_class
+from dra.common.utils.compression import Compression, write_compressed
+
+class OTLPJsonFileExporter(SpanExporter):
+    """Append each exported batch of spans to a file as one line of OTLP JSON."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def to_json(spans: Sequence[ReadableSpan]) -> dict[str,any]:
+        """
+        The OTLP-JSON form of `spans`. Unlike the protobuf JSON mapping, OTLP JSON
+        requires the trace and span ids to be hex strings and the enums to be integers.
+        """
+        request = MessageToDict(encode_spans(spans), use_integers_for_enums=True)
+        for resource_spans in request.get('resourceSpans', []):
+            for scope_spans in resource_spans.get('scopeSpans', []):
+                for span in scope_spans.get('spans', []):
+                    OTLPJsonFileExporter.__hex_ids(span)
+                    for link in span.get('links', []):
+                        OTLPJsonFileExporter.__hex_ids(link)
+        return request
+
+    @staticmethod
+    def __hex_ids(d: dict[str,any]):
+        for key in ['traceId', 'spanId', 'parentSpanId']:
+            if d.get(key):
+                d[key] = base64.b64decode(d[key]).hex()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            line = (json.dumps(OTLPJsonFileExporter.to_json(spans), separators=(',', ':')) + '\n').encode('utf-8')
+            with self.__lock, open(self.path, 'ab') as f:
+                write_compressed(f, line, Compression.of_path(self.path))
+            return SpanExportResult.SUCCESS
+        except (OSError, TypeError, ValueError):
+            return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return f"OTLPJsonFileExporter(path = {self.path})"
+
+# The name of the instrumentation scope of the spans.
+scope_name = 'dra'
+
+_provider: TracerProvider | None = None
+_tracer: trace.Tracer | None = None
+_path: Path | None = None
+_no_span = contextlib.nullcontext()
+
+def configure_tracing(path: Path, service_name: str = 'deep-research-agent') -> TracerProvider:
+    """
+    Turn tracing on for the process, exporting the spans to `path`. Calling it again with
+    the same path does nothing. A different path replaces the previous exporter after
+    flushing it.
+    """
+    global _provider, _tracer, _path
+    if _provider and _path == path:
+        return _provider
+    shutdown_tracing()
+    _provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPJsonFileExporter(path)))
+    _tracer = _provider.get_tracer(scope_name)
+    _path = path
+    return _provider
+
+def shutdown_tracing():
+    """Export the pending spans and turn tracing off."""
+    global _provider, _tracer, _path
+    if _provider:
+        _provider.shutdown()
+    _provider, _tracer, _path = None, None, None
+
+atexit.register(shutdown_tracing)
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+def flush_tracing(timeout_millis: int = 30000) -> bool:
+    """Export the pending spans, if tracing is on, without turning it off."""
+    return _provider.force_flush(timeout_millis) if _provider else True
+
+def span(name: str, **attributes: any) -> ContextManager[trace.Span | None]:
+    """
+    Return a context manager for a span that is a child of the current span, with the
+    attributes whose values aren't `None`. When tracing is off, it yields `None`.
+    """
+    if _tracer is None:
+        return _no_span
+    return _tracer.start_as_current_span(name,
+        attributes=dict((k, v) for k, v in attributes.items() if v is not None))
+
+def set_attributes(current: trace.Span | None, **attributes: any):
+    """Set the attributes whose values aren't `None` on `current`, unless it is `None`."""
+    if current:
+        current.set_attributes(dict((k, v) for k, v in attributes.items() if v is not None))
+
+def traced(llm_class: type, provider: str) -> type:
+    """
+    Return a subclass of the `AugmentedLLM` class `llm_class` with a span around each
+    `generate()` and `generate_structured()` call, with the model, tokens, and cost of
+    the call, and around each MCP tool call made by the LLM.
+    """
+    async def trace_call(llm: any, method: any, message: any, request_params: any, kwargs: dict[str,any]) -> any:
+        response_model = kwargs.get('response_model')
+        with span('llm.generate_structured' if response_model else 'llm.generate',
+            **{'gen_ai.system': provider, 'gen_ai.agent.name': getattr(llm, 'name', None),
+               'dra.response_model': response_model.__name__ if response_model else None}) as current:
+            result, usage = await measured_call(llm, method, message, request_params, kwargs, time.perf_counter)
+            set_attributes(current, **{
+                'gen_ai.request.model': usage.model,
+                'gen_ai.usage.input_tokens': usage.input_tokens,
+                'gen_ai.usage.output_tokens': usage.output_tokens,
+                'dra.cost_dollars': usage.cost,
+                'dra.cache_hit': usage.cache_hit,
+            })
+            if usage.error:
+                raise usage.error
+            return result
+
+    class TracedLLM(wrap_llm_class(llm_class, 'Traced', trace_call)):
+        async def call_tool(self, request, tool_call_id=None):
+            name = request.params.name
+            with span('mcp.call_tool', **{'gen_ai.agent.name': self.name, 'gen_ai.tool.name': name,
+                'gen_ai.tool.call.id': tool_call_id}) as current:
+                result = await super().call_tool(request, tool_call_id)
+                if current and getattr(result, 'isError', False):
+                    current.set_status(trace.Status(trace.StatusCode.ERROR, f"Tool {name} returned an error"))
+                return result
+
+    TracedLLM.__name__ = f"Traced{llm_class.__name__}"
+    TracedLLM.__qualname__ = TracedLLM.__name__
+    return TracedLLM
+
+def trace_steps(orchestrator: any):
+    """
+    Add spans around the plan steps, and the tasks in them, that `orchestrator`, a
+    `DeepOrchestrator`, executes. It creates a new task executor for each objective, so
+    each new executor is instrumented when it is created.
+    """
+    initialize = orchestrator._initialize_execution_components
+
+    def traced_initialize(*args, **kwargs):
+        initialize(*args, **kwargs)
+        trace_executor(orchestrator.task_executor)
+
+    orchestrator._initialize_execution_components = traced_initialize
+
+def trace_executor(executor: any):
+    """Add spans around the steps and tasks that a `TaskExecutor` executes."""
+    execute_step = executor.execute_step
+    execute_task = executor.execute_task
+
+    async def traced_step(step, *args, **kwargs):
+        with span('orchestrator.step', **{'dra.step': step.description, 'dra.step.tasks': len(step.tasks)}) as current:
+            succeeded = await execute_step(step, *args, **kwargs)
+            set_attributes(current, **{'dra.step.succeeded': succeeded})
+            return succeeded
+
+    async def traced_task(task, *args, **kwargs):
+        with span('orchestrator.task', **{'dra.task': task.name, 'gen_ai.agent.name': task.agent}) as current:
+            result = await execute_task(task, *args, **kwargs)
+            status = getattr(result, 'status', None)
+            set_attributes(current, **{'dra.task.status': str(getattr(status, 'value', status)) if status else None})
+            return result
+
+    executor.execute_step = traced_step
+    executor.execute_task = traced_task
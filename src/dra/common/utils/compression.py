@@ -0,0 +1,106 @@
+# Compressed artifact files, using gzip or, if the `zstandard` package is installed, zstd.
+
+import gzip
+import io
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+try:
+    import zstandard
+except ImportError:  # optional; see the "compression" extra in pyproject.toml.
+    zstandard = None
+
+def has_zstandard() -> bool:
+    return zstandard is not None
+
+class Compression(Enum):
+    """No compression."""
+    NONE = 'none'
+    """gzip, from the standard library. Smaller files, but slow to write."""
+    GZIP = 'gzip'
+    """Zstandard, which is faster and usually smaller than gzip. Needs the `zstandard` package."""
+    ZSTD = 'zstd'
+
+    @property
+    def suffix(self) -> str:
+        return {'none': '', 'gzip': '.gz', 'zstd': '.zst'}[self.value]
+
+    def require_available(self):
+        """Raise `ValueError` if the library for this compression isn't installed."""
+        if self == Compression.ZSTD and not has_zstandard():
+            raise ValueError("zstd compression requires the 'zstandard' package. Install the 'compression' extra or use gzip.")
+
+    @staticmethod
+    def of_path(path: Path) -> 'Compression':
+        """The compression implied by the file name's suffix."""
+        for compression in [Compression.GZIP, Compression.ZSTD]:
+            if path.name.endswith(compression.suffix):
+                return compression
+        return Compression.NONE
+
+# Fast levels, since the artifacts are written while the app runs. gzip's level 1 is
+# several times faster than its default, 6, for files that are only slightly larger.
+default_levels = {Compression.GZIP: 1, Compression.ZSTD: 3}
+
+# Compress in chunks of this size, so a large artifact isn't copied whole.
+chunk_size = 1024 * 1024
+
+def compressed_path(path: Path, compression: Compression) -> Path:
+    """Return `path` with the suffix for `compression` appended, if it isn't already there."""
+    if compression == Compression.NONE or path.name.endswith(compression.suffix):
+        return path
+    return path.with_name(path.name + compression.suffix)
+
+def compressing_writer(stream: BinaryIO, compression: Compression, level: int | None = None,
+    size: int = -1) -> BinaryIO:
+    """
+    Return a writable binary stream that compresses the data written to it into `stream`,
+    so large artifacts can be written chunk by chunk without building them in memory.
+    Closing it finishes the compressed data, but leaves `stream` open. For
+    `Compression.NONE`, `stream` itself is returned. `size` is the total size, if known,
+    which zstd records in the frame.
+    """
+    if compression == Compression.NONE:
+        return stream
+    compression.require_available()
+    level = level if level is not None else default_levels[compression]
+    if compression == Compression.GZIP:
+        # mtime=0 makes the output depend only on the data.
+        return gzip.GzipFile(fileobj=stream, mode='wb', compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).stream_writer(stream, size=size, closefd=False)
+
+def write_compressed(stream: BinaryIO, data: bytes, compression: Compression, level: int | None = None):
+    """Write `data` to the binary `stream`, compressing it chunk by chunk."""
+    if compression == Compression.NONE:
+        stream.write(data)
+        return
+    view = memoryview(data)
+    with compressing_writer(stream, compression, level, size=len(data)) as writer:
+        for start in range(0, len(view), chunk_size):
+            writer.write(view[start:start+chunk_size])
+
+def open_binary(path: Path) -> BinaryIO:
+    """
+    Open `path` for reading, decompressing it transparently. The compression is implied by
+    the file's name, as when it was written, since uncompressed data can start with the same
+    bytes as a compressed file. Concatenated gzip members or zstd frames, e.g., from appending
+    to a compressed file, are read as one stream.
+    """
+    compression = Compression.of_path(path)
+    stream = open(path, 'rb')
+    try:
+        if compression == Compression.GZIP:
+            stream.close()
+            return gzip.open(path, 'rb')
+        if compression == Compression.ZSTD:
+            compression.require_available()
+            return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=True)
+        return stream
+    except BaseException:
+        stream.close()
+        raise
+
+def open_text(path: Path, encoding: str = 'utf-8') -> TextIO:
+    """Like `open_binary()`, but returns a text stream."""
+    return io.TextIOWrapper(open_binary(path), encoding=encoding)
@@ -0,0 +1,73 @@
+# JSON parsing utilities, using `orjson` if it is installed.
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # optional; see the "fast" extra in pyproject.toml.
+    orjson = None
+
+from dra.common.utils.strings import clean_json_string
+
+_non_space = re.compile(r'\S')
+
+# A run of 19 or more digits, which may be an integer outside the 64-bit range that
+# `orjson` only handles as a float.
+_long_digits = re.compile(r'\d{19,}')
+_long_digits_bytes = re.compile(rb'\d{19,}')
+
+def has_orjson() -> bool:
+    return orjson is not None
+
+def loads(s: str | bytes) -> any:
+    """
+    Parse a JSON document with `orjson`, if available, which is several times faster than
+    the standard library for large documents, or else with `json.loads`. Either way, a
+    `ValueError` is raised for invalid JSON. Documents with a run of 19 or more digits,
+    which may be an integer too big for 64 bits, are parsed with `json.loads`, so such
+    integers keep their exact values.
+    """
+    if orjson and not (_long_digits_bytes if isinstance(s, bytes) else _long_digits).search(s):
+        return orjson.loads(s)
+    return json.loads(s)
+
+def looks_like_json(s: str) -> bool:
+    """
+    A cheap check that `s` might be a JSON object or array, before trying to parse it.
+    Only the characters at each end are examined, so the string isn't copied.
+    """
+    start = 0
+    end = len(s)
+    while start < end and s[start].isspace():
+        start += 1
+    while end > start and s[end-1].isspace():
+        end -= 1
+    if start >= end:
+        return False
+    return (s[start] == '{' and s[end-1] == '}') or (s[start] == '[' and s[end-1] == ']')
+
+def loads_reply(s: str) -> any:
+    """
+    Parse a JSON reply from a model. The string is parsed as is first, and only if that
+    fails is it cleaned with `clean_json_string()` and parsed again, so the usual case
+    doesn't copy the string. Raises `ValueError` if both attempts fail.
+    """
+    try:
+        return loads(s)
+    except ValueError:
+        return loads(clean_json_string(s, ''))
+
+def loads_values(s: str) -> list[any]:
+    """
+    Parse a string of whitespace-separated JSON values, e.g., JSON Lines or concatenated
+    objects. Each value is decoded in place, so the string is scanned once, without copies.
+    Raises `ValueError` if any value is invalid.
+    """
+    decoder = json.JSONDecoder()
+    values = []
+    pos = 0
+    while m := _non_space.search(s, pos):
+        value, pos = decoder.raw_decode(s, m.start())
+        values.append(value)
+    return values
@@ -1,4 +1,9 @@
 # Common utilities for the application "main" files.
+# The modules that import mcp_agent, the provider SDKs, or Rich are imported when they
+# are first used, not here, so `--help` and argument errors are reported quickly.
+# See the `startup` benchmark.
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
 
 import argparse
 import os
@@ -7,20 +12,29 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
-from mcp_agent.workflows.deep_orchestrator.config import DeepOrchestratorConfig
+if TYPE_CHECKING:
+    from mcp_agent.workflows.deep_orchestrator.config import DeepOrchestratorConfig
+    from dra.common.tasks import BaseTask
+    from dra.common.utils.io import UserPrompts
 
-from dra.common.deep_research import DeepResearch
 from dra.common.markdown import MarkdownObserver
+from dra.common.markdown.renderers import renderers
+from dra.common.knowledge import KnowledgeStore
+from dra.common.ledger import UsageLedger
+from dra.common.memory_compaction import MemoryCompactor
+from dra.common.metrics import MetricsObserver
 from dra.common.observer import Observer, Observers
-from dra.common.tasks import BaseTask
-from dra.common.utils.io import UserPrompts
-from dra.common.utils.paths import resolve_path, resolve_and_require_path
+from dra.common.profiling import ProfileMode, RunProfiler
+from dra.common.profiles import ExecutionProfile, default_profiles_path, get_profile
+from dra.common.server_installs import default_servers_dir
+from dra.common.server_startup import ServerStarter
+from dra.common.utils.compression import Compression
+from dra.common.utils.paths import def_cache_dir, resolve_path, resolve_and_require_path
 from dra.common.variables import Variable
 
 from dra.ux.display import Display
-from dra.ux.rich import RichDisplay
 
 class ParserUtil():
     def __init__(self, which_app: str, app_name: str, ux_title: str, description: str):
@@ -36,6 +50,7 @@ class ParserUtil():
         self.defaults = {
             'report-title': None,
             'output-dir': "./output",
+            'cache-dir': def_cache_dir,
             'templates-dir': "./templates",
             'markdown-report': f'{self.which_app}_research_report.md',
             'markdown-yaml-header': None,
@@ -47,6 +62,19 @@ class ParserUtil():
             'max-tokens': 500000,
             'max-cost-dollars': 2.0,
             'max-time-minutes': 15,
+            'knowledge-store': 'knowledge.sqlite',
+            'knowledge-max-age-days': KnowledgeStore.def_max_age_days,
+            'memory-compaction-tokens': MemoryCompactor.def_threshold_tokens,
+            'usage-ledger': UsageLedger.def_file_name,
+            'execution-profile': None,
+            'execution-profiles-file': None,
+            'record-llm-fixtures': '',
+            'trace-file': '',
+            'metrics-port': 0,
+            'profile': ProfileMode.NONE.value,
+            'mcp-startup-timeout-secs': ServerStarter.def_timeout_secs,
+            'mcp-servers-dir': str(default_servers_dir()),
+            'artifact-compression': Compression.NONE.value,
         }
 
     def make_parser(self) -> argparse.ArgumentParser:
@@ -107,6 +135,13 @@ class ParserUtil():
             help=f"Path where a Markdown report is written. If empty, a file name will be generated from the report title. (Default: {default}) {self.written_relative_to('output-dir')}"
         )
 
+    def add_arg_extra_report_formats(self):
+        formats = [f for f in renderers.keys() if f != 'markdown']
+        self.parser.add_argument(
+            "--extra-report-formats", nargs='*', default=[], choices=formats,
+            help=f"Also write the report in these formats, next to the Markdown report with the same name and a different file extension. (Choices: {formats}; Default: none)"
+        )
+
     def add_arg_output_dir(self, default: str = None):
         default = self.get_default("--output-dir", default)
         self.parser.add_argument(
@@ -114,6 +149,13 @@ class ParserUtil():
             help=f"Path where Excel and other output files will be saved. (Default: {default})"
         )
 
+    def add_arg_cache_dir(self, default: str = None):
+        default = self.get_default("--cache-dir", default)
+        self.parser.add_argument(
+            "--cache-dir", default=default,
+            help=f"Path where the databases kept across runs, e.g., the '--knowledge-store', are saved. Unlike '--output-dir', which 'make app-run' moves aside before each run, it should stay the same from run to run, so later runs reuse what earlier runs saved. (Default: {default})"
+        )
+
     def add_arg_templates_dir(self, default: str = None):
         default = self.get_default("--templates-dir", default)
         self.parser.add_argument(
@@ -190,6 +232,92 @@ class ParserUtil():
             help=f"Path to the mcp_agent_config.yaml file for configuration settings. (Default: {default}) Specify an absolute path or a path relative to the project's \"src\" directory. See the bottom of this help for more information."
         )
 
+    def add_arg_knowledge_store(self, default: str = None, default_max_age_days: float = None):
+        default = self.get_default("--knowledge-store", default)
+        default_max_age_days = self.get_default("--knowledge-max-age-days", default_max_age_days)
+        self.parser.add_argument(
+            "--knowledge-store", default=default,
+            help=f"Path to a SQLite database where the knowledge extracted during a run is saved, so later runs for the same subject start with it. Pass '' to disable. (Default: {default}) {self.written_relative_to('cache-dir')}"
+        )
+        self.parser.add_argument(
+            "--knowledge-max-age-days", type=float, default=default_max_age_days,
+            help=f"Only knowledge saved within this many days is used to start a new run. (Default: {default_max_age_days})"
+        )
+
+    def add_arg_usage_ledger(self, default: str = None):
+        default = self.get_default("--usage-ledger", default)
+        self.parser.add_argument(
+            "--usage-ledger", default=default,
+            help=f"Path to a SQLite database where a row is appended for every LLM call and task, with the model, tokens, cost, and latency, for tracking spending across runs. See 'python -m dra.tools.ledger --help'. Pass '' to disable. (Default: {default}) {self.written_relative_to('cache-dir')}"
+        )
+
+    def add_arg_memory_compaction_tokens(self, default: int = None):
+        default = self.get_default("--memory-compaction-tokens", default)
+        self.parser.add_argument(
+            "--memory-compaction-tokens", type=int, default=default,
+            help=f"When the estimated size of the orchestrator's memory exceeds this many tokens, duplicate knowledge items and task results are removed and long values are summarized. Pass 0 to disable. (Default: {default})"
+        )
+
+    def add_arg_execution_profile(self, default: str = None):
+        default = self.get_default("--execution-profile", default)
+        self.parser.add_argument(
+            "--execution-profile", default=default,
+            help=f"A named execution profile, e.g., 'fast', 'balanced', or 'thorough', which sets the iterations, replans, retries, parallelism, budgets, temperature, and models as a unit. Arguments passed explicitly with values different from their defaults take precedence. (Default: {default})"
+        )
+        self.parser.add_argument(
+            "--execution-profiles-file", default=self.get_default("--execution-profiles-file"),
+            help=f"A YAML file defining the execution profiles. (Default: the built-in profiles in {default_profiles_path.name} in the 'dra.common' package)"
+        )
+
+    def add_arg_record_llm_fixtures(self, default: str = None):
+        default = self.get_default("--record-llm-fixtures", default)
+        self.parser.add_argument(
+            "--record-llm-fixtures", default=default,
+            help=f"Path to a JSON Lines file where the reply, tokens, and latency of every LLM call are appended, for replaying the run offline, e.g., with 'python -m dra.tools.profile_benchmark'. Pass '' to disable. (Default: {default!r}) If the path doesn't contain a directory prefix, then the file will be written in the 'cache' subdirectory of '--output-dir'."
+        )
+
+    def add_arg_trace_file(self, default: str = None):
+        default = self.get_default("--trace-file", default)
+        self.parser.add_argument(
+            "--trace-file", default=default,
+            help=f"Path to a JSON Lines file where OpenTelemetry spans for the tasks, plan steps, LLM calls, and MCP tool calls are written in OTLP-JSON format, for inspecting where the time goes offline. Pass '' to disable. (Default: {default!r}) If the path doesn't contain a directory prefix, then the file will be written in the 'cache' subdirectory of '--output-dir'."
+        )
+
+    def add_arg_metrics_port(self, default: int = None):
+        default = self.get_default("--metrics-port", default)
+        self.parser.add_argument(
+            "--metrics-port", type=int, default=default,
+            help=f"Serve live metrics of the run, e.g., tokens, cost, iterations, replans, task latencies, and the agent cache hit rate, in OpenMetrics format at 'http://{MetricsObserver.def_host}:PORT/metrics', e.g., for Prometheus. Pass 0 to disable. (Default: {default})"
+        )
+
+    def add_arg_profile(self, default: str = None):
+        default = self.get_default("--profile", default)
+        self.parser.add_argument(
+            "--profile", default=default, choices=[m.value for m in ProfileMode],
+            help=f"Profile the whole run: 'deterministic' uses cProfile, which is exact but slows the run down, and 'sampling' samples the stack periodically, which is cheaper. Each observer's updates and the event loop lag are timed, too. The profile and a summary of the hottest functions are written next to the Markdown report. (Default: {default})"
+        )
+
+    def add_arg_mcp_startup_timeout_secs(self, default: float = None):
+        default = self.get_default("--mcp-startup-timeout-secs", default)
+        self.parser.add_argument(
+            "--mcp-startup-timeout-secs", type=float, default=default,
+            help=f"Start all the MCP servers in parallel before the research starts, failing the run if any of them doesn't complete the MCP initialize handshake within this many seconds. The launchers, e.g., 'uvx' and 'npx', may have to download the servers the first time. Pass 0 to start each server when an agent first uses it. (Default: {default})"
+        )
+
+    def add_arg_mcp_servers_dir(self, default: str = None):
+        default = self.get_default("--mcp-servers-dir", default)
+        self.parser.add_argument(
+            "--mcp-servers-dir", default=default,
+            help=f"The directory where 'python -m dra.tools.mcp_servers install' installed the MCP servers at pinned versions. The installed servers are run directly, instead of through 'uvx' or 'npx', unless their launch commands in the mcp_agent config file changed. Pass '' to always use the configured commands. (Default: {default})"
+        )
+
+    def add_arg_artifact_compression(self, default: str = None):
+        default = self.get_default("--artifact-compression", default)
+        self.parser.add_argument(
+            "--artifact-compression", default=default, choices=[c.value for c in Compression],
+            help=f"Compress the saved task prompts, raw task results, and extra report formats with gzip or zstd, which appends '.gz' or '.zst' to their names. The Markdown report isn't compressed. zstd requires the 'zstandard' package, i.e., the 'compression' extra. (Default: {default})"
+        )
+
     def add_arg_short_run(self):
         self.parser.add_argument(
             '--short-run',
@@ -211,6 +339,7 @@ class ParserUtil():
         will be called _before_ this method prompts for arguments shared across the apps,
         which is currently the `--report-title` argument only.
         """
+        from dra.common.utils.io import UserPrompts
         up = UserPrompts()
         values = self._do_prompt_for_missing_args(up)
         research_report_title = self.args.report_title
@@ -252,7 +381,10 @@ class ParserUtil():
         # Ensure output directory exists
         output_dir_path = Path(self.args.output_dir)
         output_dir_path.mkdir(parents=True, exist_ok=True)
-        cache_dir_path = output_dir_path / "cache"
+        # The files of this run only, e.g., traces, versus the databases kept across runs.
+        run_cache_dir_path = output_dir_path / "cache"
+        run_cache_dir_path.mkdir(parents=True, exist_ok=True)
+        cache_dir_path = Path(self.args.cache_dir)
         cache_dir_path.mkdir(parents=True, exist_ok=True)
 
         markdown_report_path = self._determine_report_path(output_dir_path,
@@ -262,6 +394,29 @@ class ParserUtil():
         if not templates_dir_path.exists():
             raise ValueError(f"Prompt directory '{templates_dir_path}' doesn't exist!")
 
+        usage_ledger_path = None
+        if self.args.usage_ledger:
+            usage_ledger_path = resolve_path(self.args.usage_ledger, cache_dir_path)
+
+        artifact_compression = Compression(self.args.artifact_compression)
+        artifact_compression.require_available()
+
+        llm_fixtures_path = None
+        if self.args.record_llm_fixtures:
+            llm_fixtures_path = resolve_path(self.args.record_llm_fixtures, run_cache_dir_path)
+
+        trace_path = None
+        if self.args.trace_file:
+            trace_path = resolve_path(self.args.trace_file, run_cache_dir_path)
+
+        mcp_servers_dir_path = None
+        if self.args.mcp_servers_dir:
+            mcp_servers_dir_path = Path(self.args.mcp_servers_dir).expanduser().resolve()
+
+        knowledge_store_path = None
+        if self.args.knowledge_store:
+            knowledge_store_path = resolve_path(self.args.knowledge_store, cache_dir_path)
+
         markdown_yaml_header_path = None
         if self.args.markdown_yaml_header:
             markdown_yaml_header_path = resolve_and_require_path(self.args.markdown_yaml_header, templates_dir_path)
@@ -277,6 +432,14 @@ class ParserUtil():
             # There is no alternative parent path searched for this argument, so we pass None.
             mcp_agent_config_path = resolve_and_require_path(file, None)
 
+        execution_profile = None
+        if self.args.execution_profile:
+            profiles_path = default_profiles_path
+            if self.args.execution_profiles_file:
+                profiles_path = resolve_and_require_path(self.args.execution_profiles_file, None)
+            execution_profile = get_profile(self.args.execution_profile, profiles_path)
+            self.__apply_execution_profile(execution_profile)
+
         temperature = self.args.temperature
         if self.args.temperature < 0.0:
             temperature = 0.0
@@ -300,11 +463,21 @@ class ParserUtil():
             max_time_minutes = 10
 
         # Initialize the display and observers.
+        from dra.ux.rich import RichDisplay
         display = RichDisplay(self.ux_title)
         observers_d = {'display': display}
 
-        mo = MarkdownObserver(prompted_values.get('research_report_title', self.ux_title), markdown_yaml_header_path)
+        mo = MarkdownObserver(prompted_values.get('research_report_title', self.ux_title), 
+            markdown_yaml_header_path, extra_formats=self.args.extra_report_formats)
         observers_d['markdown'] = mo
+
+        if self.args.metrics_port < 0:
+            raise ValueError(f"--metrics-port must be 0, to disable the metrics, or a port number: {self.args.metrics_port}")
+        if self.args.metrics_port:
+            observers_d['metrics'] = MetricsObserver(self.args.metrics_port)
+
+        profile_mode = ProfileMode(self.args.profile)
+        profiler = RunProfiler(profile_mode) if profile_mode != ProfileMode.NONE else None
         
         observers = Observers(observers=observers_d)
 
@@ -314,10 +487,18 @@ class ParserUtil():
             'observers': observers,
             "output_dir_path": output_dir_path,
             "cache_dir_path": cache_dir_path,
+            "knowledge_store_path": knowledge_store_path,
+            "usage_ledger_path": usage_ledger_path,
+            "llm_fixtures_path": llm_fixtures_path,
+            "trace_path": trace_path,
+            "mcp_servers_dir_path": mcp_servers_dir_path,
+            "profiler": profiler,
+            "artifact_compression": artifact_compression,
             "templates_dir_path": templates_dir_path,
             "markdown_report_path": markdown_report_path,
             "yaml_header_template_path": markdown_yaml_header_path,
             "mcp_agent_config_path": mcp_agent_config_path,
+            "execution_profile": execution_profile,
             "temperature": temperature, 
             "max_iterations": max_iterations,
             "max_tokens": max_tokens,
@@ -327,6 +508,16 @@ class ParserUtil():
         }
         self.processed_args.update(prompted_values)
 
+    def __apply_execution_profile(self, profile: ExecutionProfile):
+        """
+        Set the arguments that the profile defines, e.g., the models and budgets, unless
+        they were given on the command line with values other than their defaults.
+        Arguments the app doesn't define are ignored.
+        """
+        for dest, value in profile.cli_values(self.args.provider).items():
+            if hasattr(self.args, dest) and getattr(self.args, dest) == self.parser.get_default(dest):
+                setattr(self.args, dest, value)
+
     def only_verbose(self, formatter: str = 'str') -> str | None:
         return formatter if self.args.verbose else None
 
@@ -340,6 +531,9 @@ class ParserUtil():
             Variable("research_report_title",      self.processed_args['research_report_title'], kind='str'),
             Variable("yaml_header_template_path",  self.processed_args['yaml_header_template_path'], kind='file'),
             Variable("mcp_agent_config_path",      self.processed_args['mcp_agent_config_path'], kind='file'),
+            Variable("knowledge_store_path",       self.processed_args['knowledge_store_path'], kind='file'),
+            Variable("usage_ledger_path",          self.processed_args['usage_ledger_path'], kind='file'),
+            Variable("execution_profile",          self.args.execution_profile, kind='str'),
         ]
 
     def only_verbose_common_vars(self) -> list[Variable]:
@@ -349,6 +543,15 @@ class ParserUtil():
             Variable("short_run",         self.args.short_run, kind=fmt),
             Variable("observers",         self.processed_args['observers'], kind=fmt),
             Variable("cache_dir_path",    self.processed_args['cache_dir_path'], kind='file'),
+            Variable("llm_fixtures_path", self.processed_args['llm_fixtures_path'], kind='file'),
+            Variable("trace_path",        self.processed_args['trace_path'], kind='file'),
+            Variable("metrics_port",      self.args.metrics_port, label="OpenMetrics Port", kind=fmt),
+            Variable("profile",           self.args.profile, label="Profiling Mode", kind=fmt),
+            Variable("mcp_servers_dir_path", self.processed_args['mcp_servers_dir_path'], kind='file'),
+            Variable("mcp_startup_timeout_secs", self.args.mcp_startup_timeout_secs, label="MCP Server Startup Timeout in Seconds", kind=fmt),
+            Variable("artifact_compression", self.processed_args['artifact_compression'], label="Artifact Compression", kind=fmt),
+            Variable("knowledge_max_age_days", self.args.knowledge_max_age_days, label="Max Age in Days of Saved Knowledge", kind=fmt),
+            Variable("memory_compaction_tokens", self.args.memory_compaction_tokens, label="Memory Compaction Threshold in Tokens", kind=fmt),
             Variable("temperature",       self.processed_args['temperature'], label="LLM Temperature", kind=fmt), 
             Variable("max_iterations",    self.processed_args['max_iterations'], label="LLM Max Iterations", kind=fmt),
             Variable("max_tokens",        self.processed_args['max_tokens'], label="LLM Max Inference Tokens", kind=fmt),
@@ -383,12 +586,15 @@ class Runner():
         self.parser_util = parser_util
         self.variables = variables
 
+        from dra.common.deep_research import DeepResearch
+
         # Create the configuration for the Deep Orchestrator. 
         self.config: DeepOrchestratorConfig = DeepResearch.make_default_config(
             self.parser_util.args.short_run,
             self.parser_util.ux_title,
             self.available_servers,
-            self.variables)
+            self.variables,
+            profile=self.parser_util.processed_args.get('execution_profile'))
 
         # Add the config to the variables.
         variables["config"] = Variable("config", self.config, 
@@ -411,8 +617,18 @@ class Runner():
             variables=self.variables)
 
     async def run(self):
-        """Run the application!"""
-        await self.deep_research.run()
+        """Run the application! If profiling is enabled, the whole run is profiled."""
+        profiler = self.parser_util.processed_args.get('profiler')
+        if not profiler:
+            await self.deep_research.run()
+            return
+        profiler.time_observers(self.observers)
+        try:
+            async with profiler.profiling():
+                await self.deep_research.run()
+        finally:
+            profile_path, summary_path = profiler.save(self.parser_util.processed_args['markdown_report_path'])
+            print(f"Profile written to: {profile_path} (summary: {summary_path})")
 
     def __get_observers(self, extra_observers: dict[str, Observer]) -> dict[str, Observer]:
         # Verify there are no duplicates!
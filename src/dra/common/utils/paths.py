@@ -3,6 +3,10 @@
 import os
 from pathlib import Path, PosixPath
 
+# The default directory of the databases the apps keep across runs, e.g., the usage ledger,
+# relative to the "src" directory, where the apps and tools are run.
+def_cache_dir = "./output/cache"
+
 def cwd() -> Path:
     """Return the real path to the current working directory, which can be changed by an application!"""
     return Path(os.path.realpath('.'))
@@ -1,6 +1,7 @@
 # Common string utilities
 
 import re
+from typing import Iterator
 
 def to_id(s: str) -> str:
     """
@@ -37,62 +38,87 @@ class MarkdownUtil():
     def __init__(self, 
         default_bullet: str = '*',
         default_indent: str = '\t',
-        default_key_format: str = '**%s:**'):
+        default_key_format: str = '**%s:**',
+        max_depth: int | None = None,
+        max_lines: int | None = None):
         """
         The `default_key_format` is used to format keys, e.g., `**%s:**` for `key1` will result
         in `**key1:**`. Note the `:` shown; if you want a separator between the key and the value.
         If a method invocation doesn't include the `key_format` argument, then `default_key_format`
         is used. Similarly for `bullet` and `indent` arguments, where `indent` is used for indenting
         hierarchical objects.
+        For large objects, `max_depth` limits how deeply nested lists and dictionaries are
+        expanded; deeper ones are summarized on one line. `max_lines` limits the number of
+        lines returned; a final `...` line is added if the output was truncated. 
+        `None` means no limit. The conversion is iterative, so deeply-nested objects can't
+        exceed Python's recursion limit.
         """
         self.default_bullet = default_bullet
         self.default_indent = default_indent
         self.default_key_format = default_key_format
+        self.max_depth = max_depth
+        self.max_lines = max_lines
 
-    def __item(self, key: str, item: list[any] | dict[str, any] | str | float | int | tuple,
-        bullet: str, indent: str, key_format: str) -> list[str]:
+    def __value(self, s: str, default: str) -> str:
+        return s if s else default
+
+    def iter_markdown(self, 
+        item: list[any] | dict[str, any] | str | float | int | tuple,
+        bullet: str = None, indent: str = None, key_format: str = None) -> Iterator[str]:
+        """
+        Like `to_markdown()`, but yields the lines one at a time.
+        """
+        return self.__iter_lines([(None, item, 0)], bullet, indent, key_format)
 
+    def __iter_lines(self, nodes: list[tuple[str | None, any, int]], 
+        bullet: str, indent: str, key_format: str) -> Iterator[str]:
+        """
+        Yield the lines for the `(key, item, depth)` nodes, depth first, using an explicit stack.
+        A list or dictionary item yields a line for its key, if any, then its elements are
+        indented one more level. Other items yield one `bullet key value` line.
+        """
         bullet = self.__value(bullet, self.default_bullet)
         indent = self.__value(indent, self.default_indent)
         key_format = self.__value(key_format, self.default_key_format)
 
-        prefix = f"{bullet} {key_format % (key)}" if key else bullet
-        lines = []
-        if isinstance(item, list):
-            if len(item):
-                if key:
-                    lines.append(prefix)
-                lines2 = self.list_to_markdown(item, bullet, indent, key_format)
-                lines.extend([f"{indent}{line}" for line in lines2])
-        elif isinstance(item, dict):
-            if len(item):
-                if key:
-                    lines.append(prefix)
-                lines2 = self.dict_to_markdown(item, bullet, indent, key_format)
-                lines.extend([f"{indent}{line}" for line in lines2])
-        else:
-            lines.append(f"{prefix} {item}")
-        return lines
+        num_lines = 0
+        stack = list(reversed(nodes))
+        while stack:
+            key, item, depth = stack.pop()
+            prefix = f"{bullet} {key_format % (key)}" if key else bullet
+            line = None
+            if isinstance(item, list) or isinstance(item, dict):
+                if not len(item):
+                    continue
+                if self.max_depth is not None and depth >= self.max_depth:
+                    line = f"{indent*depth}{prefix} ... ({len(item)} items)"
+                else:
+                    if key:
+                        line = f"{indent*depth}{prefix}"
+                    children = item.items() if isinstance(item, dict) else ((None, v) for v in item)
+                    stack.extend(reversed([(k, v, depth+1) for k, v in children]))
+            else:
+                line = f"{indent*depth}{prefix} {item}"
 
-    def __value(self, s: str, default: str) -> str:
-        return s if s else default
+            if line is not None:
+                if self.max_lines is not None and num_lines >= self.max_lines:
+                    yield '...'
+                    return
+                yield line
+                num_lines += 1
 
     def dict_to_markdown(self, items: dict[str, any], 
         bullet: str = None, indent: str = None, key_format: str = None) -> list[str]:
-        lines = []
-        for key, value in items.items():
-            lines.extend(self.__item(key, value, bullet, indent, key_format))
-        return lines
+        return list(self.__iter_lines([(k, v, 0) for k, v in items.items()], 
+            bullet, indent, key_format))
 
     def list_to_markdown(self, items: list[any], 
         bullet: str = None, indent: str = None, key_format: str = None) -> list[str]:
         """
         The `key_format` value is used for _nested_ dictionaries only. See `MarkdownUtil.__init__`.
         """
-        lines = []
-        for value in items:
-            lines.extend(self.__item(None, value, bullet, indent, key_format))
-        return lines
+        return list(self.__iter_lines([(None, v, 0) for v in items], 
+            bullet, indent, key_format))
 
     def to_markdown(self, 
         item: list[any] | dict[str, any] | str | float | int | tuple,
@@ -102,8 +128,9 @@ class MarkdownUtil():
         For dictionaries, the `key_format` is used to format keys, e.g., `**%s**:`
         applied to `key1` will result in `**key1**:`. Note the `:` shown; if you
         want a separator between the key and the value, add it `key_format`.
+        See also `iter_markdown()`.
         """
-        return self.__item(None, item, bullet, indent, key_format)
+        return list(self.iter_markdown(item, bullet, indent, key_format))
 
     def next_indent(self, indent: str) -> str:
         return indent*2 if len(indent) > 0 else '\t'
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Aggregate the usage ledger written by the apps, e.g., to find the most expensive prompts
+or to see the spending per ticker, and tune the budgets from the data.
+
+Examples:
+
+```shell
+python -m dra.tools.ledger                                  # cost per model
+python -m dra.tools.ledger --group-by entity --kind task     # cost per ticker
+python -m dra.tools.ledger --group-by task template_hash --since 7d
+```
+"""
+
+import argparse, re, sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dra.common.ledger import EntryKind, UsageLedger
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.utils.paths import def_cache_dir
+
+def parse_since(since: str) -> datetime:
+    """Parse either an ISO date or time, or a relative age like `7d` or `12h`."""
+    match = re.fullmatch(r'(\d+)([dh])', since)
+    if match:
+        amount = int(match.group(1))
+        delta = timedelta(days=amount) if match.group(2) == 'd' else timedelta(hours=amount)
+        return datetime.now(timezone.utc) - delta
+    when = datetime.fromisoformat(since)
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dra.tools.ledger",
+        description="Aggregate the usage ledger of LLM calls and tasks.")
+    parser.add_argument(
+        "--ledger", default=str(Path(def_cache_dir) / UsageLedger.def_file_name),
+        help="The ledger database, i.e., the apps' '--usage-ledger' path, which is in their '--cache-dir' by default. (Default: %(default)s)")
+    parser.add_argument(
+        "--group-by", nargs='*', default=['model'], choices=UsageLedger.group_by_columns,
+        help="The columns to group by, where 'day' is the date the row was recorded. (Default: %(default)s)")
+    parser.add_argument(
+        "--kind", default=EntryKind.CALL.value, choices=[k.value for k in EntryKind],
+        help="Aggregate the rows for LLM calls or for tasks. (Default: %(default)s)")
+    parser.add_argument(
+        "--since",
+        help="Only include rows recorded at or after this ISO date or time, or within an age like '7d' or '12h'.")
+    parser.add_argument(
+        "--order-by", default='cost',
+        help="A group-by column or one of count, input_tokens, output_tokens, cost, mean_latency_secs, cache_hit_rate, sorted descending. (Default: %(default)s)")
+    parser.add_argument(
+        "--limit", type=int,
+        help="Show at most this many rows.")
+    return parser
+
+def format_value(value: any) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return str(value)
+
+def main(argv: list[str]) -> int:
+    args = make_parser().parse_args(argv)
+    path = Path(args.ledger)
+    if not path.exists():
+        print(f"ERROR: The ledger {path} doesn't exist.", file=sys.stderr)
+        return 1
+    ledger = UsageLedger(path)
+    try:
+        columns, rows = ledger.summarize(args.group_by, kind=EntryKind(args.kind),
+            since=parse_since(args.since) if args.since else None,
+            order_by=args.order_by, limit=args.limit)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    justifications = [(c, 'left') for c in args.group_by] + [(c, 'right') for c in columns[len(args.group_by):]]
+    table = MarkdownTable(title=f"Usage by {', '.join(args.group_by) if args.group_by else 'all'} ({args.kind} rows)",
+        columns=justifications, aligned=True)
+    table.add_rows([[format_value(v) for v in row] for row in rows])
+    print(table)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
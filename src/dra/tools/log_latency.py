@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""
+Break down where the wall time of the runs goes, using the JSON Lines logs that mcp_agent
+writes at the `debug` level, i.e., `logs/deep-research-agent-*.jsonl` for the apps'
+configurations. Each log file is one run. The files are streamed one record at a time,
+so large logs aren't loaded into memory, and compressed logs (`.gz`, `.zst`) are read
+transparently.
+
+The spans are reconstructed from the messages that mark the start and end of each
+operation. For example, an LLM call starts with the LLM's "Chat in progress" message and
+ends with its "... response:" message. The logs don't record when an MCP tool call
+returns, so a tool call ends at the next message from its agent's LLM. Spans overlap,
+e.g., the LLM calls made during a step and the tasks run in parallel, so the totals per
+category can add up to more than the wall time.
+
+Examples:
+
+```shell
+python -m dra.tools.log_latency                              # all the logs in ../logs
+python -m dra.tools.log_latency ../logs/deep-research-agent-20260101_120000.jsonl
+python -m dra.tools.log_latency --percentiles 50 95 --limit 20
+```
+"""
+# Allow types to self-reference during their definitions.
+from __future__ import annotations
+
+import argparse, json, math, sys
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Iterator
+
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.utils.compression import open_text
+
+class SpanCategory(Enum):
+    """An inference call, named by its model."""
+    LLM = 'llm'
+    """An MCP tool call, named by its server and tool."""
+    TOOL = 'tool'
+    """Creating the initial plan, including the planner's LLM calls."""
+    PLANNING = 'planning'
+    """Creating a new plan after the objective wasn't verified as complete."""
+    REPLAN = 'replan'
+    """Verifying whether the objective is complete."""
+    VERIFICATION = 'verification'
+    """Executing one step of the plan, i.e., its tasks."""
+    STEP = 'step'
+    """Creating the final synthesis of the results."""
+    SYNTHESIS = 'synthesis'
+    """Updating the observers, e.g., the console display and the reports."""
+    OBSERVERS = 'observers'
+    """Starting an MCP server before the research, named by the server."""
+    SERVER_STARTUP = 'server startup'
+
+# The orchestrator's phases, as (category, message prefix of the start, message prefixes of the end).
+phase_markers = [
+    (SpanCategory.PLANNING, "Phase 1: Creating initial plan", ("Created valid plan", "Failed to create valid plan")),
+    (SpanCategory.REPLAN, "Replanning (attempt", ("Created valid plan", "Failed to create valid plan")),
+    (SpanCategory.VERIFICATION, "Verifying objective completion", ("Verification result:",)),
+    (SpanCategory.STEP, "Executing step:", ("Step execution complete",)),
+    (SpanCategory.SYNTHESIS, "Creating final synthesis", ("Final synthesis completed",)),
+]
+
+# The namespace prefix of the loggers of the `AugmentedLLM` classes, which end with the agent's name.
+llm_namespace = 'mcp_agent.workflows.llm.'
+
+class Span():
+    """One reconstructed operation."""
+
+    def __init__(self, category: SpanCategory, name: str, start: float, end: float):
+        self.category = category
+        self.name = name
+        self.start = start
+        self.end = end
+
+    @property
+    def duration_secs(self) -> float:
+        # The log records are written asynchronously, so they can be slightly out of order.
+        return max(0.0, self.end - self.start)
+
+    def __repr__(self) -> str:
+        return f"Span(category = {self.category.value}, name = {self.name}, start = {self.start}, end = {self.end})"
+
+def record_data(record: dict[str,any]) -> dict[str,any]:
+    """The `data` of a log record, which mcp_agent nests in another `data` field."""
+    data = record.get('data') or {}
+    return data.get('data', data) if isinstance(data, dict) else {}
+
+class SpanBuilder():
+    """
+    Reconstruct the spans of one run from its log records, which are passed to `add()` in
+    the order they were written. Spans that never end, e.g., because the run was
+    interrupted, are counted in `incomplete` when `finish()` is called.
+    """
+
+    def __init__(self):
+        self.first: float | None = None
+        self.last: float | None = None
+        self.incomplete = 0
+        self.__phases: dict[SpanCategory, float] = {}
+        self.__llm_calls: dict[str, deque[tuple[float, str]]] = {}
+        self.__tool_calls: dict[str, list[tuple[float, str]]] = {}
+
+    @property
+    def wall_secs(self) -> float:
+        return self.last - self.first if self.first is not None else 0.0
+
+    def add(self, timestamp: float, record: dict[str,any]) -> list[Span]:
+        """Add the next record, returning the spans it ends."""
+        self.first = timestamp if self.first is None else min(self.first, timestamp)
+        self.last = timestamp if self.last is None else max(self.last, timestamp)
+        message = record.get('message') or ''
+        namespace = record.get('namespace') or ''
+        spans = []
+        for category, start, ends in phase_markers:
+            if category in self.__phases and message.startswith(ends):
+                spans.append(Span(category, category.value, self.__phases.pop(category), timestamp))
+            elif message.startswith(start):
+                self.__phases[category] = timestamp
+        if namespace.startswith(llm_namespace):
+            spans.extend(self.__add_llm_record(timestamp, namespace, message, record_data(record)))
+        elif message == "Requesting tool call":
+            data = record_data(record)
+            self.__tool_calls.setdefault(data.get('agent_name'), []).append(
+                (timestamp, f"{data.get('server_name')}/{data.get('tool_name')}"))
+        elif message == "Updated observers":
+            duration = float(record_data(record).get('duration_secs', 0.0))
+            spans.append(Span(SpanCategory.OBSERVERS, SpanCategory.OBSERVERS.value, timestamp - duration, timestamp))
+        elif message == "Started MCP server":
+            data = record_data(record)
+            duration = float(data.get('duration_secs', 0.0))
+            spans.append(Span(SpanCategory.SERVER_STARTUP, str(data.get('server_name')), timestamp - duration, timestamp))
+        return spans
+
+    def __add_llm_record(self, timestamp: float, namespace: str, message: str, data: dict[str,any]) -> list[Span]:
+        # Any message from the agent's LLM means the LLM has its tool call results.
+        agent = namespace.split('.')[-1]
+        spans = [Span(SpanCategory.TOOL, name, start, timestamp) for start, name in self.__tool_calls.pop(agent, [])]
+        calls = self.__llm_calls.setdefault(namespace, deque())
+        if message == "Chat in progress":
+            calls.append((timestamp, data.get('model') or 'unknown'))
+        elif calls and (message.endswith("response:") or message.startswith("Error:") or message == "Chat finished"):
+            # Agents with the same name can run in parallel, so end the oldest call first.
+            start, model = calls.popleft()
+            spans.append(Span(SpanCategory.LLM, model, start, timestamp))
+        return spans
+
+    def finish(self) -> int:
+        """Count and discard the spans that never ended. Returns the count."""
+        self.incomplete += len(self.__phases) + sum(len(c) for c in self.__llm_calls.values()) + \
+            sum(len(c) for c in self.__tool_calls.values())
+        self.__phases.clear()
+        self.__llm_calls.clear()
+        self.__tool_calls.clear()
+        return self.incomplete
+
+def parse_timestamp(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp).timestamp()
+
+def read_records(path: Path) -> Iterator[tuple[float, dict[str,any]]]:
+    """
+    Stream the `(timestamp, record)` pairs of a log file, skipping lines that aren't log
+    records, e.g., a last line truncated when the app was killed.
+    """
+    with open_text(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                yield parse_timestamp(record['timestamp']), record
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+
+def percentile(values: list[float], p: float) -> float:
+    """The `p`th percentile of the sorted `values`, interpolating between the closest ranks."""
+    if not values:
+        return math.nan
+    rank = (len(values) - 1) * p / 100.0
+    low = math.floor(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+class LatencyReport():
+    """
+    The latencies of the spans of many runs, by category and name, and the total time
+    per category of each run.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.incomplete = 0
+        self.durations: dict[tuple[SpanCategory, str], list[float]] = {}
+        self.run_totals: dict[SpanCategory, list[float]] = {}
+        self.wall_secs: list[float] = []
+
+    def add_run(self, records: Iterator[tuple[float, dict[str,any]]]):
+        builder = SpanBuilder()
+        totals = dict((c, 0.0) for c in SpanCategory)
+        for timestamp, record in records:
+            for span in builder.add(timestamp, record):
+                self.durations.setdefault((span.category, span.name), []).append(span.duration_secs)
+                totals[span.category] += span.duration_secs
+        if builder.first is None:
+            return
+        self.incomplete += builder.finish()
+        self.runs += 1
+        self.wall_secs.append(builder.wall_secs)
+        for category, total in totals.items():
+            self.run_totals.setdefault(category, []).append(total)
+
+    def add_log(self, path: Path):
+        self.add_run(read_records(path))
+
+    def per_run_table(self, percentiles: list[float]) -> MarkdownTable:
+        """The wall time and the total time of each category per run, across the runs."""
+        table = MarkdownTable(title=f"Time per run ({self.runs} runs)",
+            columns=[('category', 'left')] + [(f"p{p:g} secs", 'right') for p in percentiles] + [('share of wall time', 'right')],
+            aligned=True)
+        mean_wall = sum(self.wall_secs) / len(self.wall_secs) if self.wall_secs else 0.0
+        rows = [('wall time', self.wall_secs)] + [(c.value, self.run_totals.get(c, [])) for c in SpanCategory]
+        for name, values in rows:
+            values = sorted(values)
+            share = sum(values) / len(values) / mean_wall if values and mean_wall > 0 else math.nan
+            table.add_row([name] + [format_secs(percentile(values, p)) for p in percentiles] + [format_share(share)])
+        return table
+
+    def per_span_table(self, percentiles: list[float], limit: int | None = None) -> MarkdownTable:
+        """The latency of each kind of span, with the largest total time first."""
+        table = MarkdownTable(title="Latency per span",
+            columns=[('category', 'left'), ('name', 'left'), ('count', 'right')] +
+                [(f"p{p:g} secs", 'right') for p in percentiles] + [('max secs', 'right'), ('total secs', 'right')],
+            aligned=True)
+        groups = sorted(self.durations.items(), key=lambda item: sum(item[1]), reverse=True)
+        for (category, name), values in groups[:limit] if limit else groups:
+            values = sorted(values)
+            table.add_row([category.value, name, str(len(values))] +
+                [format_secs(percentile(values, p)) for p in percentiles] +
+                [format_secs(values[-1]), format_secs(sum(values))])
+        return table
+
+def format_secs(value: float) -> str:
+    return '-' if math.isnan(value) else f"{value:.3f}"
+
+def format_share(value: float) -> str:
+    return '-' if math.isnan(value) else f"{value:.1%}"
+
+def find_logs(paths: list[Path]) -> list[Path]:
+    """The log files given, with each directory replaced by the JSON Lines files in it."""
+    logs = []
+    for path in paths:
+        if path.is_dir():
+            logs.extend(sorted(p for p in path.glob('*.jsonl*') if p.is_file()))
+        elif path.exists():
+            logs.append(path)
+    return logs
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dra.tools.log_latency",
+        description="Break down the wall time of runs from the mcp_agent JSON Lines logs.")
+    parser.add_argument(
+        "logs", nargs='*', default=['../logs'],
+        help="The log files or directories of log files, one file per run. (Default: %(default)s)")
+    parser.add_argument(
+        "--percentiles", nargs='+', type=float, default=[50.0, 90.0, 99.0],
+        help="The percentiles to report, from 0 to 100. (Default: %(default)s)")
+    parser.add_argument(
+        "--limit", type=int,
+        help="Show at most this many rows of the latency per span.")
+    return parser
+
+def main(argv: list[str]) -> int:
+    args = make_parser().parse_args(argv)
+    bad = [p for p in args.percentiles if not 0 <= p <= 100]
+    if bad:
+        print(f"ERROR: Percentiles must be between 0 and 100: {bad}", file=sys.stderr)
+        return 2
+    logs = find_logs([Path(p) for p in args.logs])
+    if not logs:
+        print(f"ERROR: No log files found in {args.logs}.", file=sys.stderr)
+        return 1
+    report = LatencyReport()
+    for log in logs:
+        report.add_log(log)
+    print(report.per_run_table(args.percentiles))
+    print(report.per_span_table(args.percentiles, limit=args.limit))
+    if report.incomplete:
+        print(f"\n{report.incomplete} spans never ended, e.g., because a run was interrupted, and were excluded.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Install the MCP servers that the apps' `mcp_agent` configurations launch with `uvx` or
+`npx` into a local directory, at pinned versions, so runs start them from the installed
+executables without resolving or downloading packages. See `dra.common.server_installs`.
+
+Examples:
+
+```shell
+python -m dra.tools.mcp_servers install                     # the servers of both apps
+python -m dra.tools.mcp_servers install --servers fetch yfmcp
+python -m dra.tools.mcp_servers install --upgrade           # re-resolve the latest versions
+python -m dra.tools.mcp_servers list
+```
+"""
+
+import argparse, sys
+from pathlib import Path
+
+import yaml
+
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.server_installs import ServerInstalls, default_servers_dir
+
+# The apps' default configurations.
+apps_dir = Path(__file__).resolve().parent.parent / 'apps'
+default_configs = sorted(apps_dir.glob('*/config/mcp_agent.config.yaml'))
+
+def read_servers(configs: list[Path]) -> dict[str, tuple[str, list[str]]]:
+    """
+    The `(command, args)` of each server defined in the `configs`. Raises `ValueError` if
+    two configurations launch a server with the same name differently.
+    """
+    servers: dict[str, tuple[str, list[str]]] = {}
+    for config in configs:
+        settings = yaml.safe_load(config.read_text(encoding='utf-8')) or {}
+        for name, server in ((settings.get('mcp') or {}).get('servers') or {}).items():
+            if not server.get('command'):
+                continue  # e.g., a remote server, reached over HTTP.
+            launch = (server['command'], list(server.get('args') or []))
+            if servers.setdefault(name, launch) != launch:
+                raise ValueError(f"Server '{name}' is launched differently in {config}: {launch} vs. {servers[name]}")
+    return servers
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dra.tools.mcp_servers",
+        description="Install the MCP servers launched with uvx or npx at pinned versions, for fast, offline startup.")
+    parser.add_argument(
+        "--dir", default=str(default_servers_dir()),
+        help="The install directory, i.e., the apps' '--mcp-servers-dir'. (Default: %(default)s)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    install = subparsers.add_parser('install',
+        help="Install the servers that aren't installed yet, or whose launch command changed.")
+    install.add_argument(
+        "--config", nargs='+', default=[str(c) for c in default_configs],
+        help="The mcp_agent configuration files that define the servers. (Default: the apps' configurations)")
+    install.add_argument(
+        "--servers", nargs='+',
+        help="Only install these servers. (Default: all the servers launched with uvx or npx)")
+    install.add_argument(
+        "--upgrade", action='store_true',
+        help="Resolve the latest versions again, except for the versions pinned in the configurations.")
+    subparsers.add_parser('list', help="List the installed servers.")
+    return parser
+
+def list_table(installs: ServerInstalls) -> MarkdownTable:
+    table = MarkdownTable(title=f"Installed MCP servers in {installs.dir}",
+        columns=[('server', 'left'), ('package', 'left'), ('version', 'left'), ('command', 'left')],
+        aligned=True)
+    table.add_rows([[s.name, s.package, s.version, s.command] for _, s in sorted(installs.servers.items())])
+    return table
+
+def main(argv: list[str]) -> int:
+    args = make_parser().parse_args(argv)
+    installs = ServerInstalls(Path(args.dir).expanduser())
+    if args.command == 'list':
+        print(list_table(installs))
+        return 0
+    try:
+        servers = read_servers([Path(c) for c in args.config])
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    unknown = sorted(set(args.servers or []) - set(servers))
+    if unknown:
+        print(f"ERROR: Servers not defined in {args.config}: {unknown}", file=sys.stderr)
+        return 2
+    failures = 0
+    for name, (command, server_args) in servers.items():
+        if args.servers and name not in args.servers:
+            continue
+        try:
+            server = installs.install(name, command, server_args, upgrade=args.upgrade)
+        except ValueError as e:
+            print(f"ERROR: Failed to install {name}: {e}", file=sys.stderr)
+            failures += 1
+            continue
+        if server:
+            print(f"{name}: {server.package} {server.version} -> {server.command}")
+        else:
+            print(f"{name}: not launched with uvx or npx, skipped.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
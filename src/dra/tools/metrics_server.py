@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+A local MCP server, run over stdio, with a `compute_financial_metrics` tool that computes
+the derived metrics, e.g., margins, growth rates, the effective tax rate, free cash flow,
+and a trend projection of the next period, of the financial statements in a
+`FinancialDataStore`, using `dra.common.financial_metrics`. The finance app starts it as
+its `financial-metrics` server, passing its `--financial-data-store`.
+
+Examples:
+
+```shell
+python -m dra.tools.metrics_server --store output/cache/financial_data.sqlite
+python -m dra.tools.metrics_server --store output/cache/financial_data.sqlite --print META GOOGL
+```
+"""
+
+import argparse, sys
+from pathlib import Path
+
+from dra.common.financial_metrics import StatementPanel, compute_metrics
+from dra.common.financial_store import FinancialDataStore
+
+# The divisor of the amounts, e.g., for millions, which the research prompt uses.
+def_unit_divisor = 1e6
+
+def metrics_for(store: FinancialDataStore,
+    tickers: list[str],
+    period: str = 'annual',
+    periods: int = 4,
+    unit_divisor: float = def_unit_divisor) -> dict[str, any]:
+    """The metrics of the `tickers`, or an error for the tickers with no stored statements."""
+    panel = StatementPanel.from_store(store, tickers, period_type=period, periods=periods)
+    result = compute_metrics(panel).to_dict(scale=unit_divisor)
+    for ticker, metrics in result.items():
+        if not metrics['periods']:
+            result[ticker] = {'error': f"No {period} income statements are stored for {ticker}. "
+                "Fetch them with the financial-datasets server's get_income_statements and "
+                "get_cash_flow_statements tools first."}
+    return result
+
+def make_server(store: FinancialDataStore) -> any:
+    from mcp.server.fastmcp import FastMCP
+    server = FastMCP('financial-metrics')
+
+    @server.tool()
+    def compute_financial_metrics(tickers: list[str], period: str = 'annual', periods: int = 4,
+        unit_divisor: float = def_unit_divisor) -> dict:
+        """
+        Compute the derived metrics of the income and cash flow statements already fetched
+        for the tickers, e.g., with get_income_statements and get_cash_flow_statements:
+        gross profit, gross, operating, net, and free cash flow margins, revenue and income
+        growth, the effective tax rate, R&D and SG&A to revenue, free cash flow, and a
+        projection of the next period from the revenue's compound growth rate and the latest
+        margins. The projection is of the next fiscal year for annual statements and of the
+        next quarter, with the annualized growth rate, for quarterly statements.
+        Amounts are divided by unit_divisor (default: millions); rates are in percent.
+
+        Args:
+            tickers: The ticker symbols, e.g., ["META", "GOOGL"].
+            period: "annual" or "quarterly".
+            periods: The number of most recent periods to include.
+            unit_divisor: The divisor of the amounts, e.g., 1000000 for millions.
+        """
+        return metrics_for(store, tickers, period, periods, unit_divisor)
+
+    return server
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dra.tools.metrics_server",
+        description="An MCP server that computes derived financial metrics from the stored statements.")
+    parser.add_argument(
+        "--store", required=True,
+        help="The financial data store, i.e., the finance app's '--financial-data-store' path.")
+    parser.add_argument(
+        "--print", nargs='+', metavar='TICKER',
+        help="Print the metrics of these tickers as Markdown tables, instead of running the server.")
+    parser.add_argument(
+        "--period", default='annual', choices=['annual', 'quarterly'],
+        help="The period type for '--print'. (Default: %(default)s)")
+    return parser
+
+def main(argv: list[str]) -> int:
+    args = make_parser().parse_args(argv)
+    store = FinancialDataStore(Path(args.store))
+    if args.print:
+        metrics = compute_metrics(StatementPanel.from_store(store, args.print, period_type=args.period))
+        for ticker in args.print:
+            print(metrics.table(ticker, scale=def_unit_divisor))
+        return 0
+    make_server(store).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
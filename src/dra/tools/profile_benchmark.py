@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Run the Deep Orchestrator once per execution profile, replaying recorded LLM fixtures
+instead of calling a provider, and report the latency, calls, tokens, and cost of each,
+to compare the profiles before using them. Record fixtures from a real run with the app
+argument `--record-llm-fixtures`. The cost is computed for the research model of each
+profile, so it reflects the model choice, while the recorded latencies are replayed as is.
+The models are priced from `model_prices`. The cost of any other model comes from the token
+counter, whose price lookup is approximate, and is flagged in the report.
+No MCP servers are started and the orchestrator's filesystem workspace is disabled.
+
+Examples:
+
+```shell
+python -m dra.tools.profile_benchmark
+python -m dra.tools.profile_benchmark --profiles fast thorough --time-scale 0
+python -m dra.tools.profile_benchmark --fixtures output/cache/llm_fixtures.jsonl
+```
+"""
+
+import argparse, asyncio, sys, time
+from pathlib import Path
+
+from mcp_agent.app import MCPApp
+from mcp_agent.config import LoggerSettings, MCPSettings, Settings
+from mcp_agent.tracing.token_counter import TokenSummary
+from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
+
+from dra.common.deep_research import DeepResearch
+from dra.common.markdown.elements import MarkdownTable
+from dra.common.profiles import ExecutionProfile, default_profiles_path, load_profiles
+from dra.common.replay import LLMFixtures, replaying
+
+default_fixtures_path = 'benchmarks/fixtures/finance_research.jsonl'
+default_objective = "Research the latest financial results of Meta Platforms, Inc. (META)."
+
+# The list prices of the built-in profiles' models, in USD per million input and output
+# tokens. The token counter matches model names loosely, e.g., it prices gpt-4o as
+# gpt-4o-mini, so these models are priced exactly from this table instead.
+model_prices: dict[str, tuple[float, float]] = {
+    'gpt-4o-mini':             (0.15, 0.60),
+    'gpt-4o':                  (2.50, 10.00),
+    'gpt-4.1':                 (2.00, 8.00),
+    'o4-mini':                 (1.10, 4.40),
+    'claude-3-5-haiku-latest': (0.80, 4.00),
+    'claude-sonnet-4-0':       (3.00, 15.00),
+}
+
+def price(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """The cost of the tokens at the list price of `model`, or `None` if it isn't known."""
+    prices = model_prices.get(model)
+    if not prices:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+def cost_of(summary: TokenSummary) -> tuple[float, list[str]]:
+    """
+    The cost of the usage in the token counter's `summary`, priced from `model_prices` where
+    possible, and the names of the models used, with those priced by the counter flagged.
+    """
+    cost = 0.0
+    names = []
+    for usage in summary.model_usage.values():
+        exact = price(usage.model_name, usage.usage.input_tokens, usage.usage.output_tokens)
+        if exact is None:
+            cost += usage.cost
+            names.append(f"{usage.model_name} (approx.)")
+        else:
+            cost += exact
+            names.append(usage.model_name)
+    return (cost, sorted(names))
+
+class ProfileResult():
+    """The measurements for one profile."""
+
+    def __init__(self,
+        profile: ExecutionProfile,
+        model: str | None,
+        latency_secs: float,
+        calls: int,
+        input_tokens: int,
+        output_tokens: int,
+        cost: float,
+        priced_as: list[str] | None = None,
+        error: str | None = None):
+        self.profile = profile
+        self.model = model
+        self.latency_secs = latency_secs
+        self.calls = calls
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cost = cost
+        self.priced_as = priced_as if priced_as else []
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ProfileResult(profile = {self.profile.name}, model = {self.model}, latency_secs = {self.latency_secs:.2f}, calls = {self.calls}, input_tokens = {self.input_tokens}, output_tokens = {self.output_tokens}, cost = {self.cost:.4f}, priced_as = {self.priced_as}, error = {self.error})"
+
+async def run_profile(
+    profile: ExecutionProfile,
+    fixtures: LLMFixtures,
+    provider: str,
+    objective: str,
+    time_scale: float) -> ProfileResult:
+    """Run the orchestrator for `objective` with `profile`, replaying `fixtures` from the start."""
+    fixtures.reset()
+    model = profile.models_for(provider).get('research_model')
+    settings = Settings(execution_engine='asyncio',
+        logger=LoggerSettings(transports=['none'], level='error'),
+        mcp=MCPSettings(servers={}))
+    app = MCPApp(name=f"profile_benchmark_{profile.name}", settings=settings)
+    async with app.run() as running_app:
+        config = DeepResearch.make_default_config(False, profile.name, [], {}, profile=profile)
+        config.execution.enable_filesystem = False
+        orchestrator = DeepOrchestrator(
+            llm_factory=replaying(fixtures, provider, model=model, time_scale=time_scale),
+            config=config,
+            context=running_app.context)
+        error = None
+        start = time.perf_counter()
+        try:
+            await orchestrator.generate_str(objective)
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - start
+        summary = await running_app.context.token_counter.get_summary()
+    cost, priced_as = cost_of(summary)
+    return ProfileResult(profile, model, latency, sum(fixtures.positions.values()),
+        summary.usage.input_tokens, summary.usage.output_tokens, cost, priced_as, error)
+
+def make_table(results: list[ProfileResult]) -> MarkdownTable:
+    table = MarkdownTable(title="Execution profiles",
+        columns=[('Profile', 'left'), ('Model', 'left'), ('Parallel', 'center'),
+            ('LLM Calls', 'right'), ('Input Tokens', 'right'), ('Output Tokens', 'right'),
+            ('Cost (USD)', 'right'), ('Priced As', 'left'), ('Latency (secs)', 'right'), ('Error', 'left')],
+        aligned=True)
+    table.add_rows([[r.profile.name, r.model or '-',
+        str(r.profile.section('execution').get('enable_parallel', True)),
+        str(r.calls), str(r.input_tokens), str(r.output_tokens), f"{r.cost:.4f}",
+        '' if r.priced_as == [r.model] else ', '.join(r.priced_as),
+        f"{r.latency_secs:.2f}", r.error or ''] for r in results])
+    return table
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dra.tools.profile_benchmark",
+        description="Compare the execution profiles by replaying recorded LLM fixtures.")
+    parser.add_argument(
+        "--fixtures", default=default_fixtures_path,
+        help="The JSON Lines fixtures, e.g., written by an app with '--record-llm-fixtures'. (Default: %(default)s)")
+    parser.add_argument(
+        "--profiles-file", default=str(default_profiles_path),
+        help="The YAML file defining the profiles. (Default: the built-in profiles)")
+    parser.add_argument(
+        "--profiles", nargs='*',
+        help="The profiles to run. (Default: all the profiles in the file)")
+    parser.add_argument(
+        "--provider", default='openai',
+        help="The provider whose models in each profile are used for the cost. (Default: %(default)s)")
+    parser.add_argument(
+        "--objective", default=default_objective,
+        help="The objective passed to the orchestrator. (Default: %(default)s)")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0,
+        help="Multiply the recorded latencies by this factor. Use 0 to skip the waits. (Default: %(default)s)")
+    return parser
+
+def main(argv: list[str]) -> int:
+    args = make_parser().parse_args(argv)
+    try:
+        fixtures = LLMFixtures.load(Path(args.fixtures))
+        profiles = load_profiles(Path(args.profiles_file))
+        names = args.profiles if args.profiles else list(profiles)
+        unknown = [name for name in names if name not in profiles]
+        if unknown:
+            raise ValueError(f"Unknown profiles {unknown}. Known profiles: {list(profiles)}")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    results = [asyncio.run(run_profile(profiles[name], fixtures, args.provider,
+        args.objective, args.time_scale)) for name in names]
+    print(make_table(results))
+    return 1 if any(r.error for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -23,8 +23,8 @@ from rich.columns import Columns
 from rich import box
 
 from dra.common.deep_research import DeepResearch
+from dra.common.memory_compaction import CompactionStats
 from dra.common.tasks import BaseTask, GenerateTask, AgentTask, TaskStatus
-from dra.common.utils.strings import truncate
 from dra.ux.display import Display
 
 from mcp_agent.workflows.deep_orchestrator.orchestrator import DeepOrchestrator
@@ -213,6 +213,14 @@ class RichDeepOrchestratorMonitor():
             f"[cyan]Categories:[/cyan] {stats['knowledge_categories']}",
             f"[cyan]Est. Tokens:[/cyan] {stats['estimated_tokens']:,}",
         ]
+        compaction = CompactionStats.of(memory)
+        if compaction:
+            lines.extend([
+                f"[cyan]Compactions:[/cyan] {compaction.compactions}",
+                f"[cyan]Last Compaction Tokens:[/cyan] {compaction.tokens_before:,} → {compaction.tokens_after:,}",
+                f"[cyan]Last Compaction Knowledge:[/cyan] {compaction.knowledge_before} → {compaction.knowledge_after}",
+                f"[cyan]Last Compaction Task Results:[/cyan] {compaction.task_results_before} → {compaction.task_results_after}",
+            ])
 
         # Add recent knowledge items
         if memory.knowledge:
@@ -504,7 +512,7 @@ class RichDisplay(Display):
         for task in self.system.tasks:
             if not task.status == TaskStatus.FINISHED_OK:
                 border_style = "red"            
-            strs.append(truncate(str(task.result), 2000, '...'))
+            strs.append(task.result.truncated(2000, '...'))
         
         self.console.print(
             Panel('\n'.join(strs), title=task.title, border_style=border_style))
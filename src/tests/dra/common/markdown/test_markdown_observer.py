@@ -0,0 +1,111 @@
+# Unit tests for the MarkdownObserver's checkpointed reports.
+
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from dra.common.markdown import MarkdownObserver
+from dra.common.markdown.elements import MarkdownSection
+from dra.common.output_writer import output_writer
+from dra.common.tasks import GenerateTask, TaskStatus
+from dra.common.variables import Variable
+
+class FakeMonitor():
+    """Stands in for `MarkdownDeepOrchestratorMonitor`, with fixed content and no clock."""
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+
+    def update_execution_time(self) -> str:
+        return '0:00:01'
+
+    def get_objective_section(self) -> MarkdownSection:
+        return MarkdownSection(title='Objective', content=['Research the company.'])
+
+    def __getattr__(self, name: str):
+        # The get_*_table() and get_queue_tree() methods.
+        return lambda *args: f"{name} content"
+
+class TestMarkdownObserver(unittest.TestCase):
+    """
+    Test that the MarkdownObserver checkpoints the report as tasks finish.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.report_path = Path(self.temp_dir.name) / 'report.md'
+        patcher = patch('dra.common.markdown.MarkdownDeepOrchestratorMonitor', FakeMonitor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_system(self) -> SimpleNamespace:
+        tasks = [GenerateTask(name=f"task{n}", title=f"Task {n}", model_name='gpt-4o',
+            prompt_template_path=Path(f"task{n}.md"), output_dir_path=Path(self.temp_dir.name),
+            properties={}) for n in (1, 2)]
+        orchestrator = SimpleNamespace(iteration=2, replan_count=0,
+            queue=SimpleNamespace(completed_task_names=['task1', 'task2'], failed_task_names=[]),
+            memory=SimpleNamespace(knowledge=[], artifacts={}),
+            agent_cache=SimpleNamespace(cache={}, hits=0, misses=0),
+            budget=SimpleNamespace(get_status_summary=lambda: 'Within budget.'))
+        variables = {'research_report_path': Variable('research_report_path', self.report_path)}
+        return SimpleNamespace(logger=SimpleNamespace(info=lambda *args, **kwargs: None),
+            orchestrator=orchestrator, variables=variables, tasks=tasks)
+
+    def finish(self, task: GenerateTask, result: list[any]):
+        task.result = result
+        task.status = TaskStatus.FINISHED_OK
+
+    def read_report(self) -> str:
+        output_writer().flush(raise_errors=True)
+        return self.report_path.read_text()
+
+    def test_a_finished_task_rewrites_the_report_with_its_section(self):
+        system = self.make_system()
+        observer = MarkdownObserver(title='Report')
+        observer.update(system)
+        output_writer().flush(raise_errors=True)
+        self.assertFalse(self.report_path.exists())
+
+        self.finish(system.tasks[0], ['The first result.'])
+        observer.update(system)
+        report = self.read_report()
+        self.assertIn('Task #1: Task 1 (`task1`)', report)
+        self.assertIn('The first result.', report)
+        self.assertIn('1 of 2 tasks finished', report)
+        self.assertNotIn('Task #2:', report)
+
+        # No newly finished task, so the report isn't rewritten.
+        self.report_path.unlink()
+        observer.update(system)
+        output_writer().flush(raise_errors=True)
+        self.assertFalse(self.report_path.exists())
+
+        self.finish(system.tasks[1], ['The second result.'])
+        observer.update(system)
+        report = self.read_report()
+        self.assertIn('Task #2: Task 2 (`task2`)', report)
+        self.assertIn('2 of 2 tasks finished', report)
+
+    def test_the_final_report_is_the_same_as_without_checkpoints(self):
+        system = self.make_system()
+        checkpointed = MarkdownObserver(title='Report')
+        checkpointed.update(system)
+        for n, task in enumerate(system.tasks):
+            self.finish(task, [f"Result {n}."])
+            checkpointed.update(system)
+        checkpointed.update(system, other={'messages': ['Done.']}, is_final=True)
+        expected = self.read_report()
+        self.assertEqual(str(checkpointed), expected)
+
+        direct = MarkdownObserver(title='Report')
+        direct.update(system, other={'messages': ['Done.']}, is_final=True)
+        self.assertEqual(expected, self.read_report())
+        self.assertEqual(1, expected.count('Task #1: Task 1 (`task1`)'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,9 @@
 from hypothesis import given, strategies as st
 import unittest
 from pathlib import Path
-import os, re, sys
+import io, os, re, sys
 
-from dra.common.markdown.elements import MarkdownElement, MarkdownSection
+from dra.common.markdown.elements import MarkdownElement, MarkdownSection, MarkdownTable, MarkdownTree
 
 from dra.common.utils.strings import to_id
 
@@ -315,5 +315,54 @@ class TestMarkdownSection(unittest.TestCase):
         exp_content = f"{'#'*level} {title}\n\n{'\n'.join(content_strs)}\n{'\n'.join(subsections_strs)}".split('\n')
         self.assertEqual(exp_content, all_lines, f"exp_content = <{exp_content}>, all_lines = <{all_lines}>")
 
+    @given(st.integers(min_value=1, max_value=4), 
+        no_linefeeds_nonempty_text(), 
+        st.lists(no_linefeeds_text()),
+        st.lists(no_linefeeds_nonempty_text(), max_size=5, unique_by = str))
+    def test_section_render_to_writes_the_same_string_as___repr__(self, 
+        level: int, title: str, content: list[str], subsection_titles: list[str]):
+        """
+        Verify that streaming a section, including nested tables, trees, and subsections,
+        with `render_to` produces exactly the same string as `str(section)`.
+        """
+        table = MarkdownTable('table', ['a', 'b'])
+        table.add_row(['1', '2'])
+        tree = MarkdownTree('root')
+        tree.add('child').add('grand child')
+        subsections_l = [MarkdownSection(t, level+1, ['lorem ipsum', table]) for t in subsection_titles]
+        section = MarkdownSection(title, level, content + [tree], subsections_l)
+        stream = io.StringIO()
+        self.assertEqual(stream, section.render_to(stream))
+        self.assertEqual(str(section), stream.getvalue())
+        self.assertEqual(str(section), ''.join(section.render_chunks()))
+
+    @given(st.integers(min_value=1, max_value=4), 
+        no_linefeeds_nonempty_text(), 
+        st.lists(no_linefeeds_nonempty_text(), min_size=2, max_size=5, unique_by = str))
+    def test_section_cached_rendering_is_invalidated_by_nested_changes(self, 
+        level: int, title: str, subsection_titles: list[str]):
+        """
+        Verify that `str(section)` is cached, that changes to nested elements invalidate
+        the cached strings of their ancestors, and that unchanged siblings are not re-rendered.
+        """
+        table = MarkdownTable('table', ['a', 'b'])
+        subsections_l = [MarkdownSection(t, level+1, ['lorem ipsum']) for t in subsection_titles]
+        subsections_l[0].add_intro_content([table])
+        section = MarkdownSection(title, level, [], subsections_l)
+        s1 = str(section)
+        self.assertIs(s1, str(section))
+        sibling_str = str(subsections_l[1])
+
+        table.add_row(['1', '2'])
+        s2 = str(section)
+        self.assertNotEqual(s1, s2)
+        self.assertTrue('| 1 | 2 |' in s2)
+        self.assertIs(sibling_str, str(subsections_l[1]))
+
+        subsections_l[1].title = 'new title'
+        s3 = str(section)
+        self.assertTrue(f"{'#'*(level+1)} new title" in s3, s3)
+        self.assertEqual(s3, ''.join(section.render_chunks()))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -4,7 +4,7 @@
 from hypothesis import given, strategies as st
 import unittest
 from pathlib import Path
-import os, re, sys
+import io, os, re, sys
 from random import sample
 
 from dra.common.markdown.elements import MarkdownTable
@@ -314,5 +314,99 @@ class TestMarkdownTable(unittest.TestCase):
             with self.assertRaises(ValueError):
                 table.row_dict_to_list({other_text: 0})
 
+    @given(no_linefeeds_text(), st.lists(no_linefeeds_nonempty_text(), max_size=5), st.integers(min_value=0, max_value=5))
+    def test_table_render_to_writes_the_same_string_as___repr__(self, title: str, columns: list[str], num_rows: int):
+        """
+        Verify that streaming a table with `render_to` produces exactly the same string as `str(table)`.
+        """
+        table = MarkdownTable(title, columns)
+        for i in range(num_rows if columns else 0):
+            table.add_row([str(i)]*len(columns))
+        stream = io.StringIO()
+        table.render_to(stream)
+        self.assertEqual(str(table), stream.getvalue())
+
+    @given(st.lists(no_linefeeds_nonempty_text(), min_size=1, max_size=5))
+    def test_table_add_row_invalidates_the_cached_rendering(self, columns: list[str]):
+        """
+        Verify that `str(table)` reflects rows added after a previous `str(table)` call.
+        """
+        table = MarkdownTable('', columns)
+        s1 = str(table)
+        table.add_row(['x']*len(columns))
+        s2 = str(table)
+        self.assertNotEqual(s1, s2)
+        self.assertTrue(s2.endswith(f"| {' | '.join(['x']*len(columns))} |\n"), s2)
+
+    @given(st.lists(no_linefeeds_nonempty_text(), min_size=1, max_size=5, unique=True), st.integers(min_value=0, max_value=20))
+    def test_table_add_rows_with_lists_dicts_and_tuples(self, columns: list[str], num_rows: int):
+        """
+        Verify that `add_rows` produces the same rows as calling `add_row` for each row,
+        for each of the supported row kinds.
+        """
+        rows = [[f"{i}_{j}" for j in range(len(columns))] for i in range(num_rows)]
+        batches = [
+            rows,
+            [tuple(row) for row in rows],
+            [dict(zip(columns, row)) for row in rows],
+            [list(zip(columns, row)) for row in rows],
+        ]
+        for batch in batches:
+            table = MarkdownTable(columns = columns)
+            self.assertEqual(num_rows, table.add_rows(batch))
+            self.assertEqual(rows, table.rows)
+
+    @given(st.lists(no_linefeeds_nonempty_text(), min_size=2, max_size=5, unique=True), st.integers(min_value=1, max_value=10))
+    def test_table_add_rows_with_a_bad_row_fails_and_adds_nothing(self, columns: list[str], num_rows: int):
+        """
+        Verify that `add_rows` raises an error and leaves the table unchanged if any row is invalid.
+        """
+        table = MarkdownTable(columns = columns)
+        table.add_row(['x']*len(columns))
+        s1 = str(table)
+        good_rows = [['y']*len(columns)]*num_rows
+        with self.assertRaises(ValueError):
+            table.add_rows(good_rows + [['z']])
+        with self.assertRaises(ValueError):
+            table.add_rows([dict(zip(columns, row)) for row in good_rows] + [{columns[0]: 1, f"{columns[0]}{columns[1]}": 2}])
+        self.assertEqual([['x']*len(columns)], table.rows)
+        self.assertEqual(s1, str(table))
+
+    def test_table_from_records_infers_the_columns_in_first_seen_order(self):
+        """
+        Verify that `from_records` infers the columns from the keys and fills missing values.
+        """
+        table = MarkdownTable.from_records([{'a': 1, 'b': 2}, {'c': 3, 'a': 4}], title='t')
+        self.assertEqual('t', table.title)
+        self.assertEqual(['a', 'b', 'c'], table.columns)
+        self.assertEqual([[1, 2, ''], [4, '', 3]], table.rows)
+
+    def test_table_from_columns_transposes_the_columns(self):
+        """
+        Verify that `from_columns` produces the rows by transposing the columns and 
+        that columns of different lengths are rejected.
+        """
+        table = MarkdownTable.from_columns({'a': [1, 2], 'b': ['x', 'y']}, justifications={'b': 'right'})
+        self.assertEqual(['a', 'b'], table.columns)
+        self.assertEqual([MarkdownTable.justify('a', 'left'), MarkdownTable.justify('b', 'right')], table.columns_justifications)
+        self.assertEqual([[1, 'x'], [2, 'y']], table.rows)
+        with self.assertRaises(ValueError):
+            MarkdownTable.from_columns({'a': [1, 2], 'b': ['x']})
+
+    @given(st.lists(no_linefeeds_nonempty_text(), min_size=1, max_size=5), 
+        justifications(min_size=1, max_size=5),
+        st.lists(st.text(alphabet='abc 123', max_size=12), min_size=1, max_size=20))
+    def test_table_aligned_rows_have_equal_widths(self, columns: list[str], justs_samples: list[str], cell_samples: list[str]):
+        """
+        Verify that when `aligned=True`, all the table lines have the same length.
+        """
+        columns_justs = list(zip(columns, make_n_samples(justs_samples, len(columns))))
+        table = MarkdownTable('', columns_justs, aligned=True)
+        for i in range(len(cell_samples)):
+            table.add_row(make_n_samples(cell_samples, len(columns)))
+        lines = str(table).strip().split('\n')
+        self.assertEqual(len(cell_samples)+2, len(lines))
+        self.assertEqual(1, len(set(len(line) for line in lines)), lines)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -4,7 +4,7 @@
 from hypothesis import given, strategies as st
 import unittest
 from pathlib import Path
-import os, re, sys
+import io, os, re, sys
 from random import sample
 
 from dra.common.markdown.elements import MarkdownTree
@@ -171,5 +171,31 @@ class TestMarkdownTree(unittest.TestCase):
         expected_str = '\n'.join(expected)
         self.assertEqual(expected_str, s, f"expected_str:\n{expected_str}\nvs.\n{s}\n")
 
+    @given(no_linefeeds_text(), st.sampled_from(['*', '-']), 
+        st.lists(no_linefeeds_text(), max_size=5), 
+        st.lists(no_linefeeds_text(), max_size=5))
+    def test_tree_render_to_writes_the_same_string_as___repr__(self, label: str, bullet: str, children: list[str], grand_children: list[str]):
+        """
+        Verify that streaming a tree with `render_to` produces exactly the same string as `str(tree)`.
+        """
+        tree = MarkdownTree(label = label, bullet = bullet)
+        for child in tree.add_children(children):
+            child.add_children(grand_children)
+        stream = io.StringIO()
+        tree.render_to(stream)
+        self.assertEqual(str(tree), stream.getvalue())
+        self.assertEqual(str(tree).split('\n'), tree.as_strs(0, bullet, None))
+
+    @given(no_linefeeds_text(), no_linefeeds_text(), no_linefeeds_text())
+    def test_tree_add_to_a_child_invalidates_the_cached_rendering(self, label: str, child: str, grand_child: str):
+        """
+        Verify that `str(tree)` reflects a grand child added after a previous `str(tree)` call.
+        """
+        tree = MarkdownTree(label = label)
+        child_tree = tree.add(child)
+        self.assertEqual(f"* {label}\n  * {child}", str(tree))
+        child_tree.add(grand_child)
+        self.assertEqual(f"* {label}\n  * {child}\n    * {grand_child}", str(tree))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
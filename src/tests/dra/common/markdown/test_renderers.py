@@ -0,0 +1,114 @@
+# Unit tests for the "markdown" renderers module using Hypothesis for property-based testing.
+# https://hypothesis.readthedocs.io/en/latest/
+
+from hypothesis import given, strategies as st
+import unittest
+from html.parser import HTMLParser
+import io, json
+
+from dra.common.markdown.elements import MarkdownElement, MarkdownSection, MarkdownTable, MarkdownTree
+from dra.common.markdown.renderers import (
+    HTMLRenderer,
+    JSONRenderer,
+    MarkdownRenderer,
+    make_renderer,
+)
+
+from tests.dra.utils import (
+    no_linefeeds_nonempty_text,
+)
+
+class TestRenderers(unittest.TestCase):
+    """
+    Test the Renderer classes.
+    """
+
+    def make_document(self, title: str, cells: list[str]) -> MarkdownSection:
+        table = MarkdownTable(title, [('a', 'left'), ('b', 'right'), ('c', 'center')])
+        for cell in cells:
+            table.add_row([cell, 1, None])
+        tree = MarkdownTree(title)
+        tree.add(cells[0]).add_children(cells)
+        sub = MarkdownSection('sub', content=[tree])
+        return MarkdownSection(title, content=['intro', table], subsections={'The Sub': sub})
+
+    def render(self, renderer, element: MarkdownElement) -> str:
+        return renderer.render(element, io.StringIO()).getvalue()
+
+    @given(no_linefeeds_nonempty_text(), st.lists(st.text(), min_size=1, max_size=5))
+    def test_markdown_renderer_writes_the_same_string_as___repr__(self, title: str, cells: list[str]):
+        """
+        Verify that the Markdown renderer output is identical to `str(element)`.
+        """
+        doc = self.make_document(title, cells)
+        self.assertEqual(str(doc), self.render(MarkdownRenderer(), doc))
+
+    @given(no_linefeeds_nonempty_text(), st.lists(st.text(), min_size=1, max_size=5))
+    def test_json_renderer_writes_valid_json_with_the_tree_data(self, title: str, cells: list[str]):
+        """
+        Verify that the JSON renderer writes valid JSON containing the structured data.
+        """
+        doc = self.make_document(title, cells)
+        obj = json.loads(self.render(JSONRenderer(), doc))
+        self.assertEqual('section', obj['type'])
+        self.assertEqual(title, obj['title'])
+        self.assertEqual(1, obj['level'])
+        self.assertEqual({'type': 'text', 'text': 'intro'}, obj['content'][0])
+        table = obj['content'][1]
+        self.assertEqual(['a', 'b', 'c'], table['columns'])
+        self.assertEqual(['left', 'right', 'center'], table['justifications'])
+        self.assertEqual([[cell, 1, None] for cell in cells], table['rows'])
+        sub = obj['subsections']['The Sub']
+        self.assertEqual(2, sub['level'])
+        tree = sub['content'][0]
+        self.assertEqual('tree', tree['type'])
+        self.assertEqual(cells, [c['label'] for c in tree['children'][0]['children']])
+
+    @given(no_linefeeds_nonempty_text(), st.lists(st.text(), min_size=1, max_size=5))
+    def test_html_renderer_writes_balanced_escaped_html(self, title: str, cells: list[str]):
+        """
+        Verify that the HTML renderer writes balanced tags and escapes the text.
+        """
+        class Checker(HTMLParser):
+            def __init__(self):
+                super().__init__(convert_charrefs=True)
+                self.stack = []
+                self.data = []
+            def handle_starttag(self, tag, attrs):
+                if tag not in ('meta', 'br'):
+                    self.stack.append(tag)
+            def handle_endtag(self, tag):
+                assert self.stack.pop() == tag, tag
+            def handle_data(self, data):
+                self.data.append(data)
+
+        doc = self.make_document(title, cells)
+        checker = Checker()
+        checker.feed(self.render(HTMLRenderer(), doc))
+        checker.close()
+        self.assertEqual([], checker.stack)
+        text = ''.join(checker.data)
+        self.assertIn(title, text)
+        for cell in cells:
+            self.assertIn(cell.replace('\r', '\n'), text.replace('\r', '\n'))
+
+    def test_html_renderer_section_ids_match_markdown_anchors(self):
+        """
+        Verify that subsections have the same ids as the Markdown anchors.
+        """
+        doc = self.make_document('Doc', ['x'])
+        self.assertIn('<a id="the_sub"></a>', str(doc))
+        self.assertIn('<section id="the_sub">', self.render(HTMLRenderer(full_document=False), doc))
+
+    def test_make_renderer_rejects_unknown_formats(self):
+        """
+        Verify that `make_renderer` returns the right renderers and rejects unknown formats.
+        """
+        self.assertIsInstance(make_renderer('markdown'), MarkdownRenderer)
+        self.assertIsInstance(make_renderer('html'), HTMLRenderer)
+        self.assertIsInstance(make_renderer('json'), JSONRenderer)
+        with self.assertRaises(ValueError):
+            make_renderer('pdf')
+
+if __name__ == "__main__":
+    unittest.main()
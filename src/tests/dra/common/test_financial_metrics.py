@@ -0,0 +1,100 @@
+# Unit tests for the "financial_metrics" module.
+
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from dra.common.financial_metrics import StatementPanel, cagr, compute_metrics, growth, ratio
+from dra.common.financial_store import FinancialDataStore, StatementKind
+
+def income_statement(period_end: str, revenue: float, **fields) -> dict[str,any]:
+    return dict(report_period=period_end, revenue=revenue, cost_of_revenue=revenue / 5,
+        operating_income=revenue * 0.4, net_income=revenue * 0.3, income_tax_expense=revenue * 0.05, **fields)
+
+class TestFinancialMetrics(unittest.TestCase):
+    """
+    Test computing the derived metrics of stored statements for several tickers at once.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FinancialDataStore(Path(self.tmp.name) / 'financial_data.sqlite')
+        self.store.save('META', StatementKind.INCOME, 'annual', [
+            income_statement('2022-12-31', 100.0),
+            income_statement('2023-12-31', 110.0),
+            income_statement('2024-12-31', 121.0)])
+        self.store.save('META', StatementKind.CASH_FLOW, 'annual', [
+            dict(report_period='2024-12-31', net_cash_flow_from_operations=50.0, capital_expenditure=-20.0)])
+        # A ticker whose fiscal year ends in June, with only two years stored.
+        self.store.save('MSFT', StatementKind.INCOME, 'annual', [
+            income_statement('2023-06-30', 200.0, gross_profit=140.0),
+            income_statement('2024-06-30', 0.0)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_helpers(self):
+        np.testing.assert_allclose([2.0, np.nan, np.nan], ratio(np.array([4.0, 1.0, np.nan]), np.array([2.0, 0.0, 1.0])))
+        np.testing.assert_allclose([[np.nan, 0.5, -0.5, np.nan]], growth(np.array([[2.0, 3.0, 1.5, 4.0]]) * [[1, 1, 1, np.nan]]))
+        np.testing.assert_allclose([0.1, np.nan, np.nan], cagr(np.array([
+            [np.nan, 100.0, 110.0, 121.0],
+            [np.nan, np.nan, np.nan, 5.0],
+            [-1.0, 2.0, 3.0, 4.0]])))
+
+    def test_panel_aligns_the_latest_periods(self):
+        panel = StatementPanel.from_store(self.store, ['meta', 'msft', 'nope'], periods=3)
+        self.assertEqual(['META', 'MSFT', 'NOPE'], panel.tickers)
+        self.assertEqual((3, 3), panel.item('revenue').shape)
+        self.assertEqual([None, '2023-06-30', '2024-06-30'], panel.period_labels[1])
+        self.assertEqual([None, None, None], panel.period_labels[2])
+        np.testing.assert_allclose([50.0, np.nan, np.nan], panel.item('operating_cash_flow')[:, -1])
+
+    def test_compute_metrics(self):
+        metrics = compute_metrics(StatementPanel.from_store(self.store, ['META', 'MSFT'], periods=3))
+        result = metrics.to_dict()
+        meta = result['META']
+        self.assertEqual(['2022-12-31', '2023-12-31', '2024-12-31'], meta['periods'])
+        self.assertEqual({'2022-12-31': None, '2023-12-31': 10.0, '2024-12-31': 10.0}, meta['metrics']['revenue_growth_percent'])
+        self.assertEqual(80.0, meta['metrics']['gross_margin_percent']['2024-12-31'])
+        self.assertEqual(14.29, meta['metrics']['effective_tax_rate_percent']['2024-12-31'])
+        self.assertEqual(30.0, meta['metrics']['free_cash_flow']['2024-12-31'])
+        self.assertIsNone(meta['metrics']['free_cash_flow']['2023-12-31'])
+        self.assertEqual({'revenue': 133.1, 'revenue_growth_percent': 10.0, 'operating_income': 53.24,
+            'operating_margin_percent': 40.0, 'net_income': 39.93, 'net_margin_percent': 30.0},
+            meta['projection_next_fiscal_year'])
+        # Reported values are used as is, and ratios of zero revenue are missing.
+        msft = result['MSFT']['metrics']
+        self.assertEqual(140.0, msft['gross_profit']['2023-06-30'])
+        self.assertIsNone(msft['gross_margin_percent']['2024-06-30'])
+        self.assertEqual(-100.0, msft['revenue_growth_percent']['2024-06-30'])
+        self.assertTrue(all(v is None for v in result['MSFT']['projection_next_fiscal_year'].values()))
+
+    def test_table(self):
+        metrics = compute_metrics(StatementPanel.from_store(self.store, ['META'], periods=3))
+        table = str(metrics.table('meta'))
+        self.assertIn("META derived metrics", table)
+        self.assertIn("next FY (trend)", table)
+        self.assertIn("133.10", table)
+        self.assertTrue(math.isnan(metrics.metrics['revenue_growth'][0, 0]))
+
+    def test_quarterly_projection_is_of_the_next_quarter(self):
+        self.store.save('META', StatementKind.INCOME, 'quarterly', [
+            income_statement('2024-06-30', 100.0),
+            income_statement('2024-09-30', 110.0),
+            income_statement('2024-12-31', 121.0)])
+        metrics = compute_metrics(StatementPanel.from_store(self.store, ['META'], period_type='quarterly', periods=3))
+        meta = metrics.to_dict()['META']
+        self.assertNotIn('projection_next_fiscal_year', meta)
+        projection = meta['projection_next_quarter']
+        self.assertEqual(133.1, projection['revenue'])
+        self.assertEqual(10.0, projection['revenue_growth_percent'])
+        self.assertEqual(46.41, projection['revenue_growth_annualized_percent'])
+        self.assertIn("next quarter (trend)", str(metrics.table('META')))
+        with self.assertRaises(ValueError):
+            StatementPanel.from_store(self.store, ['META'], period_type='monthly')
+
+if __name__ == "__main__":
+    unittest.main()
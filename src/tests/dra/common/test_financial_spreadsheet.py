@@ -0,0 +1,108 @@
+# Unit tests for the "financial_spreadsheet" module.
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from dra.common.financial_spreadsheet import FinancialsSheet, research_data, write_financials_spreadsheet
+from dra.common.messages import ReplyMessage
+
+def by_year(*values, estimate=None) -> dict[str,any]:
+    return dict(zip(['FY2022', 'FY2023', 'FY2024'], values), FY2025E=estimate, sources=['s_10k'])
+
+research = {
+    'company': 'Meta Platforms', 'ticker': 'META', 'currency': 'USD', 'units': 'USD millions',
+    'periods': ['FY2021', 'FY2022', 'FY2023', 'FY2024', 'TTM', 'FY2025E', 'FY2026E'],
+    'financials': {
+        'revenue': {
+            'streams': {
+                'ads': by_year(113642, 131948, 160633, estimate=185000),
+                'payments_other': by_year(808, 1058, "1,722", estimate=None),
+            },
+            'total': by_year(None, 134902, 162355, estimate=None),
+        },
+        'cost_of_revenue': {
+            'infrastructure_da': by_year(20000, 21000, 23000),
+            'total': by_year(25249, 25959, 30161, estimate=None),
+        },
+        'opex': {
+            'r_and_d': by_year(35338, 38483, 43873),
+            'sales_marketing': by_year(15262, 12301, 11347),
+            'g_and_a': by_year(11816, 11408, 9740),
+        },
+        'tax': {'income_tax_expense': by_year(5619, 8330, 8303)},
+        'derived': {
+            'net_income': by_year(23200, 39098, 62360),
+            'margins_percent': {'gross': by_year(78.3, None, None)},
+        },
+    },
+    'street_and_banks': {'consensus': {'revenue_FY+1': {'value': 188000, 'sources': ['s_consensus']}}},
+}
+
+class TestFinancialSpreadsheet(unittest.TestCase):
+    """
+    Test writing the Excel workbook directly from the research task's JSON.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'financials.xlsx'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_research_data(self):
+        text = f"Here is the result:\n```json\n{json.dumps(research)}\n```\nDone."
+        self.assertEqual('META', research_data([ReplyMessage.normalize(1, text)])['ticker'])
+        self.assertEqual('META', research_data([ReplyMessage.normalize(1, json.dumps(research)),
+            ReplyMessage.normalize(2, "No JSON here.")])['ticker'])
+        self.assertIsNone(research_data([ReplyMessage.normalize(1, '{"notes": []}')]))
+
+    def test_rows(self):
+        sheet = FinancialsSheet(research)
+        self.assertEqual(['Account', 'FY2022', 'FY2023', 'FY2024', 'FY2025E (Our Model)', 'FY2025E (Guidance/Consensus)'],
+            sheet.columns)
+        rows = dict((row[0], row[1:]) for row in sheet.cells()[1:])
+        self.assertEqual([], rows['Revenue'])
+        self.assertEqual([808.0, 1058.0, 1722.0, None, None], rows['• Payments & Other'])
+        # The missing total is the sum of the streams, and the consensus is only known for revenue.
+        self.assertEqual([114450.0, 134902.0, 162355.0, None, 188000.0], rows['Total Revenue'])
+        self.assertEqual([89201.0, 108943.0, 132194.0, None, None], rows['Gross Profit'])
+        self.assertAlmostEqual(0.783, rows['Gross Margin'][0])
+        self.assertAlmostEqual(108943.0 / 134902.0, rows['Gross Margin'][1])
+        self.assertEqual([26785.0, 46751.0, 67234.0, None, None], rows['Operating Income'])
+        self.assertEqual([28819.0, 47428.0, 70663.0, None, None], rows['Pre-Tax Income'])
+        self.assertIn('• General & Admin', rows)
+
+    def test_write_financials_spreadsheet(self):
+        # Other sheets of an existing workbook are kept, and the "Financials" sheet is replaced.
+        workbook = Workbook()
+        workbook.active.title = 'Notes'
+        workbook.create_sheet('Financials')['A1'] = 'old'
+        workbook.save(self.path)
+
+        replies = [ReplyMessage.normalize(1, json.dumps(research))]
+        self.assertEqual([f"Created {self.path} with updated Financials sheet."],
+            write_financials_spreadsheet(replies, self.path))
+        workbook = load_workbook(self.path)
+        self.assertEqual(['Financials', 'Notes'], workbook.sheetnames)
+        sheet = workbook['Financials']
+        self.assertEqual('Account', sheet['A1'].value)
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual('Total Revenue', sheet['A5'].value)
+        self.assertEqual(188000, sheet['F5'].value)
+        self.assertEqual('#,##0;(#,##0)', sheet['B5'].number_format)
+        self.assertEqual('0.0%', sheet['B9'].number_format)
+        self.assertEqual('Units: USD millions', sheet.cell(sheet.max_row, 1).value)
+
+    def test_missing_data_falls_back_to_the_agent(self):
+        self.assertIsNone(write_financials_spreadsheet([ReplyMessage.normalize(1, "I couldn't find the data.")], self.path))
+        empty = dict(research, financials={'revenue': {'total': by_year(None, None, None)}}, street_and_banks={})
+        self.assertIsNone(write_financials_spreadsheet([ReplyMessage.normalize(1, json.dumps(empty))], self.path))
+        self.assertFalse(self.path.exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# Unit tests for the "financial_store" module.
+
+import asyncio
+import json
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from dra.common.financial_store import (
+    FinancialDataStore,
+    StatementKind,
+    find_statement_tool,
+    flatten_line_items,
+    stored_statements)
+
+def income_statement(period_end: str, revenue: float, **fields) -> dict[str,any]:
+    return dict(ticker='META', report_period=period_end, fiscal_period=f"FY{period_end[:4]}", period='annual',
+        currency='USD', revenue=revenue, cost_of_revenue=revenue / 5, **fields)
+
+statements = [
+    income_statement('2024-12-31', 164501.0, filing_date='2025-01-30'),
+    income_statement('2023-12-31', 134902.0),
+    income_statement('2022-12-31', 116609.0),
+]
+
+class FakeLLM():
+    """Stands in for an `AugmentedLLM`, returning the `records` from its tool calls."""
+
+    # The latest report was filed a month ago, so the next one isn't due yet.
+    records = [dict(s, filing_date=(date.today() - timedelta(days=30)).isoformat()) for s in statements]
+
+    def __init__(self):
+        self.tool_calls = 0
+        self.logger = SimpleNamespace(debug=lambda *args, **kwargs: None)
+
+    async def call_tool(self, request, tool_call_id=None):
+        self.tool_calls += 1
+        return SimpleNamespace(isError=False,
+            content=[SimpleNamespace(type='text', text=json.dumps({'income_statements': self.records}))])
+
+def tool_request(name: str, **arguments) -> SimpleNamespace:
+    return SimpleNamespace(params=SimpleNamespace(name=name, arguments=arguments))
+
+class TestFinancialStore(unittest.TestCase):
+    """
+    Test storing, loading, and expiring financial statements, and answering tool calls from them.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FinancialDataStore(Path(self.tmp.name) / 'cache' / 'financial_data.sqlite')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_statement_tool(self):
+        self.assertEqual(StatementKind.INCOME, find_statement_tool('financial-datasets_get_income_statements').kind)
+        self.assertEqual(StatementKind.BALANCE, find_statement_tool('get_balance_sheets').kind)
+        self.assertIsNone(find_statement_tool('fetch_fetch'))
+
+    def test_flatten_line_items(self):
+        record = {'ticker': 'META', 'report_period': '2024-12-31', 'revenue': 10, 'audited': True, 'notes': 'x',
+            'items': [{'name': 'Family of Apps', 'amount': 9.5}, {'name': 'Reality Labs', 'amount': 0.5}],
+            'opex': {'r_and_d': 4, 'g_and_a': 1}}
+        self.assertEqual({'revenue': 10.0, 'items.Family of Apps': 9.5, 'items.Reality Labs': 0.5,
+            'opex.r_and_d': 4.0, 'opex.g_and_a': 1.0}, flatten_line_items(record))
+
+    def test_save_and_load(self):
+        self.assertEqual(3, self.store.save('meta', StatementKind.INCOME, 'annual', statements + [{'revenue': 1}]))
+        records = self.store.load('META', StatementKind.INCOME, 'annual', limit=2)
+        self.assertEqual(['2024-12-31', '2023-12-31'], [r['report_period'] for r in records])
+        self.assertEqual(164501.0, records[0]['revenue'])
+        self.assertEqual('2025-01-30', records[0]['filing_date'])
+        self.assertNotIn('filing_date', records[1])
+        # A restated report replaces the line items stored for the period.
+        self.store.save('META', StatementKind.INCOME, 'annual', [dict(ticker='META', report_period='2023-12-31', revenue=135000.0)])
+        restated = self.store.load('META', StatementKind.INCOME, 'annual')[1]
+        self.assertEqual(135000.0, restated['revenue'])
+        self.assertNotIn('cost_of_revenue', restated)
+        self.assertEqual([], self.store.load('META', StatementKind.BALANCE, 'annual'))
+
+    def test_freshness_follows_the_filing_dates(self):
+        self.assertIsNone(self.store.next_filing_date('META', StatementKind.INCOME, 'annual'))
+        self.store.save('META', StatementKind.INCOME, 'annual', statements)
+        # The next annual report can't be filed until a year after the last one.
+        self.assertEqual(date(2026, 1, 30), self.store.next_filing_date('META', StatementKind.INCOME, 'annual'))
+        self.assertEqual(3, len(self.store.lookup('META', StatementKind.INCOME, 'annual', 3, today=date(2025, 6, 1))))
+        self.assertIsNone(self.store.lookup('META', StatementKind.INCOME, 'annual', 3, today=date(2026, 2, 1)))
+        self.assertIsNone(self.store.lookup('META', StatementKind.INCOME, 'annual', 5, today=date(2025, 6, 1)))
+        self.assertEqual((1, 2), (self.store.hits, self.store.misses))
+        # Without a filing date, the filing deadline after the period's end is assumed.
+        self.store.save('META', StatementKind.INCOME, 'quarterly', [dict(report_period='2025-03-31', revenue=42314.0)])
+        self.assertEqual(date(2025, 8, 15), self.store.next_filing_date('META', StatementKind.INCOME, 'quarterly'))
+
+    def test_tool_calls_are_answered_from_the_store(self):
+        llm = stored_statements(FakeLLM, self.store)()
+        self.assertEqual('StoredFakeLLM', type(llm).__name__)
+        request = tool_request('financial-datasets_get_income_statements', ticker='META', period='annual', limit=3)
+
+        async def run():
+            await llm.call_tool(request)
+            second = await llm.call_tool(request)
+            await llm.call_tool(tool_request('fetch_fetch', url='https://example.com'))
+            return second
+
+        second = asyncio.run(run())
+        # Only the first and the unrelated tool call reach the server.
+        self.assertEqual(2, llm.tool_calls)
+        records = json.loads(second.content[0].text)['income_statements']
+        self.assertEqual([s['revenue'] for s in statements], [r['revenue'] for r in records])
+        self.assertEqual(3, len(self.store.load('META', StatementKind.INCOME, 'annual')))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# Unit tests for the "knowledge" module.
+
+import unittest
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from mcp_agent.workflows.deep_orchestrator.memory import WorkspaceMemory
+from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem
+
+from dra.common.knowledge import KnowledgeStore
+
+class TestKnowledgeStore(unittest.TestCase):
+    """
+    Test the KnowledgeStore.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = KnowledgeStore(Path(self.tmp.name) / "cache" / "knowledge.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_item(self, key: str, value: any = 'v', confidence: float = 0.9,
+        age_days: float = 0, category: str = 'finance') -> KnowledgeItem:
+        return KnowledgeItem(key=key, value=value, source='task1', confidence=confidence,
+            category=category, timestamp=datetime.now(timezone.utc) - timedelta(days=age_days))
+
+    def test_save_and_load_round_trip(self):
+        """
+        Verify that saved items are loaded with the same fields.
+        """
+        items = [self.make_item('revenue', {'2024': 1.5}), self.make_item('ceo', 'Jane', category='people')]
+        self.assertEqual(2, self.store.save('META', items))
+        loaded = self.store.load('META')
+        self.assertEqual(
+            sorted([(i.key, i.value, i.category, i.source, i.confidence, i.timestamp) for i in items]),
+            sorted([(i.key, i.value, i.category, i.source, i.confidence, i.timestamp) for i in loaded]))
+        self.assertEqual([], self.store.load('AAPL'))
+
+    def test_load_filters_stale_and_low_confidence_items(self):
+        """
+        Verify that items older than `max_age_days` or below `min_confidence` aren't loaded.
+        """
+        self.store.save('META', [
+            self.make_item('fresh'),
+            self.make_item('stale', age_days=KnowledgeStore.def_max_age_days + 1),
+            self.make_item('unsure', confidence=0.5)])
+        self.assertEqual(['fresh'], [i.key for i in self.store.load('META')])
+
+    def test_load_orders_by_confidence_and_applies_limit(self):
+        """
+        Verify that the most confident items are loaded first, up to the limit.
+        """
+        self.store.save('META', [self.make_item(f"k{c}", confidence=c/10) for c in range(7, 11)])
+        self.assertEqual(['k10', 'k9'], [i.key for i in self.store.load('META', limit=2)])
+
+    def test_save_keeps_newer_or_more_confident_items(self):
+        """
+        Verify that an existing item is only replaced by a newer or more confident one.
+        """
+        self.store.save('META', [self.make_item('k', 'first', confidence=0.9)])
+        self.store.save('META', [self.make_item('k', 'older', confidence=0.8, age_days=1)])
+        self.assertEqual(['first'], [i.value for i in self.store.load('META')])
+        self.store.save('META', [self.make_item('k', 'newer', confidence=0.8)])
+        self.assertEqual(['newer'], [i.value for i in self.store.load('META')])
+
+    def test_seed_adds_items_to_memory(self):
+        """
+        Verify that `seed` adds the loaded items to the orchestrator's memory.
+        """
+        self.store.save('META', [self.make_item('a'), self.make_item('b', category='other')])
+        memory = WorkspaceMemory(use_filesystem=False)
+        self.assertEqual(2, self.store.seed('META', memory))
+        self.assertEqual({'a', 'b'}, {i.key for i in memory.knowledge})
+
+if __name__ == "__main__":
+    unittest.main()
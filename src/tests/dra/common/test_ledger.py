@@ -0,0 +1,172 @@
+# Unit tests for the "ledger" module.
+
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from mcp_agent.tracing.token_counter import TokenCounter
+from mcp_agent.workflows.llm.augmented_llm import RequestParams
+
+from dra.common.ledger import EntryKind, UsageLedger, current_task, recorded, usage_from_responses
+
+class FakeContext():
+    def __init__(self, token_counter: TokenCounter | None = None):
+        self.token_counter = token_counter
+
+class FakeLLM():
+    """Stands in for an `AugmentedLLM` class."""
+    def __init__(self, context: FakeContext, usage: tuple[int,int] = (0, 0), fail: bool = False):
+        self.name = 'fake'
+        self.context = context
+        self.usage = usage
+        self.fail = fail
+    def get_request_params(self, request_params: RequestParams | None) -> RequestParams:
+        return request_params if request_params else RequestParams(model='m1')
+    async def generate(self, message, request_params=None):
+        if self.fail:
+            raise RuntimeError("failed")
+        counter = self.context.token_counter
+        if counter:
+            async with counter.scope(self.name, 'llm'):
+                await counter.record_usage(self.usage[0], self.usage[1], model_name='m2')
+        return [message]
+    async def generate_str(self, message, request_params=None):
+        return str(await self.generate(message, request_params))
+    async def generate_structured(self, message, response_model, request_params=None):
+        return response_model(message)
+
+class TestUsageLedger(unittest.TestCase):
+    """
+    Test the UsageLedger and the `recorded` LLM wrapper.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cache" / "ledger.sqlite"
+        self.ledger = UsageLedger(self.path, run_id='run1', app='finance', entity='META')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rows(self) -> list[dict[str,any]]:
+        with sqlite3.connect(self.path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute("SELECT * FROM usage ORDER BY id")]
+
+    def test_record_appends_rows(self):
+        self.ledger.record(EntryKind.CALL, task='t1', provider='anthropic', model='m',
+            input_tokens=10, output_tokens=5, cost=0.5, latency_secs=1.5, cache_hit=True, status='ok')
+        UsageLedger(self.path, run_id='run2').record(EntryKind.CALL, task='t1')
+        rows = self.rows()
+        self.assertEqual(2, len(rows))
+        self.assertEqual(UsageLedger.columns, list(rows[0].keys()))
+        self.assertEqual(('run1', 'call', 'finance', 'META', 't1', 'm', 10, 5, 0.5, 1.5, 1),
+            tuple(rows[0][c] for c in ['run_id', 'kind', 'app', 'entity', 'task', 'model',
+                'input_tokens', 'output_tokens', 'cost', 'latency_secs', 'cache_hit']))
+        self.assertEqual('run2', rows[1]['run_id'])
+        self.assertIsNone(rows[1]['cache_hit'])
+
+    def test_record_task_totals_the_calls(self):
+        template = Path(self.tmp.name) / "prompt.md"
+        template.write_text("Research {{ticker}}")
+        for n in range(3):
+            self.ledger.record(EntryKind.CALL, task='t1', input_tokens=10, output_tokens=1, cost=0.25)
+        self.ledger.record(EntryKind.CALL, task='t2', input_tokens=99)
+        self.ledger.record_task('t1', template, 'anthropic', 'm', 3.0, 'FINISHED_OK')
+        task_row = self.rows()[-1]
+        self.assertEqual(('task', 30, 3, 0.75, str(template), UsageLedger.hash_template(template)),
+            tuple(task_row[c] for c in ['kind', 'input_tokens', 'output_tokens', 'cost', 'template', 'template_hash']))
+        self.assertEqual(12, len(task_row['template_hash']))
+
+    def test_summarize_groups_and_orders(self):
+        self.ledger.record(EntryKind.CALL, model='a', input_tokens=1, cost=1.0, latency_secs=1.0, cache_hit=True)
+        self.ledger.record(EntryKind.CALL, model='a', input_tokens=2, cost=1.0, latency_secs=3.0, cache_hit=False)
+        self.ledger.record(EntryKind.CALL, model='b', input_tokens=4, cost=5.0)
+        self.ledger.record(EntryKind.TASK, model='a', cost=100.0)
+        columns, rows = self.ledger.summarize(['model'])
+        self.assertEqual(['model', 'count', 'input_tokens', 'output_tokens', 'cost', 'mean_latency_secs', 'cache_hit_rate'], columns)
+        self.assertEqual([('b', 1, 4, 0, 5.0, 0.0, None), ('a', 2, 3, 0, 2.0, 2.0, 0.5)], rows)
+        _, rows = self.ledger.summarize([], kind=EntryKind.TASK)
+        self.assertEqual([(1, 0, 0, 100.0, 0.0, None)], rows)
+        _, rows = self.ledger.summarize(['model'], since=datetime.now(timezone.utc) + timedelta(days=1))
+        self.assertEqual([], rows)
+
+    def test_summarize_rejects_unknown_columns(self):
+        with self.assertRaises(ValueError):
+            self.ledger.summarize(['cost'])
+        with self.assertRaises(ValueError):
+            self.ledger.summarize(['model'], order_by='nope; DROP TABLE usage')
+
+    def test_recorded_uses_the_token_counter(self):
+        """
+        Verify that a call is recorded once, with the usage from its token counter scope
+        and the current task.
+        """
+        llm_class = recorded(FakeLLM, 'anthropic', self.ledger)
+        self.assertEqual('RecordedFakeLLM', llm_class.__name__)
+        async def run():
+            counter = TokenCounter()
+            async with counter.scope('app', 'app'):
+                llm = llm_class(FakeContext(counter), usage=(7, 3))
+                token = current_task.set('t1')
+                try:
+                    await llm.generate_str('hello')
+                finally:
+                    current_task.reset(token)
+        asyncio.run(run())
+        rows = self.rows()
+        self.assertEqual(1, len(rows))
+        self.assertEqual(('call', 't1', 'anthropic', 'm2', 7, 3, 'ok'),
+            tuple(rows[0][c] for c in ['kind', 'task', 'provider', 'model', 'input_tokens', 'output_tokens', 'status']))
+        self.assertGreaterEqual(rows[0]['latency_secs'], 0.0)
+
+    def test_recorded_writes_rows_off_the_event_loop(self):
+        """
+        Verify that the database is opened on a worker thread, not the event loop's, and
+        that the task totals are updated by the time the call returns.
+        """
+        connect = sqlite3.connect
+        threads = []
+        def connect_and_note_thread(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return connect(*args, **kwargs)
+        llm = recorded(FakeLLM, 'openai', self.ledger)(FakeContext())
+        async def run() -> int:
+            token = current_task.set('t1')
+            try:
+                await llm.generate('hello')
+            finally:
+                current_task.reset(token)
+            return threading.get_ident()
+        with patch('dra.common.ledger.sqlite3.connect', side_effect=connect_and_note_thread):
+            loop_thread = asyncio.run(run())
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(loop_thread, threads[0])
+        self.assertIn('t1', self.ledger.task_totals)
+        self.assertEqual(1, len(self.rows()))
+
+    def test_recorded_records_failures(self):
+        llm = recorded(FakeLLM, 'openai', self.ledger)(FakeContext(), fail=True)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(llm.generate('hello'))
+        rows = self.rows()
+        self.assertEqual(('error', 'm1', None), (rows[0]['status'], rows[0]['model'], rows[0]['task']))
+
+    def test_usage_from_responses(self):
+        class Obj():
+            def __init__(self, **kwargs):
+                self.__dict__.update(kwargs)
+        self.assertIsNone(usage_from_responses(['no usage']))
+        self.assertEqual((4, 6, True), usage_from_responses([
+            Obj(usage=Obj(input_tokens=1, output_tokens=2, cache_read_input_tokens=5)),
+            Obj(usage=Obj(prompt_tokens=3, completion_tokens=4,
+                prompt_tokens_details=Obj(cached_tokens=0)))]))
+        self.assertEqual((1, 2, None), usage_from_responses(Obj(usage=Obj(input_tokens=1, output_tokens=2))))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+# Unit tests for the "memory_compaction" module.
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from mcp_agent.workflows.deep_orchestrator.memory import WorkspaceMemory
+from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem, TaskResult, TaskStatus
+
+from dra.common.memory_compaction import CompactionStats, MemoryCompactor
+
+class TestMemoryCompaction(unittest.TestCase):
+    """
+    Test the MemoryCompactor.
+    """
+
+    def make_item(self, key: str, value: any = 'v', confidence: float = 0.9,
+        age_secs: float = 0, category: str = 'finance') -> KnowledgeItem:
+        return KnowledgeItem(key=key, value=value, source='task1', confidence=confidence,
+            category=category, timestamp=datetime.now(timezone.utc) - timedelta(seconds=age_secs))
+
+    def make_result(self, name: str, output: str = 'out') -> TaskResult:
+        return TaskResult(task_name=name, status=TaskStatus.COMPLETED, output=output)
+
+    def make_memory(self, items: list[KnowledgeItem] = [], results: list[TaskResult] = []) -> WorkspaceMemory:
+        memory = WorkspaceMemory(use_filesystem=False)
+        for item in items:
+            memory.add_knowledge(item)
+        memory.task_results.extend(results)
+        return memory
+
+    def test_threshold_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            MemoryCompactor(threshold_tokens=0)
+        with self.assertRaises(ValueError):
+            MemoryCompactor(threshold_tokens=100, target_tokens=200)
+
+    def test_maybe_compact_does_nothing_below_the_threshold(self):
+        """
+        Verify that memory under the threshold is left alone and no stats are recorded.
+        """
+        memory = self.make_memory([self.make_item('a'), self.make_item('a')])
+        compactor = MemoryCompactor(threshold_tokens=1000)
+        self.assertIsNone(compactor.maybe_compact(memory))
+        self.assertEqual(2, len(memory.knowledge))
+        self.assertIsNone(CompactionStats.of(memory))
+
+    def test_compact_keeps_the_best_knowledge_item_per_key(self):
+        """
+        Verify that duplicate keys, ignoring case and white space, are reduced to the most
+        confident item, then the most recent, keeping the original order.
+        """
+        memory = self.make_memory([
+            self.make_item('Revenue  2024', 'low', confidence=0.5),
+            self.make_item('ceo', 'Jane'),
+            self.make_item('revenue 2024', 'old', confidence=0.9, age_secs=60),
+            self.make_item('revenue 2024', 'new', confidence=0.9),
+            self.make_item('ceo', 'Other category', category='people'),
+        ])
+        stats = MemoryCompactor().compact(memory)
+        self.assertEqual([('ceo', 'Jane'), ('revenue 2024', 'new'), ('ceo', 'Other category')],
+            [(i.key, i.value) for i in memory.knowledge])
+        self.assertEqual({'finance': 2, 'people': 1},
+            {c: len(items) for c, items in memory.knowledge_by_category.items()})
+        self.assertEqual((5, 3), (stats.knowledge_before, stats.knowledge_after))
+
+    def test_compact_summarizes_long_values(self):
+        """
+        Verify that long knowledge values are truncated.
+        """
+        memory = self.make_memory([self.make_item('a', 'x'*1000), self.make_item('b', {'k': 'short'})])
+        MemoryCompactor(max_value_chars=20).compact(memory)
+        self.assertEqual('x'*20 + '...', memory.knowledge[0].value)
+        self.assertEqual({'k': 'short'}, memory.knowledge[1].value)
+
+    def test_full_knowledge_restores_summarized_and_dropped_items(self):
+        """
+        Verify that the knowledge before compaction can be recovered, even after
+        repeated compactions.
+        """
+        items = [self.make_item('long', 'x'*1000)] + \
+            [self.make_item(f"k{n}", 'v'*100, confidence=0.5, age_secs=100-n) for n in range(20)]
+        memory = self.make_memory(items)
+        compactor = MemoryCompactor(threshold_tokens=300, max_value_chars=150, regrowth_tokens=0)
+        compactor.compact(memory)
+        compactor.compact(memory)
+        self.assertEqual('x'*150 + '...', memory.knowledge[0].value)
+        self.assertLess(len(memory.knowledge), len(items))
+        full = compactor.full_knowledge(memory.knowledge)
+        self.assertEqual(sorted(i.key for i in items), sorted(i.key for i in full))
+        self.assertEqual({(i.key, i.value) for i in items}, {(i.key, i.value) for i in full})
+
+    def test_compact_keeps_the_latest_task_results(self):
+        """
+        Verify that only the latest result per task is kept and older outputs are truncated.
+        """
+        memory = self.make_memory(results=[
+            self.make_result('t1', 'first try'),
+            self.make_result('t2', 'y'*100),
+            self.make_result('t1', 'z'*100),
+            self.make_result('t3', 'w'*100),
+        ])
+        stats = MemoryCompactor(max_output_chars=5, keep_recent_results=2).compact(memory)
+        self.assertEqual([('t2', 'yyyyy...'), ('t1', 'z'*100), ('t3', 'w'*100)],
+            [(r.task_name, r.output) for r in memory.task_results])
+        self.assertEqual((4, 3), (stats.task_results_before, stats.task_results_after))
+
+    def test_stats_are_stored_in_memory_metadata(self):
+        """
+        Verify that the before and after sizes are recorded where the monitors find them.
+        """
+        memory = self.make_memory([self.make_item(f"k{n%10}", 'v'*200) for n in range(100)])
+        compactor = MemoryCompactor(threshold_tokens=1000)
+        stats = compactor.maybe_compact(memory)
+        self.assertIs(stats, CompactionStats.of(memory))
+        self.assertEqual(1, stats.compactions)
+        self.assertGreater(stats.tokens_before, 1000)
+        self.assertLess(stats.tokens_after, stats.tokens_before)
+        self.assertEqual(memory.estimate_context_size(), stats.tokens_after)
+        self.assertIsNone(compactor.maybe_compact(memory))
+
+    def test_unique_knowledge_is_dropped_to_the_target(self):
+        """
+        Verify that when deduplicating and summarizing can't get the memory under the threshold,
+        the least confident, oldest items are dropped to the target, and that later calls
+        don't compact again until the memory has grown.
+        """
+        items = [self.make_item(f"k{n:03}", 'v'*350, confidence=0.5 if n % 2 else 0.9, age_secs=300-n)
+            for n in range(300)]
+        memory = self.make_memory(items)
+        compactor = MemoryCompactor()
+        self.assertGreater(memory.estimate_context_size(), compactor.threshold_tokens)
+        stats = compactor.maybe_compact(memory)
+        self.assertLessEqual(stats.tokens_after, compactor.target_tokens)
+        self.assertLess(stats.knowledge_after, stats.knowledge_before)
+        dropped = {i.key for i in items} - {i.key for i in memory.knowledge}
+        self.assertTrue(all(int(key[1:]) % 2 for key in dropped))
+        self.assertEqual('k000', memory.knowledge[0].key)
+        self.assertEqual(len(memory.knowledge), sum(len(v) for v in memory.knowledge_by_category.values()))
+        for _ in range(5):
+            self.assertIsNone(compactor.maybe_compact(memory))
+        self.assertEqual(1, compactor.compactions)
+
+    def test_maybe_compact_waits_for_the_memory_to_grow(self):
+        """
+        Verify that memory still over the threshold after a compaction is only compacted again
+        once it has grown by the regrowth margin.
+        """
+        memory = self.make_memory(results=[self.make_result(f"t{n}", 'r'*500) for n in range(20)])
+        compactor = MemoryCompactor(threshold_tokens=1000, regrowth_tokens=500)
+        self.assertIsNotNone(compactor.maybe_compact(memory))
+        self.assertGreater(compactor.last_tokens_after, compactor.threshold_tokens)
+        self.assertIsNone(compactor.maybe_compact(memory))
+        memory.add_knowledge(self.make_item('big', 'x'*1000))
+        self.assertIsNone(compactor.maybe_compact(memory))
+        memory.add_knowledge(self.make_item('bigger', 'x'*1200))
+        self.assertIsNotNone(compactor.maybe_compact(memory))
+        self.assertEqual(2, compactor.compactions)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# Unit tests for the "messages" module using Hypothesis for property-based testing.
+# https://hypothesis.readthedocs.io/en/latest/
+
+from hypothesis import example, given, strategies as st
+import unittest
+import json
+
+from openai.types.chat import ChatCompletionMessage
+from anthropic.types import Message
+
+from dra.common.messages import ReplyKind, ReplyMessage
+
+class TestMessages(unittest.TestCase):
+    """
+    Test the ReplyMessage normalization.
+    """
+
+    def make_openai_message(self, content: str) -> ChatCompletionMessage:
+        return ChatCompletionMessage(role='assistant', content=content,
+            tool_calls=[{'id': '1', 'type': 'function', 'function': {'name': 'f', 'arguments': '{}'}}])
+
+    def make_anthropic_message(self, content: str) -> Message:
+        return Message(id='id1', model='claude', role='assistant', type='message',
+            stop_reason='end_turn', stop_sequence=None,
+            content=[
+                {'type': 'text', 'text': content},
+                {'type': 'tool_use', 'id': 't1', 'name': 'n', 'input': {'a': 1}}],
+            usage={'input_tokens': 1, 'output_tokens': 2})
+
+    @given(st.text())
+    def test_normalize_openai_message(self, content: str):
+        """
+        Verify that a `ChatCompletionMessage` is read field by field.
+        """
+        rm = ReplyMessage.normalize(1, self.make_openai_message(content))
+        self.assertEqual(ReplyKind.OPENAI, rm.kind)
+        self.assertEqual(content, rm.content)
+        self.assertEqual('assistant', rm.metadata['role'])
+        self.assertNotIn('content', rm.metadata)
+        self.assertEqual('f', rm.tool_calls[0]['function']['name'])
+
+    @given(st.text())
+    def test_normalize_openai_message_string(self, content: str):
+        """
+        Verify that the content is recovered from the `str()` of a `ChatCompletionMessage`.
+        """
+        rm = ReplyMessage.normalize(2, str(self.make_openai_message(content)))
+        self.assertEqual(2, rm.index)
+        self.assertEqual(ReplyKind.OPENAI, rm.kind)
+        self.assertEqual(content, rm.content)
+
+    @given(st.text())
+    def test_normalize_anthropic_message(self, content: str):
+        """
+        Verify that an Anthropic `Message` is read field by field.
+        """
+        rm = ReplyMessage.normalize(1, self.make_anthropic_message(content))
+        self.assertEqual(ReplyKind.ANTHROPIC, rm.kind)
+        self.assertEqual(content, rm.content)
+        self.assertEqual('claude', rm.metadata['model'])
+        self.assertEqual(2, rm.usage['output_tokens'])
+        self.assertEqual([{'id': 't1', 'input': {'a': 1}, 'name': 'n', 'type': 'tool_use'}], rm.tool_calls)
+
+    @given(st.text())
+    def test_normalize_anthropic_message_string(self, content: str):
+        """
+        Verify that the text is recovered from the `str()` of an Anthropic `Message`.
+        """
+        rm = ReplyMessage.normalize(1, str(self.make_anthropic_message(content)))
+        self.assertEqual(ReplyKind.ANTHROPIC, rm.kind)
+        self.assertEqual(content, rm.content)
+
+    @given(st.dictionaries(st.text(alphabet='abc'), st.integers()))
+    @example({'': -9223372036854775809})
+    def test_normalize_json_string(self, d: dict[str,int]):
+        """
+        Verify that a JSON string is parsed.
+        """
+        rm = ReplyMessage.normalize(1, json.dumps(d))
+        self.assertEqual(ReplyKind.JSON, rm.kind)
+        self.assertEqual(d, rm.data)
+
+    @given(st.text())
+    def test_normalize_other_values_as_text(self, text: str):
+        """
+        Verify that other strings are treated as text, unless they happen to be JSON.
+        """
+        rm = ReplyMessage.normalize(1, text)
+        self.assertIn(rm.kind, {ReplyKind.TEXT, ReplyKind.JSON, ReplyKind.OPENAI, ReplyKind.ANTHROPIC})
+        if rm.kind == ReplyKind.TEXT:
+            self.assertEqual(text, rm.content)
+            self.assertEqual(text.split('\n') if text else [], rm.content_lines())
+
+    def test_normalize_all_numbers_the_messages(self):
+        """
+        Verify that `normalize_all` numbers the messages from 1.
+        """
+        rms = ReplyMessage.normalize_all(['a', 'b', 3])
+        self.assertEqual([1, 2, 3], [rm.index for rm in rms])
+        self.assertEqual(['a', 'b', '3'], [rm.content for rm in rms])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# Unit tests for the "metrics" module.
+
+import math
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+from dra.common.metrics import Histogram, MetricsObserver, format_labels
+
+def make_system() -> SimpleNamespace:
+    """Stands in for a `DeepResearch` instance and its orchestrator."""
+    orchestrator = SimpleNamespace(
+        budget=SimpleNamespace(tokens_used=1200, cost_incurred=0.25, max_tokens=50000, max_cost=2.0),
+        config=SimpleNamespace(execution=SimpleNamespace(max_iterations=25, max_replans=2)),
+        iteration=3,
+        replan_count=1,
+        policy=SimpleNamespace(total_successes=4, total_failures=1, consecutive_failures=0),
+        agent_cache=SimpleNamespace(hits=3, misses=1),
+        memory=SimpleNamespace(task_results=[]))
+    return SimpleNamespace(orchestrator=orchestrator, observer_updates=0, last_observer_update_secs=0.0)
+
+def task_result(name: str, secs: float, status: str = 'completed') -> SimpleNamespace:
+    return SimpleNamespace(task_name=name, duration_seconds=secs, status=SimpleNamespace(value=status))
+
+class TestMetrics(unittest.TestCase):
+    """
+    Test the OpenMetrics observer and its snapshots.
+    """
+
+    def setUp(self):
+        self.system = make_system()
+        self.observer = MetricsObserver(port=0)
+
+    def tearDown(self):
+        self.observer.close()
+
+    def samples(self) -> dict[str, str]:
+        """The samples of the current snapshot, keyed by the name and labels."""
+        lines = self.observer.snapshot.render().decode('utf-8').splitlines()
+        self.assertEqual('# EOF', lines[-1])
+        return dict(line.rsplit(' ', 1) for line in lines if not line.startswith('#'))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((1.0, 5.0))
+        for value in [0.5, 1.0, 3.0, 10.0]:
+            histogram.observe(value)
+        self.assertEqual([
+            ('_bucket', {'le': '1.0'}, 2),
+            ('_bucket', {'le': '5.0'}, 3),
+            ('_bucket', {'le': '+Inf'}, 4),
+            ('_count', {}, 4),
+            ('_sum', {}, 14.5)], histogram.samples())
+
+    def test_format_labels(self):
+        self.assertEqual('', format_labels({}))
+        self.assertEqual('{a="x\\"y\\\\z\\n"}', format_labels({'a': 'x"y\\z\n'}))
+
+    def test_snapshot(self):
+        self.observer.update(self.system)
+        samples = self.samples()
+        self.assertEqual('1200', samples['dra_tokens_total'])
+        self.assertEqual('0.25', samples['dra_cost_dollars_total'])
+        self.assertEqual('3', samples['dra_iteration'])
+        self.assertEqual('1', samples['dra_replans'])
+        self.assertEqual('1', samples['dra_policy_failures_total'])
+        self.assertEqual('0.75', samples['dra_agent_cache_hit_ratio'])
+        self.assertEqual('0', samples['dra_task_duration_seconds_count'])
+        text = self.observer.snapshot.render().decode('utf-8')
+        self.assertIn('# TYPE dra_tokens counter\n', text)
+        self.assertIn('# TYPE dra_task_duration_seconds histogram\n', text)
+
+    def test_task_and_observer_latencies(self):
+        results = self.system.orchestrator.memory.task_results
+        results.extend([task_result('a', 2.0), task_result('b', 40.0, 'failed')])
+        self.system.observer_updates, self.system.last_observer_update_secs = 1, 0.02
+        self.observer.update(self.system)
+        # Compaction removes the older result; the remaining one isn't counted again.
+        del results[0]
+        results.append(task_result('c', 0.5))
+        self.observer.update(self.system)
+        samples = self.samples()
+        self.assertEqual('3', samples['dra_task_duration_seconds_count'])
+        self.assertEqual('42.5', samples['dra_task_duration_seconds_sum'])
+        self.assertEqual('1', samples['dra_task_duration_seconds_bucket{le="1.0"}'])
+        self.assertEqual('2', samples['dra_orchestrator_tasks_total{status="completed"}'])
+        self.assertEqual('1', samples['dra_orchestrator_tasks_total{status="failed"}'])
+        self.assertEqual('1', samples['dra_observer_update_duration_seconds_count'])
+        self.assertEqual('1', samples['dra_observer_update_duration_seconds_bucket{le="0.025"}'])
+
+    def test_no_orchestrator_yet(self):
+        self.observer.update(SimpleNamespace(orchestrator=None))
+        samples = self.samples()
+        self.assertNotIn('dra_tokens_total', samples)
+        self.assertEqual('0', samples['dra_task_duration_seconds_count'])
+
+    def test_scrape(self):
+        self.observer.update(self.system)
+        self.assertIsNotNone(self.observer.port)
+        url = f"http://127.0.0.1:{self.observer.port}"
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            self.assertTrue(response.headers['Content-Type'].startswith('application/openmetrics-text'))
+            self.assertEqual(self.observer.snapshot.render(), response.read())
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+        self.assertEqual(404, cm.exception.code)
+        cm.exception.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# Unit tests for the "output_writer" module.
+
+import asyncio
+import gzip
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from dra.common import output_writer as module
+from dra.common.output_writer import Chunks, OutputWriter, write_atomically
+
+class TestOutputWriter(unittest.TestCase):
+    """
+    Test the OutputWriter.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.writer = OutputWriter()
+
+    def tearDown(self):
+        self.writer.close(timeout=5)
+        self.tmp.cleanup()
+
+    def gated(self) -> tuple[threading.Event, threading.Event, any]:
+        """Patch `write_atomically` to wait for the returned `release` event."""
+        started, release = threading.Event(), threading.Event()
+        def write(path, content, encoding='utf-8'):
+            started.set()
+            release.wait(5)
+            return write_atomically(path, content, encoding)
+        return started, release, patch.object(module, 'write_atomically', write)
+
+    def test_max_pending_bytes_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            OutputWriter(max_pending_bytes=0)
+
+    def test_write_and_flush(self):
+        path = self.dir / 'sub' / 'report.md'
+        future = self.writer.write(path, 'hello')
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(path, future.result(timeout=5))
+        self.assertEqual('hello', path.read_text())
+        self.assertEqual(['report.md'], [p.name for p in path.parent.iterdir()])
+
+    def test_pending_writes_to_the_same_path_are_coalesced(self):
+        """
+        Verify that only the latest contents are written when a path is rewritten
+        while the thread is busy.
+        """
+        started, release, patcher = self.gated()
+        with patcher:
+            self.writer.write(self.dir / 'a', 'a')
+            started.wait(5)
+            first = self.writer.write(self.dir / 'b', 'old')
+            second = self.writer.write(self.dir / 'b', 'new')
+            release.set()
+            self.assertTrue(self.writer.flush(timeout=5))
+        self.assertIs(first, second)
+        self.assertEqual('new', (self.dir / 'b').read_text())
+        self.assertEqual((3, 1, 2), (self.writer.writes_requested,
+            self.writer.writes_coalesced, self.writer.files_written))
+
+    def test_write_waits_when_the_buffer_is_full(self):
+        writer = OutputWriter(max_pending_bytes=10)
+        started, release, patcher = self.gated()
+        done = threading.Event()
+        with patcher:
+            writer.write(self.dir / 'a', 'x' * 8)
+            started.wait(5)
+            thread = threading.Thread(target=lambda: (writer.write(self.dir / 'b', 'y' * 8), done.set()))
+            thread.start()
+            self.assertFalse(done.wait(0.2))
+            release.set()
+            self.assertTrue(done.wait(5))
+            thread.join(5)
+            writer.close(timeout=5)
+        self.assertEqual('y' * 8, (self.dir / 'b').read_text())
+
+    def test_errors_are_logged_and_raised_by_flush(self):
+        (self.dir / 'file').write_text('not a directory')
+        with self.assertLogs(module.logger, 'ERROR') as logs:
+            future = self.writer.write(self.dir / 'file' / 'report.md', 'x')
+            self.assertTrue(self.writer.flush(timeout=5))
+            self.assertIsNotNone(future.exception(timeout=5))
+        self.assertIn("Failed to write", logs.output[0])
+        self.assertEqual(1, self.writer.errors)
+        with self.assertRaises(ValueError) as raised:
+            self.writer.flush(timeout=5, raise_errors=True)
+        self.assertIn('report.md', str(raised.exception))
+        self.assertIsInstance(raised.exception.__cause__, OSError)
+        # The failures are only raised once.
+        self.assertTrue(self.writer.flush(timeout=5, raise_errors=True))
+
+    def test_chunks_and_functions_are_streamed(self):
+        chunks = Chunks()
+        for i in range(3):
+            chunks.write(f"line {i}\n")
+        self.writer.write(self.dir / 'chunks.md', chunks)
+        self.writer.write(self.dir / 'function.txt.gz', lambda stream: stream.write('résumé'))
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual('line 0\nline 1\nline 2\n', (self.dir / 'chunks.md').read_text())
+        self.assertEqual('résumé', gzip.decompress((self.dir / 'function.txt.gz').read_bytes()).decode('utf-8'))
+
+    def test_write_async_does_not_block_the_event_loop(self):
+        writer = OutputWriter(max_pending_bytes=10)
+        started, release, patcher = self.gated()
+
+        async def run() -> list[str]:
+            writer.write(self.dir / 'a', 'x' * 8)
+            await asyncio.to_thread(started.wait, 5)
+            # The buffer is full, so these wait in another thread, in order.
+            first = writer.write_async(self.dir / 'b', 'old-' * 2)
+            second = writer.write_async(self.dir / 'b', 'new-' * 2)
+            ticks = []
+            for i in range(3):
+                ticks.append(i)
+                await asyncio.sleep(0.01)
+            self.assertFalse(first.done() or second.done())
+            release.set()
+            await first
+            await second
+            await writer.flush_async(timeout=5)
+            return ticks
+
+        with patcher:
+            self.assertEqual([0, 1, 2], asyncio.run(run()))
+            writer.close(timeout=5)
+        self.assertEqual('new-new-', (self.dir / 'b').read_text())
+
+    def test_close_flushes_and_rejects_later_writes(self):
+        path = self.dir / 'report.md'
+        self.writer.write(path, 'final')
+        self.writer.close(timeout=5)
+        self.assertEqual('final', path.read_text())
+        with self.assertRaises(ValueError):
+            self.writer.write(path, 'too late')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# Unit tests for the "profiles" module.
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from dra.common.deep_research import DeepResearch
+from dra.common.profiles import ExecutionProfile, get_profile, load_profiles
+from dra.common.variables import Variable
+
+class TestProfiles(unittest.TestCase):
+    """
+    Test the ExecutionProfile, loading profiles, and applying them to the orchestrator config.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text: str) -> Path:
+        path = Path(self.tmp.name) / "profiles.yaml"
+        path.write_text(text)
+        return path
+
+    def test_built_in_profiles(self):
+        profiles = load_profiles()
+        self.assertEqual(['fast', 'balanced', 'thorough'], list(profiles))
+        fast, thorough = profiles['fast'], profiles['thorough']
+        self.assertLess(fast.section('execution')['max_iterations'], thorough.section('execution')['max_iterations'])
+        self.assertLess(fast.section('budget')['max_cost'], thorough.section('budget')['max_cost'])
+        self.assertIn('research_model', fast.models_for('openai'))
+
+    def test_unknown_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            ExecutionProfile('p', execution={'max_iteration': 3})
+        with self.assertRaises(ValueError):
+            ExecutionProfile.from_dict('p', {'budgets': {}})
+        with self.assertRaises(ValueError):
+            ExecutionProfile('p', models={'openai': 'gpt-4o'})
+
+    def test_load_profiles_validates_the_file(self):
+        with self.assertRaises(ValueError):
+            load_profiles(self.write("something: else\n"))
+        path = self.write("profiles:\n  tiny:\n    execution:\n      max_iterations: 2\n    budget:\n")
+        self.assertEqual({'max_iterations': 2}, get_profile('tiny', path).section('execution'))
+        self.assertEqual({}, get_profile('tiny', path).section('budget'))
+        with self.assertRaises(ValueError):
+            get_profile('huge', path)
+
+    def test_cli_values(self):
+        profile = ExecutionProfile('p', temperature=0.3,
+            models={'openai': {'research_model': 'small'}},
+            execution={'max_iterations': 4, 'max_replans': 1},
+            budget={'max_cost': 0.25})
+        self.assertEqual({'max_iterations': 4, 'max_cost_dollars': 0.25, 'temperature': 0.3,
+            'research_model': 'small'}, profile.cli_values('openai'))
+        self.assertNotIn('research_model', profile.cli_values('anthropic'))
+
+    def test_make_default_config_precedence(self):
+        """
+        Verify that variables take precedence over the profile, which takes precedence
+        over the defaults, and that a short run ignores the profile.
+        """
+        profile = ExecutionProfile('p',
+            execution={'max_iterations': 4, 'max_replans': 0, 'enable_parallel': False},
+            budget={'max_tokens': 1234, 'max_cost': 0.25},
+            policy={'min_verification_confidence': 0.6},
+            context={'task_context_budget': 999})
+        variables = {'max_tokens': Variable('max_tokens', 5000)}
+        config = DeepResearch.make_default_config(False, 'test', [], variables, profile=profile)
+        self.assertEqual((4, 0, False, 5), (config.execution.max_iterations, config.execution.max_replans,
+            config.execution.enable_parallel, config.execution.max_task_retries))
+        self.assertEqual((5000, 0.25), (config.budget.max_tokens, config.budget.max_cost))
+        self.assertEqual(0.6, config.policy.min_verification_confidence)
+        self.assertEqual(999, config.context.task_context_budget)
+
+        short = DeepResearch.make_default_config(True, 'test', [], variables, profile=profile)
+        self.assertEqual((1, 2), (short.execution.max_iterations, short.execution.max_replans))
+        self.assertEqual(0.8, short.policy.min_verification_confidence)
+
+if __name__ == "__main__":
+    unittest.main()
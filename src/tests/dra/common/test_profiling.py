@@ -0,0 +1,82 @@
+# Unit tests for the "profiling" module.
+
+import asyncio
+import pstats
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from dra.common.observer import Observer, Observers
+from dra.common.profiling import ProfileMode, RunProfiler
+
+class SlowObserver(Observer):
+    def _do_update(self, other={}, is_final=False):
+        time.sleep(0.01)
+
+def busy(secs: float):
+    end = time.perf_counter() + secs
+    while time.perf_counter() < end:
+        pass
+
+class TestProfiling(unittest.TestCase):
+    """
+    Test profiling a run, with the observer update times and the event loop lag.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.report_path = Path(self.tmp.name) / "Report.md"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_profiled(self, mode: ProfileMode) -> RunProfiler:
+        profiler = RunProfiler(mode, sample_interval_secs=0.001, lag_interval_secs=0.01)
+        observers = Observers({'slow': SlowObserver(), 'other': Observer()})
+        profiler.time_observers(observers)
+        async def run():
+            async with profiler.profiling():
+                for _ in range(3):
+                    await asyncio.sleep(0.02)
+                    busy(0.05)  # Blocks the event loop.
+                    observers.update(system='system')
+        asyncio.run(run())
+        return profiler
+
+    def test_deterministic(self):
+        profiler = self.run_profiled(ProfileMode.DETERMINISTIC)
+        profile_path, summary_path = profiler.save(self.report_path)
+        self.assertEqual(['Report.profile.md', 'Report.profile.prof'], sorted(p.name for p in Path(self.tmp.name).iterdir()))
+        self.assertTrue(any(key[2] == 'busy' for key in pstats.Stats(str(profile_path)).stats))
+        summary = summary_path.read_text()
+        self.assertIn('Mode: deterministic', summary)
+        self.assertIn('test_profiling.py', summary)
+
+    def test_sampling(self):
+        profiler = self.run_profiled(ProfileMode.SAMPLING)
+        profile_path, summary_path = profiler.save(self.report_path)
+        self.assertEqual('Report.profile.folded', profile_path.name)
+        self.assertGreater(profiler.sampler.samples, 0)
+        own, total = profiler.sampler.functions()
+        self.assertIn('test_profiling.py:busy', total)
+        for line in profile_path.read_text().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+        self.assertIn('Hottest stacks', summary_path.read_text())
+
+    def test_observers_and_loop_lag(self):
+        profiler = self.run_profiled(ProfileMode.SAMPLING)
+        self.assertEqual(3, len(profiler.observer_secs['slow']))
+        self.assertEqual(3, len(profiler.observer_secs['other']))
+        self.assertGreaterEqual(min(profiler.observer_secs['slow']), 0.009)
+        self.assertGreater(len(profiler.loop_lags), 0)
+        self.assertGreaterEqual(max(profiler.loop_lags), 0.02)
+        self.assertGreaterEqual(profiler.wall_secs, 0.2)
+
+    def test_none_is_rejected(self):
+        with self.assertRaises(ValueError):
+            RunProfiler(ProfileMode.NONE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# Unit tests for the "rate_limiter" module.
+
+import asyncio
+import unittest
+
+from mcp_agent.workflows.llm.augmented_llm import RequestParams
+
+from dra.common.rate_limiter import (
+    TokenBucket, ModelRateLimiter, RateLimiters, rate_limited, usage_tokens
+)
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self) -> float:
+        return self.now
+
+class FakeLLM():
+    """Stands in for an `AugmentedLLM` class."""
+    def __init__(self, model: str | None = None):
+        self.model = model
+        self.calls = []
+    def get_request_params(self, request_params: RequestParams | None) -> RequestParams:
+        return request_params if request_params else RequestParams(model=self.model)
+    async def generate(self, message, request_params=None):
+        self.calls.append(('generate', message))
+        return [message]
+    async def generate_str(self, message, request_params=None):
+        return str(await self.generate(message, request_params))
+    async def generate_structured(self, message, response_model, request_params=None):
+        self.calls.append(('generate_structured', message))
+        return response_model(message)
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Test the TokenBucket.
+    """
+
+    def test_rate_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+    def test_bucket_starts_full_and_refills_at_the_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)  # one per second
+        self.assertEqual(0.0, bucket.wait_time(60))
+        bucket.take(60)
+        self.assertAlmostEqual(2.0, bucket.wait_time(2))
+        clock.now = 1.0
+        self.assertAlmostEqual(1.0, bucket.wait_time(2))
+        clock.now = 1000.0
+        self.assertEqual(0.0, bucket.wait_time(60))
+        self.assertEqual(60, bucket.level)  # capped at the capacity
+
+    def test_amounts_over_the_capacity_are_capped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+        self.assertEqual(0.0, bucket.wait_time(1000))
+
+    def test_take_can_go_negative(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+        bucket.take(90)
+        self.assertAlmostEqual(31.0, bucket.wait_time(1))
+
+class TestRateLimiters(unittest.TestCase):
+    """
+    Test the ModelRateLimiter, the RateLimiters registry, and the `rate_limited` wrapper.
+    """
+
+    def setUp(self):
+        self.limiters = RateLimiters()
+        self.limiters.configure({
+            'anthropic': {
+                'requests_per_minute': 600,
+                'tokens_per_minute': 6000,
+                'models': {'fast': {'requests_per_minute': 1200}}},
+        })
+
+    def test_get_returns_none_for_providers_without_limits(self):
+        self.assertIsNone(self.limiters.get('openai', 'gpt'))
+        self.assertFalse(self.limiters.has_limits('openai'))
+
+    def test_get_uses_model_limits_and_provider_defaults(self):
+        fast = self.limiters.get('anthropic', 'fast')
+        self.assertEqual((1200, 6000), (fast.requests_per_minute, fast.tokens_per_minute))
+        other = self.limiters.get('anthropic', 'other')
+        self.assertEqual((600, 6000), (other.requests_per_minute, other.tokens_per_minute))
+        self.assertIs(other, self.limiters.get('anthropic', 'other'))
+        self.assertEqual(RateLimiters.default_model, self.limiters.get('anthropic', None).model)
+        self.assertEqual(3, len(self.limiters.all()))
+
+    def test_configure_replaces_the_limiters(self):
+        limiter = self.limiters.get('anthropic', 'other')
+        self.limiters.configure({'anthropic': {'requests_per_minute': 1}})
+        self.assertIsNot(limiter, self.limiters.get('anthropic', 'other'))
+        with self.assertRaises(ValueError):
+            self.limiters.configure({'anthropic': 10})
+
+    def test_acquire_waits_for_the_buckets(self):
+        """
+        Verify that calls beyond the burst capacity wait and the wait time is recorded.
+        """
+        limiter = ModelRateLimiter('p', 'm', requests_per_minute=600)  # 10 per second
+        async def run():
+            for _ in range(602):
+                await limiter.acquire()
+        asyncio.run(run())
+        self.assertEqual(602, limiter.request_count)
+        self.assertGreater(limiter.total_wait_secs, 0.1)
+        self.assertGreater(limiter.max_wait_secs, 0.05)
+        self.assertLess(limiter.max_wait_secs, 1.0)
+
+    def test_adjust_charges_the_actual_usage(self):
+        clock = FakeClock()
+        limiter = ModelRateLimiter('p', 'm', tokens_per_minute=60, clock=clock)
+        asyncio.run(limiter.acquire(10))
+        limiter.adjust(10, 70)
+        self.assertEqual(70, limiter.token_count)
+        self.assertAlmostEqual(-10, limiter.tokens.level)
+
+    def test_rate_limited_counts_each_call_once(self):
+        """
+        Verify that the wrapped class acquires once per call, even for nested calls,
+        and uses the requested model's limiter.
+        """
+        llm = rate_limited(FakeLLM, 'anthropic', self.limiters)('fast')
+        self.assertEqual('RateLimitedFakeLLM', type(llm).__name__)
+        async def run():
+            await llm.generate('x' * 40)
+            await llm.generate_str('y')
+            await llm.generate_structured('z', str, request_params=RequestParams(model='other'))
+        asyncio.run(run())
+        self.assertEqual(2, self.limiters.get('anthropic', 'fast').request_count)
+        self.assertEqual(10, self.limiters.get('anthropic', 'fast').token_count)
+        self.assertEqual(1, self.limiters.get('anthropic', 'other').request_count)
+        self.assertEqual(['generate', 'generate', 'generate_structured'], [c[0] for c in llm.calls])
+
+    def test_usage_tokens(self):
+        class Usage():
+            def __init__(self, **kwargs):
+                self.__dict__.update(kwargs)
+        class Response():
+            def __init__(self, usage):
+                self.usage = usage
+        self.assertIsNone(usage_tokens(['no usage']))
+        self.assertEqual(10, usage_tokens([Response(Usage(input_tokens=3, output_tokens=4)),
+            Response(Usage(prompt_tokens=1, completion_tokens=2))]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# Unit tests for the "replay" module.
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pydantic import BaseModel
+
+from dra.common import replay
+from dra.common.replay import FixtureKind, LLMFixture, LLMFixtures, recording, replaying
+
+class Answer(BaseModel):
+    value: int
+
+class FakeLLM():
+    """Stands in for an `AugmentedLLM` class."""
+    def __init__(self, name: str = 'agent'):
+        self.name = name
+        self.context = None
+    def get_request_params(self, request_params):
+        return request_params
+    async def generate(self, message, request_params=None):
+        return [f"reply to {message}"]
+    async def generate_structured(self, message, response_model, request_params=None):
+        return response_model(value=len(message))
+
+class TestReplay(unittest.TestCase):
+    """
+    Test recording and replaying LLM fixtures.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "fixtures.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_next_cycles_each_group(self):
+        fixtures = LLMFixtures([
+            LLMFixture(FixtureKind.TEXT, 'a'),
+            LLMFixture(FixtureKind.STRUCTURED, {'value': 1}, response_model='Answer'),
+            LLMFixture(FixtureKind.TEXT, 'b'),
+        ])
+        self.assertEqual(['a', 'b', 'a'], [fixtures.next(FixtureKind.TEXT).content for _ in range(3)])
+        self.assertEqual({'value': 1}, fixtures.next(FixtureKind.STRUCTURED, 'Answer').content)
+        fixtures.reset()
+        self.assertEqual('a', fixtures.next(FixtureKind.TEXT).content)
+        with self.assertRaises(ValueError):
+            fixtures.next(FixtureKind.STRUCTURED, 'Plan')
+
+    def test_load_rejects_bad_lines(self):
+        self.path.write_text('{"kind": "text"}\n')
+        with self.assertRaises(ValueError):
+            LLMFixtures.load(self.path)
+        self.path.write_text('not json\n')
+        with self.assertRaises(ValueError):
+            LLMFixtures.load(self.path)
+
+    def test_compressed_fixtures(self):
+        path = Path(self.tmp.name) / "fixtures.jsonl.gz"
+        LLMFixtures.append(path, LLMFixture(FixtureKind.TEXT, 'a'))
+        LLMFixtures.append(path, LLMFixture(FixtureKind.TEXT, 'b'))
+        self.assertEqual(b'\x1f\x8b', path.read_bytes()[:2])
+        self.assertEqual(['a', 'b'], [f.content for f in LLMFixtures.load(path).fixtures])
+
+    def test_recorded_calls_replay(self):
+        """
+        Verify that the fixtures recorded for a run answer the same calls when replayed.
+        """
+        llm = recording(FakeLLM, self.path)()
+        self.assertEqual('RecordingFakeLLM', type(llm).__name__)
+        async def record():
+            await llm.generate('hello')
+            await llm.generate_structured('four', Answer)
+        asyncio.run(record())
+
+        fixtures = LLMFixtures.load(self.path)
+        self.assertEqual(2, len(fixtures))
+        self.assertEqual(('agent', 'reply to hello'), (fixtures.fixtures[0].agent, fixtures.fixtures[0].content))
+        self.assertEqual(('Answer', {'value': 4}), (fixtures.fixtures[1].response_model, fixtures.fixtures[1].content))
+
+        replay = replaying(fixtures, 'openai', time_scale=0)()
+        async def run():
+            return (await replay.generate_str('anything'), await replay.generate_structured('x', Answer))
+        text, answer = asyncio.run(run())
+        self.assertEqual('reply to hello', text)
+        self.assertEqual(Answer(value=4), answer)
+
+    def test_recording_writes_off_the_event_loop(self):
+        write_compressed = replay.write_compressed
+        threads = []
+        def write_and_note_thread(*args, **kwargs):
+            threads.append(threading.get_ident())
+            write_compressed(*args, **kwargs)
+        llm = recording(FakeLLM, self.path)()
+        async def record() -> int:
+            await llm.generate('hello')
+            return threading.get_ident()
+        with patch('dra.common.replay.write_compressed', side_effect=write_and_note_thread):
+            loop_thread = asyncio.run(record())
+        self.assertEqual(1, len(threads))
+        self.assertNotEqual(loop_thread, threads[0])
+        self.assertEqual(['reply to hello'], [f.content for f in LLMFixtures.load(self.path).fixtures])
+
+if __name__ == "__main__":
+    unittest.main()
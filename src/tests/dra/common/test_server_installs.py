@@ -0,0 +1,135 @@
+# Unit tests for the "server_installs" module.
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from dra.common.server_installs import Launcher, LaunchSpec, ServerInstalls
+
+class FakeInstaller():
+    """
+    Stands in for `uv` and `npm`, creating the executables they would install and
+    recording the commands run.
+    """
+
+    def __init__(self, python_versions: dict[str, str], npm_versions: dict[str, str]):
+        self.python_versions = python_versions
+        self.npm_versions = npm_versions
+        self.commands: list[list[str]] = []
+
+    def __call__(self, argv: list[str], input: str | None = None) -> str:
+        self.commands.append(argv)
+        match argv[:3]:
+            case ['uv', 'pip', 'compile']:
+                package = input.split('==')[0]
+                version = input.split('==')[1] if '==' in input else self.python_versions[package]
+                return f"anyio==4.9.0\n{package.replace('-', '_')}=={version}\n"
+            case ['uv', 'venv', '--quiet']:
+                Path(argv[3], 'bin').mkdir(parents=True)
+            case ['uv', 'pip', 'install']:
+                env_dir = Path(argv[argv.index('--python') + 1])
+                package = env_dir.name.rsplit('-', 1)[0]
+                (env_dir / 'bin' / package).touch()
+            case ['npm', 'view', _]:
+                package, version = argv[2].rsplit('@', 1)
+                return json.dumps(self.npm_versions[package] if version == 'latest' else version)
+            case ['npm', 'install', '--prefix']:
+                prefix = Path(argv[3])
+                package = argv[-1].rsplit('@', 1)[0]
+                package_dir = prefix / 'node_modules' / package
+                package_dir.mkdir(parents=True)
+                name = package.split('/')[-1]
+                (package_dir / 'package.json').write_text(json.dumps({'name': package, 'bin': {name: 'dist/index.js'}}))
+                (prefix / 'node_modules' / '.bin').mkdir()
+                (prefix / 'node_modules' / '.bin' / name).touch()
+        return ''
+
+class TestServerInstalls(unittest.TestCase):
+    """
+    Test parsing launch commands and installing and using pinned MCP servers.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name) / 'mcp-servers'
+        self.installer = FakeInstaller({'yfmcp': '0.3.1', 'mcp-server-fetch': '2025.4.7'},
+            {'@modelcontextprotocol/server-filesystem': '2025.8.21'})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_launch_commands(self):
+        spec = LaunchSpec.parse('uvx', ['yfmcp@latest'])
+        self.assertEqual((Launcher.UVX, 'yfmcp', '', 'yfmcp', []),
+            (spec.launcher, spec.package, spec.version, spec.executable, spec.args))
+        spec = LaunchSpec.parse('uvx', ['excel-mcp-server==0.1.7', 'stdio'])
+        self.assertEqual(('excel-mcp-server', '0.1.7', ['stdio']), (spec.package, spec.version, spec.args))
+        spec = LaunchSpec.parse('uvx', ['--from', 'mcp-server-git@1.0', 'mcp-git', '--repo', '.'])
+        self.assertEqual(('mcp-server-git', '1.0', 'mcp-git', ['--repo', '.']),
+            (spec.package, spec.version, spec.executable, spec.args))
+        spec = LaunchSpec.parse('npx', ['-y', '@modelcontextprotocol/server-filesystem', '..'])
+        self.assertEqual((Launcher.NPX, '@modelcontextprotocol/server-filesystem', '', ['..']),
+            (spec.launcher, spec.package, spec.version, spec.args))
+        spec = LaunchSpec.parse('npx', ['-y', 'mcp-remote@0.1.29', 'https://example.com/mcp'])
+        self.assertEqual(('mcp-remote', '0.1.29', ['https://example.com/mcp']), (spec.package, spec.version, spec.args))
+        self.assertIsNone(LaunchSpec.parse('node', ['/opt/medical-mcp/build/index.js']))
+        with self.assertRaises(ValueError):
+            LaunchSpec.parse('uvx', ['--with', 'pandas', 'yfmcp'])
+        with self.assertRaises(ValueError):
+            LaunchSpec.parse('npx', ['-y'])
+
+    def test_python_and_index_options_are_passed_to_uv(self):
+        args = ['--python', '3.12', '--index-url', 'https://pypi.example.com/simple',
+            '--extra-index-url', 'https://a.example.com', '--extra-index-url', 'https://b.example.com', 'yfmcp']
+        spec = LaunchSpec.parse('uvx', args)
+        index_args = args[2:-1]
+        self.assertEqual(('yfmcp', '3.12', index_args), (spec.package, spec.python, spec.index_args))
+        self.assertEqual('3.11', LaunchSpec.parse('uvx', ['-p', '3.11', 'yfmcp']).python)
+        ServerInstalls(self.dir, run=self.installer).install('yfmcp', 'uvx', args)
+        compile, venv, install = self.installer.commands
+        self.assertEqual(['--python', '3.12'] + index_args, compile[-8:])
+        self.assertEqual(['--python', '3.12'], venv[-2:])
+        self.assertEqual(index_args, install[-6:])
+
+    def test_install_and_rewrite(self):
+        installs = ServerInstalls(self.dir, run=self.installer)
+        yfmcp = installs.install('yfmcp', 'uvx', ['yfmcp@latest'])
+        self.assertEqual('0.3.1', yfmcp.version)
+        self.assertEqual(str(self.dir / 'python' / 'yfmcp-0.3.1' / 'bin' / 'yfmcp'), yfmcp.command)
+        self.assertIn('yfmcp==0.3.1', (self.dir / 'python' / 'yfmcp-0.3.1' / 'requirements.txt').read_text())
+        filesystem = installs.install('filesystem', 'npx', ['-y', '@modelcontextprotocol/server-filesystem', '..'])
+        self.assertEqual('2025.8.21', filesystem.version)
+        self.assertEqual(str(self.dir / 'node' / 'modelcontextprotocol+server-filesystem-2025.8.21' /
+            'node_modules' / '.bin' / 'server-filesystem'), filesystem.command)
+        self.assertIsNone(installs.install('medical-mcp', 'node', ['index.js']))
+
+        # A config whose filesystem launch command changed keeps it.
+        servers = {
+            'yfmcp': SimpleNamespace(command='uvx', args=['yfmcp@latest']),
+            'filesystem': SimpleNamespace(command='npx', args=['-y', '@modelcontextprotocol/server-filesystem', '/tmp']),
+            'medical-mcp': SimpleNamespace(command='node', args=['index.js']),
+        }
+        rewritten = ServerInstalls(self.dir).rewrite(servers)
+        self.assertEqual(['yfmcp'], [s.name for s in rewritten])
+        self.assertEqual((yfmcp.command, []), (servers['yfmcp'].command, servers['yfmcp'].args))
+        self.assertEqual('npx', servers['filesystem'].command)
+        self.assertEqual('node', servers['medical-mcp'].command)
+
+    def test_installed_versions_stay_pinned(self):
+        installs = ServerInstalls(self.dir, run=self.installer)
+        installs.install('fetch', 'uvx', ['mcp-server-fetch'])
+        commands = len(self.installer.commands)
+        self.installer.python_versions['mcp-server-fetch'] = '2025.9.1'
+        self.assertEqual('2025.4.7', installs.install('fetch', 'uvx', ['mcp-server-fetch']).version)
+        self.assertEqual(commands, len(self.installer.commands))  # Already installed.
+
+        # Reinstalling a removed environment keeps the pinned version.
+        Path(installs.servers['fetch'].command).unlink()
+        self.assertEqual('2025.4.7', installs.install('fetch', 'uvx', ['mcp-server-fetch']).version)
+        self.assertEqual('2025.9.1', installs.install('fetch', 'uvx', ['mcp-server-fetch'], upgrade=True).version)
+        self.assertEqual('2025.9.1', ServerInstalls(self.dir).servers['fetch'].version)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# Unit tests for the "server_startup" module.
+
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+
+from dra.common.server_startup import ServerStarter, ServerStatus
+
+class FakeConnectionManager():
+    """Stands in for mcp_agent's `MCPConnectionManager`, with a startup delay or error per server."""
+
+    def __init__(self, delays: dict[str, float], errors: dict[str, Exception] = {}):
+        self.delays = delays
+        self.errors = errors
+        self.entered = 0
+        self.closed = 0
+        self.disconnected: list[str] = []
+
+    async def __aenter__(self):
+        self.entered += 1
+        return self
+
+    async def get_server(self, name: str):
+        await asyncio.sleep(self.delays.get(name, 0.0))
+        if name in self.errors:
+            raise self.errors[name]
+        return SimpleNamespace(name=name)
+
+    async def disconnect_server(self, name: str):
+        self.disconnected.append(name)
+
+    async def close(self):
+        self.closed += 1
+
+class TestServerStartup(unittest.TestCase):
+    """
+    Test starting the MCP servers in parallel with a `ServerStarter`.
+    """
+
+    def starter(self, context: SimpleNamespace, manager: FakeConnectionManager, names: list[str],
+        timeout_secs: float = 5.0) -> ServerStarter:
+        return ServerStarter(context, names, timeout_secs=timeout_secs, make_connection_manager=lambda _: manager)
+
+    def test_servers_start_in_parallel(self):
+        manager = FakeConnectionManager({'fetch': 0.2, 'filesystem': 0.2, 'excel_writer': 0.2})
+        starter = self.starter(SimpleNamespace(), manager, ['fetch', 'filesystem', 'excel_writer', 'fetch'])
+        start = time.perf_counter()
+        startups = asyncio.run(starter.start())
+        elapsed = time.perf_counter() - start
+        self.assertEqual(['fetch', 'filesystem', 'excel_writer'], [s.name for s in startups])
+        self.assertTrue(all(s.status == ServerStatus.READY for s in startups))
+        self.assertTrue(all(s.secs >= 0.19 for s in startups))
+        # Started one by one, they would take 0.6 seconds.
+        self.assertLess(elapsed, 0.45)
+        self.assertLess(starter.wall_secs, 0.45)
+        self.assertEqual([], starter.failed)
+
+    def test_failures_and_timeouts(self):
+        manager = FakeConnectionManager({'slow': 5.0, 'fetch': 0.0},
+            errors={'broken': RuntimeError("uvx: command not found")})
+        starter = self.starter(SimpleNamespace(), manager, ['fetch', 'broken', 'slow'], timeout_secs=0.1)
+        startups = dict((s.name, s) for s in asyncio.run(starter.start()))
+        self.assertEqual(ServerStatus.READY, startups['fetch'].status)
+        self.assertEqual(ServerStatus.FAILED, startups['broken'].status)
+        self.assertEqual("uvx: command not found", startups['broken'].error)
+        self.assertEqual(ServerStatus.TIMED_OUT, startups['slow'].status)
+        self.assertLess(startups['slow'].secs, 1.0)
+        self.assertEqual(['slow'], manager.disconnected)
+        self.assertEqual(['broken', 'slow'], [s.name for s in starter.failed])
+        message = starter.failure_message()
+        self.assertIn("broken (failed: uvx: command not found)", message)
+        self.assertIn("slow (timed out:", message)
+        self.assertIn("--mcp-startup-timeout-secs 0", message)
+
+    def test_shares_the_connection_manager_with_the_agents(self):
+        context = SimpleNamespace()
+        manager = FakeConnectionManager({})
+        starter = self.starter(context, manager, ['fetch'])
+
+        async def run():
+            await starter.start()
+            self.assertIs(manager, context._mcp_connection_manager)
+            self.assertEqual(1, context._mcp_connection_manager_ref_count)
+            # An agent's aggregator takes and releases its own reference.
+            context._mcp_connection_manager_ref_count += 1
+            context._mcp_connection_manager_ref_count -= 1
+            await starter.stop()
+            await starter.stop()  # Does nothing the second time.
+
+        asyncio.run(run())
+        self.assertEqual(1, manager.entered)
+        self.assertEqual(1, manager.closed)
+        self.assertEqual(0, context._mcp_connection_manager_ref_count)
+        self.assertFalse(hasattr(context, '_mcp_connection_manager'))
+
+    def test_reuses_an_existing_connection_manager(self):
+        existing = FakeConnectionManager({})
+        context = SimpleNamespace(_mcp_connection_manager=existing, _mcp_connection_manager_ref_count=1)
+        starter = self.starter(context, FakeConnectionManager({}), ['fetch'])
+
+        async def run():
+            context._mcp_connection_manager_lock = asyncio.Lock()
+            await starter.start()
+            self.assertEqual(2, context._mcp_connection_manager_ref_count)
+            await starter.stop()
+
+        asyncio.run(run())
+        self.assertIs(existing, starter.context._mcp_connection_manager)
+        self.assertEqual(1, context._mcp_connection_manager_ref_count)
+        self.assertEqual(0, existing.entered)
+        self.assertEqual(0, existing.closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# Unit tests for the "tasks" module using Hypothesis for property-based testing.
+# https://hypothesis.readthedocs.io/en/latest/
+
+from hypothesis import given, strategies as st
+import asyncio
+import unittest
+import io
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from dra.common.tasks import AgentTask, GenerateTask, LocalAgentTask, TaskResult, TaskStatus
+from dra.common.utils.strings import truncate
+
+class TestTaskResult(unittest.TestCase):
+    """
+    Test the TaskResult class.
+    """
+
+    messages = st.lists(st.one_of(st.text(), st.integers(), st.dictionaries(st.text(), st.floats())), max_size=10)
+
+    @given(messages)
+    def test_str_is_the_same_as_for_a_list(self, messages: list[any]):
+        """
+        Verify that `str(result)` is the same as `str()` of the list of messages.
+        """
+        result = TaskResult(messages)
+        self.assertEqual(str(messages), str(result))
+        self.assertEqual(str(messages), f"{result}")
+        self.assertEqual(len(messages), len(result))
+        self.assertEqual(bool(messages), bool(result))
+        self.assertEqual(messages, list(result))
+        self.assertEqual(result, messages)
+
+    @given(messages, st.integers(min_value=0, max_value=300))
+    def test_prefix_and_truncated_match_the_full_string(self, messages: list[any], n: int):
+        """
+        Verify that `prefix()` and `truncated()` match slicing and truncating the full string,
+        before and after the full string is computed and cached.
+        """
+        result = TaskResult(messages)
+        for _ in range(2):
+            self.assertEqual(str(messages)[:n], result.prefix(n))
+            self.assertEqual(truncate(str(messages), n, '...'), result.truncated(n, '...'))
+            str(result)
+
+    @given(messages)
+    def test_write_to_writes_each_message_followed_by_a_separator(self, messages: list[any]):
+        """
+        Verify that `write_to()` writes `str()` of each message followed by the separator.
+        """
+        stream = TaskResult(messages).write_to(io.StringIO())
+        self.assertEqual(''.join([f"{m}\n\n" for m in messages]), stream.getvalue())
+
+    def test_none_is_an_empty_result(self):
+        self.assertEqual(0, len(TaskResult(None)))
+        self.assertEqual('[]', str(TaskResult(None)))
+
+class TestBaseTask(unittest.TestCase):
+    """
+    Test how BaseTask.run() handles what _run() returns.
+    """
+
+    def test_a_run_that_returns_none_finishes_with_an_error(self):
+        errors = []
+        logger = SimpleNamespace(info=lambda *args, **kwargs: None, error=lambda message, **kwargs: errors.append(message))
+        task = GenerateTask(name='summary', title='Summary', model_name='gpt-4o',
+            prompt_template_path=Path('summary.md'), output_dir_path=Path('output'), properties={})
+        with patch.object(GenerateTask, 'prepare_prompt'), \
+             patch.object(GenerateTask, '_run', AsyncMock(return_value=None)):
+            status, result = asyncio.run(task.run(None, logger))
+        self.assertEqual(TaskStatus.FINISHED_ERROR, status)
+        self.assertEqual(["No result for task summary!"], list(result))
+        self.assertEqual(1, len(errors))
+
+class TestLocalAgentTask(unittest.TestCase):
+    """
+    Test that a LocalAgentTask only runs its agent when it can't do the work locally.
+    """
+
+    def make_task(self, local_result: list[any] | None) -> LocalAgentTask:
+        return LocalAgentTask(name='excel_writer', title='Excel', model_name='o4-mini',
+            prompt_template_path=Path('excel_writer_agent.md'), output_dir_path=Path('output'),
+            generate_prompt='Generate it.', run_locally=lambda: local_result, properties={})
+
+    def test_runs_locally_or_falls_back_to_the_agent(self):
+        logger = SimpleNamespace(info=lambda *args, **kwargs: None)
+        with patch.object(AgentTask, '_run', AsyncMock(return_value=['from the agent'])) as agent_run:
+            task = self.make_task(['written locally'])
+            self.assertEqual(['written locally'], asyncio.run(task._run(None, logger)))
+            self.assertTrue(task.ran_locally)
+            agent_run.assert_not_called()
+
+            task = self.make_task(None)
+            self.assertEqual(['from the agent'], asyncio.run(task._run(None, logger)))
+            self.assertFalse(task.ran_locally)
+            agent_run.assert_called_once()
+
+    def test_falls_back_to_the_agent_when_running_locally_raises(self):
+        errors = []
+        logger = SimpleNamespace(info=lambda *args, **kwargs: None, error=lambda message, **kwargs: errors.append(message))
+        def fail():
+            raise KeyError('revenue')
+        with patch.object(AgentTask, '_run', AsyncMock(return_value=['from the agent'])) as agent_run:
+            task = self.make_task(None)
+            task.run_locally = fail
+            self.assertEqual(['from the agent'], asyncio.run(task._run(None, logger)))
+            self.assertFalse(task.ran_locally)
+            agent_run.assert_called_once()
+        self.assertEqual(1, len(errors))
+        self.assertIn("KeyError: 'revenue'", errors[0])
+        self.assertIn('Traceback', errors[0])
+
+if __name__ == "__main__":
+    unittest.main()
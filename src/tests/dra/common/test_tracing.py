@@ -0,0 +1,144 @@
+# Unit tests for the "tracing" module.
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from dra.common.tracing import (
+    configure_tracing,
+    flush_tracing,
+    shutdown_tracing,
+    span,
+    trace_steps,
+    traced,
+    tracing_enabled,
+)
+from dra.common.utils.compression import open_text
+
+class FakeLLM():
+    """Stands in for an `AugmentedLLM` class."""
+    def __init__(self, name: str = 'agent'):
+        self.name = name
+        self.context = None
+    def get_request_params(self, request_params):
+        return request_params
+    async def generate(self, message, request_params=None):
+        return [f"reply to {message}"]
+    async def generate_structured(self, message, response_model, request_params=None):
+        return response_model()
+    async def call_tool(self, request, tool_call_id=None):
+        return SimpleNamespace(isError=request.params.name == 'broken')
+
+class FakeExecutor():
+    async def execute_step(self, step, request_params, executor=None):
+        return all([(await self.execute_task(task, request_params)).status == 'completed' for task in step.tasks])
+    async def execute_task(self, task, request_params):
+        return SimpleNamespace(status='completed')
+
+class FakeOrchestrator():
+    def __init__(self):
+        self.task_executor = None
+    def _initialize_execution_components(self, objective):
+        self.task_executor = FakeExecutor()
+
+def tool_request(name: str) -> SimpleNamespace:
+    return SimpleNamespace(params=SimpleNamespace(name=name))
+
+class TestTracing(unittest.TestCase):
+    """
+    Test the spans and their OTLP-JSON export.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "traces.jsonl"
+
+    def tearDown(self):
+        shutdown_tracing()
+        self.tmp.cleanup()
+
+    def read_spans(self, path: Path = None) -> dict[str, dict[str,any]]:
+        """The exported spans by name, with their attributes as a plain dict."""
+        self.assertTrue(flush_tracing())
+        spans = {}
+        with open_text(path or self.path) as stream:
+            lines = stream.read().splitlines()
+        for line in lines:
+            for resource_spans in json.loads(line)['resourceSpans']:
+                for scope_spans in resource_spans['scopeSpans']:
+                    for s in scope_spans['spans']:
+                        s['attributes'] = dict((a['key'], next(iter(a['value'].values()))) for a in s.get('attributes', []))
+                        spans[s['name']] = s
+        return spans
+
+    def test_spans_are_no_ops_when_disabled(self):
+        self.assertFalse(tracing_enabled())
+        with span('nothing', a=1) as current:
+            self.assertIsNone(current)
+        self.assertFalse(self.path.exists())
+
+    def test_nested_spans_are_exported_as_otlp_json(self):
+        configure_tracing(self.path)
+        self.assertTrue(tracing_enabled())
+        with span('parent', task='t1', skipped=None):
+            with span('child', tokens=3):
+                pass
+        spans = self.read_spans()
+        parent, child = spans['parent'], spans['child']
+        self.assertEqual(32, len(parent['traceId']))
+        self.assertEqual(16, len(parent['spanId']))
+        self.assertEqual(parent['traceId'], child['traceId'])
+        self.assertEqual(parent['spanId'], child['parentSpanId'])
+        self.assertNotIn('parentSpanId', parent)
+        self.assertEqual({'task': 't1'}, parent['attributes'])
+        self.assertEqual({'tokens': '3'}, child['attributes'])  # OTLP JSON encodes int64 as strings.
+        self.assertEqual(1, parent['kind'])
+
+    def test_compressed_traces(self):
+        path = Path(self.tmp.name) / "traces.jsonl.gz"
+        configure_tracing(path)
+        with span('compressed'):
+            pass
+        self.assertIn('compressed', self.read_spans(path))
+        self.assertEqual(b'\x1f\x8b', path.read_bytes()[:2])
+
+    def test_traced_llm_calls_and_tool_calls(self):
+        configure_tracing(self.path)
+        llm = traced(FakeLLM, 'openai')('researcher')
+        self.assertEqual('TracedFakeLLM', type(llm).__name__)
+        async def run():
+            with span('task'):
+                await llm.generate('hello')
+                await llm.generate_structured('hello', dict)
+                await llm.call_tool(tool_request('fetch'), tool_call_id='call_1')
+                await llm.call_tool(tool_request('broken'))
+        asyncio.run(run())
+        spans = self.read_spans()
+        self.assertEqual(spans['task']['spanId'], spans['llm.generate']['parentSpanId'])
+        self.assertEqual({'gen_ai.system': 'openai', 'gen_ai.agent.name': 'researcher',
+            'gen_ai.usage.input_tokens': '0', 'gen_ai.usage.output_tokens': '0', 'dra.cost_dollars': 0.0},
+            spans['llm.generate']['attributes'])
+        self.assertEqual('dict', spans['llm.generate_structured']['attributes']['dra.response_model'])
+        tool = spans['mcp.call_tool']
+        self.assertEqual('broken', tool['attributes']['gen_ai.tool.name'])
+        self.assertEqual(2, tool['status']['code'])  # The last call, to the broken tool, failed.
+
+    def test_trace_steps(self):
+        configure_tracing(self.path)
+        orchestrator = FakeOrchestrator()
+        trace_steps(orchestrator)
+        orchestrator._initialize_execution_components('objective')
+        step = SimpleNamespace(description='Gather', tasks=[SimpleNamespace(name='income', agent=None)])
+        self.assertTrue(asyncio.run(orchestrator.task_executor.execute_step(step, None)))
+        spans = self.read_spans()
+        self.assertEqual({'dra.step': 'Gather', 'dra.step.tasks': '1', 'dra.step.succeeded': True},
+            spans['orchestrator.step']['attributes'])
+        self.assertEqual(spans['orchestrator.step']['spanId'], spans['orchestrator.task']['parentSpanId'])
+        self.assertEqual({'dra.task': 'income', 'dra.task.status': 'completed'},
+            spans['orchestrator.task']['attributes'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# Unit tests for the "compression" module using Hypothesis for property-based testing.
+# https://hypothesis.readthedocs.io/en/latest/
+
+from hypothesis import given, settings, strategies as st
+import unittest
+import tempfile
+from pathlib import Path
+
+from dra.common.output_writer import OutputWriter
+from dra.common.utils.compression import (
+    Compression,
+    compressed_path,
+    compressing_writer,
+    has_zstandard,
+    open_binary,
+    open_text,
+    write_compressed,
+)
+
+available = [c for c in Compression if c != Compression.ZSTD or has_zstandard()]
+
+class TestCompression(unittest.TestCase):
+    """
+    Test writing and transparently reading compressed artifacts.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes, compression: Compression) -> Path:
+        path = compressed_path(self.dir / name, compression)
+        with open(path, 'ab') as stream:
+            write_compressed(stream, data, compression)
+        return path
+
+    def read(self, path: Path) -> bytes:
+        with open_binary(path) as stream:
+            return stream.read()
+
+    @settings(max_examples=20)
+    @given(st.binary(max_size=5000), st.sampled_from(available))
+    def test_round_trip(self, data: bytes, compression: Compression):
+        path = self.write('round_trip.bin', data, compression)
+        try:
+            self.assertEqual(compression, Compression.of_path(path))
+            self.assertEqual(data, self.read(path))
+        finally:
+            path.unlink()
+
+    def test_appended_members_are_read_as_one_stream(self):
+        for compression in available:
+            path = self.write('log.jsonl', b'{"a": 1}\n', compression)
+            self.write('log.jsonl', b'{"b": 2}\n', compression)
+            self.assertEqual(b'{"a": 1}\n{"b": 2}\n', self.read(path), compression)
+
+    def test_uncompressed_data_with_a_magic_number(self):
+        for data in [b'\x28\xb5\x2f\xfd', b'\x1f\x8b\x08\x00']:
+            path = self.write('plain.bin', data, Compression.NONE)
+            self.assertEqual(data, self.read(path))
+            path.unlink()
+
+    def test_compressed_path(self):
+        self.assertEqual(Path('a/r.txt.gz'), compressed_path(Path('a/r.txt'), Compression.GZIP))
+        self.assertEqual(Path('a/r.txt.gz'), compressed_path(Path('a/r.txt.gz'), Compression.GZIP))
+        self.assertEqual(Path('a/r.txt'), compressed_path(Path('a/r.txt'), Compression.NONE))
+
+    def test_compressing_writer_streams_chunks(self):
+        chunks = [f"chunk {i}\n".encode('utf-8') for i in range(1000)]
+        for compression in available:
+            path = compressed_path(self.dir / 'streamed.txt', compression)
+            with open(path, 'wb') as stream:
+                with compressing_writer(stream, compression) as writer:
+                    for chunk in chunks:
+                        writer.write(chunk)
+                if compression != Compression.NONE:
+                    self.assertFalse(stream.closed)
+            self.assertEqual(b''.join(chunks), self.read(path), compression)
+
+    @unittest.skipIf(has_zstandard(), "the 'zstandard' package is installed")
+    def test_zstd_requires_zstandard(self):
+        with self.assertRaises(ValueError):
+            Compression.ZSTD.require_available()
+
+    def test_output_writer_compresses_by_suffix(self):
+        writer = OutputWriter()
+        path = self.dir / 'report.json.gz'
+        writer.write(path, '{"report": true}')
+        writer.close(timeout=5)
+        self.assertTrue(path.read_bytes().startswith(b'\x1f\x8b'))
+        with open_text(path) as stream:
+            self.assertEqual('{"report": true}', stream.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# Unit tests for the "fast_json" module using Hypothesis for property-based testing.
+# https://hypothesis.readthedocs.io/en/latest/
+
+from hypothesis import example, given, strategies as st
+import unittest
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from dra.common.utils.fast_json import (
+    loads,
+    loads_reply,
+    loads_values,
+    looks_like_json,
+)
+
+json_values = st.recursive(
+    st.none() | st.booleans() | st.integers() | st.floats(allow_nan=False, allow_infinity=False) | st.text(),
+    lambda children: st.lists(children, max_size=4) | st.dictionaries(st.text(), children, max_size=4),
+    max_leaves=20)
+
+class TestFastJson(unittest.TestCase):
+    """
+    Test the JSON parsing utilities.
+    """
+
+    @given(json_values)
+    @example({'': -9223372036854775809})
+    @example([2**64, 10**30])
+    def test_loads_parses_what_json_dumps_writes(self, value: any):
+        """
+        Verify that `loads` and `loads_reply` round trip values written by `json.dumps`.
+        """
+        s = json.dumps(value)
+        self.assertEqual(value, loads(s))
+        self.assertEqual(value, loads_reply(s))
+
+    def test_loads_leaves_integers_beyond_64_bits_to_json(self):
+        """
+        Verify that documents that may hold integers `orjson` can't represent exactly
+        are parsed with `json.loads`.
+        """
+        fake_orjson = SimpleNamespace(loads=lambda s: 'orjson')
+        with patch('dra.common.utils.fast_json.orjson', fake_orjson):
+            self.assertEqual('orjson', loads('{"a": 922337203685477580}'))
+            self.assertEqual({'': -9223372036854775809}, loads('{"": -9223372036854775809}'))
+            self.assertEqual([2**64], loads(b'[18446744073709551616]'))
+
+    def test_loads_reply_cleans_the_string_only_if_necessary(self):
+        """
+        Verify that `loads_reply` falls back to `clean_json_string` for invalid escapes.
+        """
+        # Valid JSON with an escaped backslash is parsed as is:
+        self.assertEqual({'a': 'x\\y'}, loads_reply(r'{"a": "x\\y"}'))
+        # Invalid JSON is parsed after removing the `\\` sequences:
+        self.assertEqual({'a': 1}, loads_reply(r'{"a": 1}\\'))
+        with self.assertRaises(ValueError):
+            loads_reply('{"a": ')
+
+    @given(st.text(), st.sampled_from(['{}', '[]', ' {"a": 1}\n', '[1, 2]']))
+    def test_looks_like_json(self, text: str, json_str: str):
+        """
+        Verify that `looks_like_json` accepts objects and arrays, ignoring surrounding whitespace.
+        """
+        self.assertTrue(looks_like_json(json_str))
+        self.assertEqual(
+            text.strip()[:1] + text.strip()[-1:] in ('{}', '[]'),
+            looks_like_json(text))
+
+    @given(st.lists(json_values, max_size=10))
+    def test_loads_values_parses_a_string_of_values(self, values: list[any]):
+        """
+        Verify that `loads_values` parses whitespace-separated values in a string.
+        """
+        self.assertEqual(values, loads_values('\n'.join([json.dumps(v) for v in values])))
+        with self.assertRaises(ValueError):
+            loads_values('{"a": 1} {"b": ')
+
+if __name__ == "__main__":
+    unittest.main()
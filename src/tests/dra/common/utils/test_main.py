@@ -0,0 +1,158 @@
+# Unit tests for the "main" module, which the apps use to define and process their arguments.
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+src_dir = Path(__file__).parents[4]
+
+# Packages that are slow to import, which aren't needed until a run starts.
+slow_packages = ['mcp_agent', 'openai', 'anthropic', 'ollama', 'rich']
+
+def run_app(app: str, *args: str) -> subprocess.CompletedProcess:
+    """Run the app's `main` in a new interpreter, then print the slow packages it imported."""
+    code = (f"import runpy, sys\nsys.argv = ['{app}', *{list(args)!r}]\n"
+        f"try:\n    runpy.run_module('dra.apps.{app}.main', run_name='__main__')\n"
+        f"finally:\n    print('imported:', *(p for p in {slow_packages!r} if p in sys.modules), file=sys.stderr)")
+    return subprocess.run([sys.executable, '-c', code], cwd=src_dir, capture_output=True, text=True, timeout=60)
+
+class TestMain(unittest.TestCase):
+    """
+    Test that the apps' `--help` and argument errors don't import the slow packages.
+    """
+
+    def imported(self, result: subprocess.CompletedProcess) -> list[str]:
+        return result.stderr.strip().splitlines()[-1].split()[1:]
+
+    def test_help(self):
+        for app in ['finance', 'medical']:
+            result = run_app(app, '--help')
+            self.assertEqual(0, result.returncode, result.stderr)
+            self.assertIn('--profile', result.stdout)
+            self.assertEqual([], self.imported(result))
+
+    def test_argument_error(self):
+        result = run_app('finance', '--provider', 'nope')
+        self.assertEqual(2, result.returncode)
+        self.assertIn('invalid choice', result.stderr)
+        self.assertEqual([], self.imported(result))
+
+class TestPersistentStores(unittest.TestCase):
+    """
+    Test that the databases kept across runs survive `make app-run` moving the output
+    directory aside before each run.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name) / 'output' / 'finance' / 'META'
+        self.cache_dir = Path(self.tmp.name) / 'output' / 'cache'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def process_arguments(self, *args: str) -> dict[str, any]:
+        """Process the finance app's arguments, as `make app-run` passes them, and return its variables."""
+        from dra.apps.finance import main as finance
+        argv = ['finance', '--ticker', 'META', '--company-name', 'Meta Platforms, Inc.',
+            '--report-title', 'META Report', '--templates-dir', str(src_dir / 'dra/apps/finance/templates'),
+            '--mcp-agent-config', str(src_dir / 'dra/apps/finance/config/mcp_agent.config.yaml'),
+            '--output-dir', str(self.output_dir), *args]
+        with patch.object(sys, 'argv', argv):
+            parser_util = finance.define_cli_arguments()
+            finance.process_cli_arguments(parser_util)
+        return finance.create_variables(parser_util)
+
+    def rotate_output_dir(self, n: int):
+        """What the Makefile's setup-output-dir target does before the next run."""
+        self.output_dir.rename(self.output_dir.with_name(f"META-save-{n}"))
+
+    def start_run(self) -> any:
+        """Start a finance run with its arguments and seed the memory."""
+        from mcp_agent.workflows.deep_orchestrator.memory import WorkspaceMemory
+        from dra.common.deep_research import DeepResearch
+        variables = self.process_arguments('--cache-dir', str(self.cache_dir))
+        research = DeepResearch(app_name='finance', provider='openai', config=None, tasks=[],
+            display=None, observers=None, variables=variables)
+        research.orchestrator = SimpleNamespace(memory=WorkspaceMemory(use_filesystem=False))
+        research.logger = SimpleNamespace(info=lambda *args, **kwargs: None, warning=lambda *args, **kwargs: None)
+        research.seed_knowledge()
+        return research
+
+    def test_a_later_run_loads_the_knowledge_saved_by_an_earlier_one(self):
+        from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem
+        first = self.start_run()
+        self.assertEqual([], first.orchestrator.memory.knowledge)
+        first.orchestrator.memory.add_knowledge(KnowledgeItem(key='ceo', value='Mark Zuckerberg',
+            source='financial_research', confidence=0.95, category='people'))
+        first.save_knowledge()
+        self.assertTrue(first.knowledge_store.path.is_relative_to(self.cache_dir))
+
+        self.rotate_output_dir(1)
+        second = self.start_run()
+        self.assertEqual([('ceo', 'Mark Zuckerberg')],
+            [(item.key, item.value) for item in second.orchestrator.memory.knowledge])
+
+    def test_the_financial_data_store_is_the_same_for_every_run(self):
+        paths = []
+        for n in range(2):
+            variables = self.process_arguments('--cache-dir', str(self.cache_dir))
+            paths.append(variables['financial_data_store_path'].value)
+            self.rotate_output_dir(n)
+        self.assertEqual(paths[0], paths[1])
+        self.assertEqual(self.cache_dir / 'financial_data.sqlite', paths[0])
+
+    def test_compaction_doesnt_erode_the_saved_knowledge(self):
+        """
+        Verify that items summarized or dropped by compacting the memory are saved in full.
+        """
+        from mcp_agent.workflows.deep_orchestrator.models import KnowledgeItem
+        from dra.common.memory_compaction import MemoryCompactor
+        first = self.start_run()
+        first.memory_compactor = MemoryCompactor(threshold_tokens=200, max_value_chars=50)
+        memory = first.orchestrator.memory
+        memory.add_knowledge(KnowledgeItem(key='history', value='h'*400,
+            source='financial_research', confidence=0.95, category='company'))
+        for n in range(10):
+            memory.add_knowledge(KnowledgeItem(key=f"note{n}", value='n'*80,
+                source='financial_research', confidence=0.8, category='company'))
+        first.memory_compactor.compact(memory)
+        self.assertEqual('h'*50 + '...', memory.knowledge[0].value)
+        self.assertLess(len(memory.knowledge), 11)
+        first.save_knowledge()
+
+        self.rotate_output_dir(1)
+        second = self.start_run()
+        loaded = {item.key: item.value for item in second.orchestrator.memory.knowledge}
+        self.assertEqual(11, len(loaded))
+        self.assertEqual('h'*400, loaded['history'])
+        self.assertEqual('n'*80, loaded['note0'])
+
+    def test_runs_append_to_the_ledger_the_cli_reads_by_default(self):
+        from dra.common.ledger import EntryKind, UsageLedger
+        from dra.tools import ledger as ledger_tool
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)  # The default cache directory is relative to the current directory.
+        try:
+            for n in range(2):
+                variables = self.process_arguments()
+                UsageLedger(variables['usage_ledger_path'].value, app='finance', entity='META').record(
+                    EntryKind.CALL, model='gpt-4o', cost=1.0)
+                self.rotate_output_dir(n)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(0, ledger_tool.main(['--group-by', 'entity']))
+        finally:
+            os.chdir(cwd)
+        row = next(line for line in out.getvalue().splitlines() if 'META' in line)
+        self.assertEqual(['META', '2', '0', '0', '2.0000'], [cell.strip() for cell in row.strip('|').split('|')][:5])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -136,6 +136,48 @@ class TestStringUtils(unittest.TestCase):
         actual_str = '\n'.join(actual)
         self.assertEqual(expected, actual, f"<\n{expected_str}\n> != <\n{actual_str}\n>")
 
+    def test_MarkdownUtil_to_markdown_handles_very_deep_nesting(self):
+        """
+        Verify that deeply-nested objects don't exceed the recursion limit.
+        """
+        depth = sys.getrecursionlimit() * 2
+        obj = 1
+        for _ in range(depth):
+            obj = {'k': obj}
+        actual = MarkdownUtil().to_markdown(obj, '*', ' ', '%s')
+        self.assertEqual(depth, len(actual))
+        self.assertEqual(f"{' '*depth}* k 1", actual[-1])
+
+    @given(st.integers(min_value=0, max_value=5))
+    def test_MarkdownUtil_max_depth_summarizes_deeper_objects(self, max_depth: int):
+        """
+        Verify that lists and dictionaries deeper than `max_depth` are summarized on one line.
+        """
+        obj = [1, 2]
+        for _ in range(6):
+            obj = {'k': obj}
+        mu = MarkdownUtil(max_depth=max_depth)
+        actual = mu.to_markdown(obj, '*', '-', '%s')
+        if max_depth == 0:
+            self.assertEqual(["* ... (1 items)"], actual)
+        else:
+            self.assertEqual(max_depth, len(actual))
+            self.assertEqual(f"{'-'*max_depth}* k ... ({2 if max_depth == 6 else 1} items)", actual[-1])
+
+    @given(st.lists(st.integers(), max_size=20), st.integers(min_value=0, max_value=20))
+    def test_MarkdownUtil_max_lines_truncates_the_output(self, values: list[int], max_lines: int):
+        """
+        Verify that at most `max_lines` lines are returned, followed by `...` if truncated.
+        """
+        mu = MarkdownUtil(max_lines=max_lines)
+        actual = mu.to_markdown(values, '*', '-', '%s')
+        expected = [f"-* {v}" for v in values]
+        if len(values) > max_lines:
+            self.assertEqual(expected[:max_lines] + ['...'], actual)
+        else:
+            self.assertEqual(expected, actual)
+        self.assertEqual(actual, list(mu.iter_markdown(values, '*', '-', '%s')))
+
     no_escape_text = st.text().filter(lambda s: s.find('\\') < 0)
 
     @given(
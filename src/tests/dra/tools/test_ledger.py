@@ -0,0 +1,55 @@
+# Unit tests for the "ledger" CLI tool.
+
+import contextlib
+import io
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dra.common.ledger import EntryKind, UsageLedger
+from dra.tools.ledger import main, parse_since
+
+class TestLedgerTool(unittest.TestCase):
+    """
+    Test the ledger aggregation CLI.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "ledger.sqlite"
+        ledger = UsageLedger(self.path, app='finance', entity='META')
+        ledger.record(EntryKind.CALL, model='cheap', cost=0.01)
+        ledger.record(EntryKind.CALL, model='pricey', cost=2.5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *args: str) -> tuple[int, str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = main(['--ledger', str(self.path)] + list(args))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_main_prints_the_most_expensive_first(self):
+        code, out, _ = self.run_main('--group-by', 'model')
+        self.assertEqual(0, code)
+        self.assertIn("Usage by model (call rows)", out)
+        self.assertLess(out.index('pricey'), out.index('cheap'))
+        self.assertIn('2.5000', out)
+
+    def test_main_reports_errors(self):
+        self.assertEqual(2, self.run_main('--order-by', 'nope')[0])
+        self.path.unlink()
+        code, _, err = self.run_main()
+        self.assertEqual(1, code)
+        self.assertIn("doesn't exist", err)
+
+    def test_parse_since(self):
+        self.assertAlmostEqual(
+            (datetime.now(timezone.utc) - timedelta(days=7)).timestamp(),
+            parse_since('7d').timestamp(), delta=5)
+        self.assertEqual(datetime(2025, 1, 2, tzinfo=timezone.utc), parse_since('2025-01-02'))
+
+if __name__ == "__main__":
+    unittest.main()
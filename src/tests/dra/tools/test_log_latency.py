@@ -0,0 +1,113 @@
+# Unit tests for the "log_latency" CLI tool.
+
+import contextlib
+import gzip
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from dra.tools.log_latency import LatencyReport, SpanBuilder, SpanCategory, main, percentile
+
+llm = 'mcp_agent.workflows.llm.augmented_llm_openai.Researcher'
+orchestrator = 'mcp_agent.workflows.deep_orchestrator.orchestrator'
+
+def record(second: float, message: str, namespace: str = orchestrator, **data) -> str:
+    entry = {'level': 'DEBUG', 'timestamp': f"2026-01-01T00:00:{second:09.6f}", 'namespace': namespace, 'message': message}
+    if data:
+        entry['data'] = {'data': data}
+    return json.dumps(entry)
+
+# One run: planning, a step with one LLM call that calls a tool, then a second LLM call.
+run_lines = [
+    record(0.0, "Phase 1: Creating initial plan"),
+    record(2.0, "Created valid plan: 1 steps, reasoning: ..."),
+    record(2.0, "Executing step: Research (1 tasks)"),
+    record(2.5, "Chat in progress", llm, model='gpt-4o', agent_name='Researcher'),
+    record(4.5, "OpenAI ChatCompletion response:", llm),
+    record(4.5, "Requesting tool call", 'mcp_agent.mcp.mcp_aggregator.Researcher',
+        server_name='fetch', tool_name='fetch', agent_name='Researcher'),
+    record(5.5, "Completion request arguments:", llm),
+    record(5.5, "Chat in progress", llm, model='gpt-4o', agent_name='Researcher'),
+    record(6.5, "OpenAI ChatCompletion response:", llm),
+    record(6.5, "Chat finished", llm, model='gpt-4o'),
+    record(7.0, "Step execution complete: 1 successful, 0 failed", 'mcp_agent.workflows.deep_orchestrator.task_executor'),
+    record(7.5, "Updated observers", 'mcp_agent.finance', duration_secs=0.25, is_final=True),
+    record(8.0, "Replanning (attempt 1/2)"),
+    '{"truncated',
+]
+
+class TestLogLatencyTool(unittest.TestCase):
+    """
+    Test reconstructing spans from mcp_agent logs and reporting their latencies.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def spans(self, lines: list[str]) -> dict[SpanCategory, list[tuple[str, float]]]:
+        builder = SpanBuilder()
+        found = {}
+        for line in lines:
+            entry = json.loads(line)
+            timestamp = 1000 + float(entry['timestamp'][-9:])
+            for span in builder.add(timestamp, entry):
+                found.setdefault(span.category, []).append((span.name, span.duration_secs))
+        self.assertEqual(1, builder.finish())  # The replan never ended.
+        return found
+
+    def test_spans(self):
+        spans = self.spans(run_lines[:-1])
+        self.assertEqual([('planning', 2.0)], spans[SpanCategory.PLANNING])
+        self.assertEqual([('step', 5.0)], spans[SpanCategory.STEP])
+        self.assertEqual([('gpt-4o', 2.0), ('gpt-4o', 1.0)], spans[SpanCategory.LLM])
+        self.assertEqual([('fetch/fetch', 1.0)], spans[SpanCategory.TOOL])
+        self.assertEqual([('observers', 0.25)], spans[SpanCategory.OBSERVERS])
+        self.assertNotIn(SpanCategory.REPLAN, spans)
+
+    def test_server_startup_spans(self):
+        spans = self.spans([
+            record(1.5, "Started MCP server", 'mcp_agent.finance', server_name='fetch', status='ready', duration_secs=1.5),
+            record(3.0, "Started MCP server", 'mcp_agent.finance', server_name='excel_writer', status='ready', duration_secs=3.0),
+            record(3.0, "Replanning (attempt 1/2)"),
+        ])
+        self.assertEqual([('fetch', 1.5), ('excel_writer', 3.0)], spans[SpanCategory.SERVER_STARTUP])
+
+    def test_percentile(self):
+        self.assertEqual(2.5, percentile([1.0, 2.0, 3.0, 4.0], 50))
+        self.assertEqual(4.0, percentile([1.0, 2.0, 3.0, 4.0], 100))
+        self.assertEqual(1.0, percentile([1.0], 90))
+
+    def test_report_across_runs(self):
+        (self.dir / 'run1.jsonl').write_text('\n'.join(run_lines) + '\n')
+        with gzip.open(self.dir / 'run2.jsonl.gz', 'wt') as f:
+            f.write('\n'.join(run_lines[:2]) + '\n')
+        report = LatencyReport()
+        for path in sorted(self.dir.iterdir()):
+            report.add_log(path)
+        self.assertEqual(2, report.runs)
+        self.assertEqual(1, report.incomplete)
+        self.assertEqual([8.0, 2.0], report.wall_secs)
+        self.assertEqual([3.0, 0.0], report.run_totals[SpanCategory.LLM])
+        self.assertEqual([2.0, 2.0], report.durations[(SpanCategory.PLANNING, 'planning')])
+
+    def test_main(self):
+        (self.dir / 'run1.jsonl').write_text('\n'.join(run_lines) + '\n')
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            self.assertEqual(0, main([str(self.dir), '--percentiles', '50', '95']))
+            self.assertEqual(2, main([str(self.dir), '--percentiles', '101']))
+            self.assertEqual(1, main([str(self.dir / 'missing')]))
+        self.assertIn("Time per run (1 runs)", out.getvalue())
+        self.assertIn("p95 secs", out.getvalue())
+        self.assertIn("fetch/fetch", out.getvalue())
+        self.assertIn("1 spans never ended", out.getvalue())
+        self.assertIn("No log files found", err.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
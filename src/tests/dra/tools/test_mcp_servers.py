@@ -0,0 +1,67 @@
+# Unit tests for the "mcp_servers" CLI tool.
+
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from dra.tools.mcp_servers import default_configs, main, read_servers
+
+config = """
+mcp:
+  servers:
+    fetch:
+      command: "uvx"
+      args: ["mcp-server-fetch"]
+    medical-mcp:
+      command: "node"
+      args: ["index.js"]
+"""
+
+class TestMcpServersTool(unittest.TestCase):
+    """
+    Test the CLI that installs the MCP servers.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.config = self.dir / 'mcp_agent.config.yaml'
+        self.config.write_text(config)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *args: str) -> tuple[int, str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = main(['--dir', str(self.dir / 'servers')] + list(args))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_read_servers(self):
+        self.assertEqual({'fetch': ('uvx', ['mcp-server-fetch']), 'medical-mcp': ('node', ['index.js'])},
+            read_servers([self.config]))
+        other = self.dir / 'other.yaml'
+        other.write_text(config.replace('mcp-server-fetch', 'mcp-server-fetch@1.0'))
+        with self.assertRaises(ValueError):
+            read_servers([self.config, other])
+
+    def test_default_configs_define_the_apps_servers(self):
+        servers = read_servers(default_configs)
+        self.assertEqual(('uvx', ['yfmcp@latest']), servers['yfmcp'])
+        self.assertIn('filesystem', servers)
+
+    def test_main(self):
+        code, out, _ = self.run_main('install', '--config', str(self.config), '--servers', 'medical-mcp')
+        self.assertEqual(0, code)
+        self.assertIn("medical-mcp: not launched with uvx or npx, skipped.", out)
+        code, _, err = self.run_main('install', '--config', str(self.config), '--servers', 'nope')
+        self.assertEqual(2, code)
+        self.assertIn("['nope']", err)
+        code, out, _ = self.run_main('list')
+        self.assertEqual(0, code)
+        self.assertIn("Installed MCP servers", out)
+
+if __name__ == "__main__":
+    unittest.main()
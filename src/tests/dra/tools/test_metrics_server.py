@@ -0,0 +1,46 @@
+# Unit tests for the "metrics_server" MCP server.
+
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from dra.common.financial_store import FinancialDataStore, StatementKind
+from dra.tools.metrics_server import main, make_server, metrics_for
+
+class TestMetricsServer(unittest.TestCase):
+    """
+    Test the server that computes the derived metrics of the stored statements.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'financial_data.sqlite'
+        self.store = FinancialDataStore(self.path)
+        self.store.save('META', StatementKind.INCOME, 'annual', [
+            dict(report_period='2023-12-31', revenue=134_902e6, operating_income=46_751e6),
+            dict(report_period='2024-12-31', revenue=164_501e6, operating_income=69_380e6)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_metrics_for(self):
+        result = metrics_for(self.store, ['META', 'XYZ'])
+        self.assertEqual(164_501.0, result['META']['metrics']['revenue']['2024-12-31'])
+        self.assertEqual(21.94, result['META']['metrics']['revenue_growth_percent']['2024-12-31'])
+        self.assertIn("No annual income statements are stored for XYZ", result['XYZ']['error'])
+
+    def test_make_server(self):
+        self.assertEqual('financial-metrics', make_server(self.store).name)
+
+    def test_print(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = main(['--store', str(self.path), '--print', 'META'])
+        self.assertEqual(0, code)
+        self.assertIn("META derived metrics", out.getvalue())
+        self.assertIn("164,501.00", out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# Unit tests for the "profile_benchmark" CLI tool.
+
+import contextlib
+import io
+import unittest
+from types import SimpleNamespace
+
+from dra.tools.profile_benchmark import cost_of, main, price
+
+class TestProfileBenchmarkTool(unittest.TestCase):
+    """
+    Test the execution profile benchmark, replaying the fixtures shipped with the benchmarks.
+    """
+
+    def run_main(self, *args: str) -> tuple[int, str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = main(['--time-scale', '0'] + list(args))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_main_reports_each_profile(self):
+        code, out, err = self.run_main('--profiles', 'fast', 'thorough')
+        self.assertEqual(0, code, err)
+        self.assertIn("Execution profiles", out)
+        rows = [line for line in out.splitlines() if line.startswith('| fast') or line.startswith('| thorough')]
+        self.assertEqual(2, len(rows))
+        calls = [int(row.split('|')[4]) for row in rows]
+        self.assertLess(calls[0], calls[1])  # thorough replans, fast doesn't
+
+    def test_main_prices_each_profile_model_exactly(self):
+        """
+        Verify that each model is charged its own list price, e.g., gpt-4o isn't priced as
+        gpt-4o-mini, and that no row is flagged as priced by another model.
+        """
+        code, out, err = self.run_main()
+        self.assertEqual(0, code, err)
+        cells = [[c.strip() for c in line.split('|')[1:-1]] for line in out.splitlines()]
+        rows = {row[0]: row for row in cells if row and row[0] in ('fast', 'balanced', 'thorough')}
+        for name in ('fast', 'balanced', 'thorough'):
+            model, input_tokens, output_tokens, cost, priced_as = (rows[name][1],
+                int(rows[name][4]), int(rows[name][5]), float(rows[name][6]), rows[name][7])
+            self.assertAlmostEqual(price(model, input_tokens, output_tokens), cost, places=4)
+            self.assertEqual('', priced_as)
+        self.assertGreater(float(rows['balanced'][6]), 10 * float(rows['fast'][6]))
+
+    def test_cost_of_flags_models_without_a_list_price(self):
+        def usage(model_name: str, cost: float) -> SimpleNamespace:
+            return SimpleNamespace(model_name=model_name, cost=cost,
+                usage=SimpleNamespace(input_tokens=1_000_000, output_tokens=100_000))
+        summary = SimpleNamespace(model_usage={
+            'gpt-4o': usage('gpt-4o', 0.21),
+            'mystery': usage('mystery-model', 0.5)})
+        cost, names = cost_of(summary)
+        self.assertAlmostEqual(2.5 + 1.0 + 0.5, cost)
+        self.assertEqual(['gpt-4o', 'mystery-model (approx.)'], names)
+
+    def test_main_rejects_unknown_profiles(self):
+        code, _, err = self.run_main('--profiles', 'instant')
+        self.assertEqual(2, code)
+        self.assertIn("Unknown profiles", err)
+
+if __name__ == "__main__":
+    unittest.main()